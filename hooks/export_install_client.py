@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Any
+
+# workflows/ sits next to hooks/ in the BRS.
+CLIENT_SOURCE = Path(__file__).resolve().parents[1] / "workflows" / "export_client.py"
+
+
+def main(ctx: Any) -> Path:
+    """
+    Copy the shared export-engine client next to the rendered run.py, so the rendered
+    export directory runs on its own.
+    """
+    out_dir = Path(ctx.project_dir) / ctx.template.id if ctx.project else Path(ctx.cwd)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    target = out_dir / "export_client.py"
+    shutil.copyfile(CLIENT_SOURCE, target)
+    return target
@@ -8,14 +8,11 @@ import sys
 import threading
 import time
 from pathlib import Path
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
 
 from bpm.io.yamlio import safe_dump_yaml, safe_load_yaml
 
-
-POLL_INTERVAL_SECONDS = 2
-FINAL_MESSAGE_TIMEOUT_SECONDS = 3600
+# Copied next to this file from workflows/export_client.py by hooks/export_install_client.py.
+from export_client import ExportAPIError, ExportSession
 
 
 def _supports_color() -> bool:
@@ -149,19 +146,6 @@ def _strip_created_resources(value):
             _strip_created_resources(v)
 
 
-def _is_final_message_pending(exc: HTTPError, detail: str) -> bool:
-    """
-    Some export-engine deployments return 425 while others briefly return
-    404 {"detail":"Job not found"} before the final message is materialized.
-    Treat both as retryable pending states.
-    """
-    if exc.code == 425:
-        return True
-    if exc.code == 404 and "Job not found" in detail:
-        return True
-    return False
-
-
 def main() -> None:
     spec = Path("export_job_spec.json")
     if not spec.exists():
@@ -202,97 +186,54 @@ def main() -> None:
         raise SystemExit("export_engine_api_url not set in export template params")
 
     # Accept either base (http://host:port) or full endpoint (.../export) to avoid double suffix.
-    api_clean = api_url.rstrip("/")
-    export_endpoint = api_clean if api_clean.endswith("/export") else f"{api_clean}/export"
-    req = Request(
-        export_endpoint,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-
-    try:
-        def _post_request():
-            with urlopen(req, timeout=30) as resp:
-                return resp.read().decode("utf-8")
-
-        resp_body = _run_with_spinner(
-            "Submitting export job",
-            _post_request,
-        )
-    except HTTPError as exc:
-        detail = exc.read().decode("utf-8") if exc.fp else str(exc)
-        raise SystemExit(f"Export API request failed: {exc.code} {detail}")
-    except URLError as exc:
-        raise SystemExit(f"Export API request failed: {exc.reason}")
-
-    try:
-        response_json = json.loads(resp_body)
-    except json.JSONDecodeError as exc:
-        raise SystemExit(f"Export API returned non-JSON response: {exc}") from exc
-
-    job_id = response_json.get("job_id")
-    if not isinstance(job_id, str) or not job_id:
-        raise SystemExit("Export API response missing job_id")
-
-    _print_section("Export Request", BLUE)
-    _print_key_value("API endpoint", export_endpoint)
-    _print_key_value("Project", str(payload.get("project_name", "")))
-
-    export_dir = Path.cwd()
-    published = export_entry.get("published") or {}
-    published["export_job_id"] = job_id
-    published.pop("export_final_path", None)
-    published.pop("export_status", None)
-    published.pop("export_main_report", None)
-    export_entry["published"] = published
-    _strip_created_resources(export_entry)
-    safe_dump_yaml(project_path, project_data)
-
-    _print_section("Job Registered", GREEN)
-    _print_key_value("job_id", job_id, color=GREEN)
-    _print_key_value("project.yaml", str(project_path), color=GREEN)
-
-    final_endpoint = (
-        f"{api_clean}/final_message/{job_id}"
-        if api_clean.endswith("/export")
-        else f"{api_clean}/export/final_message/{job_id}"
-    )
-    final_req = Request(final_endpoint, method="GET")
-
-    def _wait_for_final_message():
-        start = time.monotonic()
-        while True:
-            if time.monotonic() - start > FINAL_MESSAGE_TIMEOUT_SECONDS:
-                raise TimeoutError(
-                    f"Timed out after {FINAL_MESSAGE_TIMEOUT_SECONDS}s waiting for final export status for job_id={job_id}"
-                )
-            try:
-                with urlopen(final_req, timeout=30) as resp:
-                    return json.loads(resp.read().decode("utf-8"))
-            except HTTPError as exc:
-                detail = exc.read().decode("utf-8") if exc.fp else str(exc)
-                if _is_final_message_pending(exc, detail):
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                raise RuntimeError(f"Unable to fetch final message: {exc.code} {detail}") from exc
-            except json.JSONDecodeError as exc:
-                raise RuntimeError(f"Final export message is not valid JSON: {exc}") from exc
-            except URLError as exc:
-                time.sleep(POLL_INTERVAL_SECONDS)
-                continue
-
-    try:
-        final_json = _run_with_spinner(
-            "Waiting for final export status",
-            _wait_for_final_message,
-        )
-    except KeyboardInterrupt:
-        raise SystemExit(
-            f"Interrupted while waiting for final export status. job_id={job_id} is already stored in project.yaml."
-        )
-    except Exception as exc:  # noqa: BLE001
-        raise SystemExit(str(exc)) from exc
+    with ExportSession(api_url) as session:
+        export_endpoint = session.client.export_endpoint
+        try:
+            response_json = _run_with_spinner(
+                "Submitting export job",
+                lambda: session.submit(payload),
+            )
+        except ExportAPIError as exc:
+            raise SystemExit(str(exc))
+        except json.JSONDecodeError as exc:
+            raise SystemExit(f"Export API returned non-JSON response: {exc}") from exc
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"Export API request failed: {exc}")
+
+        job_id = response_json.get("job_id")
+        if not isinstance(job_id, str) or not job_id:
+            raise SystemExit("Export API response missing job_id")
+
+        _print_section("Export Request", BLUE)
+        _print_key_value("API endpoint", export_endpoint)
+        _print_key_value("Project", str(payload.get("project_name", "")))
+
+        export_dir = Path.cwd()
+        published = export_entry.get("published") or {}
+        published["export_job_id"] = job_id
+        published.pop("export_final_path", None)
+        published.pop("export_status", None)
+        published.pop("export_main_report", None)
+        export_entry["published"] = published
+        _strip_created_resources(export_entry)
+        safe_dump_yaml(project_path, project_data)
+
+        _print_section("Job Registered", GREEN)
+        _print_key_value("job_id", job_id, color=GREEN)
+        _print_key_value("project.yaml", str(project_path), color=GREEN)
+
+        # Polls reuse the submit connection and back off while the engine reports the job pending.
+        try:
+            final_json = _run_with_spinner(
+                "Waiting for final export status",
+                lambda: session.wait_final(job_id),
+            )
+        except KeyboardInterrupt:
+            raise SystemExit(
+                f"Interrupted while waiting for final export status. job_id={job_id} is already stored in project.yaml."
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise SystemExit(str(exc)) from exc
 
     formatted_message = _strip_markdown_formatting((final_json.get("formatted_message") or "").strip())
     plain_message = (final_json.get("message") or "").strip()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+
+
+def _load_cleanup_module():
+    path = Path(__file__).resolve().parents[1] / "workflows" / "archive_cleanup" / "run.py"
+    spec = importlib.util.spec_from_file_location("archive_cleanup_run", path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_cleanup_except_patterns_keeps_preserved_files_and_prunes_empty_dirs(tmp_path: Path):
+    cleanup = _load_cleanup_module()
+    run_dir = tmp_path / "250101_A01742_0001_TEST"
+    (run_dir / "Project_A").mkdir(parents=True)
+    (run_dir / ".pixi" / "env" / "empty").mkdir(parents=True)
+    (run_dir / "Reports" / "html").mkdir(parents=True)
+    (run_dir / "Project_A" / "S1_R1.fastq.gz").write_bytes(b"x")
+    (run_dir / "Project_A" / "S1.md5").write_bytes(b"x")
+    (run_dir / ".pixi" / "env" / "lib.so").write_bytes(b"x")
+    (run_dir / "Reports" / "html" / "index.html").write_bytes(b"x")
+
+    assert cleanup._cleanup_except_patterns(run_dir, ["*.fastq.gz", ".pixi/"], dry_run=True) == (0, 0, "dry_run_only")
+    assert (run_dir / "Project_A" / "S1.md5").exists()
+
+    removed_files, removed_dirs, status = cleanup._cleanup_except_patterns(run_dir, ["*.fastq.gz", ".pixi/"], dry_run=False)
+
+    assert (removed_files, removed_dirs, status) == (2, 3, "done")
+    remaining = sorted(str(p.relative_to(run_dir)) for p in run_dir.rglob("*"))
+    assert remaining == [".pixi", ".pixi/env", ".pixi/env/lib.so", "Project_A", "Project_A/S1_R1.fastq.gz"]
+
+
+def test_cleanup_all_manifests_cleans_runs_in_parallel_and_journals_each(tmp_path: Path, monkeypatch):
+    cleanup = _load_cleanup_module()
+    raw_root = tmp_path / "raw"
+    manifest_dir = tmp_path / "manifests"
+    manifest_dir.mkdir()
+    for n, name in enumerate(("archive_rawdata_20250101_000000.json", "archive_rawdata_20250201_000000.json")):
+        records = []
+        for k in range(3):
+            run_dir = raw_root / "novaseq_A01742" / f"25010{n}_RUN{k}"
+            (run_dir / "Data").mkdir(parents=True)
+            (run_dir / "Data" / "x.bcl").write_bytes(b"x")
+            records.append(
+                {
+                    "run_id": run_dir.name,
+                    "status": "copied_verified",
+                    "copy_status": "ok",
+                    "verify_status": "ok",
+                    "cleanup_status": "done" if k == 2 else "pending_external_cleanup",
+                    "source": str(run_dir),
+                }
+            )
+        (manifest_dir / name).write_text(json.dumps({"created_at": f"2025-0{n + 1}-01", "records": records}), encoding="utf-8")
+    # A project archive manifest in the same directory belongs to archive_projects and stays untouched.
+    project_dir = raw_root / "novaseq_A01742" / "250102_PROJECT"
+    project_dir.mkdir(parents=True)
+    projects_manifest = manifest_dir / "archive_projects_20250301_000000.json"
+    projects_manifest.write_text(
+        json.dumps(
+            {
+                "created_at": "2025-03-01",
+                "records": [
+                    {
+                        "run_id": project_dir.name,
+                        "status": "copied_verified",
+                        "copy_status": "ok",
+                        "verify_status": "ok",
+                        "cleanup_status": "skipped_disabled",
+                        "source": str(project_dir),
+                    }
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+    projects_before = projects_manifest.read_bytes()
+    ctx = tmp_path / "ctx.json"
+    ctx.write_text(
+        json.dumps(
+            {
+                "params": {
+                    "manifest_dir": str(manifest_dir),
+                    "keep_rules_path": str(tmp_path / "keep.yaml"),
+                    "allowed_source_roots": str(raw_root),
+                    "all_manifests": True,
+                    "parallel_runs": 3,
+                    "non_interactive": True,
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("BPM_CTX_PATH", str(ctx))
+
+    cleanup.main()
+
+    remaining = sorted(p.name for p in (raw_root / "novaseq_A01742").iterdir())
+    assert remaining == ["250100_RUN2", "250101_RUN2", "250102_PROJECT"]
+    assert projects_manifest.read_bytes() == projects_before
+    assert not projects_manifest.with_suffix(".jsonl").exists()
+    for path in sorted(manifest_dir.glob("archive_rawdata_*.json")):
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        assert [rec["cleanup_status"] for rec in payload["records"]] == ["done", "done", "done"]
+        assert payload["cleanup_runs"][-1]["deleted"] == 2
+        journaled = [json.loads(line) for line in path.with_suffix(".jsonl").read_text(encoding="utf-8").splitlines()]
+        assert sorted(e["index"] for e in journaled if e.get("type") == "record") == [0, 1]
@@ -0,0 +1,793 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import itertools
+import json
+import os
+import shutil
+from pathlib import Path
+import sys
+import threading
+import time
+
+import pytest
+
+
+def _import_archive_common():
+    workflows_dir = Path(__file__).resolve().parents[1] / "workflows"
+    if str(workflows_dir) not in sys.path:
+        sys.path.insert(0, str(workflows_dir))
+    import archive_common  # type: ignore
+
+    return archive_common
+
+
+def test_run_batch_runs_concurrently_and_reports_on_caller_thread():
+    archive_common = _import_archive_common()
+    caller = threading.get_ident()
+    barrier = threading.Barrier(3, timeout=5)
+    seen: dict[int, str] = {}
+
+    def worker(item: str) -> str:
+        barrier.wait()
+        return item.upper()
+
+    def on_result(index: int, result: str) -> None:
+        assert threading.get_ident() == caller
+        seen[index] = result
+
+    archive_common.run_batch(["a", "b", "c"], worker, 3, on_result)
+
+    assert seen == {0: "A", 1: "B", 2: "C"}
+
+
+def test_run_batch_serial_keeps_order():
+    archive_common = _import_archive_common()
+    order: list[int] = []
+    archive_common.run_batch([1, 2, 3], lambda item: item * 2, 1, lambda index, result: order.append(result))
+    assert order == [2, 4, 6]
+
+
+def test_write_json_atomic_replaces_file_without_leftovers(tmp_path: Path):
+    archive_common = _import_archive_common()
+    target = tmp_path / "manifests" / "archive_fastq_20250101_000000.json"
+
+    archive_common.write_json_atomic(target, {"records": [1]})
+    archive_common.write_json_atomic(target, {"records": [1, 2]})
+
+    assert json.loads(target.read_text(encoding="utf-8")) == {"records": [1, 2]}
+    assert [p.name for p in target.parent.iterdir()] == [target.name]
+
+
+def test_scan_tree_single_pass_breakdown(tmp_path: Path):
+    archive_common = _import_archive_common()
+    run_dir = tmp_path / "250101_A01742_0001_TEST"
+    (run_dir / "work" / "aa").mkdir(parents=True)
+    (run_dir / "qc").mkdir()
+    (run_dir / "empty").mkdir()
+    (run_dir / "work" / "aa" / "tmp.bin").write_bytes(b"x" * 10)
+    (run_dir / "qc" / "report.html").write_bytes(b"x" * 5)
+    (run_dir / "qc" / "S1_R1.fastq.gz").write_bytes(b"x" * 7)
+    (run_dir / "samplesheet.csv").write_bytes(b"x" * 3)
+    (run_dir / "qc_link").symlink_to(run_dir / "qc", target_is_directory=True)
+
+    seen: list[tuple[str, int, str | None]] = []
+    scan = archive_common.scan_tree(
+        run_dir,
+        ["work", "*.fastq.gz"],
+        on_file=lambda rel, size, pat: seen.append((rel, size, pat)),
+    )
+
+    assert scan.total_bytes == 25
+    assert scan.archive_bytes == 8
+    assert scan.excluded_bytes == 17
+    assert scan.file_count == 4
+    assert scan.excluded_file_count == 2
+    assert scan.dir_count == 5
+    assert scan.by_pattern == {"work": 10, "*.fastq.gz": 7}
+    assert scan.top_level == {
+        "work/": [10, 0],
+        "qc/": [12, 5],
+        "empty/": [0, 0],
+        "samplesheet.csv": [3, 3],
+        "qc_link/": [0, 0],
+    }
+    assert sorted(seen) == [
+        ("qc/S1_R1.fastq.gz", 7, "*.fastq.gz"),
+        ("qc/report.html", 5, None),
+        ("samplesheet.csv", 3, None),
+        ("work/aa/tmp.bin", 10, "work"),
+    ]
+
+    caller = threading.get_ident()
+    threads: set[int] = set()
+    parallel = archive_common.scan_tree(
+        run_dir,
+        ["work", "*.fastq.gz"],
+        on_file=lambda rel, size, pat: threads.add(threading.get_ident()),
+        workers=4,
+    )
+    assert threads == {caller}
+    assert parallel.by_pattern == scan.by_pattern
+    assert parallel.top_level == scan.top_level
+    assert (parallel.total_bytes, parallel.file_count, parallel.dir_count) == (25, 4, 5)
+
+
+def test_top_n_keeps_largest_in_bounded_heap():
+    archive_common = _import_archive_common()
+    top = archive_common.TopN(3)
+    for size, name in [(5, "a"), (1, "b"), (9, "c"), (5, "d"), (7, "e"), (2, "f")]:
+        top.push(size, name)
+    assert top.items() == [(9, "c"), (7, "e"), (5, "a")]
+    assert len(top._heap) == 3
+    assert archive_common.TopN(0).items() == []
+
+
+def test_run_catalog_reuses_scan_until_run_folder_changes(tmp_path: Path, monkeypatch):
+    archive_common = _import_archive_common()
+    run_dir = tmp_path / "data" / "250101_A01742_0001_TEST"
+    run_dir.mkdir(parents=True)
+    (run_dir / "a.bin").write_bytes(b"x" * 4)
+    catalog_path = tmp_path / "manifests" / archive_common.CATALOG_FILENAME
+    scans: list[Path] = []
+    real_scan_tree = archive_common.scan_tree
+
+    def counting_scan_tree(root, exclude_patterns=(), on_file=None):
+        scans.append(root)
+        return real_scan_tree(root, exclude_patterns, on_file)
+
+    monkeypatch.setattr(archive_common, "scan_tree", counting_scan_tree)
+
+    first = archive_common.RunCatalog(catalog_path)
+    assert first.scan(run_dir, ["*.fastq.gz"]).total_bytes == 4
+    assert first.cached(run_dir, "project_id", lambda: "P1") == "P1"
+    first.close()
+
+    second = archive_common.RunCatalog(catalog_path)
+    assert second.scan(run_dir, ["*.fastq.gz"]).total_bytes == 4
+    assert second.cached(run_dir, "project_id", lambda: "P2") == "P1"
+    assert len(scans) == 1
+    second.close()
+
+    (run_dir / "b.bin").write_bytes(b"x" * 6)
+    third = archive_common.RunCatalog(catalog_path)
+    assert third.scan(run_dir, ["*.fastq.gz"]).total_bytes == 10
+    assert third.cached(run_dir, "project_id", lambda: "P2") == "P2"
+    assert len(scans) == 2
+    third.close()
+
+
+def test_run_catalog_refresh_sees_files_added_below_the_run_root(tmp_path: Path):
+    archive_common = _import_archive_common()
+    run_dir = tmp_path / "runs" / "250101_A01742_0001_TEST"
+    (run_dir / "Project_A").mkdir(parents=True)
+    (run_dir / "Project_A" / "S1_R1.fastq.gz").write_bytes(b"x" * 4)
+    catalog = archive_common.RunCatalog(tmp_path / "manifests" / archive_common.CATALOG_FILENAME)
+    assert catalog.scan(run_dir, ["*.fastq.gz"]).archive_bytes == 0
+
+    (run_dir / "Project_A" / "late.bin").write_bytes(b"x" * 6)
+    assert catalog.scan(run_dir, ["*.fastq.gz"]).archive_bytes == 0
+    assert catalog.scan(run_dir, ["*.fastq.gz"], refresh=True).archive_bytes == 6
+    catalog.close()
+
+
+def test_disabled_run_catalog_computes_directly(tmp_path: Path):
+    archive_common = _import_archive_common()
+    (tmp_path / "f").write_bytes(b"abc")
+    catalog = archive_common.open_run_catalog(tmp_path, enabled=False)
+    assert not catalog.enabled
+    assert catalog.scan(tmp_path).total_bytes == 3
+    assert catalog.cached(tmp_path, "owner", lambda: "alice") == "alice"
+
+
+def _reference_exclude(name: str, rel: str, parts: tuple[str, ...], patterns: list[str]) -> str | None:
+    for pat in patterns:
+        if fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(rel, pat):
+            return pat
+        if pat in parts:
+            return pat
+    return None
+
+
+def _reference_preserved(rel: str, patterns: list[str]) -> bool:
+    name = rel.rsplit("/", 1)[-1]
+    parts = tuple(rel.split("/"))
+    for pat in patterns:
+        cleaned = pat.strip().strip("/")
+        if not cleaned:
+            continue
+        if fnmatch.fnmatch(name, cleaned) or fnmatch.fnmatch(rel, cleaned):
+            return True
+        if all(ch not in cleaned for ch in "*?[]"):
+            if cleaned in parts or rel.startswith(cleaned + "/"):
+                return True
+        if fnmatch.fnmatch(rel, cleaned + "/*"):
+            return True
+    return False
+
+
+_PATTERN_POOL = ["work", "*.fastq.gz", "qc/*", ".pixi", "Data/Intensities", "*/tmp", "s?.bin", "[ab]*", " /logs/ ", ""]
+_REL_POOL = [
+    "work/a.bin",
+    "qc/x/S1.fastq.gz",
+    "qc/report.html",
+    "x/.pixi/env/lib.so",
+    "Data/Intensities/L001/c1.bcl",
+    "Data/Other/c1.bcl",
+    "a/tmp",
+    "a/tmp/b",
+    "s1.bin",
+    "deep/logs/run.log",
+    "bam/a.bam",
+    "work",
+]
+
+
+def test_exclude_matcher_matches_reference_semantics():
+    archive_common = _import_archive_common()
+    for size in (1, 2, 3):
+        for patterns in itertools.permutations(_PATTERN_POOL, size):
+            matcher = archive_common.ExcludeMatcher(list(patterns))
+            for rel in _REL_POOL:
+                parts = tuple(rel.split("/"))
+                expected = _reference_exclude(parts[-1], rel, parts, list(patterns))
+                assert matcher.match(parts[-1], rel, parts) == expected, (patterns, rel)
+
+
+def test_preserve_matcher_matches_reference_and_prunes_whole_subtrees():
+    archive_common = _import_archive_common()
+    for size in (1, 2, 3):
+        for patterns in itertools.combinations(_PATTERN_POOL, size):
+            matcher = archive_common.PreserveMatcher(list(patterns))
+            for rel in _REL_POOL:
+                assert matcher.matches(rel) == _reference_preserved(rel, list(patterns)), (patterns, rel)
+                parts = rel.split("/")
+                for depth in range(1, len(parts)):
+                    if matcher.covers_dir("/".join(parts[:depth])):
+                        assert _reference_preserved(rel, list(patterns)), (patterns, rel)
+
+
+def test_manifest_journal_replays_records_after_last_compaction(tmp_path: Path):
+    archive_common = _import_archive_common()
+    manifest_path = tmp_path / "archive_fastq_20250101_000000.json"
+    journal = archive_common.ManifestJournal(manifest_path, {"workflow_id": "archive_fastq"})
+    journal.append(1, {"run_id": "B"})
+    journal.append(0, {"run_id": "A"})
+    journal.close()
+
+    # Interrupted before compaction: only the journal exists.
+    assert not manifest_path.exists()
+    interrupted = archive_common.load_manifest(manifest_path.with_suffix(".jsonl"))
+    assert interrupted["workflow_id"] == "archive_fastq"
+    assert [rec["run_id"] for rec in interrupted["records"]] == ["A", "B"]
+
+    journal = archive_common.ManifestJournal(manifest_path)
+    payload = journal.compact(interrupted)
+    journal.append(1, {"run_id": "B", "cleanup_status": "done"})
+    journal.close()
+    with open(journal.path, "ab") as fh:
+        fh.write(b'{"type":"record","index":0,')  # torn final line
+
+    loaded = archive_common.load_manifest(manifest_path)
+    assert loaded["journal_offset"] == payload["journal_offset"]
+    assert loaded["records"] == [{"run_id": "A"}, {"run_id": "B", "cleanup_status": "done"}]
+
+
+def test_rsync_exclude_filter_follows_rsync_pattern_rules():
+    archive_common = _import_archive_common()
+    flt = archive_common.RsyncExcludeFilter(["work", "*.fastq.gz", "Data/Intensities", "/top", "logs/"])
+    assert flt.excluded("a/work", True)
+    assert flt.excluded("x/S1_R1.fastq.gz", False)
+    assert flt.excluded("run/Data/Intensities", True)
+    assert not flt.excluded("Data/Intensities2", True)
+    assert flt.excluded("top", False)
+    assert not flt.excluded("a/top", False)
+    assert flt.excluded("a/logs", True)
+    assert not flt.excluded("a/logs", False)
+    assert not flt.excluded("a/*.fastq.gz.md5", False)
+
+
+def test_verify_tree_hashes_files_and_reports_mismatches(tmp_path: Path):
+    archive_common = _import_archive_common()
+    source = tmp_path / "src"
+    target = tmp_path / "dst"
+    for root in (source, target):
+        (root / "qc").mkdir(parents=True)
+        (root / "qc" / "report.html").write_bytes(b"report")
+        (root / "samplesheet.csv").write_bytes(b"a,b")
+        (root / "link").symlink_to("qc/report.html")
+    (source / "work").mkdir()
+    (source / "work" / "tmp.bin").write_bytes(b"excluded")
+
+    ok = archive_common.verify_tree(source, target, ["work"], algorithm="sha256", workers=2)
+    assert ok.mismatches == []
+    assert ok.file_count == 2
+    assert ok.byte_count == 9
+    assert ok.digests["samplesheet.csv"] == hashlib.sha256(b"a,b").hexdigest()
+
+    (target / "samplesheet.csv").write_bytes(b"a,c")
+    (target / "extra.txt").write_bytes(b"x")
+    (target / "qc" / "report.html").unlink()
+    reported: list[str] = []
+    bad = archive_common.verify_tree(
+        source,
+        target,
+        ["work"],
+        check_extra=True,
+        on_mismatch=lambda rel, reason: reported.append(rel),
+    )
+    assert sorted(reported) == ["extra.txt", "qc/report.html", "samplesheet.csv"]
+    assert len(bad.mismatches) == 3
+
+
+def test_load_checkpoints_tracks_phases_and_resets_on_new_copy(tmp_path: Path):
+    archive_common = _import_archive_common()
+    manifest_path = tmp_path / "archive_projects_20250101_000000.json"
+    journal = archive_common.ManifestJournal(manifest_path, {"workflow_id": "archive_projects"})
+    journal.checkpoint("RUN_A", "copy_started")
+    journal.checkpoint("RUN_A", "copied")
+    journal.checkpoint("RUN_A", "verify_progress", digests={"a.txt": "d1"})
+    journal.checkpoint("RUN_A", "verified", details={"verify_file_count": 1})
+    journal.checkpoint("RUN_B", "copy_started")
+    journal.checkpoint("RUN_B", "copied")
+    journal.checkpoint("RUN_B", "copy_started")
+    journal.close()
+
+    state = archive_common.load_checkpoints(manifest_path)
+
+    assert state["RUN_A"]["phases"] == ["copy_started", "copied", "verified"]
+    assert state["RUN_A"]["digests"] == {"a.txt": "d1"}
+    assert state["RUN_A"]["details"]["verified"] == {"verify_file_count": 1}
+    assert state["RUN_B"]["phases"] == ["copy_started"]
+
+
+def test_verify_tree_reuses_resumed_digests_for_unchanged_files(tmp_path: Path, monkeypatch):
+    archive_common = _import_archive_common()
+    source = tmp_path / "src"
+    target = tmp_path / "dst"
+    for root in (source, target):
+        root.mkdir()
+        (root / "a.bin").write_bytes(b"aaaa")
+        (root / "b.bin").write_bytes(b"bbbb")
+        os.utime(root / "a.bin", ns=(1_000_000_000, 1_000_000_000))
+    hashed: list[str] = []
+    real_digest = archive_common.file_digest
+    monkeypatch.setattr(archive_common, "file_digest", lambda path, algorithm: hashed.append(Path(path).name) or real_digest(path, algorithm))
+    batches: list[dict[str, str]] = []
+
+    result = archive_common.verify_tree(source, target, verified={"a.bin": "cached"}, on_progress=batches.append)
+
+    assert result.mismatches == []
+    assert result.digests["a.bin"] == "cached"
+    assert sorted(hashed) == ["b.bin", "b.bin"]
+    assert batches == [{"b.bin": result.digests["b.bin"]}]
+
+
+def test_map_ordered_keeps_input_order_and_counts_progress():
+    archive_common = _import_archive_common()
+    items = list(range(40))
+    progress: list[tuple[int, int]] = []
+
+    def _slow_square(value: int) -> int:
+        time.sleep(0.001 * ((value * 7) % 5))
+        return value * value
+
+    results = archive_common.map_ordered(items, _slow_square, 8, lambda done, total, _item: progress.append((done, total)))
+
+    assert results == [value * value for value in items]
+    assert progress == [(done, len(items)) for done in range(1, len(items) + 1)]
+
+
+def test_transfer_scheduler_caps_streams_per_mount(tmp_path: Path):
+    archive_common = _import_archive_common()
+    assert archive_common.mount_key(Path("/mnt/nextgen2/archive/fastq/RUN"), ["/mnt/nextgen2", "/mnt/nextgen"]) == "/mnt/nextgen2"
+    scheduler = archive_common.TransferScheduler(
+        max_streams_per_mount=2, bwlimit_mbps_per_mount=100, parallel_runs=8, prefixes=["/mnt/a", "/mnt/b"]
+    )
+    assert scheduler.stream_bwlimit_kbps() == 100 * 1024 // 2
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def _copy(index: int) -> int | None:
+        nonlocal active, peak
+        with scheduler.slot(Path(f"/mnt/a/run{index}"), Path("/mnt/b/archive")) as bwlimit:
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+        return bwlimit
+
+    results = archive_common.map_ordered(list(range(8)), _copy, 8)
+
+    assert peak == 2
+    assert results == [51200] * 8
+
+
+def test_order_jobs():
+    archive_common = _import_archive_common()
+    jobs = [("a", 1, 30), ("b", 2, 10), ("c", 3, 30)]
+
+    assert archive_common.order_jobs(jobs, "oldest-first", lambda j: j[2], lambda j: j[1]) == jobs
+    assert [j[0] for j in archive_common.order_jobs(jobs, "largest-first", lambda j: j[2], lambda j: j[1])] == ["a", "c", "b"]
+
+
+def test_run_container_roundtrip_and_verify(tmp_path: Path):
+    archive_common = _import_archive_common()
+    source = tmp_path / "raw" / "250101_RUN"
+    (source / "InterOp").mkdir(parents=True)
+    for index in range(30):
+        (source / "InterOp" / f"tile{index}.bin").write_bytes(bytes([index]) * (index * 101))
+    (source / "RunInfo.xml").write_text("<RunInfo/>", encoding="utf-8")
+    (source / "RunInfo.link").symlink_to("RunInfo.xml")
+    container = archive_common.container_path(tmp_path / "archive", source.name, "tar")
+
+    written = archive_common.write_run_container(source, container)
+    result = archive_common.verify_container(container, source)
+
+    assert written.file_count == 31
+    assert result.file_count == 31 and result.mismatches == []
+    restored = archive_common.extract_container_member(container, "InterOp/tile17.bin", tmp_path / "restore.bin")
+    assert restored.read_bytes() == (source / "InterOp" / "tile17.bin").read_bytes()
+    names = [m["name"] for m in archive_common.read_container_index(container)["members"]]
+    assert "RunInfo.link" in names and "InterOp" in names
+
+    (source / "InterOp" / "tile3.bin").write_bytes(b"rewritten")
+    (source / "late.txt").write_text("x", encoding="utf-8")
+    mismatches = archive_common.verify_container(container, source).mismatches
+    assert any(m.startswith("InterOp/tile3.bin:") for m in mismatches)
+    assert any(m.startswith("late.txt:") for m in mismatches)
+
+
+def test_remove_tree_counts_and_never_follows_symlinks(tmp_path: Path):
+    archive_common = _import_archive_common()
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "keep.txt").write_text("x", encoding="utf-8")
+    run_dir = tmp_path / "250101_RUN"
+    for lane in range(3):
+        lane_dir = run_dir / "Data" / f"L00{lane}"
+        lane_dir.mkdir(parents=True)
+        for tile in range(100):
+            (lane_dir / f"s_{tile}.bcl").write_bytes(b"x")
+    (run_dir / "outside_link").symlink_to(outside)
+    (tmp_path / "run_link").symlink_to(run_dir)
+
+    with pytest.raises(OSError):
+        archive_common.remove_tree(tmp_path / "run_link")
+    removed = archive_common.remove_tree(run_dir, workers=4)
+
+    assert (removed.file_count, removed.link_count, removed.dir_count) == (300, 1, 5)
+    assert not run_dir.exists()
+    assert (outside / "keep.txt").exists()
+
+
+def test_keep_rules_store_imports_yaml_and_applies_concurrent_updates(tmp_path: Path):
+    archive_common = _import_archive_common()
+    import yaml
+
+    rules_path = tmp_path / "keep_rules.yaml"
+    rules_path.write_text(
+        "schema_version: 1\nruns:\n"
+        "  250101_A: {keep: true, set_by: a, keep_until: null}\n"
+        "  250102_B: {keep: true, keep_until: 2000-01-01}\n"
+        "  250103_C: {keep: false}\n",
+        encoding="utf-8",
+    )
+    store = archive_common.KeepRulesStore(rules_path)
+    assert store.active() == ({"250101_A"}, [])
+    assert store.get("250101_A")["set_by"] == "a"
+    assert store.db_path.exists()
+
+    def _add(run_id: str) -> None:
+        archive_common.update_rules(rules_path, {run_id: archive_common.keep_rule_record("u", "t", None)})
+
+    threads = [threading.Thread(target=_add, args=(f"2502{i:02d}_X",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert archive_common.update_rules(rules_path, {"250101_A": None, "missing": None}) == 1
+    exported = yaml.safe_load(rules_path.read_text(encoding="utf-8"))
+    assert sorted(exported["runs"]) == ["250102_B", "250103_C"] + [f"2502{i:02d}_X" for i in range(8)]
+
+    # A hand edit of the YAML wins over the index on the next access.
+    exported["runs"] = {"250301_Z": {"keep": True}}
+    rules_path.write_text(yaml.safe_dump(exported), encoding="utf-8")
+    assert archive_common.load_active_keep_runs(rules_path) == ({"250301_Z"}, [])
+
+    # A broken edit keeps the last imported rules in force for readers, but blocks writers.
+    rules_path.write_text("runs: [", encoding="utf-8")
+    active, notes = archive_common.load_active_keep_runs(rules_path)
+    assert active == {"250301_Z"} and "using last imported" in notes[0]
+    with pytest.raises(SystemExit):
+        _add("250401_Q")
+
+
+def test_keep_rule_updates_only_touches_changed_rows():
+    archive_common = _import_archive_common()
+    existing = {
+        "A": {"keep": True, "keep_until": None},
+        "B": {"keep": True, "keep_until": "2030-01-01"},
+        "C": {"keep": True},
+    }
+    marked = {"A": True, "B": True, "C": False, "D": True, "E": False}
+    keep_until = {"B": "2031-01-01"}
+    updates = archive_common.keep_rule_updates(existing, marked, keep_until, user="u")
+    assert sorted(updates) == ["B", "C", "D"]
+    assert updates["C"] is None
+    assert updates["B"]["keep_until"] == "2031-01-01" and updates["B"]["set_by"] == "u"
+
+
+def test_run_info_loader_fills_details_in_background_visible_rows_first(tmp_path: Path, monkeypatch):
+    archive_common = _import_archive_common()
+    root = tmp_path / "fastq"
+    for i in range(12):
+        run = root / ("instr" if i % 2 else "") / f"2501{i:02d}_RUN"
+        run.mkdir(parents=True)
+        (run / "data.bin").write_bytes(b"x" * (i + 1))
+    folders, notes = archive_common.list_run_folders([root, tmp_path / "missing"])
+    assert sorted(folders) == [f"2501{i:02d}_RUN" for i in range(12)]
+    assert len(notes) == 1
+
+    order: list[str] = []
+    gate = threading.Event()
+    real_build = archive_common.build_run_folder_info
+
+    def _build(run_id, path, catalog=None):
+        gate.wait(5)
+        order.append(run_id)
+        return real_build(run_id, path, catalog)
+
+    monkeypatch.setattr(archive_common, "build_run_folder_info", _build)
+    loader = archive_common.RunInfoLoader(folders, workers=1)
+    loader.prioritize(["250111_RUN", "250110_RUN"])
+    gate.set()
+    assert loader.wait(5)
+    loader.close()
+    # The first backlog item may already be claimed; the visible rows come right after it.
+    assert order[1:3] == ["250111_RUN", "250110_RUN"] or order[:2] == ["250111_RUN", "250110_RUN"]
+    assert loader.done == 12
+    assert loader.size("250105_RUN") == 6
+    assert loader.get("250105_RUN").path == folders["250105_RUN"]
+
+
+def test_run_info_loader_survives_runs_that_fail_to_load(tmp_path: Path, monkeypatch):
+    archive_common = _import_archive_common()
+    folders = {}
+    for name in ("250101_RUN", "250102_RUN", "250103_RUN"):
+        (tmp_path / name).mkdir()
+        folders[name] = tmp_path / name
+    real_build = archive_common.build_run_folder_info
+
+    def _build(run_id, path, catalog=None):
+        if run_id == "250101_RUN":
+            raise ValueError("unparsable RunInfo.xml")
+        return real_build(run_id, path, catalog)
+
+    monkeypatch.setattr(archive_common, "build_run_folder_info", _build)
+    loader = archive_common.RunInfoLoader(folders, workers=1)
+    assert loader.wait(5)
+    loader.close()
+    assert loader.get("250101_RUN").owner == "-"
+    assert loader.size("250101_RUN") is None
+    assert loader.size("250103_RUN") == 0
+
+
+def test_run_rsync_streams_progress_and_keeps_bounded_tail(tmp_path: Path):
+    archive_common = _import_archive_common()
+    script = tmp_path / "fake_rsync.py"
+    script.write_text(
+        "import sys\n"
+        "for i in range(50):\n"
+        "    sys.stdout.write(f'{i * 1000:>12,}  {i * 2}%   1.50MB/s    0:01:{i:02d}\\r')\n"
+        "    print(f'file{i}')\n"
+        "sys.stdout.write('      2.00G 100%  120.00MB/s    0:00:00 (xfr#50, to-chk=0/50)\\n')\n"
+        "print('boom', file=sys.stderr)\n"
+        "sys.exit(23)\n",
+        encoding="utf-8",
+    )
+    seen: list = []
+    result = archive_common.run_rsync([sys.executable, str(script)], on_progress=seen.append, tail_lines=5)
+    assert result.returncode == 23
+    assert len(seen) == 51
+    assert seen[10].bytes_done == 10000 and seen[10].percent == 20 and seen[10].eta_seconds == 70
+    assert seen[10].rate_bps == 1_500_000
+    assert result.bytes_done == 2_000_000_000 and result.peak_rate_bps == 120_000_000
+    assert result.summary.endswith("(xfr#50, to-chk=0/50)")
+    assert result.output_tail == [f"file{i}" for i in range(45, 50)]
+    assert result.completed().stderr == "boom"
+    assert set(result.stats()) == {"copy_backend", "copy_bytes", "copy_seconds", "copy_rate_bps", "copy_peak_rate_bps"}
+    assert archive_common.parse_rsync_progress("sent 3 bytes  received 5 bytes") is None
+
+
+def test_native_copy_tree_copies_excludes_and_skips_unchanged_files(tmp_path: Path):
+    archive_common = _import_archive_common()
+    src = tmp_path / "src" / "RUN"
+    (src / "sub").mkdir(parents=True)
+    (src / "work").mkdir()
+    (src / "a.txt").write_text("alpha")
+    (src / "sub" / "b.bin").write_bytes(os.urandom(200_000))
+    (src / "work" / "tmp.txt").write_text("scratch")
+    (src / "link").symlink_to("a.txt")
+    os.utime(src / "a.txt", ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+    dst = tmp_path / "dst" / "RUN"
+    (tmp_path / "dst").mkdir()
+
+    assert archive_common.native_copy_reason(src, tmp_path / "dst") == "same filesystem"
+
+    first = archive_common.native_copy_tree(src, dst, ["work"], workers=2)
+    assert (first.file_count, first.skipped_count, first.link_count) == (2, 0, 1)
+    assert first.bytes_done == 200_005
+    assert (dst / "sub" / "b.bin").read_bytes() == (src / "sub" / "b.bin").read_bytes()
+    assert os.readlink(dst / "link") == "a.txt"
+    assert not (dst / "work").exists()
+    assert (dst / "a.txt").stat().st_mtime_ns == 1_600_000_000_000_000_000
+    assert first.stats()["copy_backend"] == "native"
+
+    (src / "a.txt").write_text("alpha2")
+    second = archive_common.native_copy_tree(src, dst, ["work"])
+    assert (second.file_count, second.skipped_count) == (1, 1)
+    assert (dst / "a.txt").read_text() == "alpha2"
+    assert not [p for p in dst.rglob("*") if p.name.startswith(".") and p.is_file()]
+
+
+def test_shard_files_balances_sizes_and_copy_shards_finalizes_only_on_success(tmp_path: Path):
+    archive_common = _import_archive_common()
+    src = tmp_path / "RUN"
+    (src / "lane1").mkdir(parents=True)
+    (src / "work").mkdir()
+    for name, size in [("lane1/a.fastq.gz", 900), ("lane1/b.fastq.gz", 500), ("c.txt", 400), ("d.txt", 10)]:
+        (src / name).write_bytes(b"x" * size)
+    (src / "work" / "skip.txt").write_text("excluded")
+
+    files = archive_common.list_copy_files(src, ["work"])
+    assert sorted(files) == [("c.txt", 400), ("d.txt", 10), ("lane1/a.fastq.gz", 900), ("lane1/b.fastq.gz", 500)]
+    shards = archive_common.shard_files(files, 2)
+    assert [shard.files for shard in shards] == [["d.txt", "lane1/a.fastq.gz"], ["c.txt", "lane1/b.fastq.gz"]]
+    assert [shard.size_bytes for shard in shards] == [910, 900]
+    assert len(archive_common.shard_files(files[:1], 8)) == 1
+
+    seen: list[list[str]] = []
+    finalized: list[bool] = []
+
+    def _copy_one(shard, files_from: Path):
+        names = [os.fsdecode(n) for n in files_from.read_bytes().split(b"\0") if n]
+        seen.append(names)
+        if "c.txt" in names:
+            raise RuntimeError("disk full")
+        return names
+
+    with pytest.raises(RuntimeError, match="1 of 2 copy shards failed"):
+        archive_common.copy_shards(tmp_path / "dst", shards, _copy_one, lambda: finalized.append(True))
+    assert not finalized
+    assert sorted(seen) == sorted(shard.files for shard in shards)
+    assert (tmp_path / "dst" / "lane1").is_dir()
+
+    copy = archive_common.copy_shards(
+        tmp_path / "dst", shards[:1], lambda shard, files_from: None, lambda: finalized.append(True)
+    )
+    assert finalized == [True]
+    assert copy.results == [None]
+
+
+def test_reverify_fingerprints_rehashes_only_changed_files(tmp_path: Path):
+    archive_common = _import_archive_common()
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.txt").write_text("alpha")
+    (src / "sub" / "b.txt").write_text("beta")
+    shutil.copytree(src, dst)
+    verified = archive_common.verify_tree(src, dst)
+    assert set(verified.file_stats) == {"a.txt", "sub/b.txt"}
+    assert verified.file_stats["a.txt"] == [5, (dst / "a.txt").stat().st_mtime_ns]
+
+    manifest = tmp_path / "m" / "archive_fastq_1.json"
+    record = {
+        "run_id": "RUN",
+        "target": str(dst),
+        "verify_status": "ok",
+        "verify_algorithm": "blake2b",
+        "verify_digests": verified.digests,
+        "verify_file_stats": verified.file_stats,
+    }
+    journal = archive_common.ManifestJournal(manifest, {"workflow_id": "archive_fastq"})
+    journal.append(0, record)
+    journal.close()
+    catalog = archive_common.open_run_catalog(tmp_path / "m")
+    catalog.record_verified(dst, manifest, 0)
+    pointer = catalog.verified_record(dst)
+    assert pointer == (manifest, 0)
+    stored = archive_common.load_verified_record(*pointer, dst)
+    assert stored is not None and archive_common.load_verified_record(manifest, 0, src) is None
+    table = archive_common.fingerprint_table(stored)
+
+    unchanged = archive_common.reverify_fingerprints(dst, table)
+    assert (unchanged.unchanged_count, unchanged.rehashed_count, unchanged.mismatches) == (2, 0, [])
+
+    os.utime(dst / "a.txt", ns=(0, 1_000_000_000))
+    assert archive_common.unchanged_digests(dst, table) == {"sub/b.txt": verified.digests["sub/b.txt"]}
+    touched = archive_common.reverify_fingerprints(dst, table)
+    assert (touched.unchanged_count, touched.rehashed_count, touched.mismatches) == (1, 1, [])
+    assert touched.file_stats["a.txt"] == [5, 1_000_000_000]
+
+    (dst / "sub" / "b.txt").write_text("BETA")
+    broken = archive_common.reverify_fingerprints(dst, table)
+    assert broken.mismatches == [
+        f"sub/b.txt: blake2b differs (recorded {verified.digests['sub/b.txt']}, "
+        f"target {archive_common.file_digest(dst / 'sub' / 'b.txt')})"
+    ]
+    catalog.close()
+
+
+def test_dedup_run_hardlinks_files_archived_by_earlier_runs(tmp_path: Path):
+    archive_common = _import_archive_common()
+    payload = os.urandom(4096)
+    archived = tmp_path / "archive" / "RUN1"
+    (archived / "lane").mkdir(parents=True)
+    (archived / "lane" / "big.bam").write_bytes(payload)
+    (archived / "lane" / "other.bam").write_bytes(os.urandom(4096))
+    verified = archive_common.verify_tree(archived, archived)
+    record = {"verify_algorithm": "blake2b", "verify_digests": verified.digests, "verify_file_stats": verified.file_stats}
+    catalog = archive_common.open_run_catalog(tmp_path / "m")
+    assert archive_common.index_archived_files(catalog, archived, record, min_bytes=1024) == 2
+
+    source = tmp_path / "src" / "RUN2"
+    (source / "out").mkdir(parents=True)
+    (source / "out" / "copy.bam").write_bytes(payload)
+    (source / "out" / "near.bam").write_bytes(payload[:-1] + bytes([payload[-1] ^ 1]))
+    (source / "small.txt").write_text("small")
+    target = tmp_path / "archive" / "RUN2"
+
+    dedup = archive_common.dedup_run(catalog, source, target, min_bytes=1024)
+    assert dedup.links == {"out/copy.bam": str(archived / "lane" / "big.bam")}
+    assert dedup.bytes_saved == 4096
+    assert (target / "out" / "copy.bam").stat().st_ino == (archived / "lane" / "big.bam").stat().st_ino
+    assert not (target / "out" / "near.bam").exists()
+    assert dedup.excludes() == ["/out/copy.bam"]
+    assert sorted(archive_common.list_copy_files(source, dedup.excludes())) == [("out/near.bam", 4096), ("small.txt", 5)]
+
+    # A rerun recognizes its own links; a changed archive file is dropped from the index.
+    assert archive_common.dedup_run(catalog, source, target, min_bytes=1024).links == dedup.links
+    os.utime(archived / "lane" / "big.bam", ns=(0, 1_000_000_000))
+    assert archive_common.dedup_run(catalog, source, tmp_path / "archive" / "RUN3", min_bytes=1024).links == {}
+    matches = catalog.content_matches(4096, (archived / "lane").stat().st_dev)
+    assert [row[0] for row in matches] == [str(archived / "lane" / "other.bam")]
+    catalog.close()
+
+
+def test_manifest_index_refreshes_incrementally_and_queries_across_manifests(tmp_path: Path):
+    archive_common = _import_archive_common()
+
+    def write(name: str, created_at: str, records: list[dict], dry_run: bool = False) -> Path:
+        path = tmp_path / name
+        path.write_text(json.dumps({"created_at": created_at, "dry_run": dry_run, "records": records}), encoding="utf-8")
+        return path
+
+    first = write("archive_fastq_20250101_000000.json", "2025-01-01T00:00:00", [{"run_id": "RUN_A", "status": "copied_verified"}])
+    write("archive_rawdata_20250201_000000.json", "2025-02-01T00:00:00", [{"run_id": "RUN_B", "status": "failed", "size_bytes": 7}])
+    write("archive_fastq_20250301_000000.json", "2025-03-01T00:00:00", [{"run_id": "RUN_C", "status": "dry_run_only"}], dry_run=True)
+    (tmp_path / "archive_daemon.status.json").write_text("{}", encoding="utf-8")
+
+    index = archive_common.open_manifest_index(tmp_path)
+    refresh = index.refresh(tmp_path)
+    assert (refresh.indexed, refresh.unchanged, refresh.removed) == (3, 0, 0)
+    assert [row["run_id"] for row in index.query()] == ["RUN_A", "RUN_B"]
+    assert [row["run_id"] for row in index.query(include_dry_run=True, since="2025-02")] == ["RUN_B", "RUN_C"]
+    assert [row["workflow"] for row in index.query(run_id="RUN_[AB]")] == ["archive_fastq", "archive_rawdata"]
+    assert index.query(until="2025-01-01")[0]["manifest"] == str(first)
+
+    # A journal appended after compaction makes the manifest re-indexed; untouched ones are not re-read.
+    journal = archive_common.ManifestJournal(first)
+    journal.append(0, {"run_id": "RUN_A", "status": "copied_verified", "cleanup_status": "done"})
+    journal.close()
+    (tmp_path / "archive_rawdata_20250201_000000.json").unlink()
+    refresh = index.refresh(tmp_path)
+    assert (refresh.indexed, refresh.unchanged, refresh.removed) == (1, 1, 1)
+    assert [row["cleanup_status"] for row in index.query(workflow="archive_fastq")] == ["done"]
+    assert index.counts() == (2, 2)
+    index.close()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+
+def _load_archive_container_module():
+    path = Path(__file__).resolve().parents[1] / "workflows" / "archive_container" / "run.py"
+    spec = importlib.util.spec_from_file_location("archive_container_run", path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def _write_ctx(tmp_path: Path, monkeypatch, params: dict) -> None:
+    ctx_path = tmp_path / "ctx.json"
+    ctx_path.write_text(json.dumps({"params": params}))
+    monkeypatch.setenv("BPM_CTX_PATH", str(ctx_path))
+
+
+def test_lists_and_extracts_one_member(tmp_path: Path, monkeypatch, capsys):
+    module = _load_archive_container_module()
+    archive_common = sys.modules["archive_common"]
+    source = tmp_path / "src" / "RUN1"
+    (source / "InterOp").mkdir(parents=True)
+    (source / "RunInfo.xml").write_text("<RunInfo/>")
+    (source / "InterOp" / "tile17.bin").write_bytes(b"\x01" * 2048)
+    container = archive_common.container_path(tmp_path / "archive", source.name, "tar")
+    archive_common.write_run_container(source, container)
+
+    _write_ctx(tmp_path, monkeypatch, {"container": str(container)})
+    module.main()
+    listing = capsys.readouterr().out
+    assert "RunInfo.xml" in listing
+    assert "InterOp/tile17.bin" in listing
+
+    dest = tmp_path / "restore" / "RunInfo.xml"
+    _write_ctx(
+        tmp_path,
+        monkeypatch,
+        {"action": "extract", "container": str(container), "member": "RunInfo.xml", "dest": str(dest)},
+    )
+    module.main()
+    assert dest.read_text() == "<RunInfo/>"
+
+    _write_ctx(
+        tmp_path,
+        monkeypatch,
+        {"action": "extract", "container": str(container), "member": "missing.txt", "dest": str(dest)},
+    )
+    with pytest.raises(SystemExit, match="ERROR: "):
+        module.main()
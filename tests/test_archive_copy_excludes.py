@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+from datetime import date
+from pathlib import Path
+import sys
+
+import pytest
+
+
+def _load_workflow_module(workflow: str):
+    path = Path(__file__).resolve().parents[1] / "workflows" / workflow / "run.py"
+    name = f"{workflow}_run"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _transferred(cmd: list[str], source: Path, archive_common) -> list[str]:
+    # Applies the command's --exclude rules to the paths rsync sees relative to its transfer
+    # root: SRC/ transfers "rel", SRC (no slash) transfers "<basename>/rel".
+    patterns = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "--exclude"]
+    src_arg = cmd[-2]
+    prefix = "" if src_arg.endswith("/") else Path(src_arg).name + "/"
+    rules = archive_common.RsyncExcludeFilter(patterns)
+    return sorted(rel for rel, _ in archive_common.list_copy_files(source) if not rules.excluded(prefix + rel, False))
+
+
+@pytest.mark.parametrize("workflow", ["archive_fastq", "archive_projects"])
+def test_rsync_copy_excludes_dedup_links_on_every_copy_path(tmp_path: Path, monkeypatch, workflow: str):
+    module = _load_workflow_module(workflow)
+    archive_common = sys.modules["archive_common"]
+    payload = os.urandom(4096)
+    archived = tmp_path / "archive" / "RUN1"
+    archived.mkdir(parents=True)
+    (archived / "big.bam").write_bytes(payload)
+    verified = archive_common.verify_tree(archived, archived)
+    record = {"verify_algorithm": "blake2b", "verify_digests": verified.digests, "verify_file_stats": verified.file_stats}
+    catalog = archive_common.open_run_catalog(tmp_path / "m")
+    archive_common.index_archived_files(catalog, archived, record, min_bytes=1024)
+
+    source = tmp_path / "src" / "RUN2"
+    (source / "out").mkdir(parents=True)
+    (source / "out" / "copy.bam").write_bytes(payload)
+    (source / "small.txt").write_text("small")
+    candidate = module.RunCandidate(
+        run_id="RUN2",
+        owner_user="owner",
+        project_id=None,
+        run_date=date(2025, 1, 1),
+        retention_reference_date=date(2025, 1, 1),
+        retention_reference_source="run_date",
+        source_path=source,
+        target_instrument_path=tmp_path / "archive",
+        target_run_path=tmp_path / "archive" / "RUN2",
+        total_size_bytes=0,
+        archive_size_bytes=0,
+    )
+    dedup = archive_common.dedup_run(catalog, source, candidate.target_run_path, min_bytes=1024)
+    assert dedup.links == {"out/copy.bam": str(archived / "big.bam")}
+    catalog.close()
+
+    commands: list[list[str]] = []
+    monkeypatch.setattr(module, "_run_rsync", lambda cmd, label, live=False: commands.append(cmd))
+    module._rsync_copy(candidate, dedup.excludes())
+    module._rsync_copy(candidate, dedup.excludes(), files_from=tmp_path / "shard.list")
+
+    for cmd in commands:
+        assert cmd[-1] == f"{candidate.target_run_path}/"
+        assert _transferred(cmd, source, archive_common) == ["small.txt"]
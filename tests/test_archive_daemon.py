@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import importlib.util
+import time
+from pathlib import Path
+
+
+def _load_daemon_module():
+    path = Path(__file__).resolve().parents[1] / "workflows" / "archive_daemon" / "run.py"
+    spec = importlib.util.spec_from_file_location("archive_daemon_run", path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_work_queue_sync_order_and_restart(tmp_path: Path):
+    daemon = _load_daemon_module()
+    queue = daemon.WorkQueue(tmp_path / "queue.sqlite")
+
+    assert queue.sync("archive_fastq", {"RUN_A": 10, "RUN_B": 20}) == (2, 0)
+    job = queue.next_job(time.time())
+    assert job["run_id"] == "RUN_A"
+    queue.start(job)
+    queue.finish(job, "done", copy_bytes=10, copy_seconds=2.0)
+
+    # Done runs are not re-queued; pending runs that left the plan are dropped.
+    assert queue.sync("archive_fastq", {"RUN_A": 10, "RUN_C": 30}) == (1, 1)
+    job = queue.next_job(time.time())
+    assert job["run_id"] == "RUN_C"
+    queue.defer(job, time.time() + 60, "lock held")
+    assert queue.next_job(time.time()) is None
+
+    queue.start(job)
+    queue.close()
+    reopened = daemon.WorkQueue(tmp_path / "queue.sqlite")
+    assert reopened.counts() == {"done": 1, "pending": 1}
+    assert reopened.throughput(0) == (10, 2.0, 1)
+    reopened.close()
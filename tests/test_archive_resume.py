@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import importlib.util
+from datetime import date
+from pathlib import Path
+import sys
+
+import pytest
+
+
+def _load_workflow_module(workflow: str):
+    path = Path(__file__).resolve().parents[1] / "workflows" / workflow / "run.py"
+    name = f"{workflow}_run"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("workflow", ["archive_fastq", "archive_projects"])
+def test_run_resumed_after_verification_keeps_fingerprints_and_enters_dedup_index(tmp_path: Path, monkeypatch, workflow: str):
+    module = _load_workflow_module(workflow)
+    archive_common = sys.modules["archive_common"]
+    source = tmp_path / "src" / "RUN1"
+    target = tmp_path / "archive" / "RUN1"
+    for root in (source, target):
+        (root / "lane").mkdir(parents=True)
+        (root / "lane" / "big.bam").write_bytes(b"x" * 4096)
+    verified = archive_common.verify_tree(source, target)
+
+    # An interrupted batch that had already verified RUN1.
+    manifest = tmp_path / "m" / f"{workflow}_20250101_000000.json"
+    journal = archive_common.ManifestJournal(manifest, {"workflow_id": workflow})
+    journal.checkpoint("RUN1", "copy_started")
+    journal.checkpoint("RUN1", "copied")
+    journal.checkpoint(
+        "RUN1",
+        "verified",
+        details={"verify_mode": "checksum", "verify_algorithm": "blake2b"},
+        digests=verified.digests,
+        file_stats=verified.file_stats,
+    )
+    journal.close()
+
+    catalog = archive_common.open_run_catalog(tmp_path / "m")
+    real_index = module._shared_index_archived_files
+    monkeypatch.setattr(
+        module, "_shared_index_archived_files", lambda catalog, target, record: real_index(catalog, target, record, min_bytes=1)
+    )
+    settings = module.BatchSettings(
+        source_root=tmp_path / "src",
+        exclude_patterns=[],
+        cleanup_requested=False,
+        dry_run=False,
+        log_path=tmp_path / "archive.log",
+        verify_mode="checksum",
+        verify_algorithm="blake2b",
+        checkpoints=archive_common.load_checkpoints(manifest),
+        catalog=catalog,
+        dedup=True,
+    )
+    candidate = module.RunCandidate(
+        run_id="RUN1",
+        owner_user="owner",
+        project_id=None,
+        run_date=date(2025, 1, 1),
+        retention_reference_date=date(2025, 1, 1),
+        retention_reference_source="run_date",
+        source_path=source,
+        target_instrument_path=target.parent,
+        target_run_path=target,
+        total_size_bytes=4096,
+        archive_size_bytes=4096,
+    )
+
+    rec = module._process_candidate(candidate, settings)
+
+    assert rec["status"] == "copied_verified"
+    assert archive_common.fingerprint_table(rec) == archive_common.fingerprint_table(
+        {"verify_digests": verified.digests, "verify_file_stats": verified.file_stats}
+    )
+    matches = catalog.content_matches(4096, target.stat().st_dev)
+    assert [row[0] for row in matches] == [str(target / "lane" / "big.bam")]
+    catalog.close()
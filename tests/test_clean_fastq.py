@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+from pathlib import Path
+import sys
+
+
+def _load_clean_fastq_module():
+    path = Path(__file__).resolve().parents[1] / "workflows" / "clean_fastq" / "run.py"
+    spec = importlib.util.spec_from_file_location("clean_fastq_run", path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    # dataclasses resolve string annotations through sys.modules.
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _reference_targets(run_dir: Path, patterns: list[str]) -> tuple[set[Path], int]:
+    # Previous implementation: one rglob per pattern, then drop nested matches.
+    raw = {p for pat in patterns for p in run_dir.rglob(pat) if p != run_dir}
+    minimized: list[Path] = []
+    for p in sorted(raw, key=lambda x: len(x.parts)):
+        if not any(p.is_relative_to(parent) for parent in minimized):
+            minimized.append(p)
+    size = 0
+    for target in minimized:
+        if target.is_symlink() or target.is_file():
+            size += target.lstat().st_size
+            continue
+        for root, dirs, files in os.walk(target):
+            size += sum((Path(root) / d).lstat().st_size for d in dirs if (Path(root) / d).is_symlink())
+            size += sum((Path(root) / f).lstat().st_size for f in files)
+    return set(minimized), size
+
+
+def test_scan_clean_targets_matches_per_pattern_rglob(tmp_path: Path):
+    clean_fastq = _load_clean_fastq_module()
+    run_dir = tmp_path / "250101_A01742_0001_TEST"
+    files = {
+        "Project_A/S1_R1.fastq.gz": 10,
+        "Project_A/S1_R2.fq.gz": 20,
+        "Project_A/S1.md5": 1,
+        "Project_A/work/ab/cd/x.fastq.gz": 40,
+        "Project_A/work/ab/log.txt": 5,
+        "analysis/.pixi/env/lib.so": 70,
+        "analysis/.nextflow.log.1": 3,
+        "analysis/Reports/html/index.html": 2,
+        "analysis/nested/deep/L001/reads.fastq.gz": 11,
+    }
+    for rel, size in files.items():
+        path = run_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+    (run_dir / "analysis" / "nested" / "link.fastq.gz").symlink_to(run_dir / "Project_A" / "S1.md5")
+    (run_dir / "linked_dir").symlink_to(run_dir / "Project_A")
+    patterns = ["*.fastq.gz", "*.fq.gz", ".pixi", "work", ".nextflow.log*", "Reports/html"]
+
+    targets, reclaim = clean_fastq._scan_clean_targets(run_dir, patterns, measure=True)
+
+    expected_targets, expected_reclaim = _reference_targets(run_dir, patterns)
+    assert set(targets) == expected_targets
+    assert reclaim == expected_reclaim
+    assert len(targets) == len(set(targets))
+    assert clean_fastq._collect_clean_targets(run_dir, patterns) == targets
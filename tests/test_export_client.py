@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+import threading
+
+import pytest
+
+
+def _import_export_client():
+    workflows_dir = Path(__file__).resolve().parents[1] / "workflows"
+    if str(workflows_dir) not in sys.path:
+        sys.path.insert(0, str(workflows_dir))
+    import export_client  # type: ignore
+
+    return export_client
+
+
+class _StandInEngine(ThreadingHTTPServer):
+    # Local stand-in for the export engine: POST /export registers a job; its final_message
+    # answers 404 "Job not found" once, then 425 until `pending_polls` polls have been made;
+    # unknown job IDs get a 500.
+    daemon_threads = True
+
+    def __init__(self, pending_polls: int):
+        self.pending_polls = pending_polls
+        self.drop_after_post = False
+        self.truncate_polls = 0
+        self.jobs: dict[str, dict] = {}
+        self.polls: dict[str, int] = {}
+        self.connections = 0
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _truncated(self) -> None:
+        # Announces 100 bytes, sends 5, then closes the connection.
+        self.send_response(200)
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b'{"job')
+        self.close_connection = True
+
+    def do_POST(self) -> None:
+        spec = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if spec.get("project_name") == "truncated":
+            self._truncated()
+            return
+        if spec.get("project_name") == "broken":
+            self._reply(422, {"detail": "invalid export_list"})
+            return
+        with self.server.lock:
+            job_id = f"job{len(self.server.jobs) + 1}"
+            self.server.jobs[job_id] = spec
+        if self.server.drop_after_post:
+            # Registered, but the connection goes away before the engine answers.
+            self.close_connection = True
+            return
+        self._reply(200, {"job_id": job_id})
+
+    def do_GET(self) -> None:
+        job_id = self.path.rsplit("/", 1)[-1]
+        with self.server.lock:
+            spec = self.server.jobs.get(job_id)
+            polls = self.server.polls[job_id] = self.server.polls.get(job_id, 0) + 1
+            truncate = self.server.truncate_polls > 0
+            self.server.truncate_polls -= truncate
+        if truncate:
+            self._truncated()
+        elif spec is None:
+            self._reply(500, {"detail": "engine error"})
+        elif polls == 1:
+            self._reply(404, {"detail": "Job not found"})
+        elif polls <= self.server.pending_polls:
+            self._reply(425, {"detail": "pending"})
+        else:
+            self._reply(200, {"job_id": job_id, "status": "done", "message": spec["project_name"]})
+
+
+@pytest.fixture
+def engine():
+    server = _StandInEngine(pending_polls=3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_run_jobs_concurrently_over_pooled_connections(engine):
+    export_client = _import_export_client()
+    jobs = [export_client.ExportJob(key=f"run{i}", spec={"project_name": f"P{i}"}) for i in range(8)]
+    jobs.append(export_client.ExportJob(key="bad", spec={"project_name": "broken"}))
+    submitted: list[str] = []
+
+    async def _run():
+        async with export_client.ExportClient(
+            engine.url, max_connections=2, poll_initial=0.01, poll_max=0.05
+        ) as client:
+            await client.run_jobs(jobs, on_submitted=lambda job: submitted.append(job.key))
+            return client
+
+    client = asyncio.run(_run())
+
+    assert [job.status for job in jobs[:8]] == ["done"] * 8
+    assert [job.final["message"] for job in jobs[:8]] == [f"P{i}" for i in range(8)]
+    assert all(job.polls == 3 for job in jobs[:8])
+    assert jobs[8].status == "failed" and jobs[8].error.startswith("Export API request failed: 422")
+    assert sorted(submitted) == sorted(f"run{i}" for i in range(8))
+    # 9 submits + 32 polls share at most two kept-alive connections.
+    assert client.requests_sent == 41
+    assert client.connections_opened == engine.connections == 2
+
+
+def test_export_session_times_out_and_reports_final_message_errors(engine):
+    export_client = _import_export_client()
+    engine.pending_polls = 10**6
+    with export_client.ExportSession(engine.url + "/export/", poll_initial=0.01, poll_max=0.02, final_timeout=0.2) as session:
+        job_id = session.submit({"project_name": "P"})["job_id"]
+        with pytest.raises(TimeoutError, match=f"job_id={job_id}"):
+            session.wait_final(job_id)
+        with pytest.raises(export_client.ExportAPIError, match="Unable to fetch final message: 500"):
+            session.wait_final("unknown")
+    assert session.client.connections_opened == 1
+
+
+def test_post_is_not_resent_when_a_pooled_connection_drops_after_the_write(engine):
+    export_client = _import_export_client()
+    with export_client.ExportSession(engine.url) as session:
+        with pytest.raises(export_client.ExportAPIError, match="500"):
+            session.wait_final("unknown")
+        engine.drop_after_post = True
+        with pytest.raises(ConnectionResetError):
+            session.submit({"project_name": "P"})
+    assert len(engine.jobs) == 1
+    assert session.client.requests_sent == 2
+
+
+def test_truncated_responses_are_retried_while_polling_and_fail_only_their_job(engine):
+    export_client = _import_export_client()
+    engine.pending_polls = 1
+    engine.truncate_polls = 2
+    jobs = [
+        export_client.ExportJob(key="ok", spec={"project_name": "P"}),
+        export_client.ExportJob(key="cut", spec={"project_name": "truncated"}),
+    ]
+
+    async def _run():
+        async with export_client.ExportClient(engine.url, poll_initial=0.01, poll_max=0.02) as client:
+            return await client.run_jobs(jobs)
+
+    asyncio.run(_run())
+
+    assert jobs[0].status == "done" and jobs[0].final["message"] == "P"
+    assert jobs[1].status == "failed"
+    assert jobs[1].error.startswith("Export API response truncated")
+
+
+def test_poll_delay_backs_off_exponentially_with_jitter():
+    export_client = _import_export_client()
+    delays = [export_client.poll_delay(attempt, 1.0, 8.0) for attempt in range(6)]
+    for attempt, delay in enumerate(delays):
+        step = min(8.0, 2.0**attempt)
+        assert step / 2 <= delay <= step
+
+
+def test_export_template_hook_copies_the_client_into_the_rendered_dir(tmp_path: Path):
+    root = Path(__file__).resolve().parents[1]
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    from hooks.export_install_client import main as hook_main  # type: ignore
+
+    ctx = SimpleNamespace(project_dir=str(tmp_path), project=object(), template=SimpleNamespace(id="export"), cwd=str(tmp_path))
+    target = hook_main(ctx)
+
+    assert target == tmp_path / "export" / "export_client.py"
+    assert target.read_bytes() == (root / "workflows" / "export_client.py").read_bytes()
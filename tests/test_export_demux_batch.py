@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import threading
+
+import pytest
+import yaml
+
+
+def _load_export_demux_module():
+    path = Path(__file__).resolve().parents[1] / "workflows" / "export_demux" / "run.py"
+    spec = importlib.util.spec_from_file_location("export_demux_run", path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Engine(ThreadingHTTPServer):
+    # Export engine stand-in: rejects project "broken", otherwise registers the job and
+    # answers its final_message right away.
+    daemon_threads = True
+
+    def __init__(self):
+        self.submitted: list[str] = []
+        super().__init__(("127.0.0.1", 0), _EngineHandler)
+
+
+class _EngineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        spec = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.submitted.append(spec["project_name"])
+        if spec["project_name"] == "broken":
+            self._reply(422, {"detail": "invalid export_list"})
+            return
+        self._reply(200, {"job_id": f"job-{spec['project_name']}"})
+
+    def do_GET(self) -> None:
+        job_id = self.path.rsplit("/", 1)[-1]
+        self._reply(200, {"job_id": job_id, "status": "success", "main_report": f"https://example.org/{job_id}"})
+
+
+@pytest.fixture
+def engine():
+    server = _Engine()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _make_run(root: Path, name: str, multiqc: bool = True) -> Path:
+    run_dir = root / name
+    (run_dir / "output").mkdir(parents=True)
+    (run_dir / "multiqc").mkdir()
+    if multiqc:
+        (run_dir / "multiqc" / "multiqc_report.html").write_text("<html></html>")
+    return run_dir
+
+
+def _write_ctx(tmp_path: Path, monkeypatch, params: dict) -> None:
+    ctx_path = tmp_path / "ctx.json"
+    ctx_path.write_text(json.dumps({"params": params}))
+    monkeypatch.setenv("BPM_CTX_PATH", str(ctx_path))
+
+
+def test_batch_exports_runs_concurrently_and_records_each_final_message(tmp_path: Path, monkeypatch, engine):
+    demux = _load_export_demux_module()
+    runs = tmp_path / "fastq"
+    first = _make_run(runs, "251201_A_0001")
+    second = _make_run(runs, "251202_A_0002")
+    broken = _make_run(runs, "broken")
+    _write_ctx(
+        tmp_path,
+        monkeypatch,
+        {
+            "run_dirs": f"{runs}/2512*,{broken},{first}",
+            "export_engine_api_url": f"http://127.0.0.1:{engine.server_address[1]}",
+            "export_max_connections": 2,
+        },
+    )
+
+    with pytest.raises(SystemExit, match="1 of 3 exports failed"):
+        demux.main()
+
+    assert sorted(engine.submitted) == ["251201_A_0001", "251202_A_0002", "broken"]
+    for run_dir in (first, second):
+        export = yaml.safe_load((run_dir / "bpm.meta.yaml").read_text())["export"]
+        assert export["last_job_id"] == f"job-{run_dir.name}"
+        assert export["demux"]["final_message"]["status"] == "success"
+        assert export["demux"]["job_spec"]["password"] == "***redacted***"
+    assert not (broken / "bpm.meta.yaml").exists()
+
+
+def test_batch_stops_before_submitting_when_a_run_is_incomplete(tmp_path: Path, monkeypatch, engine):
+    demux = _load_export_demux_module()
+    complete = _make_run(tmp_path, "251201_A_0001")
+    incomplete = _make_run(tmp_path, "251202_A_0002", multiqc=False)
+    _write_ctx(
+        tmp_path,
+        monkeypatch,
+        {
+            "run_dirs": [str(complete), str(incomplete)],
+            "export_engine_api_url": f"http://127.0.0.1:{engine.server_address[1]}",
+        },
+    )
+
+    with pytest.raises(SystemExit, match="MultiQC report not found"):
+        demux.main()
+
+    assert engine.submitted == []
+    assert not (complete / "bpm.meta.yaml").exists()
+
+
+def test_batch_keeps_waiting_when_the_submit_meta_write_fails(tmp_path: Path, monkeypatch, engine):
+    demux = _load_export_demux_module()
+    run_dir = _make_run(tmp_path, "251201_A_0001")
+    _write_ctx(
+        tmp_path,
+        monkeypatch,
+        {"run_dirs": str(run_dir), "export_engine_api_url": f"http://127.0.0.1:{engine.server_address[1]}"},
+    )
+    real_save_meta = demux._save_meta
+    writes: list[Path] = []
+
+    def flaky_save_meta(path: Path, payload: dict) -> None:
+        writes.append(path)
+        if len(writes) == 1:
+            raise OSError("disk full")
+        real_save_meta(path, payload)
+
+    monkeypatch.setattr(demux, "_save_meta", flaky_save_meta)
+
+    demux.main()
+
+    export = yaml.safe_load((run_dir / "bpm.meta.yaml").read_text())["export"]
+    assert export["demux"]["final_message"]["status"] == "success"
+    assert len(writes) == 2
+
+
+def test_batch_records_an_unexpected_job_error_and_finishes_the_other_runs(tmp_path: Path, monkeypatch, engine):
+    demux = _load_export_demux_module()
+    first = _make_run(tmp_path, "251201_A_0001")
+    second = _make_run(tmp_path, "251202_A_0002")
+    _write_ctx(
+        tmp_path,
+        monkeypatch,
+        {"run_dirs": f"{first},{second}", "export_engine_api_url": f"http://127.0.0.1:{engine.server_address[1]}"},
+    )
+    real_update = demux._update_export_meta
+
+    def failing_update(run_dir: Path, *args, final_json=None, **kwargs) -> None:
+        if run_dir == first and final_json:
+            raise ValueError("unexpected meta layout")
+        real_update(run_dir, *args, final_json=final_json, **kwargs)
+
+    monkeypatch.setattr(demux, "_update_export_meta", failing_update)
+
+    with pytest.raises(SystemExit, match="1 of 2 exports failed"):
+        demux.main()
+
+    assert "final_message" not in yaml.safe_load((first / "bpm.meta.yaml").read_text())["export"]["demux"]
+    export = yaml.safe_load((second / "bpm.meta.yaml").read_text())["export"]
+    assert export["demux"]["final_message"]["status"] == "success"
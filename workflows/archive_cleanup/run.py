@@ -2,19 +2,32 @@
 from __future__ import annotations
 
 import argparse
-import fnmatch
 import json
 import os
-import shutil
 import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Any
-import yaml
+
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+from archive_common import (
+    ManifestJournal as _SharedManifestJournal,
+    PreserveMatcher as _SharedPreserveMatcher,
+    TransferScheduler as _SharedTransferScheduler,
+    load_active_keep_runs as _shared_load_active_keep_runs,
+    load_manifest as _shared_load_manifest,
+    open_manifest_index as _shared_open_manifest_index,
+    remove_tree as _shared_remove_tree,
+    run_batch as _shared_run_batch,
+)
 
 DEFAULT_MANIFEST_DIR = "/data/shared/bpm_manifests"
 DEFAULT_KEEP_RULES_PATH = "/data/shared/bpm_manifests/keep_rules.yaml"
 DEFAULT_ALLOWED_ROOTS = "/data/raw,/data/fastq"
+DEFAULT_PARALLEL_RUNS = 4
+DEFAULT_MAX_RUNS_PER_MOUNT = 2
 DEFAULT_INSTRUMENTS = [
     "miseq1_M00818",
     "miseq2_M04404",
@@ -22,6 +35,10 @@ DEFAULT_INSTRUMENTS = [
     "nextseq500_NB501289",
     "novaseq_A01742",
 ]
+# Cleanup outcomes that are never retried.
+# Workflows whose manifests this cleanup owns (archive_raw is the older name of archive_rawdata).
+CLEANUP_WORKFLOWS = ("archive_rawdata", "archive_raw", "archive_fastq")
+FINAL_CLEANUP_STATUSES = {"done", "done_no_matches", "skipped_not_eligible", "skipped_outside_allowed_root", "skipped_missing"}
 USE_COLOR = sys.stdout.isatty() and os.environ.get("NO_COLOR") is None
 
 
@@ -85,54 +102,20 @@ def _parse_bool(value: Any, default: bool) -> bool:
     return default
 
 
+def _parse_int(value: Any, default: int) -> int:
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
 def _normalize_patterns(value: Any) -> list[str]:
     pats = _split_csv(value)
     return [p for p in pats if p]
 
 
-def _load_active_keep_runs(keep_rules_path: Path) -> tuple[set[str], list[str]]:
-    if not keep_rules_path.exists():
-        return set(), []
-    try:
-        payload = yaml.safe_load(keep_rules_path.read_text(encoding="utf-8")) or {}
-    except Exception as exc:  # noqa: BLE001
-        return set(), [f"Failed to parse keep_rules file {keep_rules_path}: {exc}"]
-    if not isinstance(payload, dict):
-        return set(), [f"Invalid keep_rules format in {keep_rules_path}: expected mapping"]
-
-    runs = payload.get("runs") or {}
-    if not isinstance(runs, dict):
-        return set(), [f"Invalid keep_rules.runs format in {keep_rules_path}: expected mapping"]
-
-    from datetime import date
-
-    today = date.today()
-    active: set[str] = set()
-    notes: list[str] = []
-    for run_id, rec in runs.items():
-        run_id_s = str(run_id).strip()
-        if not run_id_s:
-            continue
-        if not isinstance(rec, dict):
-            notes.append(f"Invalid keep_rules record for run_id={run_id_s}: expected mapping")
-            continue
-        if rec.get("keep", True) is False:
-            continue
-        keep_until_raw = rec.get("keep_until")
-        if keep_until_raw in (None, ""):
-            active.add(run_id_s)
-            continue
-        try:
-            keep_until = date.fromisoformat(str(keep_until_raw))
-        except ValueError:
-            notes.append(f"Invalid keep_until in keep_rules for run_id={run_id_s}: {keep_until_raw}")
-            active.add(run_id_s)
-            continue
-        if keep_until >= today:
-            active.add(run_id_s)
-    return active, notes
-
-
 def _first_error_line(exc: Exception) -> str:
     msg = str(exc).strip()
     if not msg:
@@ -177,15 +160,21 @@ def _release_lock(fd: int, lock_path: Path) -> None:
 
 
 def _resolve_latest_manifest(manifest_dir: Path) -> Path:
-    candidates = (
-        list(manifest_dir.glob("archive_rawdata_*.json"))
-        + list(manifest_dir.glob("archive_fastq_*.json"))
-    )
+    # A manifest is a compacted .json, its .jsonl journal, or both; a lone journal is
+    # left behind when the archive run was interrupted before compaction.
+    candidates: dict[Path, float] = {}
+    for prefix in ("archive_rawdata_", "archive_fastq_"):
+        for path in manifest_dir.glob(f"{prefix}*.json*"):
+            if path.suffix not in {".json", ".jsonl"}:
+                continue
+            key = path.with_suffix(".json")
+            candidates[key] = max(candidates.get(key, 0.0), path.stat().st_mtime)
     if not candidates:
         raise SystemExit(f"No archive_rawdata/archive_fastq manifest found in {manifest_dir}")
     # Choose newest by filesystem mtime (not lexicographic name),
     # so mixed workflow prefixes still resolve the true latest file.
-    return max(candidates, key=lambda p: (p.stat().st_mtime, p.name))
+    latest = max(candidates, key=lambda p: (candidates[p], p.name))
+    return latest if latest.exists() else latest.with_suffix(".jsonl")
 
 
 def _is_under(path: Path, base: Path) -> bool:
@@ -224,10 +213,6 @@ def _is_safe_source_path(source_path: Path, allowed_roots: list[Path], allowed_i
     return False, "source path is outside allowed roots"
 
 
-def _manifest_write(path: Path, payload: dict[str, Any]) -> None:
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-
-
 def _is_safe_flat_run_path(source_path: Path, allowed_roots: list[Path]) -> tuple[bool, str]:
     if not source_path.is_absolute():
         return False, "source path is not absolute"
@@ -264,62 +249,153 @@ def _cleanup_by_patterns(source_dir: Path, patterns: list[str], dry_run: bool) -
     return removed, "done"
 
 
-def _is_preserved_file(path: Path, source_dir: Path, preserve_patterns: list[str]) -> bool:
-    rel = str(path.relative_to(source_dir))
-    name = path.name
-    rel_parts = path.relative_to(source_dir).parts
-    for pat in preserve_patterns:
-        cleaned = pat.strip().strip("/")
-        if not cleaned:
-            continue
-        if fnmatch.fnmatch(name, cleaned) or fnmatch.fnmatch(rel, cleaned):
-            return True
-        # Preserve content inside directory-name patterns (e.g. .pixi, work, .renv).
-        if all(ch not in cleaned for ch in "*?[]"):
-            if cleaned in rel_parts:
-                return True
-            if rel.startswith(cleaned + "/"):
-                return True
-        if fnmatch.fnmatch(rel, cleaned + "/*"):
-            return True
-    return False
-
-
 def _cleanup_except_patterns(source_dir: Path, preserve_patterns: list[str], dry_run: bool) -> tuple[int, int, str]:
-    removed_files = 0
-    removed_dirs = 0
+    matcher = _SharedPreserveMatcher(preserve_patterns)
 
-    # Remove non-preserved files.
-    for match in source_dir.rglob("*"):
-        if not match.is_file() or match.is_symlink():
-            continue
-        if _is_preserved_file(match, source_dir, preserve_patterns):
-            continue
-        if dry_run:
-            print(_warn(f"[dry-run] Would remove file: {match}"))
-        else:
-            match.unlink()
-            removed_files += 1
-
-    # Prune empty subdirectories bottom-up, but keep run root directory.
-    dirs = [d for d in source_dir.rglob("*") if d.is_dir()]
-    dirs.sort(key=lambda p: len(p.parts), reverse=True)
-    for d in dirs:
-        if d == source_dir:
-            continue
-        if any(d.iterdir()):
-            continue
-        if dry_run:
-            print(_warn(f"[dry-run] Would remove empty dir: {d}"))
+    def _report(path: str, kind: str) -> None:
+        if kind == "dir":
+            print(_warn(f"[dry-run] Would remove empty dir: {path}"))
         else:
-            d.rmdir()
-            removed_dirs += 1
+            print(_warn(f"[dry-run] Would remove file: {path}"))
+
+    # Only non-preserved regular files go; symlinks and special files stay. Subtrees
+    # covered by a preserve pattern are kept whole, and emptied subdirectories are
+    # pruned bottom-up while the run root directory itself is kept.
+    removed = _shared_remove_tree(
+        source_dir,
+        keep=lambda rel, kind: kind != "file" or matcher.matches(rel),
+        covers_dir=matcher.covers_dir,
+        remove_root=False,
+        dry_run=dry_run,
+        on_remove=_report,
+    )
 
     if dry_run:
         return 0, 0, "dry_run_only"
-    if removed_files == 0 and removed_dirs == 0:
+    if removed.file_count == 0 and removed.dir_count == 0:
         return 0, 0, "done_no_matches"
-    return removed_files, removed_dirs, "done"
+    return removed.file_count, removed.dir_count, "done"
+
+
+def _eligible_indexes(records: list[Any], keep_run_ids: set[str], keep_rules_path: Path) -> tuple[list[int], int]:
+    eligible_indexes: list[int] = []
+    keep_filtered = 0
+    for i, rec in enumerate(records):
+        run_id = str(rec.get("run_id") or "").strip()
+        if run_id and run_id in keep_run_ids:
+            rec["cleanup_status"] = "skipped_keep_rules"
+            rec["cleanup_error"] = f"run protected by keep_rules ({keep_rules_path})"
+            keep_filtered += 1
+            continue
+        if _cleanup_pending(rec):
+            eligible_indexes.append(i)
+    return eligible_indexes, keep_filtered
+
+
+def _cleanup_pending(rec: dict[str, Any]) -> bool:
+    if str(rec.get("cleanup_status") or "") in FINAL_CLEANUP_STATUSES:
+        return False
+    return (
+        str(rec.get("status") or "") == "copied_verified"
+        and str(rec.get("copy_status") or "") == "ok"
+        and str(rec.get("verify_status") or "") == "ok"
+    )
+
+
+def _indexed_cleanup_manifests(index: Any, manifest_dir: Path) -> list[Path]:
+    # The index narrows the whole manifest history down to the few manifests that still
+    # hold cleanable records; only those are loaded.
+    refresh = index.refresh(manifest_dir)
+    for error in refresh.errors:
+        print(_warn(f"Unreadable manifest skipped: {error}"))
+    manifests: dict[str, None] = {}
+    for row in index.query(status="copied_verified"):
+        # Same workflows as the latest-manifest default; other workflows' manifests are not ours to rewrite.
+        if row["workflow"] in CLEANUP_WORKFLOWS and _cleanup_pending(row):
+            manifests.setdefault(row["manifest"], None)
+    return [Path(path) for path in manifests]
+
+
+def _cleanup_record(
+    rec: dict[str, Any],
+    allowed_roots: list[Path],
+    allowed_instruments: set[str],
+    dry_run: bool,
+) -> tuple[str, Exception | None]:
+    # Cleans one eligible record in place; returns "done", "skipped" or "failed".
+    source_raw = str(rec.get("source") or "").strip()
+    source_path = Path(source_raw)
+
+    cleanup_mode = str(rec.get("cleanup_mode") or "")
+    if cleanup_mode == "non_fastq_only":
+        ok, reason = _is_safe_flat_run_path(source_path, allowed_roots)
+    else:
+        ok, reason = _is_safe_source_path(source_path, allowed_roots, allowed_instruments)
+    if not ok:
+        rec["cleanup_status"] = "skipped_not_eligible"
+        rec["cleanup_error"] = reason
+        return "skipped", None
+
+    resolved_source = source_path.resolve(strict=False)
+    if not resolved_source.exists():
+        rec["cleanup_status"] = "skipped_missing"
+        rec["cleanup_error"] = "source path does not exist"
+        return "skipped", None
+    if not resolved_source.is_dir():
+        rec["cleanup_status"] = "skipped_not_eligible"
+        rec["cleanup_error"] = "source path is not a directory"
+        return "skipped", None
+
+    rec["cleanup_attempted_at"] = datetime.now().isoformat(timespec="seconds")
+    mode = cleanup_mode
+    patterns = _normalize_patterns(rec.get("cleanup_patterns"))
+    preserve_patterns = _normalize_patterns(rec.get("cleanup_preserve_patterns"))
+
+    try:
+        if mode == "non_fastq_only":
+            if not preserve_patterns:
+                preserve_patterns = ["*.fastq.gz", "*.fq.gz"]
+            rec["cleanup_mode"] = "non_fastq_only"
+            rec["cleanup_scope"] = "directory_except_preserve_patterns"
+            rec["cleanup_preserve_patterns"] = preserve_patterns
+            removed_files, removed_dirs, cleanup_status = _cleanup_except_patterns(
+                resolved_source,
+                preserve_patterns,
+                dry_run,
+            )
+            rec["cleanup_removed_file_count"] = removed_files
+            rec["cleanup_removed_dir_count"] = removed_dirs
+            rec["cleanup_status"] = cleanup_status
+            rec["cleanup_error"] = ""
+        elif patterns:
+            # Backward compatibility: old manifests may request matching-pattern deletions.
+            rec["cleanup_mode"] = "patterns"
+            rec["cleanup_scope"] = "files_only"
+            rec["cleanup_patterns"] = patterns
+            removed_count, cleanup_status = _cleanup_by_patterns(resolved_source, patterns, dry_run)
+            rec["cleanup_removed_count"] = removed_count
+            rec["cleanup_status"] = cleanup_status
+            rec["cleanup_error"] = ""
+        else:
+            rec["cleanup_mode"] = "directory"
+            rec["cleanup_scope"] = "directory_tree"
+            if dry_run:
+                rec["cleanup_status"] = "dry_run_only"
+                rec["cleanup_error"] = ""
+                print(_warn(f"[dry-run] Would remove directory: {resolved_source}"))
+            else:
+                print(_warn(f"[cleanup] Removing directory: {resolved_source}"))
+                _shared_remove_tree(resolved_source)
+                rec["cleanup_status"] = "done"
+                rec["cleanup_error"] = ""
+    except Exception as exc:  # noqa: BLE001
+        rec["cleanup_status"] = "failed"
+        rec["cleanup_error"] = str(exc)
+        run_id = str(rec.get("run_id") or resolved_source.name)
+        print(_err(f"[cleanup][failed] {run_id}: {_first_error_line(exc)}"))
+        print(_dim(f"  source: {resolved_source}"))
+        return "failed", exc
+    return ("skipped" if dry_run else "done"), None
 
 
 def _parse_params() -> dict[str, Any]:
@@ -336,6 +412,9 @@ def _parse_params() -> dict[str, Any]:
     parser.add_argument("--interactive", nargs="?", const="true", default="true")
     parser.add_argument("--yes", nargs="?", const="true", default="false")
     parser.add_argument("--dry-run", nargs="?", const="true", default="false")
+    parser.add_argument("--all-manifests", nargs="?", const="true", default="false")
+    parser.add_argument("--parallel-runs", type=int, default=DEFAULT_PARALLEL_RUNS)
+    parser.add_argument("--max-runs-per-mount", type=int, default=DEFAULT_MAX_RUNS_PER_MOUNT)
 
     if params:
         return params
@@ -351,6 +430,9 @@ def _parse_params() -> dict[str, Any]:
         "interactive": args.interactive,
         "yes": args.yes,
         "dry_run": args.dry_run,
+        "all_manifests": args.all_manifests,
+        "parallel_runs": args.parallel_runs,
+        "max_runs_per_mount": args.max_runs_per_mount,
     }
 
 
@@ -366,6 +448,15 @@ def main() -> None:
     interactive = _parse_bool(params.get("interactive"), True)
     yes = _parse_bool(params.get("yes"), False)
     dry_run = _parse_bool(params.get("dry_run"), False)
+    all_manifests = _parse_bool(params.get("all_manifests"), False)
+    parallel_runs = _parse_int(params.get("parallel_runs"), DEFAULT_PARALLEL_RUNS)
+    max_runs_per_mount = _parse_int(params.get("max_runs_per_mount"), DEFAULT_MAX_RUNS_PER_MOUNT)
+    index: Any = None
+
+    if parallel_runs <= 0:
+        raise SystemExit("parallel_runs must be > 0")
+    if max_runs_per_mount < 0:
+        raise SystemExit("max_runs_per_mount must be >= 0")
 
     if non_interactive:
         interactive = False
@@ -373,53 +464,53 @@ def main() -> None:
         print(_dim("[mode] non_interactive=true -> interactive disabled, global confirmation auto-approved"))
 
     if manifest_path_raw:
-        manifest_path = Path(manifest_path_raw).expanduser().resolve()
+        manifest_paths = [Path(manifest_path_raw).expanduser().resolve()]
+    elif all_manifests:
+        index = _shared_open_manifest_index(manifest_dir)
+        manifest_paths = _indexed_cleanup_manifests(index, manifest_dir)
     else:
-        manifest_path = _resolve_latest_manifest(manifest_dir)
-
-    if not manifest_path.exists() or not manifest_path.is_file():
-        raise SystemExit(f"Manifest not found: {manifest_path}")
-    keep_run_ids, keep_notes = _load_active_keep_runs(keep_rules_path)
+        manifest_paths = [_resolve_latest_manifest(manifest_dir)]
 
-    payload = json.loads(manifest_path.read_text(encoding="utf-8"))
-    records = payload.get("records")
-    if not isinstance(records, list):
-        raise SystemExit("Manifest has invalid format: missing list field 'records'")
-
-    eligible_indexes: list[int] = []
+    keep_run_ids, keep_notes = _shared_load_active_keep_runs(keep_rules_path)
+    batches: list[tuple[Path, dict[str, Any], list[int]]] = []
     keep_filtered = 0
-    for i, rec in enumerate(records):
-        run_id = str(rec.get("run_id") or "").strip()
-        if run_id and run_id in keep_run_ids:
-            rec["cleanup_status"] = "skipped_keep_rules"
-            rec["cleanup_error"] = f"run protected by keep_rules ({keep_rules_path})"
-            keep_filtered += 1
-            continue
-        status = str(rec.get("status") or "")
-        copy_status = str(rec.get("copy_status") or "")
-        verify_status = str(rec.get("verify_status") or "")
-        cleanup_status = str(rec.get("cleanup_status") or "")
-        if cleanup_status in {"done", "done_no_matches", "skipped_not_eligible", "skipped_outside_allowed_root", "skipped_missing"}:
-            continue
-        if status == "copied_verified" and copy_status == "ok" and verify_status == "ok":
-            eligible_indexes.append(i)
+    for manifest_path in manifest_paths:
+        if not manifest_path.is_file() and not (index is not None and manifest_path.with_suffix(".jsonl").is_file()):
+            raise SystemExit(f"Manifest not found: {manifest_path}")
+        payload = _shared_load_manifest(manifest_path if manifest_path.is_file() else manifest_path.with_suffix(".jsonl"))
+        records = payload.get("records")
+        if not isinstance(records, list):
+            raise SystemExit(f"Manifest has invalid format: missing list field 'records' ({manifest_path})")
+        eligible_indexes, filtered = _eligible_indexes(records, keep_run_ids, keep_rules_path)
+        keep_filtered += filtered
+        if eligible_indexes or index is None:
+            batches.append((manifest_path, payload, eligible_indexes))
+    eligible_count = sum(len(eligible) for _, _, eligible in batches)
 
     _print_section("archive_cleanup")
-    print(f"Manifest: {manifest_path}")
+    if index is not None:
+        print(f"Manifests with eligible runs: {len(batches)} (from index {index.path})")
+        for manifest_path, _, eligible in batches:
+            print(_dim(f"- {manifest_path.name}: {len(eligible)}"))
+    else:
+        print(f"Manifest: {manifest_paths[0]}")
     print(f"Keep rules path: {keep_rules_path}")
     print(f"Protected runs from keep rules: {len(keep_run_ids)}")
     print(f"Allowed roots: {', '.join(str(p) for p in allowed_roots)}")
     print(f"Allowed instruments: {', '.join(sorted(allowed_instruments))}")
     print(f"Filtered by keep rules: {keep_filtered}")
-    print(f"Eligible runs: {len(eligible_indexes)}")
+    print(f"Eligible runs: {eligible_count}")
+    print(f"Parallel runs: {parallel_runs} (per mount: {max_runs_per_mount or 'unlimited'})")
     if keep_notes:
         for note in keep_notes:
             print(_warn(f"- {note}"))
     if dry_run:
         print(_warn("Dry-run enabled: no source data will be deleted."))
 
-    if not eligible_indexes:
+    if not eligible_count:
         print(_warn("No eligible runs found for cleanup."))
+        if index is not None:
+            index.close()
         return
 
     if not yes:
@@ -438,130 +529,76 @@ def main() -> None:
     failed = 0
     skipped = 0
     sudo_hint_printed = False
+    updated_manifests: list[Path] = []
+    journals: list[Any] = []
+    run_events: list[dict[str, Any]] = []
+    scheduler = _SharedTransferScheduler(max_streams_per_mount=max_runs_per_mount, parallel_runs=parallel_runs)
+
+    def _clean(item: tuple[int, int]) -> tuple[str, Exception | None]:
+        rec = batches[item[0]][1]["records"][item[1]]
+        source = Path(str(rec.get("source") or "").strip() or "/")
+        # The slot bounds concurrent deletions per NFS server; the safety checks in
+        # _cleanup_record run after it is granted, right before anything is removed.
+        with scheduler.slot(source, source):
+            return _cleanup_record(rec, allowed_roots, allowed_instruments, dry_run)
+
+    def _record_outcome(position: int, result: tuple[str, Exception | None]) -> None:
+        nonlocal sudo_hint_printed
+        batch_no, idx = items[position]
+        manifest_path, payload, _ = batches[batch_no]
+        outcome, exc = result
+        run_events[batch_no][{"done": "deleted"}.get(outcome, outcome)] += 1
+        if exc is not None and _is_permission_error(exc) and not sudo_hint_printed:
+            sudo_hint_printed = True
+            print(_warn("[hint] Permission issue detected. Re-run cleanup with sudo:"))
+            print(
+                _warn(
+                    f'  sudo env PATH="$PATH" BPM_CACHE="$BPM_CACHE" '
+                    f"bpm workflow run archive_cleanup --manifest-path {manifest_path}"
+                )
+            )
+        # Each finished run is journaled (and fsynced) immediately, in completion order.
+        journals[batch_no].append(idx, payload["records"][idx])
 
     try:
-        cleanup_history = payload.get("cleanup_runs")
-        if not isinstance(cleanup_history, list):
-            cleanup_history = []
-            payload["cleanup_runs"] = cleanup_history
-
-        run_event: dict[str, Any] = {
-            "started_at": datetime.now().isoformat(timespec="seconds"),
-            "manifest": str(manifest_path),
-            "dry_run": dry_run,
-            "deleted": 0,
-            "failed": 0,
-            "skipped": 0,
-        }
-
-        for idx in eligible_indexes:
-            rec = records[idx]
-            source_raw = str(rec.get("source") or "").strip()
-            source_path = Path(source_raw)
-
-            cleanup_mode = str(rec.get("cleanup_mode") or "")
-            if cleanup_mode == "non_fastq_only":
-                ok, reason = _is_safe_flat_run_path(source_path, allowed_roots)
-            else:
-                ok, reason = _is_safe_source_path(source_path, allowed_roots, allowed_instruments)
-            if not ok:
-                rec["cleanup_status"] = "skipped_not_eligible"
-                rec["cleanup_error"] = reason
-                skipped += 1
-                continue
-
-            resolved_source = source_path.resolve(strict=False)
-            if not resolved_source.exists():
-                rec["cleanup_status"] = "skipped_missing"
-                rec["cleanup_error"] = "source path does not exist"
-                skipped += 1
-                continue
-            if not resolved_source.is_dir():
-                rec["cleanup_status"] = "skipped_not_eligible"
-                rec["cleanup_error"] = "source path is not a directory"
-                skipped += 1
-                continue
-
-            rec["cleanup_attempted_at"] = datetime.now().isoformat(timespec="seconds")
-            mode = cleanup_mode
-            patterns = _normalize_patterns(rec.get("cleanup_patterns"))
-            preserve_patterns = _normalize_patterns(rec.get("cleanup_preserve_patterns"))
-
-            try:
-                if mode == "non_fastq_only":
-                    if not preserve_patterns:
-                        preserve_patterns = ["*.fastq.gz", "*.fq.gz"]
-                    rec["cleanup_mode"] = "non_fastq_only"
-                    rec["cleanup_scope"] = "directory_except_preserve_patterns"
-                    rec["cleanup_preserve_patterns"] = preserve_patterns
-                    removed_files, removed_dirs, cleanup_status = _cleanup_except_patterns(
-                        resolved_source,
-                        preserve_patterns,
-                        dry_run,
-                    )
-                    rec["cleanup_removed_file_count"] = removed_files
-                    rec["cleanup_removed_dir_count"] = removed_dirs
-                    rec["cleanup_status"] = cleanup_status
-                    rec["cleanup_error"] = ""
-                    if dry_run:
-                        skipped += 1
-                    else:
-                        done += 1
-                elif patterns:
-                    # Backward compatibility: old manifests may request matching-pattern deletions.
-                    rec["cleanup_mode"] = "patterns"
-                    rec["cleanup_scope"] = "files_only"
-                    rec["cleanup_patterns"] = patterns
-                    removed_count, cleanup_status = _cleanup_by_patterns(resolved_source, patterns, dry_run)
-                    rec["cleanup_removed_count"] = removed_count
-                    rec["cleanup_status"] = cleanup_status
-                    rec["cleanup_error"] = ""
-                    if dry_run:
-                        skipped += 1
-                    else:
-                        done += 1
-                else:
-                    rec["cleanup_mode"] = "directory"
-                    rec["cleanup_scope"] = "directory_tree"
-                    if dry_run:
-                        rec["cleanup_status"] = "dry_run_only"
-                        rec["cleanup_error"] = ""
-                        print(_warn(f"[dry-run] Would remove directory: {resolved_source}"))
-                        skipped += 1
-                    else:
-                        print(_warn(f"[cleanup] Removing directory: {resolved_source}"))
-                        shutil.rmtree(resolved_source)
-                        rec["cleanup_status"] = "done"
-                        rec["cleanup_error"] = ""
-                        done += 1
-            except Exception as exc:  # noqa: BLE001
-                rec["cleanup_status"] = "failed"
-                rec["cleanup_error"] = str(exc)
-                run_id = str(rec.get("run_id") or resolved_source.name)
-                print(_err(f"[cleanup][failed] {run_id}: {_first_error_line(exc)}"))
-                print(_dim(f"  source: {resolved_source}"))
-                if _is_permission_error(exc) and not sudo_hint_printed:
-                    sudo_hint_printed = True
-                    print(_warn("[hint] Permission issue detected. Re-run cleanup with sudo:"))
-                    print(
-                        _warn(
-                            f'  sudo env PATH="$PATH" BPM_CACHE="$BPM_CACHE" '
-                            f"bpm workflow run archive_cleanup --manifest-path {manifest_path}"
-                        )
-                    )
-                failed += 1
-
-            _manifest_write(manifest_path, payload)
-
-        run_event["deleted"] = done
-        run_event["failed"] = failed
-        run_event["skipped"] = skipped
-        run_event["finished_at"] = datetime.now().isoformat(timespec="seconds")
-        cleanup_history.append(run_event)
-        _manifest_write(manifest_path, payload)
+        for batch_no, (manifest_path, payload, eligible_indexes) in enumerate(batches):
+            journal = _SharedManifestJournal(manifest_path)
+            journals.append(journal)
+            # Fold any journal tail into the JSON first so appended indexes match "records".
+            payload = journal.compact(payload)
+            batches[batch_no] = (manifest_path, payload, eligible_indexes)
+            run_events.append(
+                {
+                    "started_at": datetime.now().isoformat(timespec="seconds"),
+                    "manifest": str(manifest_path),
+                    "dry_run": dry_run,
+                    "parallel_runs": parallel_runs,
+                    "deleted": 0,
+                    "failed": 0,
+                    "skipped": 0,
+                }
+            )
+
+        items = [(batch_no, idx) for batch_no, (_, _, eligible) in enumerate(batches) for idx in eligible]
+        _shared_run_batch(items, _clean, parallel_runs, _record_outcome)
+
+        for batch_no, (manifest_path, payload, _) in enumerate(batches):
+            run_event = run_events[batch_no]
+            done += run_event["deleted"]
+            failed += run_event["failed"]
+            skipped += run_event["skipped"]
+            run_event["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            cleanup_history = payload.get("cleanup_runs")
+            if not isinstance(cleanup_history, list):
+                cleanup_history = []
+                payload["cleanup_runs"] = cleanup_history
+            cleanup_history.append(run_event)
+            journals[batch_no].compact(payload)
+            updated_manifests.append(journals[batch_no].manifest_path)
 
         _print_section("Done")
-        print(_ok(f"Manifest updated: {manifest_path}"))
+        for manifest_path in updated_manifests:
+            print(_ok(f"Manifest updated: {manifest_path}"))
         print(_ok(f"Deleted/Cleaned records: {done}"))
         if failed:
             print(_err(f"Failed: {failed}"))
@@ -572,7 +609,18 @@ def main() -> None:
         if failed:
             raise SystemExit(1)
     finally:
-        _release_lock(lock_fd, lock_path)
+        # The lock is released even if closing a journal or updating the index fails.
+        try:
+            for journal in journals:
+                journal.close()
+            if index is not None:
+                try:
+                    for manifest_path in updated_manifests:
+                        index.ingest(manifest_path)
+                finally:
+                    index.close()
+        finally:
+            _release_lock(lock_fd, lock_path)
 
 
 if __name__ == "__main__":
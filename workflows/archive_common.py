@@ -1,22 +1,59 @@
 from __future__ import annotations
 
+import collections
 import configparser
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+import contextlib
 import csv
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import errno
+import fcntl
+import fnmatch
 import getpass
+import hashlib
+import heapq
 import json
 import os
 import re
+import shutil
+import sqlite3
+import stat
+import subprocess
 import sys
+import tarfile
+import tempfile
+import threading
+import time
 from datetime import date, datetime
 from pathlib import Path
 import pwd
-from typing import Any
+from typing import Any, Callable, Iterator, Sequence, TypeVar
 
 import yaml
 
 RUN_PREFIX_RE = re.compile(r"^\d{6}_")
+CATALOG_FILENAME = "run_catalog.sqlite"
+CATALOG_MAX_AGE_DAYS = 30
+DISCOVERY_WORKERS = 8
+DELETE_WORKERS = 8
+HOSTS_CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "hosts.yaml"
+JOB_ORDERS = ("oldest-first", "largest-first")
+COPY_BACKENDS = ("auto", "rsync", "native")
+NATIVE_COPY_CHUNK_BYTES = 64 * 1024 * 1024
+NATIVE_COPY_WORKERS = 4
+# Per-file cost used to balance copy shards, so runs of many small files split by count too.
+COPY_SHARD_FILE_COST_BYTES = 1024 * 1024
+DEDUP_MIN_BYTES = 64 * 1024 * 1024
+DEDUP_SAMPLE_BYTES = 1024 * 1024
+RSYNC_PROGRESS_INTERVAL = 30.0
+RSYNC_TAIL_LINES = 200
+VERIFY_ALGORITHMS = ("blake2b", "sha256", "xxh128")
+VERIFY_CHUNK_BYTES = 4 * 1024 * 1024
 USE_COLOR = sys.stdout.isatty() and os.environ.get("NO_COLOR") is None
+T = TypeVar("T")
+_FICLONE = 0x40049409  # ioctl(dest_fd, FICLONE, src_fd) from <linux/fs.h>
+_NO_CLONE_ERRNOS = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EBADF}
+R = TypeVar("R")
 
 
 def style(text: str, code: str) -> str:
@@ -75,66 +112,2655 @@ def default_rules() -> dict[str, Any]:
     return {"schema_version": 1, "updated_at": now_iso(), "runs": {}}
 
 
+def keep_rule_record(user: str, stamp: str, keep_until: str | None) -> dict[str, Any]:
+    return {"keep": True, "set_by": user, "set_at": stamp, "keep_until": keep_until or None}
+
+
+def keep_rule_updates(
+    existing: dict[str, Any],
+    marked: dict[str, bool],
+    keep_until: dict[str, str | None],
+    user: str | None = None,
+) -> dict[str, dict[str, Any] | None]:
+    # Only runs whose keep flag or keep_until changed in this session are written, so a TUI save
+    # does not overwrite rules another user changed for the other rows in the meantime.
+    user = user or current_user()
+    stamp = now_iso()
+    updates: dict[str, dict[str, Any] | None] = {}
+    for run_id, keep in marked.items():
+        old = existing.get(run_id) if isinstance(existing.get(run_id), dict) else {}
+        old_keep = bool(old.get("keep", False))
+        until = keep_until.get(run_id) or None
+        if keep and (not old_keep or (old.get("keep_until") or None) != until):
+            updates[run_id] = keep_rule_record(user, stamp, until)
+        elif not keep and run_id in existing:
+            updates[run_id] = None
+    return updates
+
+
+def _keep_rule_active(run_id: str, rec: Any, today: date, notes: list[str]) -> bool:
+    if not isinstance(rec, dict):
+        notes.append(f"Invalid keep_rules record for run_id={run_id}: expected mapping")
+        return False
+    if rec.get("keep", True) is False:
+        return False
+    raw_keep_until = rec.get("keep_until")
+    if raw_keep_until in (None, ""):
+        return True
+    try:
+        return date.fromisoformat(str(raw_keep_until)) >= today
+    except ValueError:
+        notes.append(f"Invalid keep_until in keep_rules for run_id={run_id}: {raw_keep_until}")
+        return True
+
+
+_KEEP_RULES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keep_rules (
+    run_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keep_rules_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class KeepRulesStore:
+    # keep_rules.yaml stays the human-readable copy; lookups and per-run updates go through a SQLite
+    # index next to it (keep_rules.sqlite), so nothing re-parses or rewrites the whole file per change.
+    # Every access holds an advisory flock on keep_rules.lock. Writers update the index in one
+    # transaction and re-export the YAML before releasing it; a YAML edited by hand (different
+    # mtime/size than the last export) is re-imported on the next access. Without write access to
+    # the manifest directory the store falls back to reading/writing the YAML directly.
+    def __init__(self, path: Path):
+        self.path = path
+        self.db_path = path.with_suffix(".sqlite")
+        self.lock_path = path.with_suffix(".lock")
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(self.lock_path, "a+")
+        except OSError:
+            # Read-only access to the manifest directory: nothing here can write either.
+            yield
+            return
+        with handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def _connect(self) -> sqlite3.Connection | None:
+        try:
+            # Default rollback journal: the manifest directory may be on NFS, where WAL is unsafe.
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.executescript(_KEEP_RULES_SCHEMA)
+            conn.commit()
+            return conn
+        except (sqlite3.Error, OSError):
+            return None
+
+    def _yaml_stamp(self) -> str:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return ""
+        return f"{st.st_mtime_ns}:{st.st_size}"
+
+    def _read_yaml(self) -> dict[str, Any]:
+        if not self.path.exists():
+            return default_rules()
+        try:
+            payload = yaml.safe_load(self.path.read_text(encoding="utf-8")) or {}
+        except Exception as exc:  # noqa: BLE001
+            raise SystemExit(f"Failed to parse keep_rules file {self.path}: {exc}") from exc
+        if not isinstance(payload, dict):
+            raise SystemExit(f"Invalid keep_rules format in {self.path}: expected mapping at top level")
+        runs = payload.get("runs")
+        if runs is not None and not isinstance(runs, dict):
+            raise SystemExit(f"Invalid keep_rules.runs format in {self.path}: expected mapping")
+        payload.setdefault("schema_version", 1)
+        payload.setdefault("updated_at", now_iso())
+        payload["runs"] = {str(k).strip(): v for k, v in (runs or {}).items() if str(k).strip()}
+        return payload
+
+    def _write_yaml(self, payload: dict[str, Any]) -> None:
+        payload["updated_at"] = now_iso()
+        payload["runs"] = {run_id: payload["runs"][run_id] for run_id in sorted(payload["runs"])}
+        write_text_atomic(self.path, yaml.safe_dump(payload, sort_keys=False))
+
+    def _meta(self, conn: sqlite3.Connection, key: str) -> str | None:
+        row = conn.execute("SELECT value FROM keep_rules_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _export(self, conn: sqlite3.Connection) -> None:
+        payload = {"schema_version": 1, "updated_at": "", **json.loads(self._meta(conn, "header") or "{}")}
+        payload["runs"] = {
+            run_id: json.loads(record) for run_id, record in conn.execute("SELECT run_id, record FROM keep_rules")
+        }
+        self._write_yaml(payload)
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO keep_rules_meta VALUES ('yaml_stamp', ?)", (self._yaml_stamp(),))
+
+    def _sync(self, conn: sqlite3.Connection) -> None:
+        stamp = self._yaml_stamp()
+        known = self._meta(conn, "yaml_stamp")
+        if known == stamp or (known is None and not stamp):
+            return
+        if not stamp:
+            # Never let a missing YAML silently drop protections; write it back from the index.
+            self._export(conn)
+            return
+        payload = self._read_yaml()
+        runs = payload.pop("runs")
+        with conn:
+            conn.execute("DELETE FROM keep_rules")
+            conn.executemany(
+                "INSERT INTO keep_rules VALUES (?, ?)",
+                [(run_id, json.dumps(rec, default=str)) for run_id, rec in runs.items()],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO keep_rules_meta VALUES ('header', ?)", (json.dumps(payload, default=str),)
+            )
+            conn.execute("INSERT OR REPLACE INTO keep_rules_meta VALUES ('yaml_stamp', ?)", (stamp,))
+
+    @contextlib.contextmanager
+    def _session(self, strict: bool, notes: list[str] | None = None) -> Iterator[sqlite3.Connection | None]:
+        with self._locked():
+            conn = self._connect()
+            if conn is None:
+                yield None
+                return
+            try:
+                try:
+                    self._sync(conn)
+                except sqlite3.Error:
+                    # An index we cannot update (e.g. read-only copy) is useless; go through the YAML.
+                    conn.close()
+                    conn = None
+                except SystemExit as exc:
+                    # Readers keep serving the last imported rules; writers must not clobber the edit.
+                    if strict or notes is None:
+                        raise
+                    notes.append(f"{exc} (using last imported keep rules)")
+                yield conn
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def load(self) -> dict[str, Any]:
+        with self._session(strict=True) as conn:
+            if conn is None:
+                return self._read_yaml()
+            payload = json.loads(self._meta(conn, "header") or "{}")
+            payload.setdefault("schema_version", 1)
+            payload.setdefault("updated_at", now_iso())
+            payload["runs"] = {
+                run_id: json.loads(record)
+                for run_id, record in conn.execute("SELECT run_id, record FROM keep_rules ORDER BY run_id")
+            }
+            return payload
+
+    def get(self, run_id: str) -> dict[str, Any] | None:
+        with self._session(strict=True) as conn:
+            if conn is None:
+                return self._read_yaml()["runs"].get(run_id)
+            row = conn.execute("SELECT record FROM keep_rules WHERE run_id = ?", (run_id,)).fetchone()
+            return json.loads(row[0]) if row is not None else None
+
+    def active(self) -> tuple[set[str], list[str]]:
+        notes: list[str] = []
+        try:
+            with self._session(strict=False, notes=notes) as conn:
+                if conn is None:
+                    records = self._read_yaml()["runs"].items()
+                else:
+                    records = [(run_id, json.loads(record)) for run_id, record in conn.execute("SELECT * FROM keep_rules")]
+        except SystemExit as exc:
+            return set(), [str(exc)]
+        today = date.today()
+        return {run_id for run_id, rec in records if _keep_rule_active(run_id, rec, today, notes)}, notes
+
+    def update(self, updates: dict[str, dict[str, Any] | None]) -> int:
+        # None removes the run's rule. Returns the number of records that actually changed.
+        changed = 0
+        with self._session(strict=True) as conn:
+            if conn is None:
+                payload = self._read_yaml()
+                for run_id, rec in updates.items():
+                    if rec is None:
+                        changed += payload["runs"].pop(run_id, None) is not None
+                    elif payload["runs"].get(run_id) != rec:
+                        payload["runs"][run_id] = rec
+                        changed += 1
+                if changed:
+                    self._write_yaml(payload)
+                return changed
+            with conn:
+                for run_id, rec in updates.items():
+                    row = conn.execute("SELECT record FROM keep_rules WHERE run_id = ?", (run_id,)).fetchone()
+                    if rec is None:
+                        if row is not None:
+                            conn.execute("DELETE FROM keep_rules WHERE run_id = ?", (run_id,))
+                            changed += 1
+                        continue
+                    record = json.dumps(rec, default=str)
+                    if row is None or json.loads(row[0]) != json.loads(record):
+                        conn.execute("INSERT OR REPLACE INTO keep_rules VALUES (?, ?)", (run_id, record))
+                        changed += 1
+            if changed:
+                self._export(conn)
+        return changed
+
+
 def load_rules(path: Path) -> dict[str, Any]:
-    if not path.exists():
-        return default_rules()
+    return KeepRulesStore(path).load()
+
+
+def update_rules(path: Path, updates: dict[str, dict[str, Any] | None]) -> int:
+    return KeepRulesStore(path).update(updates)
+
+
+def load_active_keep_runs(path: Path) -> tuple[set[str], list[str]]:
+    return KeepRulesStore(path).active()
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    # Write to a sibling temp file and rename so readers never see a half-written file.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
     try:
-        payload = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-    except Exception as exc:  # noqa: BLE001
-        raise SystemExit(f"Failed to parse keep_rules file {path}: {exc}") from exc
-    if not isinstance(payload, dict):
-        raise SystemExit(f"Invalid keep_rules format in {path}: expected mapping at top level")
-    payload.setdefault("schema_version", 1)
-    payload.setdefault("updated_at", now_iso())
-    if not isinstance(payload.get("runs"), dict):
-        payload["runs"] = {}
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+def write_json_atomic(path: Path, payload: Any) -> None:
+    write_text_atomic(path, json.dumps(payload, indent=2))
+
+
+def manifest_journal_path(manifest_path: Path) -> Path:
+    return manifest_path.with_suffix(".jsonl")
+
+
+class ManifestJournal:
+    # Append-only JSON-lines companion of a manifest. Each processed record is appended
+    # and fsynced; compact() writes the summary JSON and stores the journal offset it
+    # covers, so load_manifest() only replays lines written after the last compaction.
+    # Checkpoint lines record per-run phase progress for --resume (see load_checkpoints).
+    def __init__(self, manifest_path: Path, metadata: dict[str, Any] | None = None):
+        self.manifest_path = manifest_path.with_suffix(".json")
+        self.path = manifest_journal_path(self.manifest_path)
+        self.metadata = dict(metadata or {})
+        self._handle: Any = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> Any:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, "ab")
+            if self._handle.tell() == 0:
+                self._write({"type": "header", "metadata": self.metadata})
+        return self._handle
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        handle = self._handle
+        handle.write((json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8"))
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    def append(self, index: int, record: dict[str, Any]) -> None:
+        with self._lock:
+            self._open()
+            self._write({"type": "record", "index": index, "record": record})
+
+    def checkpoint(self, run_id: str, phase: str, **data: Any) -> None:
+        # Safe to call from worker threads.
+        with self._lock:
+            self._open()
+            self._write({"type": "checkpoint", "run_id": run_id, "phase": phase, "at": now_iso(), **data})
+
+    def compact(self, payload: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            offset = self._open().tell()
+            compacted = {**payload, "journal_path": str(self.path), "journal_offset": offset}
+            write_json_atomic(self.manifest_path, compacted)
+        return compacted
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+
+def _journal_entries(journal: Path, offset: int = 0) -> Any:
+    with open(journal, "rb") as fh:
+        fh.seek(offset)
+        for raw in fh:
+            if not raw.endswith(b"\n"):
+                break  # torn final line from a crash mid-append
+            try:
+                yield json.loads(raw)
+            except ValueError:
+                break
+
+
+def load_checkpoints(path: Path) -> dict[str, dict[str, Any]]:
+    # run_id -> {"phases": [...], "digests": {rel: digest}, "file_stats": {rel: [size, mtime_ns]},
+    # "details": {phase: {...}}} from a manifest's journal.
+    state: dict[str, dict[str, Any]] = {}
+    journal = manifest_journal_path(path)
+    if not journal.is_file():
+        return state
+    for entry in _journal_entries(journal):
+        if entry.get("type") != "checkpoint":
+            continue
+        run = state.setdefault(str(entry.get("run_id")), {"phases": [], "digests": {}, "file_stats": {}, "details": {}})
+        phase = str(entry.get("phase"))
+        if phase == "verify_progress":
+            run["digests"].update(entry.get("digests") or {})
+            continue
+        if phase == "copy_started":
+            # A new copy attempt invalidates later phases from an earlier attempt.
+            run.update(phases=[], digests={}, file_stats={}, details={})
+        if phase not in run["phases"]:
+            run["phases"].append(phase)
+        # The "verified" checkpoint carries the full fingerprint table of the run.
+        run["digests"].update(entry.get("digests") or {})
+        run["file_stats"].update(entry.get("file_stats") or {})
+        if entry.get("details"):
+            run["details"][phase] = entry["details"]
+    return state
+
+
+def load_manifest(path: Path) -> dict[str, Any]:
+    # Accepts a compacted manifest (.json) or a bare journal (.jsonl) left by an
+    # interrupted run; journal records are keyed by their position in "records".
+    payload: dict[str, Any] = {}
+    offset = 0
+    if path.suffix != ".jsonl":
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(payload, dict):
+            raise ValueError(f"Manifest is not a JSON object: {path}")
+        offset = int(payload.get("journal_offset") or 0)
+    journal = manifest_journal_path(path)
+    if not journal.is_file():
+        return payload
+    records = dict(enumerate(payload.get("records") or []))
+    updated = False
+    for entry in _journal_entries(journal, offset):
+        if entry.get("type") == "header":
+            for key, value in (entry.get("metadata") or {}).items():
+                payload.setdefault(key, value)
+        elif entry.get("type") == "record":
+            records[int(entry["index"])] = entry["record"]
+            updated = True
+    if updated or "records" not in payload:
+        payload["records"] = [records[i] for i in sorted(records)]
     return payload
 
 
-def save_rules(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    payload["updated_at"] = now_iso()
-    path.write_text(yaml.safe_dump(payload, sort_keys=False), encoding="utf-8")
+MANIFEST_INDEX_FILENAME = "manifest_index.sqlite"
+MANIFEST_PREFIXES = ("archive_fastq_", "archive_projects_", "archive_raw_", "archive_rawdata_")
+_MANIFEST_INDEX_COLUMNS = (
+    "run_id",
+    "status",
+    "copy_status",
+    "verify_status",
+    "cleanup_status",
+    "cleanup_mode",
+    "source",
+    "target",
+    "run_date",
+)
+_MANIFEST_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifests (
+    path TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    dry_run INTEGER NOT NULL,
+    record_count INTEGER NOT NULL,
+    error TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manifest_records (
+    manifest TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    workflow TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    copy_status TEXT NOT NULL,
+    verify_status TEXT NOT NULL,
+    cleanup_status TEXT NOT NULL,
+    cleanup_mode TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    PRIMARY KEY (manifest, position)
+);
+CREATE INDEX IF NOT EXISTS manifest_records_run ON manifest_records (run_id);
+CREATE INDEX IF NOT EXISTS manifest_records_status ON manifest_records (status, cleanup_status);
+CREATE INDEX IF NOT EXISTS manifest_records_target ON manifest_records (target);
+CREATE INDEX IF NOT EXISTS manifest_records_created ON manifest_records (created_at);
+"""
+
+
+def list_manifests(manifest_dir: Path) -> list[Path]:
+    # Archive manifests by their .json path, including bare journals of interrupted runs.
+    found: set[Path] = set()
+    for prefix in MANIFEST_PREFIXES:
+        for path in manifest_dir.glob(f"{prefix}*.json*"):
+            if path.suffix in {".json", ".jsonl"}:
+                found.add(path.with_suffix(".json"))
+    return sorted(found)
+
+
+def _manifest_signature(manifest_path: Path) -> str | None:
+    parts = []
+    for path in (manifest_path, manifest_journal_path(manifest_path)):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            parts.append("-")
+            continue
+        parts.append(f"{st.st_size}:{st.st_mtime_ns}")
+    return None if parts == ["-", "-"] else "/".join(parts)
+
+
+@dataclass
+class ManifestIndexRefresh:
+    indexed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+class ManifestIndex:
+    # SQLite index over the records of every archive manifest in a manifest directory. A manifest
+    # is re-read only when its .json or .jsonl changed size or mtime since it was last indexed.
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        # Rollback journal: the manifest directory may be on NFS, where WAL is unsafe. Set
+        # explicitly because the journal mode persists in indexes created in WAL mode.
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.executescript(_MANIFEST_INDEX_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def refresh(self, manifest_dir: Path, rebuild: bool = False) -> ManifestIndexRefresh:
+        result = ManifestIndexRefresh()
+        known = {row[0]: row[1] for row in self._conn.execute("SELECT path, signature FROM manifests")}
+        present: set[str] = set()
+        for path in list_manifests(manifest_dir):
+            signature = _manifest_signature(path)
+            if signature is None:
+                continue
+            present.add(str(path))
+            if not rebuild and known.get(str(path)) == signature:
+                result.unchanged += 1
+                continue
+            error = self.ingest(path, signature)
+            result.indexed += 1
+            if error:
+                result.errors.append(f"{path}: {error}")
+        gone = [(key,) for key in known if key not in present]
+        with self._conn:
+            self._conn.executemany("DELETE FROM manifest_records WHERE manifest = ?", gone)
+            self._conn.executemany("DELETE FROM manifests WHERE path = ?", gone)
+        result.removed = len(gone)
+        return result
+
+    def ingest(self, manifest_path: Path, signature: str | None = None) -> str:
+        # (Re)indexes one manifest; returns the load error for unreadable ones, which are kept
+        # as empty entries so they are not re-read until they change.
+        manifest_path = manifest_path.with_suffix(".json")
+        signature = signature or _manifest_signature(manifest_path) or ""
+        error = ""
+        try:
+            source = manifest_path if manifest_path.exists() else manifest_journal_path(manifest_path)
+            payload = load_manifest(source)
+        except (OSError, ValueError) as exc:
+            payload, error = {}, str(exc)
+        records = payload.get("records")
+        if not isinstance(records, list):
+            records = []
+        workflow = str(
+            payload.get("workflow_id")
+            or next((prefix[:-1] for prefix in MANIFEST_PREFIXES if manifest_path.name.startswith(prefix)), "")
+        )
+        created_at = str(payload.get("created_at") or "")
+        key = str(manifest_path)
+        rows = [
+            (
+                key,
+                position,
+                workflow,
+                created_at,
+                *(str(rec.get(column) or "") for column in _MANIFEST_INDEX_COLUMNS),
+                int(rec.get("size_bytes") or 0),
+            )
+            for position, rec in enumerate(records)
+            if isinstance(rec, dict)
+        ]
+        with self._conn:
+            self._conn.execute("DELETE FROM manifest_records WHERE manifest = ?", (key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manifests (path, signature, workflow, created_at, dry_run, record_count, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, signature, workflow, created_at, int(bool(payload.get("dry_run"))), len(rows), error),
+            )
+            self._conn.executemany(
+                f"INSERT INTO manifest_records (manifest, position, workflow, created_at, "
+                f"{', '.join(_MANIFEST_INDEX_COLUMNS)}, size_bytes) "
+                f"VALUES ({', '.join('?' * (len(_MANIFEST_INDEX_COLUMNS) + 5))})",
+                rows,
+            )
+        return error
+
+    def query(
+        self,
+        run_id: str | None = None,
+        status: str | None = None,
+        workflow: str | None = None,
+        target: str | None = None,
+        cleanup_status: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        include_dry_run: bool = False,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        # Text filters are shell-style globs; since/until compare the manifest's created_at
+        # with a date or timestamp prefix (both inclusive).
+        clauses: list[str] = []
+        args: list[Any] = []
+        for column, value in (
+            ("run_id", run_id),
+            ("status", status),
+            ("workflow", workflow),
+            ("target", target),
+            ("cleanup_status", cleanup_status),
+        ):
+            if value:
+                clauses.append(f"r.{column} GLOB ?")
+                args.append(value)
+        if since:
+            clauses.append("r.created_at >= ?")
+            args.append(since)
+        if until:
+            clauses.append("substr(r.created_at, 1, length(?)) <= ?")
+            args.extend([until, until])
+        if not include_dry_run:
+            clauses.append("m.dry_run = 0")
+        sql = "SELECT r.* FROM manifest_records r JOIN manifests m ON m.path = r.manifest"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY r.created_at, r.manifest, r.position"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self._conn.execute(sql, args)]
+
+    def counts(self) -> tuple[int, int]:
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(record_count), 0) FROM manifests").fetchone()
+        return int(row[0]), int(row[1])
+
+
+def open_manifest_index(manifest_dir: Path) -> ManifestIndex:
+    return ManifestIndex(manifest_dir / MANIFEST_INDEX_FILENAME)
+
+
+def run_batch(
+    items: Sequence[T],
+    worker: Callable[[T], R],
+    parallel_runs: int,
+    on_result: Callable[[int, R], None],
+) -> None:
+    # on_result always runs on the calling thread, so manifest/log bookkeeping stays serialized.
+    if parallel_runs <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            on_result(index, worker(item))
+        return
+    with ThreadPoolExecutor(max_workers=parallel_runs, thread_name_prefix="archive-run") as pool:
+        futures = {pool.submit(worker, item): index for index, item in enumerate(items)}
+        try:
+            for future in as_completed(futures):
+                on_result(futures[future], future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
 
 
-def load_active_keep_runs(path: Path) -> tuple[set[str], list[str]]:
-    if not path.exists():
-        return set(), []
+def order_jobs(items: Sequence[T], order: str, size: Callable[[T], int], age: Callable[[T], Any]) -> list[T]:
+    if order == "oldest-first":
+        return sorted(items, key=age)
+    if order == "largest-first":
+        return sorted(items, key=lambda item: (-size(item), age(item)))
+    raise ValueError(f"job_order must be one of: {', '.join(JOB_ORDERS)}")
+
+
+def load_mount_prefixes(path: Path = HOSTS_CONFIG_PATH) -> list[str]:
+    # Host mount prefixes from config/hosts.yaml, longest first so nested mounts win.
     try:
         payload = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-    except Exception as exc:  # noqa: BLE001
-        return set(), [f"Failed to parse keep_rules file {path}: {exc}"]
-    if not isinstance(payload, dict):
-        return set(), [f"Invalid keep_rules format in {path}: expected mapping"]
-    runs = payload.get("runs") or {}
-    if not isinstance(runs, dict):
-        return set(), [f"Invalid keep_rules.runs format in {path}: expected mapping"]
-
-    active: set[str] = set()
-    notes: list[str] = []
-    today = date.today()
-    for run_id, rec in runs.items():
-        run_id_s = str(run_id).strip()
-        if not run_id_s:
+    except (OSError, yaml.YAMLError):
+        return []
+    hosts = payload.get("hosts") if isinstance(payload, dict) else None
+    if not isinstance(hosts, dict):
+        return []
+    prefixes = {
+        str(host["mount_prefix"]).rstrip("/")
+        for host in hosts.values()
+        if isinstance(host, dict) and host.get("mount_prefix")
+    }
+    return sorted((p for p in prefixes if p), key=len, reverse=True)
+
+
+def mount_key(path: Path, prefixes: Sequence[str]) -> str:
+    text = os.path.abspath(path)
+    for prefix in prefixes:
+        if text == prefix or text.startswith(prefix + "/"):
+            return prefix
+    # Not under a configured host mount: fall back to the local mount point.
+    current = Path(text)
+    while current != current.parent and not os.path.ismount(current):
+        current = current.parent
+    return str(current)
+
+
+class TransferScheduler:
+    # Admission control for copy processes. A copy holds one stream slot on both its
+    # source and its target mount; each mount's bandwidth budget is split evenly over
+    # its stream slots and handed to rsync as --bwlimit (KiB/s).
+    def __init__(
+        self,
+        max_streams_per_mount: int = 0,
+        bwlimit_mbps_per_mount: int = 0,
+        io_nice: bool = False,
+        parallel_runs: int = 1,
+        prefixes: Sequence[str] | None = None,
+    ):
+        self.max_streams = max(0, max_streams_per_mount)
+        self.bwlimit_mbps = max(0, bwlimit_mbps_per_mount)
+        self.io_nice = io_nice
+        self.prefixes = list(prefixes) if prefixes is not None else load_mount_prefixes()
+        self._streams = self.max_streams or max(1, parallel_runs)
+        self._active: dict[str, int] = {}
+        self._waiting: list[tuple[int, list[str]]] = []
+        self._tickets = 0
+        self._cond = threading.Condition()
+
+    def stream_bwlimit_kbps(self) -> int | None:
+        if not self.bwlimit_mbps:
+            return None
+        return max(1, self.bwlimit_mbps * 1024 // self._streams)
+
+    def command_prefix(self) -> list[str]:
+        if not self.io_nice:
+            return []
+        prefix: list[str] = []
+        if shutil.which("ionice"):
+            prefix.extend(["ionice", "-c", "2", "-n", "7"])
+        if shutil.which("nice"):
+            prefix.extend(["nice", "-n", "10"])
+        return prefix
+
+    def describe(self) -> str:
+        streams = str(self.max_streams) if self.max_streams else "unlimited"
+        bandwidth = f"{self.bwlimit_mbps} MB/s" if self.bwlimit_mbps else "unlimited"
+        return f"streams/mount={streams}, bandwidth/mount={bandwidth}, io_nice={'on' if self.io_nice else 'off'}"
+
+    def _admissible(self, entry: tuple[int, list[str]]) -> bool:
+        ticket, mounts = entry
+        if self.max_streams and any(self._active.get(m, 0) >= self.max_streams for m in mounts):
+            return False
+        # Earlier waiters on a shared mount go first, so copies start in job order.
+        return not any(other < ticket and set(others) & set(mounts) for other, others in self._waiting)
+
+    @contextlib.contextmanager
+    def slot(self, source: Path, target: Path) -> Iterator[int | None]:
+        mounts = sorted({mount_key(source, self.prefixes), mount_key(target, self.prefixes)})
+        with self._cond:
+            self._tickets += 1
+            entry = (self._tickets, mounts)
+            self._waiting.append(entry)
+            # Both mounts are taken together under one lock, so two copies can never
+            # each hold one side while waiting for the other.
+            while not self._admissible(entry):
+                self._cond.wait()
+            self._waiting.remove(entry)
+            for mount in mounts:
+                self._active[mount] = self._active.get(mount, 0) + 1
+            self._cond.notify_all()
+        try:
+            yield self.stream_bwlimit_kbps()
+        finally:
+            with self._cond:
+                for mount in mounts:
+                    self._active[mount] -= 1
+                self._cond.notify_all()
+
+
+def _clone_file(src_fd: int, dst_fd: int) -> bool:
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        return True
+    except OSError as exc:
+        if exc.errno in _NO_CLONE_ERRNOS:
+            return False
+        raise
+
+
+def _kernel_copy(src_fd: int, dst_fd: int) -> int:
+    # copy_file_range keeps the data in the kernel (and lets NFS 4.2 / XFS / Btrfs copy or share
+    # extents server-side); plain read/write only when the kernel refuses the pair of files.
+    copied = 0
+    use_range = hasattr(os, "copy_file_range")
+    while True:
+        if use_range:
+            try:
+                n = os.copy_file_range(src_fd, dst_fd, NATIVE_COPY_CHUNK_BYTES)
+            except OSError as exc:
+                if exc.errno not in _NO_CLONE_ERRNOS or copied:
+                    raise
+                use_range = False
+                continue
+        else:
+            chunk = os.read(src_fd, NATIVE_COPY_CHUNK_BYTES)
+            n = len(chunk)
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(dst_fd, view) :]
+        if n == 0:
+            return copied
+        copied += n
+
+
+def native_copy_reason(source: Path, target_dir: Path) -> str | None:
+    # Why the native backend can be used for source -> target_dir, or None to stay on rsync.
+    try:
+        if os.stat(source).st_dev == os.stat(target_dir).st_dev:
+            return "same filesystem"
+    except OSError:
+        return None
+    # Different st_dev can still share a reflink-capable pool (e.g. Btrfs subvolumes): try to
+    # clone one small file from the run into a throwaway file on the target.
+    probe_src = None
+    with contextlib.suppress(OSError), os.scandir(source) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                probe_src = entry.path
+                break
+    if probe_src is None:
+        return None
+    try:
+        fd, tmp_name = tempfile.mkstemp(prefix=".reflink-probe.", dir=target_dir)
+    except OSError:
+        return None
+    try:
+        src_fd = os.open(probe_src, os.O_RDONLY)
+        try:
+            return "reflink" if _clone_file(src_fd, fd) else None
+        finally:
+            os.close(src_fd)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+
+
+@dataclass
+class NativeCopy:
+    file_count: int = 0
+    skipped_count: int = 0
+    cloned_count: int = 0
+    link_count: int = 0
+    dir_count: int = 0
+    bytes_done: int = 0
+    seconds: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "copy_backend": "native",
+            "copy_bytes": self.bytes_done,
+            "copy_seconds": round(self.seconds, 3),
+            "copy_rate_bps": round(self.bytes_done / self.seconds) if self.seconds > 0 else 0,
+            "copy_cloned_files": self.cloned_count,
+            "copy_skipped_files": self.skipped_count,
+        }
+
+
+def native_copy_tree(
+    source: Path,
+    target: Path,
+    exclude_patterns: Sequence[str] = (),
+    preserve_perms: bool = False,
+    preserve_group: bool = False,
+    dir_times: bool = False,
+    workers: int = NATIVE_COPY_WORKERS,
+) -> NativeCopy:
+    # In-kernel replacement for `rsync -a [--no-perms] [--no-group] [--omit-dir-times] source/
+    # target/`: reflinks (FICLONE) where the filesystem allows, copy_file_range otherwise.
+    # Like rsync it skips files whose size and mtime already match, preserves symlinks and file
+    # mtimes, keeps owners only when running as root, and with --no-perms gives new files the
+    # source mode masked by the umask. Each file is written to a temp name and renamed into
+    # place. Device/special files are not supported; errors are raised as one OSError at the end.
+    started = time.monotonic()
+    result = NativeCopy()
+    flt = RsyncExcludeFilter(exclude_patterns)
+    umask = os.umask(0)
+    os.umask(umask)
+    as_root = os.geteuid() == 0
+    clone_ok = [True]
+    lock = threading.Lock()
+
+    def _apply_meta(path: str, st: os.stat_result, is_link: bool = False) -> None:
+        if as_root:
+            os.chown(path, st.st_uid, st.st_gid if preserve_group else -1, follow_symlinks=not is_link)
+        if not is_link:
+            os.chmod(path, stat.S_IMODE(st.st_mode) if preserve_perms else stat.S_IMODE(st.st_mode) & ~umask)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns), follow_symlinks=not is_link)
+
+    def _copy_file(src: str, dst: str, st: os.stat_result) -> tuple[int, bool]:
+        dst_dir, name = os.path.split(dst)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{name}.", dir=dst_dir)
+        try:
+            src_fd = os.open(src, os.O_RDONLY)
+            try:
+                cloned = clone_ok[0] and _clone_file(src_fd, fd)
+                if not cloned:
+                    clone_ok[0] = False
+                    size = _kernel_copy(src_fd, fd)
+                else:
+                    size = st.st_size
+            finally:
+                os.close(src_fd)
+            os.close(fd)
+            fd = -1
+            _apply_meta(tmp_name, st)
+            os.replace(tmp_name, dst)
+            return size, cloned
+        except BaseException:
+            if fd >= 0:
+                os.close(fd)
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
+            raise
+
+    def _file_job(src: str, dst: str, rel: str, st: os.stat_result) -> None:
+        try:
+            size, cloned = _copy_file(src, dst, st)
+        except OSError as exc:
+            with lock:
+                result.errors.append(f"{rel}: {exc}")
+            return
+        with lock:
+            result.file_count += 1
+            result.bytes_done += size
+            result.cloned_count += cloned
+
+    dirs: list[tuple[str, os.stat_result]] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running: set[Future[None]] = set()
+        stack: list[tuple[str, str, str]] = [(str(source), str(target), "")]
+        while stack:
+            src_dir, dst_dir, rel_dir = stack.pop()
+            try:
+                dir_st = os.stat(src_dir)
+                os.makedirs(dst_dir, exist_ok=True)
+                with os.scandir(src_dir) as it:
+                    entries = list(it)
+            except OSError as exc:
+                if not rel_dir:
+                    raise
+                result.errors.append(f"{rel_dir}: {exc}")
+                continue
+            dirs.append((dst_dir, dir_st))
+            result.dir_count += 1
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                dst = os.path.join(dst_dir, entry.name)
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    if stat.S_ISDIR(st.st_mode):
+                        if not flt.excluded(rel, True):
+                            stack.append((entry.path, dst, rel))
+                        continue
+                    if flt.excluded(rel, False):
+                        continue
+                    if stat.S_ISLNK(st.st_mode):
+                        link = os.readlink(entry.path)
+                        with contextlib.suppress(FileNotFoundError):
+                            if os.path.islink(dst) and os.readlink(dst) == link:
+                                continue
+                            if os.path.isdir(dst) and not os.path.islink(dst):
+                                raise IsADirectoryError(errno.EISDIR, "target is a directory", dst)
+                            os.unlink(dst)
+                        os.symlink(link, dst)
+                        _apply_meta(dst, st, is_link=True)
+                        result.link_count += 1
+                        continue
+                    if not stat.S_ISREG(st.st_mode):
+                        raise OSError(errno.EOPNOTSUPP, "special file not supported by the native copy backend")
+                    with contextlib.suppress(FileNotFoundError):
+                        dst_st = os.lstat(dst)
+                        if (
+                            stat.S_ISREG(dst_st.st_mode)
+                            and dst_st.st_size == st.st_size
+                            and dst_st.st_mtime_ns == st.st_mtime_ns
+                        ):
+                            result.skipped_count += 1
+                            continue
+                except OSError as exc:
+                    result.errors.append(f"{rel}: {exc}")
+                    continue
+                running.add(pool.submit(_file_job, entry.path, dst, rel, st))
+                if len(running) >= workers * 4:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+        for future in running:
+            future.result()
+    for dst_dir, dir_st in reversed(dirs):
+        try:
+            if as_root:
+                os.chown(dst_dir, dir_st.st_uid, dir_st.st_gid if preserve_group else -1)
+            if preserve_perms:
+                os.chmod(dst_dir, stat.S_IMODE(dir_st.st_mode))
+            if dir_times:
+                os.utime(dst_dir, ns=(dir_st.st_atime_ns, dir_st.st_mtime_ns))
+        except OSError as exc:
+            result.errors.append(f"{dst_dir}: {exc}")
+    result.seconds = time.monotonic() - started
+    if result.errors:
+        more = f" (+{len(result.errors) - 5} more)" if len(result.errors) > 5 else ""
+        raise OSError(f"Native copy of {source} failed: {'; '.join(result.errors[:5])}{more}")
+    return result
+
+
+@dataclass
+class CopyShard:
+    index: int
+    files: list[str] = field(default_factory=list)
+    size_bytes: int = 0
+
+
+@dataclass
+class ShardedCopy:
+    shards: list[CopyShard]
+    results: list[Any]
+    final: Any
+    seconds: float
+
+    def stats(self) -> dict[str, Any]:
+        copies = [*self.results, self.final]
+        bytes_done = sum(getattr(copy, "bytes_done", 0) for copy in copies)
+        stats = self.final.stats()
+        stats.update(
+            {
+                "copy_shards": len(self.shards),
+                "copy_bytes": bytes_done,
+                "copy_seconds": round(self.seconds, 3),
+                "copy_rate_bps": round(bytes_done / self.seconds) if self.seconds > 0 else 0,
+            }
+        )
+        if "copy_peak_rate_bps" in stats:
+            # Shards run side by side, so their peaks add up.
+            stats["copy_peak_rate_bps"] = round(sum(getattr(copy, "peak_rate_bps", 0.0) for copy in self.results))
+        return stats
+
+
+def list_copy_files(source: Path, exclude_patterns: Sequence[str] = ()) -> list[tuple[str, int]]:
+    # Files and symlinks `rsync -a --exclude ... source/` would transfer, with their sizes.
+    files: list[tuple[str, int]] = []
+    for rel, kind in _verify_walk(source, RsyncExcludeFilter(exclude_patterns)):
+        if kind == "dir":
             continue
-        if not isinstance(rec, dict):
-            notes.append(f"Invalid keep_rules record for run_id={run_id_s}: expected mapping")
+        size = 0
+        if kind == "file":
+            with contextlib.suppress(OSError):
+                size = os.lstat(os.path.join(source, rel)).st_size
+        files.append((rel, size))
+    return files
+
+
+def shard_files(files: Sequence[tuple[str, int]], shards: int) -> list[CopyShard]:
+    # Greedy size balancing: largest file first, always onto the lightest shard.
+    count = max(1, min(shards, len(files)))
+    out = [CopyShard(index) for index in range(count)]
+    heap = [(0, index) for index in range(count)]
+    for rel, size in sorted(files, key=lambda item: (-item[1], item[0])):
+        load, index = heapq.heappop(heap)
+        out[index].files.append(rel)
+        out[index].size_bytes += size
+        heapq.heappush(heap, (load + size + COPY_SHARD_FILE_COST_BYTES, index))
+    for shard in out:
+        shard.files.sort()
+    return [shard for shard in out if shard.files]
+
+
+def copy_shards(
+    target: Path,
+    shards: Sequence[CopyShard],
+    copy_one: Callable[[CopyShard, Path], Any],
+    finalize: Callable[[], Any],
+) -> ShardedCopy:
+    # copy_one(shard, files_from) copies one shard from a NUL-separated list (rsync --from0
+    # --files-from). All shards run concurrently; only when every one succeeded does
+    # finalize() run, a full pass that settles directory metadata and anything missed.
+    started = time.monotonic()
+    for rel_dir in sorted({os.path.dirname(rel) for shard in shards for rel in shard.files}):
+        # Created up front so concurrent shards never race on the same parent directory.
+        (target / rel_dir).mkdir(parents=True, exist_ok=True)
+    results: list[Any] = [None] * len(shards)
+    errors: list[str] = []
+    with tempfile.TemporaryDirectory(prefix="archive-shards.") as tmp:
+        lists: list[Path] = []
+        for shard in shards:
+            path = Path(tmp) / f"shard{shard.index:03d}.list"
+            path.write_bytes(b"".join(os.fsencode(rel) + b"\0" for rel in shard.files))
+            lists.append(path)
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="archive-shard") as pool:
+            futures = {pool.submit(copy_one, shard, path): pos for pos, (shard, path) in enumerate(zip(shards, lists))}
+            for future in as_completed(futures):
+                pos = futures[future]
+                try:
+                    results[pos] = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    errors.append(f"shard {shards[pos].index + 1}: {exc}")
+    if errors:
+        raise RuntimeError(
+            f"{len(errors)} of {len(shards)} copy shards failed, directories not finalized: " + "; ".join(sorted(errors)[:3])
+        )
+    final = finalize()
+    return ShardedCopy(list(shards), results, final, time.monotonic() - started)
+
+
+_RSYNC_PROGRESS_RE = re.compile(
+    r"^\s*(?P<bytes>[\d.,]+)(?P<bsuffix>[KMGTP]?)\s+(?P<percent>\d+)%\s+"
+    r"(?P<rate>[\d.,]+)(?P<rsuffix>[kKMGTP]?)(?P<binary>i?)B/s\s+(?P<h>\d+):(?P<m>\d{2}):(?P<s>\d{2})"
+)
+_RSYNC_UNITS = {"": 0, "k": 1, "K": 1, "M": 2, "G": 3, "T": 4, "P": 5}
+
+
+@dataclass
+class RsyncProgress:
+    bytes_done: int
+    percent: int
+    rate_bps: float
+    eta_seconds: int
+
+
+def parse_rsync_progress(line: str) -> RsyncProgress | None:
+    # One --info=progress2 line, with or without --human-readable (single -h uses 1000-based units).
+    match = _RSYNC_PROGRESS_RE.match(line)
+    if match is None:
+        return None
+    try:
+        done = float(match["bytes"].replace(",", "")) * 1000 ** _RSYNC_UNITS[match["bsuffix"]]
+        base = 1024 if match["binary"] else 1000
+        rate = float(match["rate"].replace(",", "")) * base ** _RSYNC_UNITS[match["rsuffix"]]
+    except ValueError:
+        return None
+    eta = int(match["h"]) * 3600 + int(match["m"]) * 60 + int(match["s"])
+    return RsyncProgress(bytes_done=int(done), percent=int(match["percent"]), rate_bps=rate, eta_seconds=eta)
+
+
+@dataclass
+class RsyncResult:
+    cmd: list[str]
+    returncode: int
+    output_tail: list[str]
+    error_tail: list[str]
+    seconds: float
+    bytes_done: int = 0
+    peak_rate_bps: float = 0.0
+    summary: str | None = None
+
+    @property
+    def rate_bps(self) -> float:
+        return self.bytes_done / self.seconds if self.seconds > 0 else 0.0
+
+    def completed(self) -> subprocess.CompletedProcess[str]:
+        # Bounded stand-in for subprocess.run(capture_output=True) in failure summaries.
+        return subprocess.CompletedProcess(
+            self.cmd, self.returncode, "\n".join(self.output_tail), "\n".join(self.error_tail)
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "copy_backend": "rsync",
+            "copy_bytes": self.bytes_done,
+            "copy_seconds": round(self.seconds, 3),
+            "copy_rate_bps": round(self.rate_bps),
+            "copy_peak_rate_bps": round(self.peak_rate_bps),
+        }
+
+
+def run_rsync(
+    cmd: list[str],
+    on_progress: Callable[[RsyncProgress], None] | None = None,
+    tail_lines: int = RSYNC_TAIL_LINES,
+) -> RsyncResult:
+    # Streams rsync output instead of buffering the whole transcript: progress2 updates (split on
+    # \r) are parsed as they arrive and only the last tail_lines of other output are kept.
+    started = time.monotonic()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    error_tail: collections.deque[str] = collections.deque(maxlen=tail_lines)
+
+    def _drain_stderr() -> None:
+        for raw in proc.stderr:
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            if line:
+                error_tail.append(line)
+
+    stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+    stderr_thread.start()
+    result = RsyncResult(cmd=list(cmd), returncode=0, output_tail=[], error_tail=[], seconds=0.0)
+    output_tail: collections.deque[str] = collections.deque(maxlen=tail_lines)
+    pending = b""
+    fd = proc.stdout.fileno()
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        parts = re.split(rb"[\r\n]", pending + chunk)
+        pending = parts.pop()
+        for raw in parts:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            progress = parse_rsync_progress(line)
+            if progress is None:
+                output_tail.append(line)
+                continue
+            result.bytes_done = max(result.bytes_done, progress.bytes_done)
+            result.peak_rate_bps = max(result.peak_rate_bps, progress.rate_bps)
+            if "(xfr#" in line:
+                result.summary = line
+            if on_progress is not None:
+                on_progress(progress)
+    if pending.strip():
+        output_tail.append(pending.decode("utf-8", errors="replace").strip())
+    result.returncode = proc.wait()
+    stderr_thread.join()
+    proc.stdout.close()
+    proc.stderr.close()
+    result.seconds = time.monotonic() - started
+    result.output_tail = list(output_tail)
+    result.error_tail = list(error_tail)
+    return result
+
+
+class RsyncProgressReporter:
+    # on_progress callback for run_rsync. A single run on a terminal gets one self-updating status
+    # line; otherwise (parallel runs, logs) a plain line is printed at most every `interval` seconds.
+    def __init__(self, label: str, live: bool, interval: float = RSYNC_PROGRESS_INTERVAL):
+        self.label = label
+        self.live = live
+        self.interval = interval
+        self._last = 0.0
+        self._drawn = False
+
+    def __call__(self, progress: RsyncProgress) -> None:
+        now = time.monotonic()
+        if not self.live and now - self._last < self.interval:
+            return
+        self._last = now
+        eta = f"{progress.eta_seconds // 3600}:{progress.eta_seconds // 60 % 60:02d}:{progress.eta_seconds % 60:02d}"
+        text = (
+            f"[copy] {self.label}: {progress.percent:3d}%  {format_bytes(progress.bytes_done)}  "
+            f"{format_bytes(int(progress.rate_bps))}/s  ETA {eta}"
+        )
+        if self.live:
+            print("\r" + dim(text) + "\033[K", end="", flush=True)
+            self._drawn = True
+        else:
+            print(dim(text), flush=True)
+
+    def close(self) -> None:
+        if self._drawn:
+            print()
+            self._drawn = False
+
+
+def map_ordered(
+    items: Sequence[T],
+    worker: Callable[[T], R],
+    workers: int,
+    on_progress: Callable[[int, int, T], None] | None = None,
+) -> list[R]:
+    # Fans metadata probes out over a thread pool; results keep input order and on_progress
+    # runs on the calling thread once per finished item, so a progress bar stays monotonic.
+    total = len(items)
+    results: list[R] = []
+    if workers <= 1 or total <= 1:
+        for done, item in enumerate(items, start=1):
+            results.append(worker(item))
+            if on_progress is not None:
+                on_progress(done, total, item)
+        return results
+    slots: list[Any] = [None] * total
+    with ThreadPoolExecutor(max_workers=min(workers, total), thread_name_prefix="archive-discover") as pool:
+        futures = {pool.submit(worker, item): index for index, item in enumerate(items)}
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                slots[index] = future.result()
+                if on_progress is not None:
+                    on_progress(done, total, items[index])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return slots
+
+
+@dataclass
+class TreeRemoval:
+    file_count: int = 0
+    link_count: int = 0
+    dir_count: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def _unlink_batch(paths: list[tuple[str, str]]) -> tuple[int, int, list[str]]:
+    files = links = 0
+    errors: list[str] = []
+    for path, kind in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
             continue
-        if rec.get("keep", True) is False:
+        except OSError as exc:
+            errors.append(f"{path}: {exc}")
             continue
-        raw_keep_until = rec.get("keep_until")
-        if raw_keep_until in (None, ""):
-            active.add(run_id_s)
+        if kind == "link":
+            links += 1
+        else:
+            files += 1
+    return files, links, errors
+
+
+def _rmdir(path: str, ignore_not_empty: bool) -> str | None:
+    try:
+        os.rmdir(path)
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        if ignore_not_empty and exc.errno in (errno.ENOTEMPTY, errno.EEXIST):
+            return None
+        return f"{path}: {exc}"
+    return ""
+
+
+def remove_tree(
+    root: Path,
+    workers: int = DELETE_WORKERS,
+    keep: Callable[[str, str], bool] | None = None,
+    covers_dir: Callable[[str], bool] | None = None,
+    remove_root: bool = True,
+    dry_run: bool = False,
+    on_remove: Callable[[str, str], None] | None = None,
+) -> TreeRemoval:
+    # Deletes a tree with one scandir walk. Non-directory entries are unlinked by a thread
+    # pool while the walk continues; directories are then removed deepest level first,
+    # each level in parallel. Symlinks are unlinked, never followed, and a symlinked root
+    # is refused like shutil.rmtree. With `keep(rel, kind)` (kind: file/link/other) only
+    # unkept entries go and directories are removed only once empty; `covers_dir(rel)`
+    # marks subtrees whose entries are all kept. dry_run reports through on_remove(path,
+    # kind) what would go, where a directory counts only if it is already empty.
+    if os.path.islink(root):
+        raise OSError(f"Cannot call rmtree on a symbolic link: {root}")
+    result = TreeRemoval()
+    selective = keep is not None
+    levels: list[list[str]] = []
+    pending: set[Future] = set()
+
+    def _collect(done: set[Future]) -> None:
+        for future in done:
+            files, links, errors = future.result()
+            result.file_count += files
+            result.link_count += links
+            result.errors.extend(errors)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="archive-remove") as pool:
+        try:
+            stack: list[tuple[str, str, int, bool]] = [(str(root), "", 0, False)]
+            while stack:
+                dir_path, rel_dir, depth, covered = stack.pop()
+                try:
+                    with os.scandir(dir_path) as it:
+                        entries = list(it)
+                except OSError as exc:
+                    # Selective cleanup leaves unreadable directories in place.
+                    if not selective:
+                        result.errors.append(f"{dir_path}: {exc}")
+                    continue
+                if depth or remove_root:
+                    while len(levels) <= depth:
+                        levels.append([])
+                    levels[depth].append(dir_path)
+                    if dry_run and not entries and on_remove is not None:
+                        on_remove(dir_path, "dir")
+                batch: list[tuple[str, str]] = []
+                for entry in entries:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, rel, depth + 1, covered or bool(covers_dir and covers_dir(rel))))
+                        continue
+                    kind = "link" if entry.is_symlink() else "file" if entry.is_file(follow_symlinks=False) else "other"
+                    if covered or (selective and keep(rel, kind)):
+                        continue
+                    if dry_run:
+                        if on_remove is not None:
+                            on_remove(entry.path, kind)
+                        continue
+                    batch.append((entry.path, kind))
+                    if len(batch) >= 64:
+                        pending.add(pool.submit(_unlink_batch, batch))
+                        batch = []
+                if batch:
+                    pending.add(pool.submit(_unlink_batch, batch))
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _collect(done)
+            done, pending = wait(pending)
+            _collect(done)
+        finally:
+            for future in pending:
+                future.cancel()
+        if not dry_run:
+            for level in reversed(levels):
+                for outcome in pool.map(lambda path: _rmdir(path, selective), level):
+                    if outcome == "":
+                        result.dir_count += 1
+                    elif outcome is not None:
+                        result.errors.append(outcome)
+    if result.errors and not dry_run:
+        more = f" (+{len(result.errors) - 1} more)" if len(result.errors) > 1 else ""
+        raise OSError(f"Failed to remove {result.errors[0]}{more}")
+    return result
+
+
+def _glob_alternation(patterns: Sequence[str]) -> re.Pattern[str] | None:
+    # One regex for a whole pattern list; re alternation tries branches left to right,
+    # so lastgroup names the first pattern (in list order) that matches.
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?P<p{i}>{fnmatch.translate(pat)})" for i, pat in enumerate(patterns)))
+
+
+class ExcludeMatcher:
+    # Precompiled exclude list. match() returns the first pattern that matches the entry
+    # name or relative path as a glob, or that equals one of its path components.
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self.none = len(self.patterns)
+        self._regex = _glob_alternation(self.patterns)
+        self._literal: dict[str, int] = {}
+        for index, pat in enumerate(self.patterns):
+            self._literal.setdefault(pat, index)
+
+    def dir_index(self, inherited: int, name: str) -> int:
+        # Pattern index every entry below directory `name` already matches via its parts.
+        index = self._literal.get(name, self.none)
+        return index if index < inherited else inherited
+
+    def match_index(self, name: str, rel: str, inherited: int) -> int:
+        best = self.dir_index(inherited, name)
+        if best == 0 or self._regex is None:
+            return best
+        for text in (name, rel) if rel != name else (name,):
+            m = self._regex.match(text)
+            if m is not None:
+                index = int(m.lastgroup[1:])
+                if index < best:
+                    best = index
+        return best
+
+    def match(self, name: str, rel: str, parts: Sequence[str]) -> str | None:
+        inherited = self.none
+        for part in parts[:-1]:
+            inherited = self.dir_index(inherited, part)
+        index = self.match_index(name, rel, inherited)
+        return self.patterns[index] if index < self.none else None
+
+
+class PreserveMatcher:
+    # Precompiled preserve list (archive_cleanup keep_patterns). A file is preserved when
+    # a pattern matches its name or relative path, its path lies inside a matching
+    # directory, or a wildcard-free pattern equals one of its path components.
+    def __init__(self, patterns: Sequence[str]):
+        cleaned = [pat.strip().strip("/") for pat in patterns]
+        cleaned = [pat for pat in cleaned if pat]
+        self._literal = {pat for pat in cleaned if all(ch not in pat for ch in "*?[]")}
+        self._regex = _glob_alternation([p for pat in cleaned for p in (pat, pat + "/*")])
+
+    def covers_dir(self, rel_dir: str) -> bool:
+        # True when every file below rel_dir is preserved, so the subtree can be skipped.
+        if self._regex is not None and self._regex.match(rel_dir):
+            return True
+        return any(part in self._literal for part in rel_dir.split("/"))
+
+    def matches(self, rel: str) -> bool:
+        name = rel.rsplit("/", 1)[-1]
+        if self._regex is not None and (self._regex.match(name) or self._regex.match(rel)):
+            return True
+        return any(part in self._literal for part in rel.split("/"))
+
+
+@dataclass
+class TreeScan:
+    total_bytes: int = 0
+    archive_bytes: int = 0
+    excluded_bytes: int = 0
+    file_count: int = 0
+    dir_count: int = 0
+    excluded_file_count: int = 0
+    by_pattern: dict[str, int] = field(default_factory=dict)
+    # Keyed by top-level entry name ("name/" for directories) -> [total_bytes, archive_bytes].
+    top_level: dict[str, list[int]] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+
+def _scan_dir(
+    matcher: ExcludeMatcher,
+    dir_path: str,
+    rel_dir: str,
+    parts: tuple[str, ...],
+    inherited: int,
+) -> tuple[TreeScan, list[tuple[str, str, tuple[str, ...], int]], list[tuple[str, int, str | None]]]:
+    # One directory level: counts go into a partial TreeScan, subdirectories and file sizes are
+    # returned so the caller can merge them (and call on_file) on its own thread.
+    part = TreeScan()
+    subdirs: list[tuple[str, str, tuple[str, ...], int]] = []
+    files: list[tuple[str, int, str | None]] = []
+    with os.scandir(dir_path) as it:
+        entries = list(it)
+    for entry in entries:
+        name = entry.name
+        rel = f"{rel_dir}/{name}" if rel_dir else name
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            part.dir_count += 1
+            if not parts:
+                part.top_level.setdefault(name + "/", [0, 0])
+            try:
+                is_link = entry.is_symlink()
+            except OSError:
+                is_link = True
+            if not is_link:
+                subdirs.append((entry.path, rel, parts + (name,), matcher.dir_index(inherited, name)))
+            continue
+        part.file_count += 1
+        index = matcher.match_index(name, rel, inherited)
+        pat = matcher.patterns[index] if index < matcher.none else None
+        if pat is not None:
+            part.excluded_file_count += 1
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            continue
+        top = part.top_level.setdefault(parts[0] + "/" if parts else name, [0, 0])
+        part.total_bytes += size
+        top[0] += size
+        if pat is None:
+            part.archive_bytes += size
+            top[1] += size
+        else:
+            part.excluded_bytes += size
+            part.by_pattern[pat] = part.by_pattern.get(pat, 0) + size
+        files.append((rel, size, pat))
+    return part, subdirs, files
+
+
+def _merge_scan(scan: TreeScan, part: TreeScan) -> None:
+    scan.total_bytes += part.total_bytes
+    scan.archive_bytes += part.archive_bytes
+    scan.excluded_bytes += part.excluded_bytes
+    scan.file_count += part.file_count
+    scan.dir_count += part.dir_count
+    scan.excluded_file_count += part.excluded_file_count
+    for pat, size in part.by_pattern.items():
+        scan.by_pattern[pat] = scan.by_pattern.get(pat, 0) + size
+    for name, (total, archive) in part.top_level.items():
+        top = scan.top_level.setdefault(name, [0, 0])
+        top[0] += total
+        top[1] += archive
+
+
+def scan_tree(
+    root: Path,
+    exclude_patterns: Sequence[str] = (),
+    on_file: Callable[[str, int, str | None], None] | None = None,
+    workers: int = 1,
+) -> TreeScan:
+    # One os.scandir traversal replacing du -sb plus the per-question os.walk passes.
+    # Follows the os.walk/stat conventions of the old helpers: symlinked directories are
+    # counted but not descended, file sizes follow symlinks, unstatable files are skipped.
+    # With workers > 1 directories are listed and stat'ed on a thread pool; on_file still runs on
+    # the calling thread and totals are identical, only the visiting order differs.
+    scan = TreeScan()
+    matcher = ExcludeMatcher(exclude_patterns)
+    root_item = (str(root), "", (), matcher.none)
+
+    def _visit(item: tuple[str, str, tuple[str, ...], int]) -> Any:
+        try:
+            return _scan_dir(matcher, *item)
+        except OSError as exc:
+            if not item[2]:
+                raise
+            return exc
+
+    def _absorb(item: tuple[str, str, tuple[str, ...], int], result: Any) -> list[tuple[str, str, tuple[str, ...], int]]:
+        if isinstance(result, OSError):
+            scan.errors.append(f"{item[0]}: {result}")
+            return []
+        part, subdirs, files = result
+        _merge_scan(scan, part)
+        if on_file is not None:
+            for rel, size, pat in files:
+                on_file(rel, size, pat)
+        return subdirs
+
+    if workers <= 1:
+        stack = [root_item]
+        while stack:
+            item = stack.pop()
+            stack.extend(_absorb(item, _visit(item)))
+        return scan
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {pool.submit(_visit, root_item): root_item}
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                item = running.pop(future)
+                for sub in _absorb(item, future.result()):
+                    running[pool.submit(_visit, sub)] = sub
+    return scan
+
+
+class TopN:
+    # Keeps the n largest (size, item) pairs seen so far in a bounded min-heap.
+    def __init__(self, n: int):
+        self.n = n
+        self._heap: list[tuple[int, int, Any]] = []
+        self._seq = 0
+
+    def push(self, size: int, item: Any) -> None:
+        if self.n <= 0:
+            return
+        self._seq += 1
+        entry = (size, -self._seq, item)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> list[tuple[int, Any]]:
+        # Largest first; ties keep the order they were seen in.
+        return [(size, item) for size, _, item in sorted(self._heap, reverse=True)]
+
+
+_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_scans (
+    path TEXT NOT NULL,
+    patterns_key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    total_bytes INTEGER NOT NULL,
+    archive_bytes INTEGER NOT NULL,
+    excluded_bytes INTEGER NOT NULL,
+    file_count INTEGER NOT NULL,
+    dir_count INTEGER NOT NULL,
+    excluded_file_count INTEGER NOT NULL,
+    by_pattern TEXT NOT NULL,
+    top_level TEXT NOT NULL,
+    PRIMARY KEY (path, patterns_key)
+);
+CREATE TABLE IF NOT EXISTS run_meta (
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (path, name)
+);
+CREATE TABLE IF NOT EXISTS archived_content (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    quick_hash TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    dev INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archived_content_size ON archived_content (size);
+CREATE TABLE IF NOT EXISTS verified_targets (
+    target TEXT PRIMARY KEY,
+    manifest TEXT NOT NULL,
+    record_index INTEGER NOT NULL,
+    verified_at REAL NOT NULL
+);
+"""
+
+
+def _rsync_glob(pattern: str) -> str:
+    # rsync wildcards: "*" and "?" stop at "/", "**" crosses directories.
+    out: list[str] = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if ch == "*":
+            out.append("[^/]*")
+        elif ch == "?":
+            out.append("[^/]")
+        elif ch == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                out.append(re.escape(ch))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+                continue
+        elif ch == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return "".join(out)
+
+
+class RsyncExcludeFilter:
+    # The subset of rsync --exclude semantics the archive workflows rely on, applied to
+    # paths relative to the run directory: a trailing "/" only matches directories, a
+    # leading "/" anchors at the run root, and unanchored patterns match trailing path
+    # components. An excluded directory hides its whole subtree.
+    def __init__(self, patterns: Sequence[str]):
+        any_rules: list[str] = []
+        dir_rules: list[str] = []
+        for pat in patterns:
+            body = pat.rstrip("/")
+            if not body:
+                continue
+            if body.startswith("/"):
+                regex = "^" + _rsync_glob(body.lstrip("/")) + "$"
+            else:
+                regex = "(?:^|/)" + _rsync_glob(body) + "$"
+            (dir_rules if pat.endswith("/") else any_rules).append(regex)
+        self._any = re.compile("|".join(any_rules)) if any_rules else None
+        self._dir = re.compile("|".join(dir_rules)) if dir_rules else None
+
+    def excluded(self, rel: str, is_dir: bool) -> bool:
+        if self._any is not None and self._any.search(rel):
+            return True
+        return is_dir and self._dir is not None and self._dir.search(rel) is not None
+
+
+def _new_hasher(algorithm: str) -> Any:
+    if algorithm == "xxh128":
+        try:
+            import xxhash
+        except ImportError as exc:
+            raise RuntimeError("verify_algorithm xxh128 requires the xxhash package") from exc
+        return xxhash.xxh3_128()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+    return hashlib.new(algorithm)
+
+
+def check_verify_algorithm(algorithm: str) -> None:
+    if algorithm not in VERIFY_ALGORITHMS:
+        raise ValueError(f"verify_algorithm must be one of: {', '.join(VERIFY_ALGORITHMS)}")
+    _new_hasher(algorithm)
+
+
+def file_digest(path: Path | str, algorithm: str = "blake2b") -> str:
+    hasher = _new_hasher(algorithm)
+    buf = bytearray(VERIFY_CHUNK_BYTES)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as fh:
+        while True:
+            n = fh.readinto(buf)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+@dataclass
+class TreeVerify:
+    algorithm: str
+    file_count: int = 0
+    byte_count: int = 0
+    digests: dict[str, str] = field(default_factory=dict)
+    mismatches: list[str] = field(default_factory=list)
+    stopped_early: bool = False
+    # Target [size, mtime_ns] of every verified file; with `digests` this is the fingerprint
+    # table later runs re-check against (see reverify_fingerprints).
+    file_stats: dict[str, list[int]] = field(default_factory=dict)
+
+
+def _verify_walk(root: Path, flt: RsyncExcludeFilter) -> Any:
+    # Yields (rel, kind) for every entry rsync would transfer; kind is "dir", "link" or "file".
+    stack: list[tuple[str, str]] = [(str(root), "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_symlink():
+                if not flt.excluded(rel, False):
+                    yield rel, "link"
+                continue
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if flt.excluded(rel, is_dir):
+                continue
+            if is_dir:
+                yield rel, "dir"
+                stack.append((entry.path, rel))
+            elif entry.is_file(follow_symlinks=False):
+                yield rel, "file"
+
+
+def _verify_file(
+    source: Path,
+    target: Path,
+    rel: str,
+    algorithm: str,
+    known_digest: str | None = None,
+) -> tuple[str, int, str | None, str | None, int]:
+    src = source / rel
+    dst = target / rel
+    try:
+        dst_st = os.lstat(dst)
+    except FileNotFoundError:
+        return rel, 0, None, "missing in target", 0
+    if not stat.S_ISREG(dst_st.st_mode):
+        return rel, 0, None, "not a regular file in target", 0
+    src_st = os.stat(src)
+    src_size = src_st.st_size
+    mtime = dst_st.st_mtime_ns
+    if src_size != dst_st.st_size:
+        return rel, src_size, None, f"size differs (source {src_size}, target {dst_st.st_size})", mtime
+    if known_digest is not None and src_st.st_mtime_ns == mtime:
+        # Hashed equal by an earlier attempt or batch and untouched since.
+        return rel, src_size, known_digest, None, mtime
+    src_digest = file_digest(src, algorithm)
+    dst_digest = file_digest(dst, algorithm)
+    if src_digest != dst_digest:
+        return rel, src_size, src_digest, f"{algorithm} differs (source {src_digest}, target {dst_digest})", mtime
+    return rel, src_size, src_digest, None, mtime
+
+
+def verify_tree(
+    source: Path,
+    target: Path,
+    exclude_patterns: Sequence[str] = (),
+    algorithm: str = "blake2b",
+    workers: int = 0,
+    check_extra: bool = False,
+    max_mismatches: int = 20,
+    on_mismatch: Callable[[str, str], None] | None = None,
+    verified: dict[str, str] | None = None,
+    on_progress: Callable[[dict[str, str]], None] | None = None,
+) -> TreeVerify:
+    # Content verification of an rsync copy. Files are hashed on both sides by a thread
+    # pool; at most 4 * workers files are in flight, so read-ahead and memory stay bounded
+    # on runs with millions of files. Mismatches are reported through on_mismatch as soon
+    # as they are found, and the walk stops once max_mismatches have been collected.
+    # `verified` digests from a resumed attempt skip re-hashing files whose size and
+    # mtime still agree on both sides; on_progress receives new digests in batches.
+    result = TreeVerify(algorithm=algorithm)
+    workers = workers if workers > 0 else min(8, os.cpu_count() or 1)
+    flt = RsyncExcludeFilter(exclude_patterns)
+    seen: set[str] = set()
+    verified = verified or {}
+    progress: dict[str, str] = {}
+
+    def _mismatch(rel: str, reason: str) -> None:
+        result.mismatches.append(f"{rel}: {reason}")
+        if on_mismatch is not None:
+            on_mismatch(rel, reason)
+        if len(result.mismatches) >= max_mismatches:
+            result.stopped_early = True
+
+    def _collect(done: set[Future]) -> None:
+        for future in done:
+            rel, size, digest, reason, mtime = future.result()
+            result.file_count += 1
+            result.byte_count += size
+            if digest is not None:
+                result.digests[rel] = digest
+                if reason is None:
+                    result.file_stats[rel] = [size, mtime]
+                if reason is None and on_progress is not None and rel not in verified:
+                    progress[rel] = digest
+            if reason is not None:
+                _mismatch(rel, reason)
+        if on_progress is not None and len(progress) >= 1000:
+            on_progress(dict(progress))
+            progress.clear()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive-verify") as pool:
+        pending: set[Future] = set()
+        try:
+            for rel, kind in _verify_walk(source, flt):
+                if result.stopped_early:
+                    break
+                if check_extra:
+                    seen.add(rel)
+                if kind == "file":
+                    pending.add(pool.submit(_verify_file, source, target, rel, algorithm, verified.get(rel)))
+                    if len(pending) >= workers * 4:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        _collect(done)
+                    continue
+                dst = target / rel
+                if kind == "link":
+                    if not dst.is_symlink():
+                        _mismatch(rel, "symlink missing in target")
+                    elif os.readlink(source / rel) != os.readlink(dst):
+                        _mismatch(rel, "symlink target differs")
+                elif not dst.is_dir() or dst.is_symlink():
+                    _mismatch(rel, "directory missing in target")
+            done, pending = wait(pending)
+            _collect(done)
+            if progress and on_progress is not None:
+                on_progress(dict(progress))
+        finally:
+            for future in pending:
+                future.cancel()
+
+    if check_extra and not result.stopped_early:
+        for rel, _kind in _verify_walk(target, flt):
+            if rel not in seen:
+                _mismatch(rel, "extra in target")
+                if result.stopped_early:
+                    break
+    result.digests = dict(sorted(result.digests.items()))
+    result.file_stats = dict(sorted(result.file_stats.items()))
+    return result
+
+
+def fingerprint_table(record: dict[str, Any]) -> dict[str, tuple[int, int, str]]:
+    # rel -> (size, mtime_ns, digest) from a verified manifest record.
+    digests = record.get("verify_digests") or {}
+    stats = record.get("verify_file_stats") or {}
+    return {rel: (int(st[0]), int(st[1]), digests[rel]) for rel, st in stats.items() if rel in digests}
+
+
+def unchanged_digests(target: Path, table: dict[str, tuple[int, int, str]]) -> dict[str, str]:
+    # Stored digests of target files whose size and mtime still match the table; verify_tree
+    # reuses them for source files with the same size and mtime instead of hashing again.
+    known: dict[str, str] = {}
+    for rel, (size, mtime, digest) in table.items():
+        with contextlib.suppress(OSError):
+            st = os.lstat(target / rel)
+            if stat.S_ISREG(st.st_mode) and st.st_size == size and st.st_mtime_ns == mtime:
+                known[rel] = digest
+    return known
+
+
+@dataclass
+class FingerprintVerify:
+    algorithm: str
+    file_count: int = 0
+    unchanged_count: int = 0
+    rehashed_count: int = 0
+    rehashed_bytes: int = 0
+    digests: dict[str, str] = field(default_factory=dict)
+    file_stats: dict[str, list[int]] = field(default_factory=dict)
+    mismatches: list[str] = field(default_factory=list)
+
+
+def reverify_fingerprints(
+    target: Path,
+    table: dict[str, tuple[int, int, str]],
+    algorithm: str = "blake2b",
+    workers: int = 0,
+) -> FingerprintVerify:
+    # Re-checks an archived tree against the fingerprint table of its last verification
+    # without the source. Files whose size and mtime are unchanged count as proven by the
+    # table; only files with a new mtime are read and compared with the stored digest.
+    result = FingerprintVerify(algorithm=algorithm, file_count=len(table))
+    changed: list[tuple[str, os.stat_result]] = []
+    for rel, (size, mtime, digest) in sorted(table.items()):
+        try:
+            st = os.lstat(target / rel)
+        except FileNotFoundError:
+            result.mismatches.append(f"{rel}: missing in target")
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            result.mismatches.append(f"{rel}: not a regular file in target")
+        elif st.st_size != size:
+            result.mismatches.append(f"{rel}: size differs (recorded {size}, target {st.st_size})")
+        elif st.st_mtime_ns == mtime:
+            result.unchanged_count += 1
+            result.digests[rel] = digest
+            result.file_stats[rel] = [size, mtime]
+        else:
+            changed.append((rel, st))
+    workers = workers if workers > 0 else min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive-reverify") as pool:
+        hashed = pool.map(lambda item: file_digest(target / item[0], algorithm), changed)
+        for (rel, st), digest in zip(changed, hashed):
+            result.rehashed_count += 1
+            result.rehashed_bytes += st.st_size
+            if digest != table[rel][2]:
+                result.mismatches.append(f"{rel}: {algorithm} differs (recorded {table[rel][2]}, target {digest})")
+                continue
+            result.digests[rel] = digest
+            result.file_stats[rel] = [st.st_size, st.st_mtime_ns]
+    result.digests = dict(sorted(result.digests.items()))
+    result.file_stats = dict(sorted(result.file_stats.items()))
+    return result
+
+
+_VERIFIED_MANIFESTS: collections.OrderedDict[tuple[str, int, int], list[Any]] = collections.OrderedDict()
+_VERIFIED_MANIFESTS_LOCK = threading.Lock()
+
+
+def load_verified_record(manifest: Path, index: int, target: Path) -> dict[str, Any] | None:
+    # The record behind a RunCatalog.verified_record() pointer, if it still describes a
+    # verified copy at `target`. The last two manifests stay parsed, since one batch
+    # manifest usually covers many runs looked up in a row.
+    try:
+        journal = manifest_journal_path(manifest)
+        # A batch that is still running (or was interrupted) may only have its journal.
+        source = manifest if manifest.exists() else journal
+        key = (str(manifest), source.stat().st_mtime_ns, journal.stat().st_size if journal.exists() else 0)
+        with _VERIFIED_MANIFESTS_LOCK:
+            records = _VERIFIED_MANIFESTS.get(key)
+            if records is not None:
+                _VERIFIED_MANIFESTS.move_to_end(key)
+        if records is None:
+            records = list(load_manifest(source).get("records") or [])
+            with _VERIFIED_MANIFESTS_LOCK:
+                _VERIFIED_MANIFESTS[key] = records
+                while len(_VERIFIED_MANIFESTS) > 2:
+                    _VERIFIED_MANIFESTS.popitem(last=False)
+    except (OSError, ValueError):
+        return None
+    record = records[index] if 0 <= index < len(records) else None
+    if not isinstance(record, dict) or record.get("target") != str(target):
+        return None
+    if record.get("verify_status") != "ok" or not record.get("verify_file_stats"):
+        return None
+    return record
+
+
+CONTAINER_FORMATS = ("tar", "tar.zst")
+CONTAINER_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def _import_zstd() -> Any:
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("archive_format tar.zst requires the zstandard package") from exc
+    return zstandard
+
+
+def check_container_format(archive_format: str) -> None:
+    if archive_format not in CONTAINER_FORMATS:
+        raise ValueError(f"archive_format must be one of: {', '.join(CONTAINER_FORMATS)}")
+    if archive_format == "tar.zst":
+        _import_zstd()
+
+
+def container_path(target_dir: Path, run_id: str, archive_format: str) -> Path:
+    return target_dir / f"{run_id}.{archive_format}"
+
+
+def container_index_path(container: Path) -> Path:
+    return container.with_name(container.name + ".index.json")
+
+
+class _ContainerSink:
+    # File-like sink under tarfile. Counts uncompressed stream bytes and, for zstd, ends
+    # a frame at the first member boundary after CONTAINER_FRAME_BYTES; the recorded
+    # (uncompressed, compressed) frame offsets let readers seek close to any member.
+    def __init__(self, handle: Any, compression: str):
+        self.handle = handle
+        self.offset = 0
+        self.frames: list[list[int]] = [[0, 0]]
+        self._since_frame = 0
+        self._zstd = _import_zstd() if compression == "zstd" else None
+        self._cctx = self._zstd.ZstdCompressor(level=3) if self._zstd else None
+        self._cobj = self._cctx.compressobj() if self._cctx else None
+
+    def write(self, data: bytes) -> int:
+        if self._cobj is None:
+            self.handle.write(data)
+        else:
+            self.handle.write(self._cobj.compress(data))
+        self.offset += len(data)
+        self._since_frame += len(data)
+        return len(data)
+
+    def member_boundary(self) -> None:
+        if self._cobj is None or self._since_frame < CONTAINER_FRAME_BYTES:
+            return
+        self.handle.write(self._cobj.flush(self._zstd.COMPRESSOBJ_FLUSH_FRAME))
+        self.frames.append([self.offset, self.handle.tell()])
+        self._cobj = self._cctx.compressobj()
+        self._since_frame = 0
+
+    def finish(self) -> None:
+        if self._cobj is not None:
+            self.handle.write(self._cobj.flush(self._zstd.COMPRESSOBJ_FLUSH_FRAME))
+
+
+class _HashingReader:
+    def __init__(self, handle: Any, hasher: Any):
+        self.handle = handle
+        self.hasher = hasher
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.handle.read(size)
+        self.hasher.update(data)
+        return data
+
+
+@dataclass
+class ContainerWrite:
+    container: Path
+    index_path: Path
+    file_count: int = 0
+    byte_count: int = 0
+    container_bytes: int = 0
+
+
+def write_run_container(
+    source: Path,
+    container: Path,
+    algorithm: str = "blake2b",
+    on_member: Callable[[str], None] | None = None,
+) -> ContainerWrite:
+    # Streams a run folder into one tar (optionally zstd) plus a sidecar JSON member
+    # index. Source files are hashed while they are read into the tar, so the index
+    # digests describe exactly the bytes that were written. Both files are written
+    # under temporary names and renamed into place only once complete.
+    compression = "zstd" if container.name.endswith(".zst") else "none"
+    index_path = container_index_path(container)
+    result = ContainerWrite(container=container, index_path=index_path)
+    members: list[dict[str, Any]] = []
+    container.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{container.name}.", suffix=".partial", dir=container.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            sink = _ContainerSink(handle, compression)
+            with tarfile.open(fileobj=sink, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for rel, kind in _container_walk(source):
+                    path = source / rel if rel else source
+                    arcname = f"{source.name}/{rel}" if rel else source.name
+                    info = tar.gettarinfo(str(path), arcname=arcname)
+                    entry: dict[str, Any] = {
+                        "name": rel,
+                        "type": kind,
+                        "mode": info.mode,
+                        "mtime_ns": os.lstat(path).st_mtime_ns,
+                    }
+                    if kind == "file":
+                        hasher = _new_hasher(algorithm)
+                        with open(path, "rb") as src:
+                            tar.addfile(info, _HashingReader(src, hasher))
+                        # Data ends at tar.offset, padded to the next 512-byte block.
+                        entry["size"] = info.size
+                        entry["offset"] = tar.offset - (-(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE)
+                        entry["digest"] = hasher.hexdigest()
+                        result.file_count += 1
+                        result.byte_count += info.size
+                    else:
+                        if kind == "link":
+                            entry["link"] = info.linkname
+                        tar.addfile(info)
+                    members.append(entry)
+                    sink.member_boundary()
+                    if on_member is not None:
+                        on_member(rel)
+            sink.finish()
+            handle.flush()
+            os.fsync(handle.fileno())
+            result.container_bytes = handle.tell()
+        write_json_atomic(
+            index_path,
+            {
+                "format_version": 1,
+                "run_id": source.name,
+                "source": str(source),
+                "compression": compression,
+                "algorithm": algorithm,
+                "created_at": now_iso(),
+                "stream_bytes": sink.offset,
+                "container_bytes": result.container_bytes,
+                "frames": sink.frames,
+                "members": members,
+            },
+        )
+        os.replace(tmp_name, container)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+    return result
+
+
+def _container_walk(root: Path) -> Iterator[tuple[str, str]]:
+    yield "", "dir"
+    yield from _verify_walk(root, RsyncExcludeFilter(()))
+
+
+def read_container_index(container: Path) -> dict[str, Any]:
+    index_path = container_index_path(container)
+    try:
+        payload = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise RuntimeError(f"Cannot read container index {index_path}: {exc}") from exc
+    if not isinstance(payload, dict) or not isinstance(payload.get("members"), list):
+        raise RuntimeError(f"Invalid container index: {index_path}")
+    return payload
+
+
+def _open_container_stream(container: Path, index: dict[str, Any], offset: int = 0) -> tuple[Any, int]:
+    # Returns a readable uncompressed stream positioned at or before `offset`, plus the
+    # number of bytes still to skip. Plain tars seek directly; zstd starts at the frame.
+    handle = open(container, "rb")
+    if index.get("compression") != "zstd":
+        handle.seek(offset)
+        return handle, 0
+    frame_offset, compressed_offset = 0, 0
+    for frame in index.get("frames") or [[0, 0]]:
+        if frame[0] > offset:
+            break
+        frame_offset, compressed_offset = frame
+    handle.seek(compressed_offset)
+    reader = _import_zstd().ZstdDecompressor().stream_reader(handle, read_across_frames=True, closefd=True)
+    return reader, offset - frame_offset
+
+
+def _read_exact(stream: Any, size: int, sink: Callable[[bytes], Any]) -> int:
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(min(VERIFY_CHUNK_BYTES, remaining))
+        if not chunk:
+            break
+        sink(chunk)
+        remaining -= len(chunk)
+    return size - remaining
+
+
+def extract_container_member(container: Path, name: str, dest: Path) -> Path:
+    # Single-file restore: seeks to the member via the index instead of reading the tar.
+    index = read_container_index(container)
+    member = next((m for m in index["members"] if m.get("name") == name), None)
+    if member is None or member.get("type") != "file":
+        raise RuntimeError(f"No file member {name!r} in {container}")
+    stream, skip = _open_container_stream(container, index, int(member["offset"]))
+    hasher = _new_hasher(str(index.get("algorithm") or "blake2b"))
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        _read_exact(stream, skip, lambda _chunk: None)
+        with open(dest, "wb") as out:
+
+            def _write(chunk: bytes) -> None:
+                hasher.update(chunk)
+                out.write(chunk)
+
+            copied = _read_exact(stream, int(member["size"]), _write)
+    finally:
+        stream.close()
+    if copied != int(member["size"]) or hasher.hexdigest() != member.get("digest"):
+        raise RuntimeError(f"Extracted member {name!r} does not match the container index")
+    os.chmod(dest, int(member.get("mode") or 0o644) & 0o7777)
+    return dest
+
+
+def verify_container(
+    container: Path,
+    source: Path,
+    max_mismatches: int = 20,
+    on_mismatch: Callable[[str, str], None] | None = None,
+) -> TreeVerify:
+    # One sequential read of the container: every member is hashed and compared with the
+    # index digest taken from the source while the container was written. The source is
+    # only re-walked for metadata (names, types, sizes, mtimes) to catch changes since.
+    index = read_container_index(container)
+    result = TreeVerify(algorithm=str(index.get("algorithm") or "blake2b"))
+    members = {str(m["name"]): m for m in index["members"]}
+
+    def _mismatch(rel: str, reason: str) -> None:
+        result.mismatches.append(f"{rel or '.'}: {reason}")
+        if on_mismatch is not None:
+            on_mismatch(rel, reason)
+        if len(result.mismatches) >= max_mismatches:
+            result.stopped_early = True
+
+    prefix = f"{source.name}/"
+    seen: set[str] = set()
+    stream, _skip = _open_container_stream(container, index)
+    try:
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for info in tar:
+                if result.stopped_early:
+                    break
+                rel = "" if info.name == source.name else info.name[len(prefix):] if info.name.startswith(prefix) else None
+                member = members.get(rel) if rel is not None else None
+                if member is None:
+                    _mismatch(info.name, "not in container index")
+                    continue
+                seen.add(rel)
+                if not info.isfile():
+                    continue
+                hasher = _new_hasher(result.algorithm)
+                handle = tar.extractfile(info)
+                size = _read_exact(handle, info.size, hasher.update) if handle is not None else 0
+                digest = hasher.hexdigest()
+                result.file_count += 1
+                result.byte_count += size
+                result.digests[rel] = digest
+                if size != member.get("size") or digest != member.get("digest"):
+                    _mismatch(rel, f"{result.algorithm} differs from container index")
+    except (tarfile.TarError, OSError) as exc:
+        _mismatch("", f"container unreadable: {exc}")
+    finally:
+        stream.close()
+
+    if not result.stopped_early:
+        for rel in sorted(set(members) - seen):
+            _mismatch(rel, "missing in container")
+            if result.stopped_early:
+                break
+    if not result.stopped_early:
+        for rel, kind in _container_walk(source):
+            member = members.get(rel)
+            if member is None:
+                _mismatch(rel, "in source but not in container")
+            elif member.get("type") != kind:
+                _mismatch(rel, f"type differs (source {kind}, container {member.get('type')})")
+            elif kind == "file":
+                st = os.lstat(source / rel)
+                if st.st_size != member.get("size") or st.st_mtime_ns != member.get("mtime_ns"):
+                    _mismatch(rel, "changed in source since the container was written")
+            if result.stopped_early:
+                break
+    result.digests = dict(sorted(result.digests.items()))
+    return result
+
+
+def run_dir_fingerprint(run_dir: Path) -> str:
+    # Run folder inode/mtime/owner plus name/mtime/size of its direct children. Metadata files
+    # (bpm.meta.yaml, samplesheets, project.ini) live at the top level, so edits to them are caught.
+    st = run_dir.stat()
+    digest = hashlib.sha1()
+    with os.scandir(run_dir) as it:
+        children = sorted(it, key=lambda e: e.name)
+    for entry in children:
+        try:
+            cst = entry.stat(follow_symlinks=False)
+        except OSError:
             continue
+        digest.update(f"{entry.name}\0{cst.st_mtime_ns}\0{cst.st_size}\n".encode("utf-8", "surrogateescape"))
+    return f"{st.st_ino}:{st.st_mtime_ns}:{st.st_uid}:{digest.hexdigest()}"
+
+
+class RunCatalog:
+    # SQLite cache of per-run scan results and metadata, keyed by run path and invalidated when
+    # the run folder fingerprint changes. A catalog without a path (or one that failed to open)
+    # computes everything directly.
+    def __init__(self, path: Path | None, refresh: bool = False, max_age_days: int = CATALOG_MAX_AGE_DAYS):
+        self.path = path
+        self.refresh = refresh
+        self.max_age_seconds = max_age_days * 86400
+        self.notes: list[str] = []
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._fingerprints: dict[str, tuple[float, str]] = {}
+        if path is None:
+            return
         try:
-            keep_until = date.fromisoformat(str(raw_keep_until))
-        except ValueError:
-            notes.append(f"Invalid keep_until in keep_rules for run_id={run_id_s}: {raw_keep_until}")
-            active.add(run_id_s)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+            # Rollback journal: the manifest directory may be on NFS, where WAL is unsafe. Set
+            # explicitly because the journal mode persists in catalogs created in WAL mode.
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.executescript(_CATALOG_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        except (sqlite3.Error, OSError) as exc:
+            self.notes.append(f"Run catalog disabled ({path}): {exc}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _disable(self, exc: Exception) -> None:
+        self.notes.append(f"Run catalog disabled ({self.path}): {exc}")
+        with contextlib.suppress(sqlite3.Error):
+            if self._conn is not None:
+                self._conn.close()
+        self._conn = None
+
+    def _fingerprint(self, run_dir: Path) -> str | None:
+        if not self.enabled:
+            return None
+        # Several lookups for the same run happen back to back during discovery.
+        key = str(run_dir)
+        now = time.monotonic()
+        memo = self._fingerprints.get(key)
+        if memo is not None and now - memo[0] < 60:
+            return memo[1]
+        try:
+            fingerprint = run_dir_fingerprint(run_dir)
+        except OSError:
+            return None
+        self._fingerprints[key] = (now, fingerprint)
+        return fingerprint
+
+    def _fresh(self, row_fingerprint: str, checked_at: float, fingerprint: str) -> bool:
+        if self.refresh or row_fingerprint != fingerprint:
+            return False
+        return time.time() - checked_at <= self.max_age_seconds
+
+    def scan(self, run_dir: Path, exclude_patterns: Sequence[str] = (), refresh: bool = False) -> TreeScan:
+        # The fingerprint only sees the run directory's direct children; refresh=True walks the
+        # tree regardless, for decisions that must not rest on a cached result.
+        fingerprint = self._fingerprint(run_dir)
+        if fingerprint is None:
+            return scan_tree(run_dir, exclude_patterns)
+        key = str(run_dir)
+        patterns_key = json.dumps(list(exclude_patterns))
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT fingerprint, checked_at, total_bytes, archive_bytes, excluded_bytes, file_count, dir_count, "
+                    "excluded_file_count, by_pattern, top_level FROM run_scans WHERE path = ? AND patterns_key = ?",
+                    (key, patterns_key),
+                ).fetchone() if self._conn is not None and not refresh else None
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                row = None
+        if row is not None and self._fresh(row[0], row[1], fingerprint):
+            return TreeScan(
+                total_bytes=row[2],
+                archive_bytes=row[3],
+                excluded_bytes=row[4],
+                file_count=row[5],
+                dir_count=row[6],
+                excluded_file_count=row[7],
+                by_pattern=json.loads(row[8]),
+                top_level=json.loads(row[9]),
+            )
+        scan = scan_tree(run_dir, exclude_patterns)
+        if scan.errors:
+            return scan
+        with self._lock:
+            if self._conn is None:
+                return scan
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO run_scans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        patterns_key,
+                        fingerprint,
+                        time.time(),
+                        scan.total_bytes,
+                        scan.archive_bytes,
+                        scan.excluded_bytes,
+                        scan.file_count,
+                        scan.dir_count,
+                        scan.excluded_file_count,
+                        json.dumps(scan.by_pattern),
+                        json.dumps(scan.top_level),
+                    ),
+                )
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+        return scan
+
+    def cached(self, run_dir: Path, name: str, compute: Callable[[], Any]) -> Any:
+        # compute() must return a JSON-serializable value.
+        fingerprint = self._fingerprint(run_dir)
+        if fingerprint is None:
+            return compute()
+        key = str(run_dir)
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT fingerprint, checked_at, value FROM run_meta WHERE path = ? AND name = ?",
+                    (key, name),
+                ).fetchone() if self._conn is not None else None
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                row = None
+        if row is not None and self._fresh(row[0], row[1], fingerprint):
+            return json.loads(row[2])
+        value = compute()
+        with self._lock:
+            if self._conn is None:
+                return value
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO run_meta VALUES (?, ?, ?, ?, ?)",
+                    (key, name, fingerprint, time.time(), json.dumps(value)),
+                )
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+        return value
+
+    def record_verified(self, target: Path, manifest: Path, index: int) -> None:
+        # Points `target` at the manifest record holding its latest fingerprint table.
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO verified_targets VALUES (?, ?, ?, ?)",
+                    (str(target), str(manifest), index, time.time()),
+                )
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def verified_record(self, target: Path) -> tuple[Path, int] | None:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT manifest, record_index FROM verified_targets WHERE target = ?", (str(target),)
+                ).fetchone() if self._conn is not None else None
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                row = None
+        return (Path(row[0]), int(row[1])) if row is not None else None
+
+    def index_content(self, rows: Sequence[tuple[str, int, str, str, str, int, int]]) -> None:
+        # rows: (path, size, quick_hash, algorithm, digest, dev, mtime_ns) of verified archive files.
+        with self._lock:
+            if self._conn is None or not rows:
+                return
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO archived_content VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def content_matches(self, size: int, dev: int) -> list[tuple[str, str, str, str, int]]:
+        # (path, quick_hash, algorithm, digest, mtime_ns) of archived files with this size on device `dev`.
+        with self._lock:
+            try:
+                return self._conn.execute(
+                    "SELECT path, quick_hash, algorithm, digest, mtime_ns FROM archived_content WHERE size = ? AND dev = ?",
+                    (size, dev),
+                ).fetchall() if self._conn is not None else []
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                return []
+
+    def forget_content(self, path: str) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("DELETE FROM archived_content WHERE path = ?", (path,))
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+
+def quick_hash(path: Path | str, size: int | None = None) -> str:
+    # Cheap prefilter for dedup: size plus the first and last DEDUP_SAMPLE_BYTES.
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size if size is None else size
+        hasher.update(str(size).encode())
+        hasher.update(fh.read(DEDUP_SAMPLE_BYTES))
+        if size > 2 * DEDUP_SAMPLE_BYTES:
+            fh.seek(size - DEDUP_SAMPLE_BYTES)
+            hasher.update(fh.read(DEDUP_SAMPLE_BYTES))
+    return hasher.hexdigest()
+
+
+def index_archived_files(catalog: RunCatalog, target: Path, record: dict[str, Any], min_bytes: int = DEDUP_MIN_BYTES) -> int:
+    # Adds the large files of a verified run to the catalog's content index, keyed by the
+    # digests its verification recorded, so later runs can hardlink instead of copying.
+    algorithm = str(record.get("verify_algorithm") or "")
+    rows: list[tuple[str, int, str, str, str, int, int]] = []
+    for rel, (size, mtime, digest) in fingerprint_table(record).items():
+        if size < min_bytes or not algorithm:
+            continue
+        path = target / rel
+        try:
+            st = os.lstat(path)
+            if not stat.S_ISREG(st.st_mode) or st.st_size != size or st.st_mtime_ns != mtime:
+                continue
+            rows.append((str(path), size, quick_hash(path, size), algorithm, digest, st.st_dev, mtime))
+        except OSError:
             continue
-        if keep_until >= today:
-            active.add(run_id_s)
-    return active, notes
+    catalog.index_content(rows)
+    return len(rows)
+
+
+@dataclass
+class DedupLinks:
+    links: dict[str, str] = field(default_factory=dict)
+    bytes_saved: int = 0
+    checked_count: int = 0
+    hashed_count: int = 0
+
+    def excludes(self) -> list[str]:
+        # Anchored rsync excludes that keep the copy from replacing the links.
+        return ["/" + rel for rel in self.links]
+
+    def stats(self) -> dict[str, Any]:
+        return {"dedup_links": dict(sorted(self.links.items())), "dedup_files": len(self.links), "dedup_bytes": self.bytes_saved}
+
+
+def dedup_run(
+    catalog: RunCatalog,
+    source: Path,
+    target: Path,
+    exclude_patterns: Sequence[str] = (),
+    min_bytes: int = DEDUP_MIN_BYTES,
+) -> DedupLinks:
+    # Before a run is copied, hardlinks each large source file that is already archived
+    # elsewhere on the target filesystem into place. Candidates are narrowed by size, then by
+    # quick_hash, and confirmed with a full digest against the one recorded at verification.
+    result = DedupLinks()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    dev = os.stat(target.parent).st_dev
+    for rel, size in list_copy_files(source, exclude_patterns):
+        # Paths with rsync wildcard characters cannot be excluded literally.
+        if size < min_bytes or any(ch in rel for ch in "*?[\\"):
+            continue
+        matches = catalog.content_matches(size, dev)
+        if not matches:
+            continue
+        result.checked_count += 1
+        src = source / rel
+        dst = target / rel
+        try:
+            src_quick = quick_hash(src, size)
+            src_digests: dict[str, str] = {}
+            for path, match_quick, algorithm, digest, mtime in matches:
+                if match_quick != src_quick or path == str(dst):
+                    continue
+                try:
+                    st = os.lstat(path)
+                except FileNotFoundError:
+                    catalog.forget_content(path)
+                    continue
+                if not stat.S_ISREG(st.st_mode) or st.st_size != size or st.st_mtime_ns != mtime:
+                    catalog.forget_content(path)
+                    continue
+                if algorithm not in src_digests:
+                    result.hashed_count += 1
+                    src_digests[algorithm] = file_digest(src, algorithm)
+                if src_digests[algorithm] != digest:
+                    continue
+                if os.path.lexists(dst):
+                    # Left by an interrupted attempt; anything else is rsync's to update.
+                    if os.path.samefile(dst, path):
+                        result.links[rel] = path
+                        result.bytes_saved += size
+                    break
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                os.link(path, dst)
+                result.links[rel] = path
+                result.bytes_saved += size
+                break
+        except OSError:
+            # Unreadable source or a refused link: the file is simply copied.
+            continue
+    return result
+
+
+def open_run_catalog(manifest_dir: Path, enabled: bool = True, refresh: bool = False) -> RunCatalog:
+    return RunCatalog(manifest_dir / CATALOG_FILENAME if enabled else None, refresh=refresh)
 
 
 @dataclass(frozen=True)
@@ -263,7 +2889,14 @@ def project_id_from_folder(path: Path) -> str | None:
     return None
 
 
-def build_run_folder_info(run_id: str, path: Path) -> RunFolderInfo:
+def build_run_folder_info(run_id: str, path: Path, catalog: RunCatalog | None = None) -> RunFolderInfo:
+    if catalog is not None:
+        return RunFolderInfo(
+            run_id=run_id,
+            path=path,
+            owner=catalog.cached(path, "owner", lambda: path_owner(path)),
+            project_id=catalog.cached(path, "project_id", lambda: project_id_from_folder(path)),
+        )
     return RunFolderInfo(
         run_id=run_id,
         path=path,
@@ -272,8 +2905,9 @@ def build_run_folder_info(run_id: str, path: Path) -> RunFolderInfo:
     )
 
 
-def discover_runs(source_roots: list[Path]) -> tuple[dict[str, RunFolderInfo], list[str]]:
-    found: dict[str, RunFolderInfo] = {}
+def list_run_folders(source_roots: list[Path]) -> tuple[dict[str, Path], list[str]]:
+    # Directory listing only (root/<run> and root/<instrument>/<run>); no per-run file parsing.
+    found: dict[str, Path] = {}
     notes: list[str] = []
     for root in source_roots:
         if not root.exists() or not root.is_dir():
@@ -283,32 +2917,156 @@ def discover_runs(source_roots: list[Path]) -> tuple[dict[str, RunFolderInfo], l
             if not entry.is_dir():
                 continue
             if RUN_PREFIX_RE.match(entry.name):
-                found.setdefault(entry.name, build_run_folder_info(entry.name, entry))
+                found.setdefault(entry.name, entry)
                 continue
             for sub in entry.iterdir():
                 if not sub.is_dir():
                     continue
                 if RUN_PREFIX_RE.match(sub.name):
-                    found.setdefault(sub.name, build_run_folder_info(sub.name, sub))
+                    found.setdefault(sub.name, sub)
     return found, notes
 
 
-def run_keep_tui(rules_path: Path, browse_root: Path, heading: str) -> tuple[bool, int, int]:
+def discover_runs(
+    source_roots: list[Path],
+    catalog: RunCatalog | None = None,
+) -> tuple[dict[str, RunFolderInfo], list[str]]:
+    folders, notes = list_run_folders(source_roots)
+    return {run_id: build_run_folder_info(run_id, path, catalog) for run_id, path in folders.items()}, notes
+
+
+def format_bytes(num_bytes: int) -> str:
+    units = ["B", "KiB", "MiB", "GiB", "TiB", "PiB"]
+    value = float(num_bytes)
+    for unit in units:
+        if value < 1024 or unit == units[-1]:
+            return f"{value:.2f} {unit}"
+        value /= 1024
+    return f"{num_bytes} B"
+
+
+class RunInfoLoader:
+    # Resolves RunFolderInfo and run size for listed run folders on a background thread pool, so a
+    # TUI can draw run IDs before any run is parsed. prioritize() moves the rows currently on screen
+    # to the front of the queue. Lookups go through the run catalog when given, so reopening the
+    # TUI is served from cache; `version` changes whenever a result lands.
+    def __init__(
+        self,
+        folders: dict[str, Path],
+        catalog: RunCatalog | None = None,
+        workers: int = DISCOVERY_WORKERS,
+        with_size: bool = True,
+    ):
+        self.folders = folders
+        self.catalog = catalog
+        self.with_size = with_size
+        self.version = 0
+        self._info: dict[str, RunFolderInfo] = {}
+        self._size: dict[str, int] = {}
+        self._backlog: collections.deque[str] = collections.deque(sorted(folders))
+        self._urgent: list[str] = []
+        self._claimed: set[str] = set()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"run-info-{i}", daemon=True)
+            for i in range(max(1, min(workers, len(folders))))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def done(self) -> int:
+        with self._cond:
+            return len(self._info)
+
+    def get(self, run_id: str) -> RunFolderInfo | None:
+        with self._cond:
+            return self._info.get(run_id)
+
+    def size(self, run_id: str) -> int | None:
+        with self._cond:
+            return self._size.get(run_id)
+
+    def prioritize(self, run_ids: Sequence[str]) -> None:
+        with self._cond:
+            self._urgent = [run_id for run_id in reversed(run_ids) if run_id not in self._claimed]
+            if self._urgent:
+                self._cond.notify_all()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while len(self._info) < len(self.folders) and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return len(self._info) >= len(self.folders)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _next(self) -> str | None:
+        with self._cond:
+            while not self._closed:
+                while self._urgent:
+                    run_id = self._urgent.pop()
+                    if run_id not in self._claimed:
+                        self._claimed.add(run_id)
+                        return run_id
+                while self._backlog:
+                    run_id = self._backlog.popleft()
+                    if run_id not in self._claimed:
+                        self._claimed.add(run_id)
+                        return run_id
+                return None
+            return None
+
+    def _work(self) -> None:
+        while True:
+            run_id = self._next()
+            if run_id is None:
+                return
+            path = self.folders[run_id]
+            info = RunFolderInfo(run_id=run_id, path=path, owner="-", project_id=None)
+            size = None
+            try:
+                info = build_run_folder_info(run_id, path, self.catalog)
+                if self.with_size:
+                    scan = self.catalog.scan(path) if self.catalog is not None else scan_tree(path)
+                    size = scan.total_bytes
+            except Exception:  # noqa: BLE001
+                # An unreadable run keeps its placeholder; the worker and the runs it claimed go on.
+                pass
+            with self._cond:
+                self._info[run_id] = info
+                if size is not None:
+                    self._size[run_id] = size
+                self.version += 1
+                self._cond.notify_all()
+
+
+def run_keep_tui(
+    rules_path: Path,
+    browse_root: Path,
+    heading: str,
+    catalog: RunCatalog | None = None,
+) -> tuple[bool, int, int]:
     import curses
 
     payload = load_rules(rules_path)
-    discovered, notes = discover_runs([browse_root])
+    folders, notes = list_run_folders([browse_root])
     for note in notes:
         print(warn(f"- {note}"))
-    if not discovered:
+    if not folders:
         print(warn(f"No run IDs discovered under {browse_root}"))
         return False, 0, 0
 
-    runs = sorted(discovered)
+    runs = sorted(folders)
     existing = payload.get("runs") or {}
-    show_project_id = any(info.project_id for info in discovered.values())
-    owner_values = [discovered[run_id].owner for run_id in runs]
-    project_values = [discovered[run_id].project_id or "-" for run_id in runs] if show_project_id else []
     marked = {run_id: bool((existing.get(run_id) or {}).get("keep", False)) for run_id in runs}
     keep_until = {run_id: (existing.get(run_id) or {}).get("keep_until") for run_id in runs}
     set_by_map = {run_id: str((existing.get(run_id) or {}).get("set_by") or "-") for run_id in runs}
@@ -329,28 +3087,17 @@ def run_keep_tui(rules_path: Path, browse_root: Path, heading: str) -> tuple[boo
         return value[: width - 1] + "~"
 
     def apply_changes() -> tuple[int, int]:
-        added_or_updated = 0
-        removed = 0
-        user = current_user()
-        stamp = now_iso()
-        run_map = payload.setdefault("runs", {})
-        for run_id in runs:
-            old = run_map.get(run_id)
-            if marked.get(run_id, False):
-                rec = {"keep": True, "set_by": user, "set_at": stamp, "keep_until": keep_until.get(run_id) or None}
-                if old != rec:
-                    run_map[run_id] = rec
-                    added_or_updated += 1
-            elif run_id in run_map:
-                del run_map[run_id]
-                removed += 1
-        save_rules(rules_path, payload)
-        return added_or_updated, removed
+        updates = keep_rule_updates(existing, marked, keep_until)
+        update_rules(rules_path, updates)
+        removed = sum(1 for rec in updates.values() if rec is None)
+        return len(updates) - removed, removed
 
     def curses_main(stdscr) -> tuple[bool, int, int]:
         curses.curs_set(0)
         stdscr.nodelay(False)
         stdscr.keypad(True)
+        # Wake up periodically to draw owner/project/size details as the loader fills them in.
+        stdscr.timeout(250)
         color_header = curses.A_BOLD
         color_help = curses.A_DIM
         color_row = curses.A_NORMAL
@@ -382,31 +3129,38 @@ def run_keep_tui(rules_path: Path, browse_root: Path, heading: str) -> tuple[boo
         idx = 0
         top = 0
         changed = False
+        drawn_version = -1
 
         def render(status: str = "") -> None:
-            nonlocal top
+            nonlocal top, drawn_version
             h, w = stdscr.getmaxyx()
             stdscr.erase()
-            stdscr.addnstr(0, 0, f"{heading} | root={browse_root} | runs={len(runs)}".ljust(max(0, w - 1)), w - 1, color_header)
+            drawn_version = loader.version
+            done = loader.done
+            loading = f" | details {done}/{len(runs)}" if done < len(runs) else ""
+            stdscr.addnstr(0, 0, f"{heading} | root={browse_root} | runs={len(runs)}{loading}".ljust(max(0, w - 1)), w - 1, color_header)
             stdscr.addnstr(1, 0, "Up/Down: move  Space: toggle keep  u: keep-until  s: save  q: quit".ljust(max(0, w - 1)), w - 1, color_help)
             list_top = 4
             list_h = max(1, h - 6)
-            owner_col = column_width(owner_values, "Owner", min_width=5, max_width=16)
+            if idx < top:
+                top = idx
+            elif idx >= top + list_h:
+                top = idx - list_h + 1
+            loader.prioritize(runs[top : top + list_h])
+            infos = [info for info in (loader.get(run_id) for run_id in runs) if info is not None]
+            show_project_id = any(info.project_id for info in infos)
+            owner_col = column_width([info.owner for info in infos], "Owner", min_width=5, max_width=16)
             set_by_col = column_width([set_by_map.get(run_id, "-") for run_id in runs], "Set By", min_width=6, max_width=20)
-            project_col = column_width(project_values, "Project ID", min_width=10, max_width=36) if show_project_id else 0
-            fixed_non_run = 3 + owner_col + project_col + 10 + set_by_col + (5 if show_project_id else 4)
+            project_col = column_width([info.project_id or "-" for info in infos], "Project ID", min_width=10, max_width=36) if show_project_id else 0
+            fixed_non_run = 3 + owner_col + project_col + 11 + 10 + set_by_col + (6 if show_project_id else 5)
             run_col = min(column_width(runs, "Run ID", min_width=12), max(12, w - fixed_non_run - 1))
             if show_project_id:
-                row_fmt = f"{{sel:<3}} {{run:<{run_col}}} {{owner:<{owner_col}}} {{project:<{project_col}}} {{ku:<10}} {{set_by:<{set_by_col}}}"
-                header = row_fmt.format(sel="Sel", run="Run ID", owner="Owner", project="Project ID", ku="Keep Until", set_by="Set By")
+                row_fmt = f"{{sel:<3}} {{run:<{run_col}}} {{owner:<{owner_col}}} {{project:<{project_col}}} {{size:>11}} {{ku:<10}} {{set_by:<{set_by_col}}}"
+                header = row_fmt.format(sel="Sel", run="Run ID", owner="Owner", project="Project ID", size="Size", ku="Keep Until", set_by="Set By")
             else:
-                row_fmt = f"{{sel:<3}} {{run:<{run_col}}} {{owner:<{owner_col}}} {{ku:<10}} {{set_by:<{set_by_col}}}"
-                header = row_fmt.format(sel="Sel", run="Run ID", owner="Owner", ku="Keep Until", set_by="Set By")
+                row_fmt = f"{{sel:<3}} {{run:<{run_col}}} {{owner:<{owner_col}}} {{size:>11}} {{ku:<10}} {{set_by:<{set_by_col}}}"
+                header = row_fmt.format(sel="Sel", run="Run ID", owner="Owner", size="Size", ku="Keep Until", set_by="Set By")
             stdscr.addnstr(3, 0, header.ljust(max(0, w - 1)), w - 1, color_help | curses.A_BOLD)
-            if idx < top:
-                top = idx
-            elif idx >= top + list_h:
-                top = idx - list_h + 1
             for row in range(list_h):
                 pos = top + row
                 y = list_top + row
@@ -414,14 +3168,17 @@ def run_keep_tui(rules_path: Path, browse_root: Path, heading: str) -> tuple[boo
                     stdscr.addnstr(y, 0, " " * max(0, w - 1), w - 1, color_row)
                     continue
                 run_id = runs[pos]
-                owner = clip_text(discovered[run_id].owner, owner_col)
-                project_id = clip_text(discovered[run_id].project_id or "-", project_col) if show_project_id else "-"
+                info = loader.get(run_id)
+                run_size = loader.size(run_id)
+                owner = clip_text(info.owner if info is not None else "...", owner_col)
+                project_id = clip_text((info.project_id or "-") if info is not None else "...", project_col) if show_project_id else "-"
+                size = format_bytes(run_size) if run_size is not None else "..."
                 ku = keep_until.get(run_id) or "-"
                 set_by = clip_text(set_by_map.get(run_id, "-"), set_by_col)
                 if show_project_id:
-                    line = row_fmt.format(sel="[x]" if marked.get(run_id, False) else "[ ]", run=clip_text(run_id, run_col), owner=owner, project=project_id, ku=ku, set_by=set_by)
+                    line = row_fmt.format(sel="[x]" if marked.get(run_id, False) else "[ ]", run=clip_text(run_id, run_col), owner=owner, project=project_id, size=size, ku=ku, set_by=set_by)
                 else:
-                    line = row_fmt.format(sel="[x]" if marked.get(run_id, False) else "[ ]", run=clip_text(run_id, run_col), owner=owner, ku=ku, set_by=set_by)
+                    line = row_fmt.format(sel="[x]" if marked.get(run_id, False) else "[ ]", run=clip_text(run_id, run_col), owner=owner, size=size, ku=ku, set_by=set_by)
                 attr = color_selected if pos == idx else (color_marked if marked.get(run_id, False) else color_row)
                 stdscr.addnstr(y, 0, line.ljust(max(0, w - 1)), w - 1, attr)
             stdscr.addnstr(h - 2, 0, f"Marked: {sum(1 for v in marked.values() if v)}  Changed: {'yes' if changed else 'no'}".ljust(max(0, w - 1)), w - 1, color_summary)
@@ -431,6 +3188,7 @@ def run_keep_tui(rules_path: Path, browse_root: Path, heading: str) -> tuple[boo
         def prompt_keep_until(current: str | None) -> str | None:
             h, w = stdscr.getmaxyx()
             prompt = "keep_until for selected run (YYYY-MM-DD, empty clears)"
+            stdscr.timeout(-1)
             while True:
                 curses.curs_set(1)
                 stdscr.move(h - 2, 0)
@@ -455,10 +3213,15 @@ def run_keep_tui(rules_path: Path, browse_root: Path, heading: str) -> tuple[boo
                     curses.napms(900)
                 finally:
                     curses.curs_set(0)
+                    stdscr.timeout(250)
 
         render()
         while True:
             key = stdscr.getch()
+            if key == -1:
+                if loader.version != drawn_version:
+                    render()
+                continue
             if key in (curses.KEY_UP, ord("k")):
                 idx = max(0, idx - 1)
                 render()
@@ -484,13 +3247,20 @@ def run_keep_tui(rules_path: Path, browse_root: Path, heading: str) -> tuple[boo
             elif key == ord("q"):
                 if changed:
                     render("Unsaved changes. Press q again to discard.")
-                    if stdscr.getch() == ord("q"):
+                    stdscr.timeout(-1)
+                    key2 = stdscr.getch()
+                    stdscr.timeout(250)
+                    if key2 == ord("q"):
                         return False, 0, 0
                     render()
                     continue
                 return False, 0, 0
 
-    saved, add_count, remove_count = curses.wrapper(curses_main)
+    loader = RunInfoLoader(folders, catalog)
+    try:
+        saved, add_count, remove_count = curses.wrapper(curses_main)
+    finally:
+        loader.close()
     print_section(heading)
     print(f"Rules file: {rules_path}")
     if saved:
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+
+from archive_common import (
+    extract_container_member as _shared_extract_container_member,
+    read_container_index as _shared_read_container_index,
+)
+
+ACTIONS = ("list", "extract")
+
+
+def load_ctx() -> dict[str, Any]:
+    ctx_path = os.environ.get("BPM_CTX_PATH")
+    if not ctx_path or not Path(ctx_path).is_file():
+        return {}
+    with open(ctx_path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _parse_params() -> dict[str, Any]:
+    ctx = load_ctx()
+    params = dict(ctx.get("params") or {})
+
+    parser = argparse.ArgumentParser(description="List or restore files from an archive_raw run container.")
+    parser.add_argument("--action", default="list", choices=list(ACTIONS))
+    parser.add_argument("--container", required=not params)
+    parser.add_argument("--member", default="")
+    parser.add_argument("--dest", default="")
+
+    if params:
+        return params
+
+    args = parser.parse_args()
+    return {
+        "action": args.action,
+        "container": args.container,
+        "member": args.member,
+        "dest": args.dest,
+    }
+
+
+def main() -> None:
+    params = _parse_params()
+    action = str(params.get("action") or "list").strip().lower()
+    container_text = str(params.get("container") or "").strip()
+    member = str(params.get("member") or "").strip()
+    dest_text = str(params.get("dest") or "").strip()
+
+    if action not in ACTIONS:
+        raise SystemExit(f"action must be one of: {', '.join(ACTIONS)}")
+    if not container_text:
+        raise SystemExit("container is required")
+    container = Path(container_text).expanduser().resolve()
+    if action == "extract" and not (member and dest_text):
+        raise SystemExit("extract needs member and dest")
+
+    try:
+        if action == "list":
+            for entry in _shared_read_container_index(container)["members"]:
+                size = entry.get("size", "-")
+                print(f"{entry.get('type', '?'):4}  {size:>14}  {entry.get('name') or '.'}")
+        else:
+            print(_shared_extract_container_member(container, member, Path(dest_text).expanduser()))
+    except RuntimeError as exc:
+        raise SystemExit(f"ERROR: {exc}") from exc
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+
+from archive_common import (
+    format_bytes as _shared_format_bytes,
+    load_manifest as _shared_load_manifest,
+    write_json_atomic as _shared_write_json_atomic,
+)
+
+DEFAULT_MANIFEST_DIR = "/data/shared/bpm_manifests"
+DEFAULT_WORKFLOWS = "archive_fastq,archive_projects,archive_raw"
+DEFAULT_POLL_MINUTES = 60
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_MINUTES = 120
+DEFAULT_MAX_STREAMS_PER_MOUNT = 1
+LOCK_RETRY_SECONDS = 300
+HEARTBEAT_SECONDS = 60
+WORKFLOW_ENTRIES = {
+    "archive_fastq": "archive_fastq/run.py",
+    "archive_projects": "archive_projects/run.py",
+    "archive_raw": "archive_raw/run.py",
+}
+# Batch locks taken by the workflows themselves; a manual batch holding one defers the queue.
+WORKFLOW_LOCKS = {
+    "archive_fastq": Path("/tmp/archive_fastq.lock"),
+    "archive_projects": Path("/tmp/archive_projects.lock"),
+    "archive_raw": Path("/tmp/archive_raw.lock"),
+}
+QUEUE_FILENAME = "archive_daemon.sqlite"
+STATUS_FILENAME = "archive_daemon.status.json"
+USE_COLOR = sys.stdout.isatty() and os.environ.get("NO_COLOR") is None
+
+_QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    workflow TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    copy_bytes INTEGER NOT NULL DEFAULT 0,
+    copy_seconds REAL NOT NULL DEFAULT 0,
+    manifest TEXT NOT NULL DEFAULT '',
+    last_error TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (workflow, run_id)
+);
+"""
+
+
+def _style(text: str, code: str) -> str:
+    if not USE_COLOR:
+        return text
+    return f"\033[{code}m{text}\033[0m"
+
+
+def _ok(text: str) -> str:
+    return _style(text, "1;32")
+
+
+def _warn(text: str) -> str:
+    return _style(text, "1;33")
+
+
+def _err(text: str) -> str:
+    return _style(text, "1;31")
+
+
+def _dim(text: str) -> str:
+    return _style(text, "2")
+
+
+def load_ctx() -> dict[str, Any]:
+    ctx_path = os.environ.get("BPM_CTX_PATH")
+    if not ctx_path or not Path(ctx_path).is_file():
+        return {}
+    with open(ctx_path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _parse_bool(value: Any, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in {"1", "true", "yes", "y", "on"}:
+        return True
+    if text in {"0", "false", "no", "n", "off"}:
+        return False
+    return default
+
+
+def _parse_int(value: Any, default: int) -> int:
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _split_csv(value: Any) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+
+def _iso(ts: float | None) -> str:
+    return datetime.fromtimestamp(ts).isoformat(timespec="seconds") if ts else ""
+
+
+def _log(log_path: Path, message: str) -> None:
+    stamp = datetime.now().isoformat(timespec="seconds")
+    print(f"[{stamp}] {message}", flush=True)
+    with open(log_path, "a", encoding="utf-8") as fh:
+        fh.write(f"[{stamp}] [daemon] {message}\n")
+
+
+class WorkQueue:
+    # Persistent queue of (workflow, run_id) jobs. States: pending, running, done,
+    # failed (attempts exhausted), skipped (no longer eligible when its turn came).
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_QUEUE_SCHEMA)
+        # A job left running belonged to a daemon that died; its workflow run resumes from scratch.
+        self._conn.execute("UPDATE queue SET state = 'pending' WHERE state = 'running'")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def sync(self, workflow: str, planned: dict[str, int]) -> tuple[int, int]:
+        # Adds newly eligible runs and drops pending ones that left the plan (kept, removed).
+        now = time.time()
+        known = {
+            row["run_id"]: row["state"]
+            for row in self._conn.execute("SELECT run_id, state FROM queue WHERE workflow = ?", (workflow,))
+        }
+        added = [(workflow, run_id, size, now) for run_id, size in planned.items() if run_id not in known]
+        dropped = [(workflow, run_id) for run_id, state in known.items() if state == "pending" and run_id not in planned]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO queue (workflow, run_id, size_bytes, state, enqueued_at) VALUES (?, ?, ?, 'pending', ?)",
+                added,
+            )
+            self._conn.executemany("DELETE FROM queue WHERE workflow = ? AND run_id = ?", dropped)
+            for run_id, size in planned.items():
+                if known.get(run_id) == "pending":
+                    self._conn.execute(
+                        "UPDATE queue SET size_bytes = ? WHERE workflow = ? AND run_id = ?", (size, workflow, run_id)
+                    )
+        return len(added), len(dropped)
+
+    def next_job(self, now: float) -> sqlite3.Row | None:
+        return self._conn.execute(
+            "SELECT * FROM queue WHERE state = 'pending' AND not_before <= ? ORDER BY enqueued_at, run_id LIMIT 1",
+            (now,),
+        ).fetchone()
+
+    def next_wakeup(self) -> float | None:
+        row = self._conn.execute("SELECT MIN(not_before) FROM queue WHERE state = 'pending'").fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def start(self, job: sqlite3.Row) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE queue SET state = 'running', started_at = ?, finished_at = NULL WHERE workflow = ? AND run_id = ?",
+                (time.time(), job["workflow"], job["run_id"]),
+            )
+
+    def defer(self, job: sqlite3.Row, until: float, reason: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE queue SET state = 'pending', not_before = ?, last_error = ? WHERE workflow = ? AND run_id = ?",
+                (until, reason, job["workflow"], job["run_id"]),
+            )
+
+    def finish(self, job: sqlite3.Row, state: str, **values: Any) -> None:
+        fields = {"state": state, "finished_at": time.time(), **values}
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._conn:
+            self._conn.execute(
+                f"UPDATE queue SET {assignments} WHERE workflow = ? AND run_id = ?",
+                (*fields.values(), job["workflow"], job["run_id"]),
+            )
+
+    def retry_failed(self) -> int:
+        with self._conn:
+            return self._conn.execute(
+                "UPDATE queue SET state = 'pending', attempts = 0, not_before = 0 WHERE state = 'failed'"
+            ).rowcount
+
+    def counts(self) -> dict[str, int]:
+        return {row[0]: row[1] for row in self._conn.execute("SELECT state, COUNT(*) FROM queue GROUP BY state")}
+
+    def rows(self, where: str, order: str, limit: int, params: tuple[Any, ...] = ()) -> list[dict[str, Any]]:
+        return [
+            dict(row)
+            for row in self._conn.execute(f"SELECT * FROM queue WHERE {where} ORDER BY {order} LIMIT {int(limit)}", params)
+        ]
+
+    def throughput(self, since: float) -> tuple[int, float, int]:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(copy_bytes), 0), COALESCE(SUM(copy_seconds), 0), COUNT(*) FROM queue "
+            "WHERE state = 'done' AND finished_at >= ?",
+            (since,),
+        ).fetchone()
+        return int(row[0]), float(row[1]), int(row[2])
+
+
+def _lock_holder(lock_path: Path) -> int | None:
+    # Mirrors the workflows' PID lock files: a live PID means a batch is running.
+    try:
+        pid = int(lock_path.read_text(encoding="utf-8").strip())
+    except (OSError, ValueError):
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        return pid
+    return pid
+
+
+def _run_workflow(workflow: str, params: dict[str, Any], log_path: Path) -> int:
+    # Workflows read their params from the BPM ctx file, exactly as under `bpm workflow run`.
+    entry = WORKFLOWS_DIR / WORKFLOW_ENTRIES[workflow]
+    with tempfile.NamedTemporaryFile("w", prefix=f"{workflow}_ctx_", suffix=".json", delete=False) as fh:
+        json.dump({"params": params}, fh)
+        ctx_path = fh.name
+    env = {**os.environ, "BPM_CTX_PATH": ctx_path, "BPM_WORKFLOW_ID": workflow, "NO_COLOR": "1"}
+    try:
+        with open(log_path, "a", encoding="utf-8") as log:
+            log.write(f"[{datetime.now().isoformat(timespec='seconds')}] [daemon] $ {workflow} {json.dumps(params)}\n")
+            log.flush()
+            proc = subprocess.Popen(
+                [sys.executable, str(entry)],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env=env,
+                # The child finishes its run even when the daemon is asked to stop.
+                start_new_session=True,
+            )
+            return proc.wait()
+    finally:
+        Path(ctx_path).unlink(missing_ok=True)
+
+
+def _load_records(manifest_path: Path) -> list[dict[str, Any]]:
+    for path in (manifest_path, manifest_path.with_suffix(".jsonl")):
+        if path.exists():
+            try:
+                return list(_shared_load_manifest(path).get("records") or [])
+            except (OSError, ValueError):
+                return []
+    return []
+
+
+class ArchiveDaemon:
+    def __init__(
+        self,
+        workflows: list[str],
+        manifest_dir: Path,
+        base_params: dict[str, Any],
+        workflow_params: dict[str, dict[str, Any]],
+        poll_seconds: float,
+        max_attempts: int,
+        retry_seconds: float,
+        status_path: Path,
+    ):
+        self.workflows = workflows
+        self.manifest_dir = manifest_dir
+        self.base_params = base_params
+        self.workflow_params = workflow_params
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.status_path = status_path
+        self.work_dir = manifest_dir / "archive_daemon"
+        self.log_path = self.work_dir / "archive_daemon.log"
+        self.queue = WorkQueue(manifest_dir / QUEUE_FILENAME)
+        self.stop = threading.Event()
+        self.started_at = time.time()
+        self.state = "starting"
+        self.current: dict[str, Any] | None = None
+        self.last_discovery: dict[str, dict[str, Any]] = {}
+        self.next_discovery = 0.0
+
+    def _params(self, workflow: str, **extra: Any) -> dict[str, Any]:
+        return {**self.base_params, **self.workflow_params.get(workflow, {}), **extra}
+
+    def discover(self) -> None:
+        # A dry run of each workflow is its own planner: same retention rules, keep rules,
+        # excludes, and the shared run catalog, which stays warm between polls.
+        self.state = "discovering"
+        for workflow in self.workflows:
+            if self.stop.is_set():
+                return
+            self.write_status()
+            plan_path = self.work_dir / f"{workflow}.plan.json"
+            for stale in (plan_path, plan_path.with_suffix(".jsonl"), plan_path.with_suffix(".log")):
+                stale.unlink(missing_ok=True)
+            started = time.time()
+            code = _run_workflow(workflow, self._params(workflow, dry_run=True, manifest_path=str(plan_path)), self.log_path)
+            info: dict[str, Any] = {"at": _iso(started), "seconds": round(time.time() - started, 1), "exit_code": code}
+            if code != 0:
+                info["error"] = f"dry run exited with status {code}"
+                _log(self.log_path, f"{workflow}: discovery failed (exit {code}); queue left unchanged")
+            else:
+                planned = {
+                    str(rec["run_id"]): int(rec.get("size_bytes") or 0)
+                    for rec in _load_records(plan_path)
+                    if rec.get("run_id")
+                }
+                added, dropped = self.queue.sync(workflow, planned)
+                info.update({"eligible": len(planned), "added": added, "dropped": dropped})
+                if added or dropped:
+                    _log(self.log_path, f"{workflow}: {len(planned)} eligible, {added} queued, {dropped} dropped")
+            self.last_discovery[workflow] = info
+        self.next_discovery = time.time() + self.poll_seconds
+
+    def process(self, job: Any) -> None:
+        workflow, run_id = job["workflow"], job["run_id"]
+        holder = _lock_holder(WORKFLOW_LOCKS[workflow])
+        if holder is not None:
+            self.queue.defer(job, time.time() + LOCK_RETRY_SECONDS, f"{workflow} batch running (pid {holder})")
+            _log(self.log_path, f"{workflow} {run_id}: deferred, another {workflow} batch holds the lock (pid {holder})")
+            return
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        manifest_path = self.manifest_dir / f"{workflow}_{stamp}_{run_id}.json"
+        self.state = "archiving"
+        self.current = {"workflow": workflow, "run_id": run_id, "size_bytes": job["size_bytes"], "started_at": _iso(time.time())}
+        self.queue.start(job)
+        self.write_status()
+        _log(self.log_path, f"{workflow} {run_id}: archiving ({_shared_format_bytes(job['size_bytes'])})")
+        code = _run_workflow(workflow, self._params(workflow, only_runs=run_id, manifest_path=str(manifest_path)), self.log_path)
+        record = next((rec for rec in _load_records(manifest_path) if rec.get("run_id") == run_id), None)
+        self.current = None
+        if record is None and code == 0:
+            self.queue.finish(job, "skipped", last_error="no longer eligible when processed")
+            _log(self.log_path, f"{workflow} {run_id}: skipped, no longer eligible")
+        elif record is not None and code == 0 and record.get("status") != "failed":
+            copy_bytes = int(record.get("copy_bytes") or 0)
+            copy_seconds = float(record.get("copy_seconds") or 0.0)
+            self.queue.finish(
+                job,
+                "done",
+                attempts=job["attempts"] + 1,
+                copy_bytes=copy_bytes,
+                copy_seconds=copy_seconds,
+                manifest=str(manifest_path),
+                last_error="",
+            )
+            rate = f" ({_shared_format_bytes(int(copy_bytes / copy_seconds))}/s)" if copy_seconds > 0 else ""
+            _log(self.log_path, f"{workflow} {run_id}: {record.get('status')}, {_shared_format_bytes(copy_bytes)} copied{rate}")
+        else:
+            errors = (record or {}).get("errors") or [f"{workflow} exited with status {code}"]
+            attempts = job["attempts"] + 1
+            if attempts < self.max_attempts:
+                self.queue.finish(
+                    job,
+                    "pending",
+                    attempts=attempts,
+                    not_before=time.time() + self.retry_seconds * attempts,
+                    manifest=str(manifest_path),
+                    last_error=str(errors[0]),
+                )
+                _log(self.log_path, f"{workflow} {run_id}: failed (attempt {attempts}/{self.max_attempts}), will retry: {errors[0]}")
+            else:
+                self.queue.finish(job, "failed", attempts=attempts, manifest=str(manifest_path), last_error=str(errors[0]))
+                _log(self.log_path, f"{workflow} {run_id}: failed after {attempts} attempts: {errors[0]}")
+
+    def status(self) -> dict[str, Any]:
+        now = time.time()
+        total_bytes, total_seconds, total_runs = self.queue.throughput(0)
+        day_bytes, day_seconds, day_runs = self.queue.throughput(now - 86400)
+        pending = self.queue.rows("state = 'pending'", "enqueued_at, run_id", 50)
+        recent = self.queue.rows("state IN ('done', 'failed', 'skipped')", "finished_at DESC", 20)
+        keys = ("workflow", "run_id", "size_bytes", "attempts", "last_error")
+        return {
+            "pid": os.getpid(),
+            "state": self.state,
+            "started_at": _iso(self.started_at),
+            "updated_at": _iso(now),
+            "next_discovery_at": _iso(self.next_discovery),
+            "workflows": self.workflows,
+            "current": self.current,
+            "queue": self.queue.counts(),
+            "pending_bytes": sum(int(row["size_bytes"]) for row in pending),
+            "pending": [
+                {**{k: row[k] for k in keys}, "enqueued_at": _iso(row["enqueued_at"]), "not_before": _iso(row["not_before"])}
+                for row in pending
+            ],
+            "recent": [
+                {
+                    **{k: row[k] for k in keys},
+                    "state": row["state"],
+                    "finished_at": _iso(row["finished_at"]),
+                    "copy_bytes": row["copy_bytes"],
+                    "copy_seconds": row["copy_seconds"],
+                    "manifest": row["manifest"],
+                }
+                for row in recent
+            ],
+            "throughput": {
+                "total_runs": total_runs,
+                "total_bytes": total_bytes,
+                "total_rate_bps": round(total_bytes / total_seconds) if total_seconds > 0 else 0,
+                "last_24h_runs": day_runs,
+                "last_24h_bytes": day_bytes,
+                "last_24h_rate_bps": round(day_bytes / day_seconds) if day_seconds > 0 else 0,
+            },
+            "last_discovery": self.last_discovery,
+        }
+
+    def write_status(self) -> None:
+        _shared_write_json_atomic(self.status_path, self.status())
+
+    def run(self, once: bool = False) -> None:
+        last_status = 0.0
+        try:
+            while not self.stop.is_set():
+                if time.time() >= self.next_discovery:
+                    self.discover()
+                    continue
+                job = self.queue.next_job(time.time())
+                if job is not None:
+                    self.process(job)
+                    continue
+                if once:
+                    break
+                self.state = "idle"
+                if time.time() - last_status >= HEARTBEAT_SECONDS:
+                    self.write_status()
+                    last_status = time.time()
+                wakeup = min(self.next_discovery, self.queue.next_wakeup() or self.next_discovery)
+                self.stop.wait(max(1.0, min(HEARTBEAT_SECONDS, wakeup - time.time())))
+        finally:
+            self.state = "stopped"
+            self.current = None
+            self.write_status()
+            self.queue.close()
+
+
+def _print_status(status_path: Path) -> None:
+    if not status_path.is_file():
+        raise SystemExit(f"No archive daemon status file at {status_path}")
+    status = json.loads(status_path.read_text(encoding="utf-8"))
+    print(f"State: {status.get('state')} (pid {status.get('pid')}, updated {status.get('updated_at')})")
+    current = status.get("current")
+    if current:
+        print(_ok(f"Archiving: {current['workflow']} {current['run_id']} since {current['started_at']}"))
+    counts = status.get("queue") or {}
+    print("Queue: " + ", ".join(f"{state}={counts[state]}" for state in sorted(counts)) if counts else "Queue: empty")
+    print(f"Pending size: {_shared_format_bytes(int(status.get('pending_bytes') or 0))}")
+    throughput = status.get("throughput") or {}
+    print(
+        f"Last 24h: {throughput.get('last_24h_runs', 0)} runs, {_shared_format_bytes(int(throughput.get('last_24h_bytes') or 0))} "
+        f"at {_shared_format_bytes(int(throughput.get('last_24h_rate_bps') or 0))}/s"
+    )
+    for row in status.get("pending") or []:
+        note = f"  retry after {row['not_before']}: {row['last_error']}" if row.get("last_error") else ""
+        print(_dim(f"- {row['workflow']} {row['run_id']} {_shared_format_bytes(int(row['size_bytes']))}{note}"))
+    print(f"Next discovery: {status.get('next_discovery_at') or '-'}")
+
+
+def _parse_params() -> dict[str, Any]:
+    ctx = load_ctx()
+    params = dict(ctx.get("params") or {})
+
+    parser = argparse.ArgumentParser(description="Run the archive workflows continuously from a persistent work queue.")
+    parser.add_argument("--action", default="run", choices=["run", "status"])
+    parser.add_argument("--workflows", default=DEFAULT_WORKFLOWS)
+    parser.add_argument("--manifest-dir", default=DEFAULT_MANIFEST_DIR)
+    parser.add_argument("--status-path", default="")
+    parser.add_argument("--poll-minutes", type=int, default=DEFAULT_POLL_MINUTES)
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    parser.add_argument("--retry-minutes", type=int, default=DEFAULT_RETRY_MINUTES)
+    parser.add_argument("--max-streams-per-mount", type=int, default=DEFAULT_MAX_STREAMS_PER_MOUNT)
+    parser.add_argument("--mount-bwlimit-mbps", type=int, default=0)
+    parser.add_argument("--io-nice", nargs="?", const="true", default="true")
+    parser.add_argument("--workflow-params", default="")
+    parser.add_argument("--retry-failed", nargs="?", const="true", default="false")
+    parser.add_argument("--once", nargs="?", const="true", default="false")
+
+    if params:
+        return params
+
+    args = parser.parse_args()
+    return {
+        "action": args.action,
+        "workflows": args.workflows,
+        "manifest_dir": args.manifest_dir,
+        "status_path": args.status_path,
+        "poll_minutes": args.poll_minutes,
+        "max_attempts": args.max_attempts,
+        "retry_minutes": args.retry_minutes,
+        "max_streams_per_mount": args.max_streams_per_mount,
+        "mount_bwlimit_mbps": args.mount_bwlimit_mbps,
+        "io_nice": args.io_nice,
+        "workflow_params": args.workflow_params,
+        "retry_failed": args.retry_failed,
+        "once": args.once,
+    }
+
+
+def main() -> None:
+    params = _parse_params()
+    action = str(params.get("action") or "run").strip().lower()
+    workflows = _split_csv(params.get("workflows") or DEFAULT_WORKFLOWS)
+    manifest_dir = Path(str(params.get("manifest_dir") or DEFAULT_MANIFEST_DIR)).expanduser().resolve()
+    status_raw = str(params.get("status_path") or "").strip()
+    status_path = Path(status_raw).expanduser().resolve() if status_raw else manifest_dir / STATUS_FILENAME
+    poll_minutes = _parse_int(params.get("poll_minutes"), DEFAULT_POLL_MINUTES)
+    max_attempts = _parse_int(params.get("max_attempts"), DEFAULT_MAX_ATTEMPTS)
+    retry_minutes = _parse_int(params.get("retry_minutes"), DEFAULT_RETRY_MINUTES)
+    max_streams_per_mount = _parse_int(params.get("max_streams_per_mount"), DEFAULT_MAX_STREAMS_PER_MOUNT)
+    mount_bwlimit_mbps = _parse_int(params.get("mount_bwlimit_mbps"), 0)
+    io_nice = _parse_bool(params.get("io_nice"), True)
+    workflow_params_raw = str(params.get("workflow_params") or "").strip()
+    retry_failed = _parse_bool(params.get("retry_failed"), False)
+    once = _parse_bool(params.get("once"), False)
+
+    if action == "status":
+        _print_status(status_path)
+        return
+    if action != "run":
+        raise SystemExit("action must be one of: run, status")
+    unknown = [w for w in workflows if w not in WORKFLOW_ENTRIES]
+    if unknown or not workflows:
+        raise SystemExit(f"workflows must be a comma-separated subset of: {', '.join(WORKFLOW_ENTRIES)}")
+    if poll_minutes <= 0 or max_attempts <= 0 or retry_minutes < 0:
+        raise SystemExit("poll_minutes and max_attempts must be > 0, retry_minutes >= 0")
+    if max_streams_per_mount < 0 or mount_bwlimit_mbps < 0:
+        raise SystemExit("max_streams_per_mount and mount_bwlimit_mbps must be >= 0")
+    workflow_params: dict[str, dict[str, Any]] = {}
+    if workflow_params_raw:
+        path = Path(workflow_params_raw).expanduser()
+        try:
+            loaded = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        except (OSError, yaml.YAMLError) as exc:
+            raise SystemExit(f"Cannot read workflow_params {path}: {exc}") from exc
+        if not isinstance(loaded, dict) or not all(isinstance(v, dict) for v in loaded.values()):
+            raise SystemExit(f"workflow_params must map workflow ids to parameter mappings: {path}")
+        workflow_params = {str(k): dict(v) for k, v in loaded.items()}
+
+    work_dir = manifest_dir / "archive_daemon"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    lock_fh = open(work_dir / "archive_daemon.lock", "w", encoding="utf-8")
+    try:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise SystemExit(f"Another archive_daemon is running for {manifest_dir}")
+
+    base_params = {
+        "non_interactive": True,
+        "tui": False,
+        "manifest_dir": str(manifest_dir),
+        "max_streams_per_mount": max_streams_per_mount,
+        "mount_bwlimit_mbps": mount_bwlimit_mbps,
+        "io_nice": io_nice,
+    }
+    daemon = ArchiveDaemon(
+        workflows,
+        manifest_dir,
+        base_params,
+        workflow_params,
+        poll_seconds=poll_minutes * 60,
+        max_attempts=max_attempts,
+        retry_seconds=retry_minutes * 60,
+        status_path=status_path,
+    )
+    if retry_failed:
+        print(_warn(f"Re-queued failed runs: {daemon.queue.retry_failed()}"))
+
+    def _request_stop(signum: int, _frame: Any) -> None:
+        print(_warn(f"Received signal {signum}; stopping after the current run."), flush=True)
+        daemon.stop.set()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+    print(f"Workflows: {', '.join(workflows)}")
+    print(f"Queue: {daemon.queue.path}")
+    print(f"Status: {status_path}")
+    print(f"Log: {daemon.log_path}")
+    print(f"Poll interval: {poll_minutes} min; transfer limits: streams/mount={max_streams_per_mount or 'unlimited'}, "
+          f"bandwidth/mount={f'{mount_bwlimit_mbps} MB/s' if mount_bwlimit_mbps else 'unlimited'}, io_nice={'on' if io_nice else 'off'}")
+    try:
+        daemon.run(once=once)
+    finally:
+        fcntl.flock(lock_fh, fcntl.LOCK_UN)
+        lock_fh.close()
+    print(_ok("archive_daemon stopped."))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@ from __future__ import annotations
 import argparse
 import configparser
 import csv
-import fnmatch
 import json
 import os
 import pwd
@@ -12,7 +11,8 @@ import shutil
 import subprocess
 import sys
 import tempfile
-from dataclasses import dataclass
+import threading
+from dataclasses import asdict, dataclass, field, replace
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any
@@ -21,15 +21,56 @@ WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
 if str(WORKFLOWS_DIR) not in sys.path:
     sys.path.insert(0, str(WORKFLOWS_DIR))
 from archive_common import (
-    current_user as _shared_current_user,
+    COPY_BACKENDS as _SHARED_COPY_BACKENDS,
+    DEDUP_MIN_BYTES as _SHARED_DEDUP_MIN_BYTES,
+    DISCOVERY_WORKERS as _SHARED_DISCOVERY_WORKERS,
+    JOB_ORDERS as _SHARED_JOB_ORDERS,
+    ManifestJournal as _SharedManifestJournal,
+    NATIVE_COPY_WORKERS as _SHARED_NATIVE_COPY_WORKERS,
+    RsyncProgressReporter as _SharedRsyncProgressReporter,
+    RsyncResult as _SharedRsyncResult,
+    RunCatalog as _SharedRunCatalog,
+    TopN as _SharedTopN,
+    TransferScheduler as _SharedTransferScheduler,
+    TreeVerify as _SharedTreeVerify,
+    check_verify_algorithm as _shared_check_verify_algorithm,
+    copy_shards as _shared_copy_shards,
+    dedup_run as _shared_dedup_run,
+    fingerprint_table as _shared_fingerprint_table,
+    index_archived_files as _shared_index_archived_files,
+    keep_rule_updates as _shared_keep_rule_updates,
+    list_copy_files as _shared_list_copy_files,
     load_active_keep_runs as _shared_load_active_keep_runs,
+    load_checkpoints as _shared_load_checkpoints,
+    load_manifest as _shared_load_manifest,
     load_rules as _shared_load_rules,
-    save_rules as _shared_save_rules,
+    load_verified_record as _shared_load_verified_record,
+    map_ordered as _shared_map_ordered,
+    native_copy_reason as _shared_native_copy_reason,
+    native_copy_tree as _shared_native_copy_tree,
+    open_run_catalog as _shared_open_run_catalog,
+    order_jobs as _shared_order_jobs,
+    remove_tree as _shared_remove_tree,
+    reverify_fingerprints as _shared_reverify_fingerprints,
+    run_batch as _shared_run_batch,
+    run_rsync as _shared_run_rsync,
+    scan_tree as _shared_scan_tree,
+    shard_files as _shared_shard_files,
+    unchanged_digests as _shared_unchanged_digests,
+    update_rules as _shared_update_rules,
     validate_keep_until as _shared_validate_keep_until,
+    verify_tree as _shared_verify_tree,
 )
 DEFAULT_SOURCE_ROOT = "/data/fastq"
 DEFAULT_TARGET_ROOT = "/mnt/nextgen2/archive/fastq"
 DEFAULT_RETENTION_DAYS = 90
+DEFAULT_PARALLEL_RUNS = 1
+DEFAULT_JOB_ORDER = "oldest-first"
+DEFAULT_COPY_BACKEND = "auto"
+DEFAULT_COPY_SHARDS = 1
+DEFAULT_VERIFY_MODE = "checksum"
+DEFAULT_VERIFY_ALGORITHM = "blake2b"
+VERIFY_MODES = ("checksum", "rsync")
 DEFAULT_MANIFEST_DIR = "/data/shared/bpm_manifests"
 DEFAULT_KEEP_RULES_PATH = "/data/shared/bpm_manifests/keep_rules.yaml"
 DEFAULT_EXCLUDE_PATTERNS = [
@@ -54,6 +95,7 @@ DEFAULT_INSTRUMENTS = [
 ]
 RUN_PREFIX_RE = re.compile(r"^(?P<prefix>\d{6})_")
 USE_COLOR = sys.stdout.isatty() and os.environ.get("NO_COLOR") is None
+_LOG_LOCK = threading.Lock()
 def _style(text: str, code: str) -> str:
     if not USE_COLOR:
         return text
@@ -270,71 +312,6 @@ def _get_retention_reference(run_dir: Path, run_date: date) -> tuple[date, str]:
         if parsed is not None:
             return parsed, "export_last_exported_at"
     return run_date, "run_name_prefix"
-def _du_size_bytes(path: Path) -> int:
-    result = subprocess.run(
-        ["du", "-sb", str(path)],
-        check=True,
-        text=True,
-        capture_output=True,
-    )
-    first = result.stdout.strip().split()[0]
-    return int(first)
-def _dir_size_excluding(path: Path, exclude_patterns: list[str]) -> int:
-    total = 0
-    for root, _, files in os.walk(path):
-        root_path = Path(root)
-        for name in files:
-            file_path = root_path / name
-            if _match_exclude_pattern(file_path, path, exclude_patterns) is not None:
-                continue
-            try:
-                total += file_path.stat().st_size
-            except OSError:
-                continue
-    return total
-def _has_excluded_files(path: Path, exclude_patterns: list[str]) -> bool:
-    for root, _, files in os.walk(path):
-        root_path = Path(root)
-        for name in files:
-            file_path = root_path / name
-            if _match_exclude_pattern(file_path, path, exclude_patterns) is not None:
-                return True
-    return False
-def _has_any_files(path: Path) -> bool:
-    for root, _, files in os.walk(path):
-        if files:
-            return True
-    return False
-def _match_exclude_pattern(file_path: Path, run_dir: Path, exclude_patterns: list[str]) -> str | None:
-    name = file_path.name
-    rel_path = file_path.relative_to(run_dir)
-    rel = str(rel_path)
-    parts = rel_path.parts
-    for pat in exclude_patterns:
-        if fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(rel, pat):
-            return pat
-        if pat in parts:
-            return pat
-    return None
-def _is_preserved_file(path: Path, source_dir: Path, preserve_patterns: list[str]) -> bool:
-    rel_path = path.relative_to(source_dir)
-    rel = str(rel_path)
-    name = path.name
-    rel_parts = rel_path.parts
-    for pat in preserve_patterns:
-        cleaned = pat.strip().strip('/')
-        if not cleaned:
-            continue
-        if fnmatch.fnmatch(name, cleaned) or fnmatch.fnmatch(rel, cleaned):
-            return True
-        if all(ch not in cleaned for ch in '*?[]'):
-            if cleaned in rel_parts:
-                return True
-            if rel.startswith(cleaned + '/'):
-                return True
-        if fnmatch.fnmatch(rel, cleaned + '/*'):
-            return True
-    return False
 def _is_safe_flat_run_path(source_dir: Path, source_root: Path) -> tuple[bool, str]:
     if not source_dir.is_absolute():
         return False, 'source path is not absolute'
@@ -360,47 +337,50 @@ def _cleanup_run_directory(source_dir: Path, source_root: Path, dry_run: bool) -
     if dry_run:
         print(_warn(f'[dry-run] Would remove run directory: {source_dir}'))
         return 0, 0, 'dry_run_only'
-    file_count = sum(1 for p in source_dir.rglob('*') if p.is_file() and not p.is_symlink())
-    dir_count = sum(1 for p in source_dir.rglob('*') if p.is_dir())
-    shutil.rmtree(source_dir)
-    return file_count, dir_count + 1, 'done'
+    removed = _shared_remove_tree(source_dir)
+    return removed.file_count, removed.dir_count, 'done'
+def _cached_retention_reference(catalog: _SharedRunCatalog, run_dir: Path, run_date: date) -> tuple[date, str]:
+    def _compute() -> list[str]:
+        ref_date, ref_source = _get_retention_reference(run_dir, run_date)
+        return [ref_date.isoformat(), ref_source]
+    ref_iso, ref_source = catalog.cached(run_dir, "retention_reference", _compute)
+    return date.fromisoformat(ref_iso), ref_source
 def _compute_cutoff(retention_days: int) -> date:
     return date.today() - timedelta(days=retention_days)
-def _investigate_run(source_root: Path, run_id: str, exclude_patterns: list[str], top_n: int) -> None:
+def _investigate_run(
+    source_root: Path,
+    run_id: str,
+    exclude_patterns: list[str],
+    top_n: int,
+    workers: int = _SHARED_DISCOVERY_WORKERS,
+    output_path: Path | None = None,
+) -> None:
     run_dir = source_root / run_id
     if not run_dir.exists() or not run_dir.is_dir():
         raise SystemExit(f"Investigate run not found or not a directory: {run_dir}")
-    total_bytes = 0
-    excluded_bytes = 0
-    included_bytes = 0
-    included_files: list[tuple[int, str]] = []
-    excluded_files: list[tuple[int, str, str]] = []
-    by_pattern: dict[str, int] = {}
+    # Only the top N files are kept, so memory stays flat however many files the run has.
+    top_included = _SharedTopN(top_n)
+    top_excluded = _SharedTopN(top_n)
+    def _collect(rel: str, size: int, pat: str | None) -> None:
+        if pat is None:
+            top_included.push(size, (rel, None))
+        else:
+            top_excluded.push(size, (rel, pat))
+    scan = _shared_scan_tree(run_dir, exclude_patterns, on_file=_collect, workers=workers)
+    total_bytes = scan.total_bytes
+    excluded_bytes = scan.excluded_bytes
+    included_bytes = scan.archive_bytes
+    by_pattern = scan.by_pattern
     by_top_included: dict[str, int] = {}
     by_top_excluded: dict[str, int] = {}
-    for root, _, files in os.walk(run_dir):
-        root_path = Path(root)
-        for name in files:
-            file_path = root_path / name
-            try:
-                size = file_path.stat().st_size
-            except OSError:
-                continue
-            rel = str(file_path.relative_to(run_dir))
-            top = rel.split("/", 1)[0] if "/" in rel else "."
-            total_bytes += size
-            pat = _match_exclude_pattern(file_path, run_dir, exclude_patterns)
-            if pat is not None:
-                excluded_bytes += size
-                excluded_files.append((size, rel, pat))
-                by_pattern[pat] = by_pattern.get(pat, 0) + size
-                by_top_excluded[top] = by_top_excluded.get(top, 0) + size
-            else:
-                included_bytes += size
-                included_files.append((size, rel))
-                by_top_included[top] = by_top_included.get(top, 0) + size
-    def _top_items(items: list[tuple[int, str]], n: int) -> list[tuple[int, str]]:
-        return sorted(items, key=lambda x: x[0], reverse=True)[:n]
+    for name, (total, archive) in scan.top_level.items():
+        top = name[:-1] if name.endswith("/") else "."
+        if archive:
+            by_top_included[top] = by_top_included.get(top, 0) + archive
+        if total - archive:
+            by_top_excluded[top] = by_top_excluded.get(top, 0) + (total - archive)
+    top_level_included = sorted(by_top_included.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    top_level_excluded = sorted(by_top_excluded.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
     _print_section("Investigate Run")
     print(f"Run: {run_id}")
     print(f"Path: {run_dir}")
@@ -409,28 +389,59 @@ def _investigate_run(source_root: Path, run_id: str, exclude_patterns: list[str]
     print(_ok(f"- Total size: {_format_bytes(total_bytes)}"))
     print(_warn(f"- Excluded by patterns: {_format_bytes(excluded_bytes)}"))
     print(_ok(f"- Included (archive size): {_format_bytes(included_bytes)}"))
+    print(f"- Files: {scan.file_count} ({scan.excluded_file_count} excluded), directories: {scan.dir_count}")
+    if scan.errors:
+        print(_warn(f"- Unreadable directories: {len(scan.errors)} (first: {scan.errors[0]})"))
     if by_pattern:
         print("\nExcluded size by pattern:")
         for pat, size in sorted(by_pattern.items(), key=lambda kv: kv[1], reverse=True):
             print(f"  {pat:<20} {_format_bytes(size):>12}")
-    if by_top_included:
+    if top_level_included:
         print("\nTop-level included paths:")
-        for name, size in sorted(by_top_included.items(), key=lambda kv: kv[1], reverse=True)[:top_n]:
+        for name, size in top_level_included:
             print(f"  {name:<36} {_format_bytes(size):>12}")
-    if by_top_excluded:
+    if top_level_excluded:
         print("\nTop-level excluded paths:")
-        for name, size in sorted(by_top_excluded.items(), key=lambda kv: kv[1], reverse=True)[:top_n]:
+        for name, size in top_level_excluded:
             print(f"  {name:<36} {_format_bytes(size):>12}")
-    top_inc = _top_items(included_files, top_n)
-    if top_inc:
+    if top_included.items():
         print("\nTop included files:")
-        for size, rel in top_inc:
+        for size, (rel, _) in top_included.items():
             print(f"  {_format_bytes(size):>12}  {rel}")
-    top_exc = sorted(excluded_files, key=lambda x: x[0], reverse=True)[:top_n]
-    if top_exc:
+    if top_excluded.items():
         print("\nTop excluded files:")
-        for size, rel, pat in top_exc:
+        for size, (rel, pat) in top_excluded.items():
             print(f"  {_format_bytes(size):>12}  {rel}  {_dim(f'({pat})')}")
+    if output_path is None:
+        return
+    # kind/name/size_bytes/pattern rows; the JSON form adds the run summary around them.
+    rows = [{"kind": "pattern", "name": pat, "size_bytes": size, "pattern": pat} for pat, size in by_pattern.items()]
+    rows += [{"kind": "top_level_included", "name": n, "size_bytes": s, "pattern": None} for n, s in top_level_included]
+    rows += [{"kind": "top_level_excluded", "name": n, "size_bytes": s, "pattern": None} for n, s in top_level_excluded]
+    rows += [{"kind": "included_file", "name": rel, "size_bytes": s, "pattern": None} for s, (rel, _) in top_included.items()]
+    rows += [{"kind": "excluded_file", "name": rel, "size_bytes": s, "pattern": p} for s, (rel, p) in top_excluded.items()]
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.suffix.lower() == ".csv":
+        with output_path.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=["kind", "name", "size_bytes", "pattern"])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        report = {
+            "run_id": run_id,
+            "path": str(run_dir),
+            "exclude_patterns": exclude_patterns,
+            "total_bytes": total_bytes,
+            "excluded_bytes": excluded_bytes,
+            "archive_bytes": included_bytes,
+            "file_count": scan.file_count,
+            "excluded_file_count": scan.excluded_file_count,
+            "dir_count": scan.dir_count,
+            "errors": scan.errors,
+            "rows": rows,
+        }
+        output_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(_ok(f"\nInvestigation report written: {output_path}"))
 def _owner_user(path: Path) -> str:
     try:
         uid = path.stat().st_uid
@@ -445,71 +456,89 @@ def _discover_candidates(
     skip_runs: set[str],
     keep_run_ids: set[str],
     exclude_patterns: list[str],
+    catalog: _SharedRunCatalog,
+    discovery_workers: int = _SHARED_DISCOVERY_WORKERS,
+    only_runs: set[str] | None = None,
 ) -> tuple[list[RunCandidate], list[str]]:
     # /data/fastq is a flat run layout (no instrument-level folders).
     # Keep "instruments" argument for interface compatibility; it is ignored here.
     _ = instruments
-    issues: list[str] = []
+    catalog_notes_before = len(catalog.notes)
     cutoff = _compute_cutoff(retention_days)
-    candidates: list[RunCandidate] = []
-    for entry in sorted(source_root.iterdir()):
+    def _probe(entry: Path) -> tuple[RunCandidate | None, list[str]]:
+        issues: list[str] = []
+        if only_runs and entry.name not in only_runs:
+            return None, issues
         if not entry.is_dir():
-            continue
+            return None, issues
         run_date = _parse_run_date(entry.name)
         if run_date is None:
-            continue
-        ref_date, ref_source = _get_retention_reference(entry, run_date)
+            return None, issues
+        ref_date, ref_source = _cached_retention_reference(catalog, entry, run_date)
         if ref_date >= cutoff:
-            continue
+            return None, issues
         if entry.name in skip_runs:
-            continue
+            return None, issues
         try:
-            total_size_bytes = _du_size_bytes(entry)
-            project_id = _project_id_from_folder(entry)
+            scan = catalog.scan(entry, exclude_patterns)
+            if scan.errors:
+                raise RuntimeError(scan.errors[0])
+            total_size_bytes = scan.total_bytes
+            project_id = catalog.cached(entry, "project_id", lambda: _project_id_from_folder(entry))
             kept_by_rule = entry.name in keep_run_ids
             archive_size_bytes = None
             cleanup_only = False
             cleanup_only_reason = None
             if not kept_by_rule:
-                archive_size_bytes = _dir_size_excluding(entry, exclude_patterns)
+                archive_size_bytes = scan.archive_bytes
                 if archive_size_bytes == 0:
-                    if _has_excluded_files(entry, exclude_patterns):
+                    # A cleanup-only run has its source removed without a copy, so a cached
+                    # "nothing left to archive" is confirmed by a fresh walk first.
+                    scan = catalog.scan(entry, exclude_patterns, refresh=True)
+                    if scan.errors:
+                        raise RuntimeError(scan.errors[0])
+                    total_size_bytes = scan.total_bytes
+                    archive_size_bytes = scan.archive_bytes
+                if archive_size_bytes == 0:
+                    if scan.excluded_file_count:
                         if (target_root / entry.name).is_dir():
                             cleanup_only = True
                             cleanup_only_reason = 'already-cleaned/FASTQ-only'
                             issues.append(f"Including cleanup-only run with existing archive target: {entry.name}")
                         else:
                             issues.append(f"Skipping already-cleaned/FASTQ-only run without archive target: {entry.name}")
-                            continue
-                    elif not _has_any_files(entry):
+                            return None, issues
+                    elif not scan.file_count:
                         if (target_root / entry.name).is_dir():
                             cleanup_only = True
                             cleanup_only_reason = 'already-cleaned/empty'
                             issues.append(f"Including cleanup-only run with existing archive target: {entry.name}")
                         else:
                             issues.append(f"Skipping already-cleaned/empty run without archive target: {entry.name}")
-                            continue
+                            return None, issues
         except Exception as exc:  # noqa: BLE001
             issues.append(f"Failed to calculate size for {entry}: {exc}")
-            continue
-        candidates.append(
-            RunCandidate(
-                run_id=entry.name,
-                owner_user=_owner_user(entry),
-                project_id=project_id,
-                run_date=run_date,
-                retention_reference_date=ref_date,
-                retention_reference_source=ref_source,
-                source_path=entry,
-                target_instrument_path=target_root,
-                target_run_path=target_root / entry.name,
-                total_size_bytes=total_size_bytes,
-                archive_size_bytes=archive_size_bytes,
-                kept_by_rule=kept_by_rule,
-                cleanup_only=cleanup_only,
-                cleanup_only_reason=cleanup_only_reason,
-            )
-        )
+            return None, issues
+        return RunCandidate(
+            run_id=entry.name,
+            owner_user=catalog.cached(entry, "owner", lambda: _owner_user(entry)),
+            project_id=project_id,
+            run_date=run_date,
+            retention_reference_date=ref_date,
+            retention_reference_source=ref_source,
+            source_path=entry,
+            target_instrument_path=target_root,
+            target_run_path=target_root / entry.name,
+            total_size_bytes=total_size_bytes,
+            archive_size_bytes=archive_size_bytes,
+            kept_by_rule=kept_by_rule,
+            cleanup_only=cleanup_only,
+            cleanup_only_reason=cleanup_only_reason,
+        ), issues
+    results = _shared_map_ordered(sorted(source_root.iterdir()), _probe, discovery_workers)
+    candidates = [candidate for candidate, _ in results if candidate is not None]
+    issues = [issue for _, entry_issues in results for issue in entry_issues]
+    issues.extend(catalog.notes[catalog_notes_before:])
     candidates.sort(key=lambda c: (c.run_date, c.run_id))
     return candidates, issues
 def _print_section(title: str) -> None:
@@ -540,27 +569,9 @@ def _run_archive_tui(candidates: list[RunCandidate], rules_path: Path) -> str:
             return value[:1]
         return value[: width - 1] + "~"
     def _save() -> int:
-        changed = 0
-        stamp = datetime.now().astimezone().isoformat(timespec="seconds")
-        user = _shared_current_user()
-        runs = payload.setdefault("runs", {})
-        for candidate in candidates:
-            old = runs.get(candidate.run_id)
-            if marked.get(candidate.run_id, False):
-                rec = {
-                    "keep": True,
-                    "set_by": user,
-                    "set_at": stamp,
-                    "keep_until": keep_until.get(candidate.run_id) or None,
-                }
-                if old != rec:
-                    runs[candidate.run_id] = rec
-                    changed += 1
-            elif candidate.run_id in runs:
-                del runs[candidate.run_id]
-                changed += 1
-        _shared_save_rules(rules_path, payload)
-        return changed
+        updates = _shared_keep_rule_updates(existing, marked, keep_until)
+        _shared_update_rules(rules_path, updates)
+        return len(updates)
     def _curses_main(stdscr) -> tuple[str, int]:
         curses.curs_set(0)
         stdscr.nodelay(False)
@@ -866,23 +877,32 @@ def _preflight_target_paths(target_root: Path, candidates: list[RunCandidate]) -
                 raise SystemExit(f"Target run path exists and is not a directory: {target_run_dir}")
             _assert_writable_dir(target_run_dir)
         seen_runs.add(target_run_dir)
-def _run_cmd(cmd: list[str], *, quiet_success: bool = False) -> subprocess.CompletedProcess[str]:
+def _run_rsync(cmd: list[str], label: str, live: bool = False) -> _SharedRsyncResult:
     print(_cmd("+ " + " ".join(cmd)))
-    result = subprocess.run(cmd, check=False, text=True, capture_output=True)
+    reporter = _SharedRsyncProgressReporter(label, live)
+    try:
+        result = _shared_run_rsync(cmd, on_progress=reporter)
+    finally:
+        reporter.close()
     if result.returncode != 0:
-        if result.stderr:
-            print(result.stderr, end='' if result.stderr.endswith('\n') else '\n', file=sys.stderr)
-        elif result.stdout:
-            print(result.stdout, end='' if result.stdout.endswith('\n') else '\n')
-        raise RuntimeError(_summarize_command_failure(cmd, result))
-    if not quiet_success:
-        summary = _rsync_progress_summary(result.stdout)
-        if summary:
-            print(_dim(summary))
+        for line in result.error_tail or result.output_tail:
+            print(line, file=sys.stderr)
+        raise RuntimeError(_summarize_command_failure(cmd, result.completed()))
+    print(_dim(f"[copy] {label}: {_format_bytes(result.bytes_done)} in {result.seconds:.0f}s ({_format_bytes(int(result.rate_bps))}/s)"))
     return result
-def _rsync_copy(candidate: RunCandidate, exclude_patterns: list[str]) -> None:
+def _rsync_copy(
+    candidate: RunCandidate,
+    exclude_patterns: list[str],
+    resume: bool = False,
+    scheduler: _SharedTransferScheduler | None = None,
+    live: bool = False,
+    files_from: Path | None = None,
+    label: str | None = None,
+) -> _SharedRsyncResult:
+    scheduler = scheduler or _SharedTransferScheduler(prefixes=[])
     candidate.target_instrument_path.mkdir(parents=True, exist_ok=True)
     cmd = [
+        *scheduler.command_prefix(),
         "rsync",
         "-a",
         "--human-readable",
@@ -893,10 +913,85 @@ def _rsync_copy(candidate: RunCandidate, exclude_patterns: list[str]) -> None:
         "--no-perms",
         "--no-group",
     ]
+    if resume:
+        # Continue partially transferred files left by an interrupted batch.
+        cmd.append("--append-verify")
     for pat in exclude_patterns:
         cmd.extend(["--exclude", pat])
-    cmd.extend([str(candidate.source_path), str(candidate.target_instrument_path)])
-    _run_cmd(cmd, quiet_success=True)
+    if files_from is not None:
+        # One shard of the run: only the listed files, relative to the run directory.
+        cmd.extend(["--from0", f"--files-from={files_from}", f"{candidate.source_path}/", f"{candidate.target_run_path}/"])
+    else:
+        # Rooted at the run directory like the shard and verify passes, so anchored excludes
+        # (e.g. dedup links) mean the same thing on every path.
+        cmd.extend([f"{candidate.source_path}/", f"{candidate.target_run_path}/"])
+    # Waits for a free stream slot on both mounts before rsync starts.
+    with scheduler.slot(candidate.source_path, candidate.target_instrument_path) as bwlimit_kbps:
+        if bwlimit_kbps:
+            cmd.insert(len(cmd) - 2, f"--bwlimit={bwlimit_kbps}")
+        return _run_rsync(cmd, label or candidate.run_id, live)
+def _sharded_rsync_copy(candidate: RunCandidate, settings: BatchSettings, resume: bool = False) -> Any:
+    scheduler = settings.scheduler or _SharedTransferScheduler(prefixes=[])
+    def _full_copy() -> _SharedRsyncResult:
+        return _rsync_copy(
+            candidate,
+            settings.exclude_patterns,
+            resume=resume,
+            scheduler=scheduler,
+            live=settings.live_progress,
+        )
+    if settings.copy_shards <= 1:
+        return _full_copy()
+    shards = _shared_shard_files(
+        _shared_list_copy_files(candidate.source_path, settings.exclude_patterns), settings.copy_shards
+    )
+    if len(shards) < 2:
+        return _full_copy()
+    sizes = ", ".join(_format_bytes(shard.size_bytes) for shard in shards)
+    print(_dim(f"[copy] {candidate.run_id}: {sum(len(s.files) for s in shards)} files in {len(shards)} shards ({sizes})"))
+    def _copy_shard(shard: Any, files_from: Path) -> _SharedRsyncResult:
+        return _rsync_copy(
+            candidate,
+            settings.exclude_patterns,
+            resume=resume,
+            scheduler=scheduler,
+            files_from=files_from,
+            label=f"{candidate.run_id} shard {shard.index + 1}/{len(shards)}",
+        )
+    # The closing full rsync only sets directory metadata and picks up files added since listing.
+    copy = _shared_copy_shards(candidate.target_run_path, shards, _copy_shard, _full_copy)
+    print(_dim(f"[copy] {candidate.run_id}: {_format_bytes(copy.stats()['copy_bytes'])} in {copy.seconds:.0f}s over {len(shards)} shards"))
+    return copy
+def _copy_run(candidate: RunCandidate, settings: BatchSettings, resume: bool = False) -> Any:
+    # The native backend (reflink/copy_file_range) is used when source and target share a
+    # filesystem or reflink pool; "auto" falls back to rsync for anything it cannot handle.
+    scheduler = settings.scheduler or _SharedTransferScheduler(prefixes=[])
+    reason = None
+    if settings.copy_backend == "native":
+        reason = "requested"
+    elif settings.copy_backend == "auto":
+        candidate.target_instrument_path.mkdir(parents=True, exist_ok=True)
+        reason = _shared_native_copy_reason(candidate.source_path, candidate.target_instrument_path)
+    if reason is not None:
+        print(_cmd(f"+ native copy ({reason}) {candidate.source_path} -> {candidate.target_run_path}"))
+        try:
+            with scheduler.slot(candidate.source_path, candidate.target_instrument_path):
+                copy = _shared_native_copy_tree(
+                    candidate.source_path,
+                    candidate.target_run_path,
+                    settings.exclude_patterns,
+                    workers=max(settings.copy_shards, _SHARED_NATIVE_COPY_WORKERS),
+                )
+            print(_dim(
+                f"[copy] {candidate.run_id}: {_format_bytes(copy.bytes_done)} in {copy.seconds:.0f}s "
+                f"({copy.file_count} files, {copy.cloned_count} reflinked, {copy.skipped_count} already present)"
+            ))
+            return copy
+        except OSError as exc:
+            if settings.copy_backend == "native":
+                raise
+            print(_warn(f"[copy] native copy failed for {candidate.run_id}, falling back to rsync: {exc}"))
+    return _sharded_rsync_copy(candidate, settings, resume=resume)
 def _rsync_verify(candidate: RunCandidate, exclude_patterns: list[str]) -> None:
     cmd = [
         "rsync",
@@ -926,6 +1021,64 @@ def _rsync_verify(candidate: RunCandidate, exclude_patterns: list[str]) -> None:
             "Verification mismatch after copy for "
             f"{candidate.run_id}. First rsync diff lines: {preview}"
         )
+def _checksum_verify(
+    candidate: RunCandidate,
+    exclude_patterns: list[str],
+    algorithm: str,
+    log_path: Path,
+    verified: dict[str, str] | None = None,
+    on_progress: Any = None,
+) -> _SharedTreeVerify:
+    def _report(rel: str, reason: str) -> None:
+        print(_err(f"[verify][mismatch] {candidate.run_id}: {rel}: {reason}"))
+        _append_log(log_path, f"run_verify_mismatch {candidate.run_id}: {rel}: {reason}")
+    return _shared_verify_tree(
+        candidate.source_path,
+        candidate.target_run_path,
+        exclude_patterns,
+        algorithm=algorithm,
+        on_mismatch=_report,
+        verified=verified,
+        on_progress=on_progress,
+    )
+def _verify_copy(
+    candidate: RunCandidate,
+    settings: BatchSettings,
+    rec: dict[str, Any],
+    known_digests: dict[str, str] | None = None,
+) -> None:
+    rec["verify_mode"] = settings.verify_mode
+    if settings.verify_mode == "rsync":
+        _rsync_verify(candidate, settings.exclude_patterns)
+        return
+    stored = _stored_verification(candidate, settings) if known_digests is None else None
+    if stored is not None and stored[1].get("verify_algorithm") == settings.verify_algorithm:
+        # Files unchanged on both sides since the last verified batch keep their digest.
+        known_digests = _shared_unchanged_digests(candidate.target_run_path, _shared_fingerprint_table(stored[1]))
+        rec["verify_fingerprint_manifest"] = str(stored[0])
+        rec["verify_reused_digests"] = len(known_digests)
+    result = _checksum_verify(
+        candidate,
+        settings.exclude_patterns,
+        settings.verify_algorithm,
+        settings.log_path,
+        verified=known_digests,
+        on_progress=lambda digests: _checkpoint(settings, candidate.run_id, "verify_progress", digests=digests),
+    )
+    rec["verify_algorithm"] = result.algorithm
+    rec["verify_file_count"] = result.file_count
+    rec["verify_bytes"] = result.byte_count
+    rec["verify_digests"] = result.digests
+    rec["verify_file_stats"] = result.file_stats
+    if result.mismatches:
+        rec["verify_mismatches"] = result.mismatches
+        preview = "; ".join(result.mismatches[:5])
+        if len(result.mismatches) > 5:
+            preview += f"; ... (+{len(result.mismatches) - 5} more)"
+        raise RuntimeError(
+            "Verification mismatch after copy for "
+            f"{candidate.run_id}. First checksum mismatches: {preview}"
+        )
 def _acquire_lock(lock_path: Path) -> int:
     flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
     try:
@@ -957,9 +1110,10 @@ def _release_lock(fd: int, lock_path: Path) -> None:
         pass
 def _append_log(log_path: Path, message: str) -> None:
     stamp = datetime.now().isoformat(timespec="seconds")
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(log_path, "a", encoding="utf-8") as fh:
-        fh.write(f"[{stamp}] {message}\n")
+    with _LOG_LOCK:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as fh:
+            fh.write(f"[{stamp}] {message}\n")
 def _first_meaningful_line(text: str) -> str:
     for line in text.splitlines():
         stripped = line.strip()
@@ -974,12 +1128,6 @@ def _summarize_command_failure(cmd: list[str], result: subprocess.CompletedProce
     stdout_first = _first_meaningful_line(result.stdout or '')
     detail = stderr_first or stdout_first or f'command exited with status {result.returncode}'
     return f"{' '.join(cmd)} -> {detail} (exit {result.returncode})"
-def _rsync_progress_summary(stdout: str) -> str | None:
-    lines = [line.strip() for line in stdout.splitlines() if line.strip()]
-    for line in reversed(lines):
-        if '(xfr#' in line:
-            return line
-    return None
 def _classify_failure(rec: dict[str, Any]) -> tuple[str, str]:
     messages: list[str] = []
     messages.extend(str(e) for e in rec.get('errors') or [])
@@ -1088,12 +1236,317 @@ def _manifest_payload(metadata: dict[str, Any], records: list[dict[str, Any]]) -
         "updated_at": datetime.now().isoformat(timespec="seconds"),
         "records": records,
     }
-def _write_manifest(manifest_path: Path, metadata: dict[str, Any], records: list[dict[str, Any]]) -> None:
-    manifest_path.parent.mkdir(parents=True, exist_ok=True)
-    manifest_path.write_text(
-        json.dumps(_manifest_payload(metadata, records), indent=2),
-        encoding="utf-8",
+def _write_manifest(journal: _SharedManifestJournal, metadata: dict[str, Any], records: list[dict[str, Any]]) -> None:
+    # Records are journaled as they finish; the summary JSON is compacted once per batch.
+    journal.compact(_manifest_payload(metadata, records))
+@dataclass
+class BatchSettings:
+    source_root: Path
+    exclude_patterns: list[str]
+    cleanup_requested: bool
+    dry_run: bool
+    log_path: Path
+    verify_mode: str
+    verify_algorithm: str
+    journal: _SharedManifestJournal | None = None
+    checkpoints: dict[str, dict[str, Any]] = field(default_factory=dict)
+    scheduler: _SharedTransferScheduler | None = None
+    live_progress: bool = False
+    copy_backend: str = DEFAULT_COPY_BACKEND
+    copy_shards: int = DEFAULT_COPY_SHARDS
+    catalog: _SharedRunCatalog | None = None
+    dedup: bool = False
+def _initial_record(candidate: RunCandidate, settings: BatchSettings) -> dict[str, Any]:
+    return {
+        "run_id": candidate.run_id,
+        "owner_user": candidate.owner_user,
+        "run_date": candidate.run_date.isoformat(),
+        "retention_reference_date": candidate.retention_reference_date.isoformat(),
+        "retention_reference_source": candidate.retention_reference_source,
+        "source": str(candidate.source_path),
+        "target": str(candidate.target_run_path),
+        "size_bytes": candidate.archive_size_bytes or 0,
+        "archive_size_bytes": candidate.archive_size_bytes or 0,
+        "total_size_bytes": candidate.total_size_bytes,
+        "cleanup_only": candidate.cleanup_only,
+        "cleanup_only_reason": candidate.cleanup_only_reason,
+        "copy_status": "pending",
+        "verify_status": "pending",
+        "cleanup_status": "pending" if settings.cleanup_requested else "skipped_disabled",
+        "cleanup_mode": "full_run_directory" if settings.cleanup_requested else "disabled",
+        "status": "planned",
+        "errors": [],
+        "log_path": str(settings.log_path),
+    }
+def _checkpoint(settings: BatchSettings, run_id: str, phase: str, **data: Any) -> None:
+    if settings.journal is not None and not settings.dry_run:
+        settings.journal.checkpoint(run_id, phase, **data)
+def _stored_verification(candidate: RunCandidate, settings: BatchSettings) -> tuple[Path, dict[str, Any]] | None:
+    if settings.catalog is None:
+        return None
+    pointer = settings.catalog.verified_record(candidate.target_run_path)
+    if pointer is None:
+        return None
+    record = _shared_load_verified_record(pointer[0], pointer[1], candidate.target_run_path)
+    return (pointer[0], record) if record is not None else None
+def _reverify_archived(candidate: RunCandidate, settings: BatchSettings, rec: dict[str, Any]) -> bool:
+    # Cleanup-only runs have nothing left to compare against on the source side, so the
+    # archive is re-checked against the fingerprint table of its last verification.
+    stored = _stored_verification(candidate, settings)
+    if stored is None:
+        return False
+    manifest, record = stored
+    algorithm = str(record.get("verify_algorithm") or settings.verify_algorithm)
+    result = _shared_reverify_fingerprints(candidate.target_run_path, _shared_fingerprint_table(record), algorithm)
+    rec["verify_mode"] = "fingerprint"
+    rec["verify_algorithm"] = algorithm
+    rec["verify_fingerprint_manifest"] = str(manifest)
+    rec["verify_file_count"] = result.file_count
+    rec["verify_unchanged_files"] = result.unchanged_count
+    rec["verify_rehashed_files"] = result.rehashed_count
+    rec["verify_rehashed_bytes"] = result.rehashed_bytes
+    if result.mismatches:
+        rec["verify_mismatches"] = result.mismatches
+        preview = "; ".join(result.mismatches[:5])
+        if len(result.mismatches) > 5:
+            preview += f"; ... (+{len(result.mismatches) - 5} more)"
+        raise RuntimeError(f"Archived copy of {candidate.run_id} no longer matches its fingerprints: {preview}")
+    rec["verify_digests"] = result.digests
+    rec["verify_file_stats"] = result.file_stats
+    return True
+def _dedup_links(candidate: RunCandidate, settings: BatchSettings, rec: dict[str, Any]) -> list[str]:
+    # Hardlinks large files already archived by earlier runs; returns excludes for the copy.
+    if not settings.dedup or settings.catalog is None or not settings.catalog.enabled:
+        return []
+    try:
+        dedup = _shared_dedup_run(
+            settings.catalog, candidate.source_path, candidate.target_run_path, settings.exclude_patterns
+        )
+    except OSError as exc:
+        print(_warn(f"[dedup] skipped for {candidate.run_id}: {exc}"))
+        return []
+    if dedup.links:
+        rec.update(dedup.stats())
+        _append_log(settings.log_path, f"run_dedup {candidate.run_id}: files={len(dedup.links)} bytes={dedup.bytes_saved}")
+        print(_dim(f"[dedup] {candidate.run_id}: {len(dedup.links)} files ({_format_bytes(dedup.bytes_saved)}) hardlinked to earlier archives"))
+    return dedup.excludes()
+def _index_content(candidate: RunCandidate, settings: BatchSettings, rec: dict[str, Any]) -> None:
+    if not settings.dedup or settings.catalog is None:
+        return
+    try:
+        _shared_index_archived_files(settings.catalog, candidate.target_run_path, rec)
+    except OSError as exc:
+        print(_warn(f"[dedup] could not index {candidate.run_id}: {exc}"))
+def _process_candidate(candidate: RunCandidate, settings: BatchSettings) -> dict[str, Any]:
+    rec = _initial_record(candidate, settings)
+    if settings.dry_run:
+        if candidate.cleanup_only:
+            rec["copy_status"] = "skipped_already_archived"
+            rec["verify_status"] = "skipped_already_archived"
+            rec["status"] = "dry_run_only"
+            rec["cleanup_status"] = "dry_run_only" if settings.cleanup_requested else "skipped_disabled"
+            print(_warn(f"[dry-run] Would remove already-archived source run directory: {candidate.source_path}"))
+        else:
+            rec["copy_status"] = "skipped_dry_run"
+            rec["verify_status"] = "skipped_dry_run"
+            rec["status"] = "dry_run_only"
+            rec["cleanup_status"] = "dry_run_only" if settings.cleanup_requested else "skipped_disabled"
+            print(_warn(f"[dry-run] Would archive {candidate.source_path} -> {candidate.target_run_path}"))
+        return rec
+    # Phases already completed by an interrupted attempt of this batch (--resume).
+    state = settings.checkpoints.get(candidate.run_id) or {}
+    phases = state.get("phases") or []
+    details = state.get("details") or {}
+    _append_log(settings.log_path, f"run_start {candidate.run_id}" + (f" resume_after={','.join(phases)}" if phases else ""))
+    if candidate.cleanup_only:
+        rec["copy_status"] = "skipped_already_archived"
+        rec["verify_status"] = "skipped_already_archived"
+        rec["status"] = "already_archived"
+        _append_log(settings.log_path, f"run_already_archived {candidate.run_id}: reason={candidate.cleanup_only_reason or '-'}")
+        print(_dim(f"[archive] already archived on target, cleanup-only: {candidate.run_id}"))
+        try:
+            if _reverify_archived(candidate, settings, rec):
+                rec["verify_status"] = "ok"
+                _append_log(settings.log_path, f"run_fingerprints_verified {candidate.run_id}: rehashed={rec['verify_rehashed_files']}")
+                print(_ok(
+                    f"[verify] archive matches recorded fingerprints: {candidate.run_id} "
+                    f"({rec['verify_unchanged_files']} unchanged, {rec['verify_rehashed_files']} re-hashed)"
+                ))
+        except Exception as exc:  # noqa: BLE001
+            rec["verify_status"] = "failed"
+            rec["cleanup_status"] = "skipped_due_to_verify_failure" if settings.cleanup_requested else rec["cleanup_status"]
+            rec["status"] = "failed"
+            rec["errors"].append(f"verify: {exc}")
+            _append_log(settings.log_path, f"run_verify_failed {candidate.run_id}: {exc}")
+            print(_err(f"[verify] failed: {candidate.run_id}: {exc}"))
+    elif "copied" in phases:
+        rec.update(details.get("copied") or {})
+        rec["copy_status"] = "ok"
+        print(_dim(f"[resume] copy already completed: {candidate.run_id}"))
+    else:
+        print(_dim(f"[archive] copying {candidate.run_id} -> {candidate.target_run_path}"))
+        try:
+            _checkpoint(settings, candidate.run_id, "copy_started")
+            linked = _dedup_links(candidate, settings, rec)
+            copy_settings = replace(settings, exclude_patterns=[*settings.exclude_patterns, *linked]) if linked else settings
+            copy = _copy_run(candidate, copy_settings, resume="copy_started" in phases)
+            rec.update(copy.stats())
+            _checkpoint(
+                settings,
+                candidate.run_id,
+                "copied",
+                details={k: v for k, v in rec.items() if k.startswith("dedup_")},
+            )
+            rec["copy_status"] = "ok"
+            print(_ok(f"[archive] copied: {candidate.run_id}"))
+        except Exception as exc:  # noqa: BLE001
+            rec["copy_status"] = "failed"
+            rec["verify_status"] = "skipped_due_to_copy_failure"
+            rec["cleanup_status"] = "skipped_due_to_copy_failure" if settings.cleanup_requested else rec["cleanup_status"]
+            rec["status"] = "failed"
+            rec["errors"].append(f"copy: {exc}")
+            _append_log(settings.log_path, f"run_copy_failed {candidate.run_id}: {exc}")
+            print(_err(f"[archive] failed: {candidate.run_id}: {exc}"))
+            return rec
+    if not candidate.cleanup_only and "verified" in phases:
+        rec.update(details.get("verified") or {})
+        if state.get("digests"):
+            rec["verify_digests"] = dict(sorted(state["digests"].items()))
+        if state.get("file_stats"):
+            rec["verify_file_stats"] = dict(sorted(state["file_stats"].items()))
+        rec["verify_status"] = "ok"
+        rec["status"] = "copied_verified"
+        _index_content(candidate, settings, rec)
+        print(_dim(f"[resume] verification already completed: {candidate.run_id}"))
+    elif not candidate.cleanup_only:
+        print(_dim(f"[verify] checking archived copy for {candidate.run_id}"))
+        try:
+            # Digests from an interrupted verify are reusable only if this attempt did not copy.
+            _verify_copy(candidate, settings, rec, state.get("digests") if "copied" in phases else None)
+            _checkpoint(
+                settings,
+                candidate.run_id,
+                "verified",
+                details={k: v for k, v in rec.items() if k.startswith("verify_") and k not in {"verify_digests", "verify_file_stats"}},
+                digests=rec.get("verify_digests") or {},
+                file_stats=rec.get("verify_file_stats") or {},
+            )
+            rec["verify_status"] = "ok"
+            rec["status"] = "copied_verified"
+            _append_log(settings.log_path, f"run_verified {candidate.run_id}")
+            _index_content(candidate, settings, rec)
+            print(_ok(f"[verify] archived copy verified: {candidate.run_id}"))
+        except Exception as exc:  # noqa: BLE001
+            rec["verify_status"] = "failed"
+            rec["cleanup_status"] = "skipped_due_to_verify_failure" if settings.cleanup_requested else rec["cleanup_status"]
+            rec["status"] = "failed"
+            rec["errors"].append(f"verify: {exc}")
+            _append_log(settings.log_path, f"run_verify_failed {candidate.run_id}: {exc}")
+            print(_err(f"[verify] failed: {candidate.run_id}: {exc}"))
+    cleanup_ready = (
+        (candidate.cleanup_only and rec["copy_status"] == "skipped_already_archived" and rec["verify_status"] in {"skipped_already_archived", "ok"})
+        or (rec["copy_status"] == "ok" and rec["verify_status"] == "ok")
     )
+    if cleanup_ready and settings.cleanup_requested and "cleaned" in phases:
+        rec.update(details.get("cleaned") or {})
+        rec["status"] = "already_archived_cleaned" if candidate.cleanup_only else "copied_verified_cleaned"
+        print(_dim(f"[resume] source already removed: {candidate.run_id}"))
+    elif cleanup_ready and settings.cleanup_requested:
+        rec["cleanup_attempted_at"] = datetime.now().isoformat(timespec="seconds")
+        remove_reason = "already archived target exists" if candidate.cleanup_only else "verified archive"
+        print(_warn(f"[remove] removing source run directory after {remove_reason}: {candidate.run_id}"))
+        try:
+            removed_files, removed_dirs, cleanup_status = _cleanup_run_directory(
+                candidate.source_path,
+                settings.source_root,
+                settings.dry_run,
+            )
+            rec["cleanup_removed_file_count"] = removed_files
+            rec["cleanup_removed_dir_count"] = removed_dirs
+            rec["cleanup_status"] = cleanup_status
+            rec["cleanup_error"] = ""
+            if cleanup_status in {"done", "done_no_matches"}:
+                rec["status"] = "already_archived_cleaned" if candidate.cleanup_only else "copied_verified_cleaned"
+                _checkpoint(
+                    settings,
+                    candidate.run_id,
+                    "cleaned",
+                    details={k: v for k, v in rec.items() if k.startswith("cleanup_") and k != "cleanup_mode"},
+                )
+            elif cleanup_status == "dry_run_only":
+                rec["status"] = "dry_run_only"
+            _append_log(
+                settings.log_path,
+                f"run_cleaned {candidate.run_id}: status={cleanup_status} removed_files={removed_files} removed_dirs={removed_dirs}",
+            )
+            print(_ok(f"[remove] source run directory removed: {candidate.run_id}"))
+        except Exception as exc:  # noqa: BLE001
+            rec["cleanup_status"] = "failed"
+            rec["cleanup_error"] = str(exc)
+            rec["status"] = "failed"
+            rec["errors"].append(f"cleanup: {exc}")
+            _append_log(settings.log_path, f"run_cleanup_failed {candidate.run_id}: {exc}")
+    elif cleanup_ready and not settings.cleanup_requested:
+        rec["cleanup_status"] = "skipped_disabled"
+        rec["status"] = "already_archived_cleanup_skipped" if candidate.cleanup_only else rec["status"]
+    return rec
+@dataclass
+class ResumeState:
+    manifest_path: Path
+    metadata: dict[str, Any]
+    plan: list[RunCandidate]
+    records: list[dict[str, Any]]
+    checkpoints: dict[str, dict[str, Any]]
+def _plan_entry(candidate: RunCandidate) -> dict[str, Any]:
+    return {key: str(value) if isinstance(value, (Path, date)) else value for key, value in asdict(candidate).items()}
+def _candidate_from_plan(entry: dict[str, Any]) -> RunCandidate:
+    values = dict(entry)
+    for key in ("run_date", "retention_reference_date"):
+        values[key] = date.fromisoformat(values[key])
+    for key in ("source_path", "target_instrument_path", "target_run_path"):
+        values[key] = Path(values[key])
+    return RunCandidate(**values)
+def _load_resume_state(path: Path) -> ResumeState:
+    if not path.is_file():
+        raise SystemExit(f"Resume manifest not found: {path}")
+    try:
+        payload = _shared_load_manifest(path)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Cannot read resume manifest {path}: {exc}") from exc
+    if payload.get("workflow_id") != "archive_fastq":
+        raise SystemExit(f"Resume manifest was not written by archive_fastq: {path}")
+    plan = payload.get("plan")
+    records = payload.get("records")
+    if not isinstance(plan, list) or not isinstance(records, list) or len(plan) != len(records):
+        raise SystemExit(f"Resume manifest has no batch plan (written before --resume support): {path}")
+    return ResumeState(
+        manifest_path=path.with_suffix(".json"),
+        metadata={k: v for k, v in payload.items() if k not in {"records", "updated_at", "journal_path", "journal_offset"}},
+        plan=[_candidate_from_plan(entry) for entry in plan],
+        records=records,
+        checkpoints=_shared_load_checkpoints(path),
+    )
+def _resume_completed(rec: dict[str, Any], cleanup_requested: bool) -> bool:
+    status = str(rec.get("status") or "")
+    if status in {"copied_verified_cleaned", "already_archived_cleaned"}:
+        return True
+    return not cleanup_requested and status in {"copied_verified", "already_archived_cleanup_skipped"}
+def _resume_candidates(state: ResumeState, keep_run_ids: set[str], cleanup_requested: bool) -> list[RunCandidate]:
+    _print_section("Resume")
+    print(f"Resuming batch from: {state.manifest_path}")
+    completed = 0
+    protected = 0
+    for candidate, rec in zip(state.plan, state.records):
+        if _resume_completed(rec, cleanup_requested):
+            completed += 1
+        elif candidate.run_id in keep_run_ids:
+            candidate.kept_by_rule = True
+            protected += 1
+            print(_warn(f"- {candidate.run_id}: now protected by keep rules, not resumed"))
+    print(_ok(f"Planned runs: {len(state.plan)}"))
+    print(_ok(f"Already completed: {completed}"))
+    print(_ok(f"Remaining: {len(state.plan) - completed - protected}"))
+    return state.plan
 def _parse_params() -> dict[str, Any]:
     ctx = load_ctx()
     params = dict(ctx.get("params") or {})
@@ -1103,6 +1556,7 @@ def _parse_params() -> dict[str, Any]:
     parser.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS)
     parser.add_argument("--instrument-folders", default=",".join(DEFAULT_INSTRUMENTS))
     parser.add_argument("--skip-runs", default="")
+    parser.add_argument("--only-runs", default="")
     parser.add_argument("--non-interactive", nargs="?", const="true", default="false")
     parser.add_argument("--interactive", nargs="?", const="true", default="true")
     parser.add_argument("--yes", nargs="?", const="true", default="false")
@@ -1116,6 +1570,21 @@ def _parse_params() -> dict[str, Any]:
     parser.add_argument("--tui", nargs="?", const="true", default="true")
     parser.add_argument("--investigate", default="")
     parser.add_argument("--investigate-top", type=int, default=20)
+    parser.add_argument("--investigate-output", default="")
+    parser.add_argument("--parallel-runs", type=int, default=DEFAULT_PARALLEL_RUNS)
+    parser.add_argument("--use-catalog", nargs="?", const="true", default="true")
+    parser.add_argument("--refresh-catalog", nargs="?", const="true", default="false")
+    parser.add_argument("--discovery-workers", type=int, default=_SHARED_DISCOVERY_WORKERS)
+    parser.add_argument("--job-order", default=DEFAULT_JOB_ORDER, choices=_SHARED_JOB_ORDERS)
+    parser.add_argument("--max-streams-per-mount", type=int, default=0)
+    parser.add_argument("--mount-bwlimit-mbps", type=int, default=0)
+    parser.add_argument("--io-nice", nargs="?", const="true", default="false")
+    parser.add_argument("--copy-backend", default=DEFAULT_COPY_BACKEND, choices=_SHARED_COPY_BACKENDS)
+    parser.add_argument("--copy-shards", type=int, default=DEFAULT_COPY_SHARDS)
+    parser.add_argument("--dedup", nargs="?", const="true", default="false")
+    parser.add_argument("--verify-mode", default=DEFAULT_VERIFY_MODE, choices=VERIFY_MODES)
+    parser.add_argument("--verify-algorithm", default=DEFAULT_VERIFY_ALGORITHM)
+    parser.add_argument("--resume", default="")
     if params:
         return params
     args = parser.parse_args()
@@ -1125,6 +1594,7 @@ def _parse_params() -> dict[str, Any]:
         "retention_days": args.retention_days,
         "instrument_folders": args.instrument_folders,
         "skip_runs": args.skip_runs,
+        "only_runs": args.only_runs,
         "non_interactive": args.non_interactive,
         "interactive": args.interactive,
         "yes": args.yes,
@@ -1138,6 +1608,21 @@ def _parse_params() -> dict[str, Any]:
         "tui": args.tui,
         "investigate": args.investigate,
         "investigate_top": args.investigate_top,
+        "investigate_output": args.investigate_output,
+        "parallel_runs": args.parallel_runs,
+        "use_catalog": args.use_catalog,
+        "refresh_catalog": args.refresh_catalog,
+        "discovery_workers": args.discovery_workers,
+        "job_order": args.job_order,
+        "max_streams_per_mount": args.max_streams_per_mount,
+        "mount_bwlimit_mbps": args.mount_bwlimit_mbps,
+        "io_nice": args.io_nice,
+        "copy_backend": args.copy_backend,
+        "copy_shards": args.copy_shards,
+        "dedup": args.dedup,
+        "verify_mode": args.verify_mode,
+        "verify_algorithm": args.verify_algorithm,
+        "resume": args.resume,
     }
 def main() -> None:
     params = _parse_params()
@@ -1148,6 +1633,7 @@ def main() -> None:
     if not instruments:
         instruments = list(DEFAULT_INSTRUMENTS)
     skip_runs = set(_split_csv(params.get("skip_runs")))
+    only_runs = set(_split_csv(params.get("only_runs")))
     non_interactive = _parse_bool(params.get("non_interactive"), False)
     interactive = _parse_bool(params.get("interactive"), True)
     dry_run = _parse_bool(params.get("dry_run"), False)
@@ -1159,22 +1645,81 @@ def main() -> None:
     exclude_patterns = _split_csv(params.get("exclude_patterns") or ",".join(DEFAULT_EXCLUDE_PATTERNS))
     keep_rules_path = Path(str(params.get("keep_rules_path") or DEFAULT_KEEP_RULES_PATH)).expanduser().resolve()
     tui = _parse_bool(params.get("tui"), True)
+    use_catalog = _parse_bool(params.get("use_catalog"), True)
+    refresh_catalog = _parse_bool(params.get("refresh_catalog"), False)
+    discovery_workers = _parse_int(params.get("discovery_workers"), _SHARED_DISCOVERY_WORKERS)
+    job_order = str(params.get("job_order") or DEFAULT_JOB_ORDER).strip().lower()
+    max_streams_per_mount = _parse_int(params.get("max_streams_per_mount"), 0)
+    mount_bwlimit_mbps = _parse_int(params.get("mount_bwlimit_mbps"), 0)
+    io_nice = _parse_bool(params.get("io_nice"), False)
+    copy_backend = str(params.get("copy_backend") or DEFAULT_COPY_BACKEND).strip().lower()
+    copy_shards = _parse_int(params.get("copy_shards"), DEFAULT_COPY_SHARDS)
+    dedup = _parse_bool(params.get("dedup"), False)
     investigate_run_id = str(params.get("investigate") or "").strip()
     investigate_top = _parse_int(params.get("investigate_top"), 20)
+    investigate_output = str(params.get("investigate_output") or "").strip()
+    parallel_runs = _parse_int(params.get("parallel_runs"), DEFAULT_PARALLEL_RUNS)
+    verify_mode = str(params.get("verify_mode") or DEFAULT_VERIFY_MODE).strip().lower()
+    verify_algorithm = str(params.get("verify_algorithm") or DEFAULT_VERIFY_ALGORITHM).strip().lower()
+    resume_raw = str(params.get("resume") or "").strip()
+    resume_state: ResumeState | None = None
+    if resume_raw:
+        resume_state = _load_resume_state(Path(resume_raw).expanduser().resolve())
+        # A resumed batch keeps the plan and settings it was started with.
+        planned = resume_state.metadata
+        source_root = str(planned.get("source_root") or source_root)
+        target_root = str(planned.get("target_root") or target_root)
+        retention_days = _parse_int(planned.get("retention_days"), retention_days)
+        instruments = list(planned.get("instrument_folders") or instruments)
+        skip_runs = set(planned.get("skip_runs") or [])
+        exclude_patterns = list(planned.get("archive_exclude_patterns") or exclude_patterns)
+        cleanup_requested = bool(planned.get("cleanup_in_archive"))
+        dry_run = bool(planned.get("dry_run"))
+        verify_mode = str(planned.get("verify_mode") or verify_mode)
+        verify_algorithm = str(planned.get("verify_algorithm") or verify_algorithm)
+        copy_backend = str(planned.get("copy_backend") or copy_backend)
+        copy_shards = _parse_int(planned.get("copy_shards"), copy_shards)
+        dedup = _parse_bool(planned.get("dedup"), dedup)
+        manifest_path_raw = str(resume_state.manifest_path)
+        investigate_run_id = ""
+        tui = False
     for mandatory in DEFAULT_EXCLUDE_PATTERNS:
         if mandatory not in exclude_patterns:
             exclude_patterns.append(mandatory)
     if retention_days < 0:
         raise SystemExit("retention_days must be >= 0")
+    if discovery_workers <= 0:
+        raise SystemExit("discovery_workers must be > 0")
+    if job_order not in _SHARED_JOB_ORDERS:
+        raise SystemExit(f"job_order must be one of: {', '.join(_SHARED_JOB_ORDERS)}")
+    if copy_backend not in _SHARED_COPY_BACKENDS:
+        raise SystemExit(f"copy_backend must be one of: {', '.join(_SHARED_COPY_BACKENDS)}")
+    if copy_shards <= 0:
+        raise SystemExit("copy_shards must be > 0")
+    if dedup and verify_mode != "checksum":
+        raise SystemExit("dedup requires verify_mode=checksum (it indexes the verified digests)")
+    if dedup and not use_catalog:
+        raise SystemExit("dedup requires the run catalog (use_catalog=true)")
+    if max_streams_per_mount < 0 or mount_bwlimit_mbps < 0:
+        raise SystemExit("max_streams_per_mount and mount_bwlimit_mbps must be >= 0")
     if investigate_top <= 0:
         raise SystemExit("investigate_top must be > 0")
+    if parallel_runs <= 0:
+        raise SystemExit("parallel_runs must be > 0")
+    if verify_mode not in VERIFY_MODES:
+        raise SystemExit(f"verify_mode must be one of: {', '.join(VERIFY_MODES)}")
+    if verify_mode == "checksum":
+        try:
+            _shared_check_verify_algorithm(verify_algorithm)
+        except (ValueError, RuntimeError) as exc:
+            raise SystemExit(str(exc)) from exc
     if non_interactive:
         interactive = False
         yes = True
         print(_dim("[mode] non_interactive=true -> interactive disabled, global confirmation auto-approved"))
     if investigate_run_id:
         interactive = False
-    if interactive and sys.stdin.isatty():
+    if interactive and sys.stdin.isatty() and resume_state is None:
         source_root, target_root, retention_days, instruments, skip_runs = _interactive_overrides(
             source_root,
             target_root,
@@ -1187,7 +1732,14 @@ def main() -> None:
     if not source_root_path.exists() or not source_root_path.is_dir():
         raise SystemExit(f"Source root not found or not a directory: {source_root_path}")
     if investigate_run_id:
-        _investigate_run(source_root_path, investigate_run_id, exclude_patterns, investigate_top)
+        _investigate_run(
+            source_root_path,
+            investigate_run_id,
+            exclude_patterns,
+            investigate_top,
+            workers=discovery_workers,
+            output_path=Path(investigate_output).expanduser().resolve() if investigate_output else None,
+        )
         return
     if not target_root_path.exists() or not target_root_path.is_dir():
         raise SystemExit(f"Target root not found or not a directory: {target_root_path}")
@@ -1205,29 +1757,21 @@ def main() -> None:
     print(f"Manifest path: {manifest_path}")
     print(f"Log path: {log_path}")
     print(f"Rsync exclude patterns: {', '.join(exclude_patterns) if exclude_patterns else '(none)'}")
+    if only_runs:
+        print(f"Only runs: {', '.join(sorted(only_runs))}")
+    print(f"Parallel runs: {parallel_runs}")
+    print(f"Job order: {job_order}")
+    print(f"Copy backend: {copy_backend}" + (f" ({copy_shards} shards per run)" if copy_shards > 1 else ""))
+    print(f"Dedup: {'on (hardlinks files >= ' + _format_bytes(_SHARED_DEDUP_MIN_BYTES) + ')' if dedup else 'off'}")
+    print(f"Verify: {verify_mode}" + (f" ({verify_algorithm})" if verify_mode == "checksum" else ""))
     # Fail fast before expensive discovery/copy if manifest/log location is not writable.
     _preflight_manifest_paths(manifest_path, log_path)
-    candidates, issues = _discover_candidates(
-        source_root=source_root_path,
-        target_root=target_root_path,
-        instruments=instruments,
-        retention_days=retention_days,
-        skip_runs=skip_runs,
-        keep_run_ids=keep_run_ids,
-        exclude_patterns=exclude_patterns,
-    )
-    if issues or keep_notes:
-        _print_section("Discovery Notes")
-        for issue in issues:
-            print(_warn(f"- {issue}"))
-        for note in keep_notes:
-            print(_warn(f"- {note}"))
-    if interactive and sys.stdin.isatty() and tui and candidates:
-        tui_action = _run_archive_tui(candidates, keep_rules_path)
-        if tui_action == "quit":
-            print(_warn("\nCancelled from TUI."))
-            return
-        keep_run_ids, keep_notes = _shared_load_active_keep_runs(keep_rules_path)
+    # Also needed on resume: it points archived targets at their recorded fingerprints.
+    catalog = _shared_open_run_catalog(manifest_dir, enabled=use_catalog, refresh=refresh_catalog)
+    print(f"Run catalog: {catalog.path if catalog.enabled else 'disabled'}")
+    if resume_state is not None:
+        candidates = _resume_candidates(resume_state, keep_run_ids, cleanup_requested)
+    else:
         candidates, issues = _discover_candidates(
             source_root=source_root_path,
             target_root=target_root_path,
@@ -1236,6 +1780,9 @@ def main() -> None:
             skip_runs=skip_runs,
             keep_run_ids=keep_run_ids,
             exclude_patterns=exclude_patterns,
+            catalog=catalog,
+            discovery_workers=discovery_workers,
+            only_runs=only_runs,
         )
         if issues or keep_notes:
             _print_section("Discovery Notes")
@@ -1243,24 +1790,56 @@ def main() -> None:
                 print(_warn(f"- {issue}"))
             for note in keep_notes:
                 print(_warn(f"- {note}"))
-        _print_section("Archive Summary")
-        print(f"Retention days: {retention_days}")
-        print(f"Archive runs older than: {_compute_cutoff(retention_days).isoformat()} (strictly before this date)")
-        print(f"Runs protected by keep_rules: {len(keep_run_ids)}")
-        selected_candidates = [c for c in candidates if not c.kept_by_rule]
-        archive_candidates = [c for c in selected_candidates if not c.cleanup_only]
-        cleanup_only_candidates = [c for c in selected_candidates if c.cleanup_only]
-        kept_candidates = [c for c in candidates if c.kept_by_rule]
-        print(_ok(f"Selected run count: {len(selected_candidates)}"))
-        print(_ok(f"Archive run count: {len(archive_candidates)}"))
-        print(_ok(f"Cleanup-only run count: {len(cleanup_only_candidates)}"))
-        print(_warn(f"Kept run count: {len(kept_candidates)}"))
-        print(_ok(f"Total size to archive: {_format_bytes(sum((c.archive_size_bytes or 0) for c in archive_candidates))}"))
-        print(_ok(f"Source removal after verify: {'enabled' if cleanup_requested else 'disabled'}"))
-    else:
-        _print_plan(candidates, retention_days, skip_runs, keep_run_ids, exclude_patterns)
+        if interactive and sys.stdin.isatty() and tui and candidates:
+            tui_action = _run_archive_tui(candidates, keep_rules_path)
+            if tui_action == "quit":
+                print(_warn("\nCancelled from TUI."))
+                return
+            keep_run_ids, keep_notes = _shared_load_active_keep_runs(keep_rules_path)
+            candidates, issues = _discover_candidates(
+                source_root=source_root_path,
+                target_root=target_root_path,
+                instruments=instruments,
+                retention_days=retention_days,
+                skip_runs=skip_runs,
+                keep_run_ids=keep_run_ids,
+                exclude_patterns=exclude_patterns,
+                catalog=catalog,
+                discovery_workers=discovery_workers,
+                only_runs=only_runs,
+            )
+            if issues or keep_notes:
+                _print_section("Discovery Notes")
+                for issue in issues:
+                    print(_warn(f"- {issue}"))
+                for note in keep_notes:
+                    print(_warn(f"- {note}"))
+            _print_section("Archive Summary")
+            print(f"Retention days: {retention_days}")
+            print(f"Archive runs older than: {_compute_cutoff(retention_days).isoformat()} (strictly before this date)")
+            print(f"Runs protected by keep_rules: {len(keep_run_ids)}")
+            selected_candidates = [c for c in candidates if not c.kept_by_rule]
+            archive_candidates = [c for c in selected_candidates if not c.cleanup_only]
+            cleanup_only_candidates = [c for c in selected_candidates if c.cleanup_only]
+            kept_candidates = [c for c in candidates if c.kept_by_rule]
+            print(_ok(f"Selected run count: {len(selected_candidates)}"))
+            print(_ok(f"Archive run count: {len(archive_candidates)}"))
+            print(_ok(f"Cleanup-only run count: {len(cleanup_only_candidates)}"))
+            print(_warn(f"Kept run count: {len(kept_candidates)}"))
+            print(_ok(f"Total size to archive: {_format_bytes(sum((c.archive_size_bytes or 0) for c in archive_candidates))}"))
+            print(_ok(f"Source removal after verify: {'enabled' if cleanup_requested else 'disabled'}"))
+        else:
+            _print_plan(candidates, retention_days, skip_runs, keep_run_ids, exclude_patterns)
     selected_candidates = [c for c in candidates if not c.kept_by_rule]
-    if not selected_candidates:
+    if resume_state is not None:
+        pending = [
+            (index, candidate)
+            for index, candidate in enumerate(resume_state.plan)
+            if not candidate.kept_by_rule and not _resume_completed(resume_state.records[index], cleanup_requested)
+        ]
+    else:
+        pending = list(enumerate(selected_candidates))
+    if not pending:
         print(_warn("\nNothing to archive. Exiting."))
         return
     if not yes:
@@ -1273,146 +1852,82 @@ def main() -> None:
         lock_fd = _acquire_lock(lock_path)
     except FileExistsError:
         raise SystemExit(f"Another archive_fastq process is running (lock exists: {lock_path})")
-    metadata: dict[str, Any] = {
-        "workflow_id": "archive_fastq",
-        "created_at": datetime.now().isoformat(timespec="seconds"),
-        "source_root": str(source_root_path),
-        "target_root": str(target_root_path),
-        "retention_days": retention_days,
-        "instrument_folders": instruments,
-        "skip_runs": sorted(skip_runs),
-        "keep_rules_path": str(keep_rules_path),
-        "keep_protected_runs": sorted(keep_run_ids),
-        "dry_run": dry_run,
-        "cleanup_in_archive": cleanup_requested,
-        "cleanup_mode": "full_run_directory" if cleanup_requested else "disabled",
-        "archive_exclude_patterns": exclude_patterns,
-        "log_path": str(log_path),
-    }
-    records: list[dict[str, Any]] = []
-    copy_failures = 0
-    verify_failures = 0
+    if resume_state is not None:
+        metadata: dict[str, Any] = {**resume_state.metadata, "parallel_runs": parallel_runs, "job_order": job_order}
+        metadata["resumed_at"] = [*metadata.get("resumed_at", []), datetime.now().isoformat(timespec="seconds")]
+    else:
+        metadata = {
+            "workflow_id": "archive_fastq",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "source_root": str(source_root_path),
+            "target_root": str(target_root_path),
+            "retention_days": retention_days,
+            "instrument_folders": instruments,
+            "skip_runs": sorted(skip_runs),
+            "keep_rules_path": str(keep_rules_path),
+            "keep_protected_runs": sorted(keep_run_ids),
+            "dry_run": dry_run,
+            "cleanup_in_archive": cleanup_requested,
+            "cleanup_mode": "full_run_directory" if cleanup_requested else "disabled",
+            "archive_exclude_patterns": exclude_patterns,
+            "parallel_runs": parallel_runs,
+            "job_order": job_order,
+            "copy_backend": copy_backend,
+            "copy_shards": copy_shards,
+            "dedup": dedup,
+            "verify_mode": verify_mode,
+            "verify_algorithm": verify_algorithm if verify_mode == "checksum" else "",
+            "log_path": str(log_path),
+            "plan": [_plan_entry(c) for c in selected_candidates],
+        }
+    journal = _SharedManifestJournal(manifest_path, metadata)
+    settings = BatchSettings(
+        source_root=source_root_path,
+        exclude_patterns=exclude_patterns,
+        cleanup_requested=cleanup_requested,
+        dry_run=dry_run,
+        log_path=log_path,
+        verify_mode=verify_mode,
+        verify_algorithm=verify_algorithm,
+        journal=journal,
+        checkpoints=resume_state.checkpoints if resume_state is not None else {},
+        scheduler=_SharedTransferScheduler(max_streams_per_mount, mount_bwlimit_mbps, io_nice, parallel_runs),
+        # Parallel runs would fight over one status line; they get periodic progress lines instead.
+        live_progress=parallel_runs == 1 and sys.stdout.isatty(),
+        copy_backend=copy_backend,
+        copy_shards=copy_shards,
+        catalog=catalog,
+        dedup=dedup,
+    )
+    print(_dim(f"Transfer limits: {settings.scheduler.describe()}"))
+    # One record per planned run, indexed like the plan; pending runs are replaced as they finish.
+    if resume_state is not None:
+        records = resume_state.records
+    else:
+        records = [_initial_record(c, settings) for c in selected_candidates]
+    pending = _shared_order_jobs(pending, job_order, lambda item: item[1].archive_size_bytes or 0, lambda item: item[0])
+    batch = [candidate for _, candidate in pending]
+    def _record_result(position: int, rec: dict[str, Any]) -> None:
+        index = pending[position][0]
+        records[index] = rec
+        journal.append(index, rec)
+        if rec.get("verify_status") == "ok" and rec.get("verify_file_stats"):
+            catalog.record_verified(Path(rec["target"]), manifest_path, index)
     try:
-        required = sum(c.archive_size_bytes or 0 for c in selected_candidates)
+        required = sum(c.archive_size_bytes or 0 for c in batch)
         _ensure_target_free_space(target_root_path, required, min_free_gb)
-        _preflight_target_paths(target_root_path, selected_candidates)
-        _append_log(log_path, f"archive_fastq start: runs={len(selected_candidates)} total_size={required}")
-        for candidate in selected_candidates:
-            rec: dict[str, Any] = {
-                "run_id": candidate.run_id,
-                "owner_user": candidate.owner_user,
-                "run_date": candidate.run_date.isoformat(),
-                "retention_reference_date": candidate.retention_reference_date.isoformat(),
-                "retention_reference_source": candidate.retention_reference_source,
-                "source": str(candidate.source_path),
-                "target": str(candidate.target_run_path),
-                "size_bytes": candidate.archive_size_bytes or 0,
-                "archive_size_bytes": candidate.archive_size_bytes or 0,
-                "total_size_bytes": candidate.total_size_bytes,
-                "cleanup_only": candidate.cleanup_only,
-                "cleanup_only_reason": candidate.cleanup_only_reason,
-                "copy_status": "pending",
-                "verify_status": "pending",
-                "cleanup_status": "pending" if cleanup_requested else "skipped_disabled",
-                "cleanup_mode": "full_run_directory" if cleanup_requested else "disabled",
-                "status": "planned",
-                "errors": [],
-                "log_path": str(log_path),
-            }
-            if dry_run:
-                if candidate.cleanup_only:
-                    rec["copy_status"] = "skipped_already_archived"
-                    rec["verify_status"] = "skipped_already_archived"
-                    rec["status"] = "dry_run_only"
-                    rec["cleanup_status"] = "dry_run_only" if cleanup_requested else "skipped_disabled"
-                    print(_warn(f"[dry-run] Would remove already-archived source run directory: {candidate.source_path}"))
-                else:
-                    rec["copy_status"] = "skipped_dry_run"
-                    rec["verify_status"] = "skipped_dry_run"
-                    rec["status"] = "dry_run_only"
-                    rec["cleanup_status"] = "dry_run_only" if cleanup_requested else "skipped_disabled"
-                    print(_warn(f"[dry-run] Would archive {candidate.source_path} -> {candidate.target_run_path}"))
-                records.append(rec)
-                _write_manifest(manifest_path, metadata, records)
-                continue
-            _append_log(log_path, f"run_start {candidate.run_id}")
-            if candidate.cleanup_only:
-                rec["copy_status"] = "skipped_already_archived"
-                rec["verify_status"] = "skipped_already_archived"
-                rec["status"] = "already_archived"
-                _append_log(log_path, f"run_already_archived {candidate.run_id}: reason={candidate.cleanup_only_reason or '-'}")
-                print(_dim(f"[archive] already archived on target, cleanup-only: {candidate.run_id}"))
-            else:
-                print(_dim(f"[archive] copying {candidate.run_id} -> {candidate.target_run_path}"))
-                try:
-                    _rsync_copy(candidate, exclude_patterns)
-                    rec["copy_status"] = "ok"
-                    print(_ok(f"[archive] copied: {candidate.run_id}"))
-                except Exception as exc:  # noqa: BLE001
-                    rec["copy_status"] = "failed"
-                    rec["verify_status"] = "skipped_due_to_copy_failure"
-                    rec["cleanup_status"] = "skipped_due_to_copy_failure" if cleanup_requested else rec["cleanup_status"]
-                    rec["status"] = "failed"
-                    rec["errors"].append(f"copy: {exc}")
-                    copy_failures += 1
-                    _append_log(log_path, f"run_copy_failed {candidate.run_id}: {exc}")
-                    print(_err(f"[archive] failed: {candidate.run_id}: {exc}"))
-                    records.append(rec)
-                    _write_manifest(manifest_path, metadata, records)
-                    continue
-                print(_dim(f"[verify] checking archived copy for {candidate.run_id}"))
-                try:
-                    _rsync_verify(candidate, exclude_patterns)
-                    rec["verify_status"] = "ok"
-                    rec["status"] = "copied_verified"
-                    _append_log(log_path, f"run_verified {candidate.run_id}")
-                    print(_ok(f"[verify] archived copy verified: {candidate.run_id}"))
-                except Exception as exc:  # noqa: BLE001
-                    rec["verify_status"] = "failed"
-                    rec["cleanup_status"] = "skipped_due_to_verify_failure" if cleanup_requested else rec["cleanup_status"]
-                    rec["status"] = "failed"
-                    rec["errors"].append(f"verify: {exc}")
-                    verify_failures += 1
-                    _append_log(log_path, f"run_verify_failed {candidate.run_id}: {exc}")
-                    print(_err(f"[verify] failed: {candidate.run_id}: {exc}"))
-            cleanup_ready = (
-                (candidate.cleanup_only and rec["copy_status"] == "skipped_already_archived" and rec["verify_status"] == "skipped_already_archived")
-                or (rec["copy_status"] == "ok" and rec["verify_status"] == "ok")
-            )
-            if cleanup_ready and cleanup_requested:
-                rec["cleanup_attempted_at"] = datetime.now().isoformat(timespec="seconds")
-                remove_reason = "already archived target exists" if candidate.cleanup_only else "verified archive"
-                print(_warn(f"[remove] removing source run directory after {remove_reason}: {candidate.run_id}"))
-                try:
-                    removed_files, removed_dirs, cleanup_status = _cleanup_run_directory(
-                        candidate.source_path,
-                        source_root_path,
-                        dry_run,
-                    )
-                    rec["cleanup_removed_file_count"] = removed_files
-                    rec["cleanup_removed_dir_count"] = removed_dirs
-                    rec["cleanup_status"] = cleanup_status
-                    rec["cleanup_error"] = ""
-                    if cleanup_status in {"done", "done_no_matches"}:
-                        rec["status"] = "already_archived_cleaned" if candidate.cleanup_only else "copied_verified_cleaned"
-                    elif cleanup_status == "dry_run_only":
-                        rec["status"] = "dry_run_only"
-                    _append_log(
-                        log_path,
-                        f"run_cleaned {candidate.run_id}: status={cleanup_status} removed_files={removed_files} removed_dirs={removed_dirs}",
-                    )
-                    print(_ok(f"[remove] source run directory removed: {candidate.run_id}"))
-                except Exception as exc:  # noqa: BLE001
-                    rec["cleanup_status"] = "failed"
-                    rec["cleanup_error"] = str(exc)
-                    rec["status"] = "failed"
-                    rec["errors"].append(f"cleanup: {exc}")
-                    _append_log(log_path, f"run_cleanup_failed {candidate.run_id}: {exc}")
-            elif cleanup_ready and not cleanup_requested:
-                rec["cleanup_status"] = "skipped_disabled"
-                rec["status"] = "already_archived_cleanup_skipped" if candidate.cleanup_only else rec["status"]
-            records.append(rec)
-            _write_manifest(manifest_path, metadata, records)
+        _preflight_target_paths(target_root_path, batch)
+        # Persist the plan before copying so an interrupted batch can be resumed.
+        _write_manifest(journal, metadata, records)
+        _append_log(log_path, f"archive_fastq start: runs={len(batch)} total_size={required} parallel_runs={parallel_runs}")
+        _shared_run_batch(
+            batch,
+            lambda candidate: _process_candidate(candidate, settings),
+            parallel_runs,
+            _record_result,
+        )
+        copy_failures = sum(1 for rec in records if rec.get("copy_status") == "failed")
+        verify_failures = sum(1 for rec in records if rec.get("verify_status") == "failed")
         cleanup_failures = sum(1 for rec in records if rec.get("cleanup_status") == "failed")
         cleanup_done = sum(1 for rec in records if rec.get("cleanup_status") in {"done", "done_no_matches"})
         _append_log(
@@ -1443,6 +1958,14 @@ def main() -> None:
             _print_failure_details(records)
             raise SystemExit(1)
     finally:
-        _release_lock(lock_fd, lock_path)
+        # The lock is released even if writing the manifest fails, so later batches can start.
+        try:
+            if records:
+                _write_manifest(journal, metadata, records)
+        finally:
+            try:
+                journal.close()
+            finally:
+                _release_lock(lock_fd, lock_path)
 if __name__ == "__main__":
     main()
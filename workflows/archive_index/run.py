@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+
+from archive_common import (
+    format_bytes as _shared_format_bytes,
+    open_manifest_index as _shared_open_manifest_index,
+)
+
+DEFAULT_MANIFEST_DIR = "/data/shared/bpm_manifests"
+OUTPUT_FORMATS = ("table", "json")
+TABLE_COLUMNS = (
+    ("created_at", "Manifest date"),
+    ("workflow", "Workflow"),
+    ("run_id", "Run"),
+    ("status", "Status"),
+    ("verify_status", "Verify"),
+    ("cleanup_status", "Cleanup"),
+    ("size", "Size"),
+    ("target", "Target"),
+)
+USE_COLOR = sys.stdout.isatty() and os.environ.get("NO_COLOR") is None
+
+
+def _style(text: str, code: str) -> str:
+    if not USE_COLOR:
+        return text
+    return f"\033[{code}m{text}\033[0m"
+
+
+def _title(text: str) -> str:
+    return _style(text, "1;36")
+
+
+def _warn(text: str) -> str:
+    return _style(text, "1;33")
+
+
+def _dim(text: str) -> str:
+    return _style(text, "2")
+
+
+def load_ctx() -> dict[str, Any]:
+    ctx_path = os.environ.get("BPM_CTX_PATH")
+    if not ctx_path or not Path(ctx_path).is_file():
+        return {}
+    with open(ctx_path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _parse_bool(value: Any, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in {"1", "true", "yes", "y", "on"}:
+        return True
+    if text in {"0", "false", "no", "n", "off"}:
+        return False
+    return default
+
+
+def _parse_int(value: Any, default: int) -> int:
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _print_table(rows: list[dict[str, Any]]) -> None:
+    cells = [
+        [_shared_format_bytes(row["size_bytes"]) if key == "size" else str(row.get(key) or "-") for key, _ in TABLE_COLUMNS]
+        for row in rows
+    ]
+    widths = [max([len(label)] + [len(line[i]) for line in cells]) for i, (_, label) in enumerate(TABLE_COLUMNS)]
+    print(_title("  ".join(label.ljust(widths[i]) for i, (_, label) in enumerate(TABLE_COLUMNS)).rstrip()))
+    for line in cells:
+        print("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(line)).rstrip())
+
+
+def _parse_params() -> dict[str, Any]:
+    ctx = load_ctx()
+    params = dict(ctx.get("params") or {})
+
+    parser = argparse.ArgumentParser(description="Index archive manifests and query runs across all of them.")
+    parser.add_argument("--action", default="query", choices=["query", "refresh"])
+    parser.add_argument("--manifest-dir", default=DEFAULT_MANIFEST_DIR)
+    parser.add_argument("--run-id", default="")
+    parser.add_argument("--status", default="")
+    parser.add_argument("--workflow", default="")
+    parser.add_argument("--target", default="")
+    parser.add_argument("--cleanup-status", default="")
+    parser.add_argument("--since", default="")
+    parser.add_argument("--until", default="")
+    parser.add_argument("--include-dry-run", nargs="?", const="true", default="false")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--format", default="table", choices=list(OUTPUT_FORMATS))
+    parser.add_argument("--rebuild", nargs="?", const="true", default="false")
+
+    if params:
+        return params
+
+    args = parser.parse_args()
+    return {
+        "action": args.action,
+        "manifest_dir": args.manifest_dir,
+        "run_id": args.run_id,
+        "status": args.status,
+        "workflow": args.workflow,
+        "target": args.target,
+        "cleanup_status": args.cleanup_status,
+        "since": args.since,
+        "until": args.until,
+        "include_dry_run": args.include_dry_run,
+        "limit": args.limit,
+        "format": args.format,
+        "rebuild": args.rebuild,
+    }
+
+
+def main() -> None:
+    params = _parse_params()
+    action = str(params.get("action") or "query").strip().lower()
+    manifest_dir = Path(str(params.get("manifest_dir") or DEFAULT_MANIFEST_DIR)).expanduser().resolve()
+    output_format = str(params.get("format") or "table").strip().lower()
+    limit = _parse_int(params.get("limit"), 0)
+    rebuild = _parse_bool(params.get("rebuild"), False)
+    filters = {
+        name: str(params.get(name) or "").strip() or None
+        for name in ("run_id", "status", "workflow", "target", "cleanup_status", "since", "until")
+    }
+
+    if action not in {"query", "refresh"}:
+        raise SystemExit("action must be one of: query, refresh")
+    if output_format not in OUTPUT_FORMATS:
+        raise SystemExit(f"format must be one of: {', '.join(OUTPUT_FORMATS)}")
+    if limit < 0:
+        raise SystemExit("limit must be >= 0")
+    if not manifest_dir.is_dir():
+        raise SystemExit(f"Manifest directory not found: {manifest_dir}")
+
+    started = time.monotonic()
+    try:
+        index = _shared_open_manifest_index(manifest_dir)
+    except (sqlite3.Error, OSError) as exc:
+        raise SystemExit(f"Cannot open manifest index in {manifest_dir}: {exc}") from exc
+    try:
+        # Every query refreshes first; unchanged manifests cost one stat() each.
+        refresh = index.refresh(manifest_dir, rebuild=rebuild)
+        refresh_seconds = time.monotonic() - started
+        manifests, records = index.counts()
+        if action == "refresh" or output_format == "table":
+            print(
+                _dim(
+                    f"Index: {index.path} ({manifests} manifests, {records} records; "
+                    f"{refresh.indexed} indexed, {refresh.unchanged} unchanged, {refresh.removed} removed "
+                    f"in {refresh_seconds:.2f}s)"
+                ),
+                file=sys.stderr if output_format == "json" else sys.stdout,
+            )
+        for error in refresh.errors:
+            print(_warn(f"Unreadable manifest: {error}"), file=sys.stderr)
+        if action == "refresh":
+            return
+        rows = index.query(
+            **filters,
+            include_dry_run=_parse_bool(params.get("include_dry_run"), False),
+            limit=limit or None,
+        )
+    finally:
+        index.close()
+
+    if output_format == "json":
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(_warn("No matching records."))
+        return
+    _print_table(rows)
+    print(_dim(f"{len(rows)} records"))
+
+
+if __name__ == "__main__":
+    main()
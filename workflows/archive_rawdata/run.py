@@ -10,6 +10,8 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from pathlib import Path
@@ -21,16 +23,52 @@ if str(WORKFLOWS_DIR) not in sys.path:
     sys.path.insert(0, str(WORKFLOWS_DIR))
 
 from archive_common import (
-    current_user as _shared_current_user,
+    CONTAINER_FORMATS as _SHARED_CONTAINER_FORMATS,
+    COPY_BACKENDS as _SHARED_COPY_BACKENDS,
+    DISCOVERY_WORKERS as _SHARED_DISCOVERY_WORKERS,
+    JOB_ORDERS as _SHARED_JOB_ORDERS,
+    ManifestJournal as _SharedManifestJournal,
+    NATIVE_COPY_WORKERS as _SHARED_NATIVE_COPY_WORKERS,
+    RsyncProgressReporter as _SharedRsyncProgressReporter,
+    RsyncResult as _SharedRsyncResult,
+    RunCatalog as _SharedRunCatalog,
+    TransferScheduler as _SharedTransferScheduler,
+    TreeVerify as _SharedTreeVerify,
+    check_container_format as _shared_check_container_format,
+    check_verify_algorithm as _shared_check_verify_algorithm,
+    container_path as _shared_container_path,
+    copy_shards as _shared_copy_shards,
+    keep_rule_updates as _shared_keep_rule_updates,
+    list_copy_files as _shared_list_copy_files,
     load_active_keep_runs as _shared_load_active_keep_runs,
     load_rules as _shared_load_rules,
-    save_rules as _shared_save_rules,
+    map_ordered as _shared_map_ordered,
+    native_copy_reason as _shared_native_copy_reason,
+    native_copy_tree as _shared_native_copy_tree,
+    open_run_catalog as _shared_open_run_catalog,
+    order_jobs as _shared_order_jobs,
+    run_batch as _shared_run_batch,
+    run_rsync as _shared_run_rsync,
+    shard_files as _shared_shard_files,
+    update_rules as _shared_update_rules,
     validate_keep_until as _shared_validate_keep_until,
+    verify_container as _shared_verify_container,
+    verify_tree as _shared_verify_tree,
+    write_run_container as _shared_write_run_container,
 )
 
 DEFAULT_SOURCE_ROOT = "/data/raw"
 DEFAULT_TARGET_ROOT = "/mnt/nextgen2/archive/raw"
 DEFAULT_RETENTION_DAYS = 90
+DEFAULT_PARALLEL_RUNS = 1
+DEFAULT_JOB_ORDER = "oldest-first"
+DEFAULT_COPY_BACKEND = "auto"
+DEFAULT_COPY_SHARDS = 1
+DEFAULT_VERIFY_MODE = "checksum"
+DEFAULT_VERIFY_ALGORITHM = "blake2b"
+VERIFY_MODES = ("checksum", "rsync")
+DEFAULT_ARCHIVE_FORMAT = "directory"
+ARCHIVE_FORMATS = ("directory", *_SHARED_CONTAINER_FORMATS)
 DEFAULT_MANIFEST_DIR = "/data/shared/bpm_manifests"
 DEFAULT_KEEP_RULES_PATH = "/data/shared/bpm_manifests/keep_rules.yaml"
 DEFAULT_INSTRUMENTS = [
@@ -42,6 +80,7 @@ DEFAULT_INSTRUMENTS = [
 ]
 RUN_PREFIX_RE = re.compile(r"^(?P<prefix>\d{6})_")
 USE_COLOR = sys.stdout.isatty() and os.environ.get("NO_COLOR") is None
+_LOG_LOCK = threading.Lock()
 
 
 def _workflow_public_id() -> str:
@@ -188,47 +227,6 @@ def _parse_exported_at_date(value: Any) -> date | None:
         return None
 
 
-def _load_active_keep_runs(keep_rules_path: Path) -> tuple[set[str], list[str]]:
-    if not keep_rules_path.exists():
-        return set(), []
-    try:
-        payload = yaml.safe_load(keep_rules_path.read_text(encoding="utf-8")) or {}
-    except Exception as exc:  # noqa: BLE001
-        return set(), [f"Failed to parse keep_rules file {keep_rules_path}: {exc}"]
-    if not isinstance(payload, dict):
-        return set(), [f"Invalid keep_rules format in {keep_rules_path}: expected mapping"]
-
-    runs = payload.get("runs") or {}
-    if not isinstance(runs, dict):
-        return set(), [f"Invalid keep_rules.runs format in {keep_rules_path}: expected mapping"]
-
-    today = date.today()
-    active: set[str] = set()
-    notes: list[str] = []
-    for run_id, rec in runs.items():
-        run_id_s = str(run_id).strip()
-        if not run_id_s:
-            continue
-        if not isinstance(rec, dict):
-            notes.append(f"Invalid keep_rules record for run_id={run_id_s}: expected mapping")
-            continue
-        if rec.get("keep", True) is False:
-            continue
-        keep_until_raw = rec.get("keep_until")
-        if keep_until_raw in (None, ""):
-            active.add(run_id_s)
-            continue
-        try:
-            keep_until = date.fromisoformat(str(keep_until_raw))
-        except ValueError:
-            notes.append(f"Invalid keep_until in keep_rules for run_id={run_id_s}: {keep_until_raw}")
-            active.add(run_id_s)
-            continue
-        if keep_until >= today:
-            active.add(run_id_s)
-    return active, notes
-
-
 def _get_retention_reference(run_dir: Path, run_date: date) -> tuple[date, str]:
     meta_path = run_dir / "bpm.meta.yaml"
     if not meta_path.exists():
@@ -256,15 +254,20 @@ def _get_retention_reference(run_dir: Path, run_date: date) -> tuple[date, str]:
     return run_date, "run_name_prefix"
 
 
-def _du_size_bytes(path: Path) -> int:
-    result = subprocess.run(
-        ["du", "-sb", str(path)],
-        check=True,
-        text=True,
-        capture_output=True,
-    )
-    first = result.stdout.strip().split()[0]
-    return int(first)
+def _tree_size_bytes(path: Path, catalog: _SharedRunCatalog) -> int:
+    scan = catalog.scan(path)
+    if scan.errors:
+        raise RuntimeError(scan.errors[0])
+    return scan.total_bytes
+
+
+def _cached_retention_reference(catalog: _SharedRunCatalog, run_dir: Path, run_date: date) -> tuple[date, str]:
+    def _compute() -> list[str]:
+        ref_date, ref_source = _get_retention_reference(run_dir, run_date)
+        return [ref_date.isoformat(), ref_source]
+
+    ref_iso, ref_source = catalog.cached(run_dir, "retention_reference", _compute)
+    return date.fromisoformat(ref_iso), ref_source
 
 
 def _compute_cutoff(retention_days: int) -> date:
@@ -286,53 +289,64 @@ def _discover_candidates(
     retention_days: int,
     skip_runs: set[str],
     keep_run_ids: set[str],
+    catalog: _SharedRunCatalog,
+    discovery_workers: int = _SHARED_DISCOVERY_WORKERS,
+    only_runs: set[str] | None = None,
 ) -> tuple[list[RunCandidate], list[str]]:
     issues: list[str] = []
+    catalog_notes_before = len(catalog.notes)
     cutoff = _compute_cutoff(retention_days)
-    candidates: list[RunCandidate] = []
+    entries: list[tuple[str, Path]] = []
 
     for instrument in instruments:
         src_instrument = source_root / instrument
-        dst_instrument = target_root / instrument
 
         if not src_instrument.exists() or not src_instrument.is_dir():
             issues.append(f"Missing source instrument directory: {src_instrument}")
             continue
 
-        for entry in sorted(src_instrument.iterdir()):
-            if not entry.is_dir():
-                continue
-            run_date = _parse_run_date(entry.name)
-            if run_date is None:
-                continue
-            ref_date, ref_source = _get_retention_reference(entry, run_date)
-            if ref_date >= cutoff:
-                continue
-            if entry.name in skip_runs:
-                continue
-            try:
-                kept_by_rule = entry.name in keep_run_ids
-                size_bytes = _du_size_bytes(entry)
-            except Exception as exc:  # noqa: BLE001
-                issues.append(f"Failed to calculate size for {entry}: {exc}")
-                continue
-
-            candidates.append(
-                RunCandidate(
-                    instrument=instrument,
-                    run_id=entry.name,
-                    owner_user=_owner_user(entry),
-                    run_date=run_date,
-                    retention_reference_date=ref_date,
-                    retention_reference_source=ref_source,
-                    source_path=entry,
-                    target_instrument_path=dst_instrument,
-                    target_run_path=dst_instrument / entry.name,
-                    size_bytes=size_bytes,
-                    kept_by_rule=kept_by_rule,
-                )
-            )
+        entries.extend((instrument, entry) for entry in sorted(src_instrument.iterdir()))
+
+    def _probe(item: tuple[str, Path]) -> tuple[RunCandidate | None, list[str]]:
+        instrument, entry = item
+        if only_runs and entry.name not in only_runs:
+            return None, []
+        if not entry.is_dir():
+            return None, []
+        run_date = _parse_run_date(entry.name)
+        if run_date is None:
+            return None, []
+        ref_date, ref_source = _cached_retention_reference(catalog, entry, run_date)
+        if ref_date >= cutoff:
+            return None, []
+        if entry.name in skip_runs:
+            return None, []
+        try:
+            kept_by_rule = entry.name in keep_run_ids
+            size_bytes = _tree_size_bytes(entry, catalog)
+        except Exception as exc:  # noqa: BLE001
+            return None, [f"Failed to calculate size for {entry}: {exc}"]
 
+        dst_instrument = target_root / instrument
+        return RunCandidate(
+            instrument=instrument,
+            run_id=entry.name,
+            owner_user=catalog.cached(entry, "owner", lambda: _owner_user(entry)),
+            run_date=run_date,
+            retention_reference_date=ref_date,
+            retention_reference_source=ref_source,
+            source_path=entry,
+            target_instrument_path=dst_instrument,
+            target_run_path=dst_instrument / entry.name,
+            size_bytes=size_bytes,
+            kept_by_rule=kept_by_rule,
+        ), []
+
+    results = _shared_map_ordered(entries, _probe, discovery_workers)
+    candidates = [candidate for candidate, _ in results if candidate is not None]
+    issues.extend(issue for _, entry_issues in results for issue in entry_issues)
+
+    issues.extend(catalog.notes[catalog_notes_before:])
     candidates.sort(key=lambda c: (c.instrument, c.run_date, c.run_id))
     return candidates, issues
 
@@ -372,27 +386,9 @@ def _run_archive_tui(candidates: list[RunCandidate], rules_path: Path) -> bool:
         return value[: width - 1] + "~"
 
     def _save() -> int:
-        changed = 0
-        stamp = datetime.now().astimezone().isoformat(timespec="seconds")
-        user = _shared_current_user()
-        runs = payload.setdefault("runs", {})
-        for candidate in candidates:
-            old = runs.get(candidate.run_id)
-            if marked.get(candidate.run_id, False):
-                rec = {
-                    "keep": True,
-                    "set_by": user,
-                    "set_at": stamp,
-                    "keep_until": keep_until.get(candidate.run_id) or None,
-                }
-                if old != rec:
-                    runs[candidate.run_id] = rec
-                    changed += 1
-            elif candidate.run_id in runs:
-                del runs[candidate.run_id]
-                changed += 1
-        _shared_save_rules(rules_path, payload)
-        return changed
+        updates = _shared_keep_rule_updates(existing, marked, keep_until)
+        _shared_update_rules(rules_path, updates)
+        return len(updates)
 
     def _curses_main(stdscr) -> tuple[bool, int]:
         curses.curs_set(0)
@@ -694,25 +690,119 @@ def _preflight_target_paths(target_root: Path, candidates: list[RunCandidate]) -
         seen.add(instrument_dir)
 
 
-def _run_cmd(cmd: list[str]) -> None:
+def _run_rsync(cmd: list[str], label: str, live: bool) -> _SharedRsyncResult:
     print(_cmd("+ " + " ".join(cmd)))
-    subprocess.run(cmd, check=True)
-
-
-def _rsync_copy(candidate: RunCandidate) -> None:
+    reporter = _SharedRsyncProgressReporter(label, live)
+    try:
+        result = _shared_run_rsync(cmd, on_progress=reporter)
+    finally:
+        reporter.close()
+    if result.returncode != 0:
+        for line in result.error_tail or result.output_tail:
+            print(line, file=sys.stderr)
+        detail = (result.error_tail or result.output_tail or [f"command exited with status {result.returncode}"])[-1]
+        raise RuntimeError(f"{' '.join(cmd)} -> {detail} (exit {result.returncode})")
+    print(_dim(f"[copy] {label}: {_format_bytes(result.bytes_done)} in {result.seconds:.0f}s ({_format_bytes(int(result.rate_bps))}/s)"))
+    return result
+
+
+def _rsync_copy(
+    candidate: RunCandidate,
+    show_progress: bool = True,
+    scheduler: _SharedTransferScheduler | None = None,
+    files_from: Path | None = None,
+    label: str | None = None,
+) -> _SharedRsyncResult:
+    scheduler = scheduler or _SharedTransferScheduler(prefixes=[])
     candidate.target_instrument_path.mkdir(parents=True, exist_ok=True)
-    _run_cmd(
-        [
-            "rsync",
-            "-a",
-            "--human-readable",
-            "--info=progress2",
-            "--no-inc-recursive",
-            "--partial",
-            str(candidate.source_path),
-            str(candidate.target_instrument_path),
-        ]
+    # progress2 is parsed, not passed through, so it is safe with concurrent runs too.
+    cmd = [*scheduler.command_prefix(), "rsync", "-a", "--human-readable", "--info=progress2"]
+    if files_from is not None:
+        # One shard of the run: only the listed files, relative to the run directory.
+        cmd.extend(
+            [
+                "--partial",
+                "--from0",
+                f"--files-from={files_from}",
+                f"{candidate.source_path}/",
+                f"{candidate.target_run_path}/",
+            ]
+        )
+    else:
+        cmd.extend(
+            [
+                "--no-inc-recursive",
+                "--partial",
+                str(candidate.source_path),
+                str(candidate.target_instrument_path),
+            ]
+        )
+    # Waits for a free stream slot on both mounts before rsync starts.
+    with scheduler.slot(candidate.source_path, candidate.target_instrument_path) as bwlimit_kbps:
+        if bwlimit_kbps:
+            cmd.insert(len(cmd) - 2, f"--bwlimit={bwlimit_kbps}")
+        return _run_rsync(cmd, label or candidate.run_id, show_progress)
+
+
+def _sharded_rsync_copy(candidate: RunCandidate, settings: BatchSettings) -> Any:
+    scheduler = settings.scheduler or _SharedTransferScheduler(prefixes=[])
+    if settings.copy_shards <= 1:
+        return _rsync_copy(candidate, settings.show_progress, scheduler)
+    shards = _shared_shard_files(_shared_list_copy_files(candidate.source_path), settings.copy_shards)
+    if len(shards) < 2:
+        return _rsync_copy(candidate, settings.show_progress, scheduler)
+    sizes = ", ".join(_format_bytes(shard.size_bytes) for shard in shards)
+    print(_dim(f"[copy] {candidate.run_id}: {sum(len(s.files) for s in shards)} files in {len(shards)} shards ({sizes})"))
+
+    def _copy_shard(shard: Any, files_from: Path) -> _SharedRsyncResult:
+        label = f"{candidate.run_id} shard {shard.index + 1}/{len(shards)}"
+        return _rsync_copy(candidate, False, scheduler, files_from=files_from, label=label)
+
+    # The closing full rsync only sets directory metadata and picks up files added since listing.
+    copy = _shared_copy_shards(
+        candidate.target_run_path,
+        shards,
+        _copy_shard,
+        lambda: _rsync_copy(candidate, settings.show_progress, scheduler),
     )
+    print(_dim(f"[copy] {candidate.run_id}: {_format_bytes(copy.stats()['copy_bytes'])} in {copy.seconds:.0f}s over {len(shards)} shards"))
+    return copy
+
+
+def _copy_run(candidate: RunCandidate, settings: BatchSettings) -> Any:
+    # Same-filesystem targets are copied in-kernel (reflink/copy_file_range) with the
+    # metadata rsync -a would keep; "auto" falls back to rsync when that is not possible.
+    scheduler = settings.scheduler or _SharedTransferScheduler(prefixes=[])
+    reason = None
+    if settings.copy_backend == "native":
+        reason = "requested"
+    elif settings.copy_backend == "auto":
+        candidate.target_instrument_path.mkdir(parents=True, exist_ok=True)
+        reason = _shared_native_copy_reason(candidate.source_path, candidate.target_instrument_path)
+    if reason is not None:
+        print(_cmd(f"+ native copy ({reason}) {candidate.source_path} -> {candidate.target_run_path}"))
+        try:
+            with scheduler.slot(candidate.source_path, candidate.target_instrument_path):
+                copy = _shared_native_copy_tree(
+                    candidate.source_path,
+                    candidate.target_run_path,
+                    preserve_perms=True,
+                    preserve_group=True,
+                    dir_times=True,
+                    workers=max(settings.copy_shards, _SHARED_NATIVE_COPY_WORKERS),
+                )
+            print(
+                _dim(
+                    f"[copy] {candidate.run_id}: {_format_bytes(copy.bytes_done)} in {copy.seconds:.0f}s "
+                    f"({copy.file_count} files, {copy.cloned_count} reflinked, {copy.skipped_count} already present)"
+                )
+            )
+            return copy
+        except OSError as exc:
+            if settings.copy_backend == "native":
+                raise
+            print(_warn(f"[copy] native copy failed for {candidate.run_id}, falling back to rsync: {exc}"))
+    return _sharded_rsync_copy(candidate, settings)
 
 
 def _rsync_verify(candidate: RunCandidate) -> None:
@@ -737,6 +827,58 @@ def _rsync_verify(candidate: RunCandidate) -> None:
         )
 
 
+def _checksum_verify(candidate: RunCandidate, algorithm: str, log_path: Path) -> _SharedTreeVerify:
+    # Same scope as the rsync --delete dry-run: no excludes, extra target files are mismatches.
+    def _report(rel: str, reason: str) -> None:
+        print(_err(f"[verify][mismatch] {candidate.run_id}: {rel}: {reason}"))
+        _append_log(log_path, f"run_verify_mismatch {candidate.run_id}: {rel}: {reason}")
+
+    return _shared_verify_tree(
+        candidate.source_path,
+        candidate.target_run_path,
+        algorithm=algorithm,
+        check_extra=True,
+        on_mismatch=_report,
+    )
+
+
+def _container_copy(candidate: RunCandidate, container: Path, settings: BatchSettings) -> dict[str, Any]:
+    scheduler = settings.scheduler or _SharedTransferScheduler(prefixes=[])
+    print(_cmd(f"+ pack {candidate.source_path} -> {container}"))
+    with scheduler.slot(candidate.source_path, candidate.target_instrument_path):
+        started = time.monotonic()
+        written = _shared_write_run_container(candidate.source_path, container, settings.verify_algorithm)
+        seconds = time.monotonic() - started
+    print(
+        _dim(
+            f"[archive] packed {written.file_count} files ({_format_bytes(written.byte_count)}) "
+            f"into {_format_bytes(written.container_bytes)}: {container.name}"
+        )
+    )
+    return {
+        "copy_bytes": written.container_bytes,
+        "copy_seconds": round(seconds, 3),
+        "copy_rate_bps": round(written.container_bytes / seconds) if seconds > 0 else 0,
+    }
+
+
+def _container_verify(candidate: RunCandidate, container: Path, settings: BatchSettings, rec: dict[str, Any]) -> None:
+    def _report(rel: str, reason: str) -> None:
+        print(_err(f"[verify][mismatch] {candidate.run_id}: {rel}: {reason}"))
+        _append_log(settings.log_path, f"run_verify_mismatch {candidate.run_id}: {rel}: {reason}")
+
+    result = _shared_verify_container(container, candidate.source_path, on_mismatch=_report)
+    rec["verify_mode"] = "container"
+    rec["verify_algorithm"] = result.algorithm
+    rec["verify_file_count"] = result.file_count
+    rec["verify_bytes"] = result.byte_count
+    if result.mismatches:
+        rec["verify_mismatches"] = result.mismatches
+        raise RuntimeError(
+            f"Container verification failed for {candidate.run_id}. First mismatches: {'; '.join(result.mismatches[:5])}"
+        )
+
+
 def _acquire_lock(lock_path: Path) -> int:
     flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
     try:
@@ -772,9 +914,10 @@ def _release_lock(fd: int, lock_path: Path) -> None:
 
 def _append_log(log_path: Path, message: str) -> None:
     stamp = datetime.now().isoformat(timespec="seconds")
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(log_path, "a", encoding="utf-8") as fh:
-        fh.write(f"[{stamp}] {message}\n")
+    with _LOG_LOCK:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as fh:
+            fh.write(f"[{stamp}] {message}\n")
 
 
 def _manifest_setup_hint(dir_path: Path) -> str:
@@ -822,12 +965,106 @@ def _manifest_payload(metadata: dict[str, Any], records: list[dict[str, Any]]) -
     }
 
 
-def _write_manifest(manifest_path: Path, metadata: dict[str, Any], records: list[dict[str, Any]]) -> None:
-    manifest_path.parent.mkdir(parents=True, exist_ok=True)
-    manifest_path.write_text(
-        json.dumps(_manifest_payload(metadata, records), indent=2),
-        encoding="utf-8",
-    )
+def _write_manifest(journal: _SharedManifestJournal, metadata: dict[str, Any], records: list[dict[str, Any]]) -> None:
+    # Records are journaled as they finish; the summary JSON is compacted once per batch.
+    journal.compact(_manifest_payload(metadata, records))
+
+
+@dataclass
+class BatchSettings:
+    dry_run: bool
+    log_path: Path
+    show_progress: bool
+    verify_mode: str
+    verify_algorithm: str
+    scheduler: _SharedTransferScheduler | None = None
+    archive_format: str = DEFAULT_ARCHIVE_FORMAT
+    copy_backend: str = DEFAULT_COPY_BACKEND
+    copy_shards: int = DEFAULT_COPY_SHARDS
+
+
+def _verify_copy(candidate: RunCandidate, settings: BatchSettings, rec: dict[str, Any]) -> None:
+    rec["verify_mode"] = settings.verify_mode
+    if settings.verify_mode == "rsync":
+        _rsync_verify(candidate)
+        return
+    result = _checksum_verify(candidate, settings.verify_algorithm, settings.log_path)
+    rec["verify_algorithm"] = result.algorithm
+    rec["verify_file_count"] = result.file_count
+    rec["verify_bytes"] = result.byte_count
+    rec["verify_digests"] = result.digests
+    if result.mismatches:
+        rec["verify_mismatches"] = result.mismatches
+        preview = "; ".join(result.mismatches[:5])
+        if len(result.mismatches) > 5:
+            preview += f"; ... (+{len(result.mismatches) - 5} more)"
+        raise RuntimeError(
+            "Verification mismatch after copy for "
+            f"{candidate.run_id}. First checksum mismatches: {preview}"
+        )
+
+
+def _process_candidate(candidate: RunCandidate, settings: BatchSettings) -> dict[str, Any]:
+    rec: dict[str, Any] = {
+        "instrument": candidate.instrument,
+        "run_id": candidate.run_id,
+        "owner_user": candidate.owner_user,
+        "run_date": candidate.run_date.isoformat(),
+        "retention_reference_date": candidate.retention_reference_date.isoformat(),
+        "retention_reference_source": candidate.retention_reference_source,
+        "source": str(candidate.source_path),
+        "target": str(candidate.target_run_path),
+        "size_bytes": candidate.size_bytes,
+        "copy_status": "pending",
+        "verify_status": "pending",
+        "cleanup_status": "pending_external_cleanup",
+        "status": "planned",
+        "errors": [],
+        "log_path": str(settings.log_path),
+    }
+    container: Path | None = None
+    if settings.archive_format != "directory":
+        container = _shared_container_path(candidate.target_instrument_path, candidate.run_id, settings.archive_format)
+        rec["target"] = str(container)
+        rec["archive_format"] = settings.archive_format
+        rec["container_index"] = str(container) + ".index.json"
+
+    if settings.dry_run:
+        rec["copy_status"] = "skipped_dry_run"
+        rec["verify_status"] = "skipped_dry_run"
+        rec["status"] = "dry_run_only"
+        print(_warn(f"[dry-run] Would archive {candidate.source_path} -> {rec['target']}"))
+        return rec
+
+    _append_log(settings.log_path, f"run_start {candidate.run_id}")
+    try:
+        if container is not None:
+            rec.update(_container_copy(candidate, container, settings))
+        else:
+            rec.update(_copy_run(candidate, settings).stats())
+        rec["copy_status"] = "ok"
+    except Exception as exc:  # noqa: BLE001
+        rec["copy_status"] = "failed"
+        rec["verify_status"] = "skipped_due_to_copy_failure"
+        rec["status"] = "failed"
+        rec["errors"].append(f"copy: {exc}")
+        _append_log(settings.log_path, f"run_copy_failed {candidate.run_id}: {exc}")
+        return rec
+
+    try:
+        if container is not None:
+            _container_verify(candidate, container, settings, rec)
+        else:
+            _verify_copy(candidate, settings, rec)
+        rec["verify_status"] = "ok"
+        rec["status"] = "copied_verified"
+        _append_log(settings.log_path, f"run_verified {candidate.run_id}")
+    except Exception as exc:  # noqa: BLE001
+        rec["verify_status"] = "failed"
+        rec["status"] = "failed"
+        rec["errors"].append(f"verify: {exc}")
+        _append_log(settings.log_path, f"run_verify_failed {candidate.run_id}: {exc}")
+    return rec
 
 
 def _parse_params() -> dict[str, Any]:
@@ -840,6 +1077,7 @@ def _parse_params() -> dict[str, Any]:
     parser.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS)
     parser.add_argument("--instrument-folders", default=",".join(DEFAULT_INSTRUMENTS))
     parser.add_argument("--skip-runs", default="")
+    parser.add_argument("--only-runs", default="")
     parser.add_argument("--non-interactive", nargs="?", const="true", default="false")
     parser.add_argument("--interactive", nargs="?", const="true", default="true")
     parser.add_argument("--yes", nargs="?", const="true", default="false")
@@ -850,6 +1088,19 @@ def _parse_params() -> dict[str, Any]:
     parser.add_argument("--manifest-dir", default=DEFAULT_MANIFEST_DIR)
     parser.add_argument("--keep-rules-path", default=DEFAULT_KEEP_RULES_PATH)
     parser.add_argument("--tui", nargs="?", const="true", default="true")
+    parser.add_argument("--parallel-runs", type=int, default=DEFAULT_PARALLEL_RUNS)
+    parser.add_argument("--use-catalog", nargs="?", const="true", default="true")
+    parser.add_argument("--refresh-catalog", nargs="?", const="true", default="false")
+    parser.add_argument("--discovery-workers", type=int, default=_SHARED_DISCOVERY_WORKERS)
+    parser.add_argument("--job-order", default=DEFAULT_JOB_ORDER, choices=_SHARED_JOB_ORDERS)
+    parser.add_argument("--max-streams-per-mount", type=int, default=0)
+    parser.add_argument("--mount-bwlimit-mbps", type=int, default=0)
+    parser.add_argument("--io-nice", nargs="?", const="true", default="false")
+    parser.add_argument("--verify-mode", default=DEFAULT_VERIFY_MODE, choices=VERIFY_MODES)
+    parser.add_argument("--verify-algorithm", default=DEFAULT_VERIFY_ALGORITHM)
+    parser.add_argument("--archive-format", default=DEFAULT_ARCHIVE_FORMAT, choices=ARCHIVE_FORMATS)
+    parser.add_argument("--copy-backend", default=DEFAULT_COPY_BACKEND, choices=_SHARED_COPY_BACKENDS)
+    parser.add_argument("--copy-shards", type=int, default=DEFAULT_COPY_SHARDS)
 
     if params:
         return params
@@ -861,6 +1112,7 @@ def _parse_params() -> dict[str, Any]:
         "retention_days": args.retention_days,
         "instrument_folders": args.instrument_folders,
         "skip_runs": args.skip_runs,
+        "only_runs": args.only_runs,
         "non_interactive": args.non_interactive,
         "interactive": args.interactive,
         "yes": args.yes,
@@ -871,6 +1123,19 @@ def _parse_params() -> dict[str, Any]:
         "manifest_dir": args.manifest_dir,
         "keep_rules_path": args.keep_rules_path,
         "tui": args.tui,
+        "parallel_runs": args.parallel_runs,
+        "use_catalog": args.use_catalog,
+        "refresh_catalog": args.refresh_catalog,
+        "discovery_workers": args.discovery_workers,
+        "job_order": args.job_order,
+        "max_streams_per_mount": args.max_streams_per_mount,
+        "mount_bwlimit_mbps": args.mount_bwlimit_mbps,
+        "io_nice": args.io_nice,
+        "verify_mode": args.verify_mode,
+        "verify_algorithm": args.verify_algorithm,
+        "archive_format": args.archive_format,
+        "copy_backend": args.copy_backend,
+        "copy_shards": args.copy_shards,
     }
 
 
@@ -885,6 +1150,7 @@ def main() -> None:
         instruments = list(DEFAULT_INSTRUMENTS)
 
     skip_runs = set(_split_csv(params.get("skip_runs")))
+    only_runs = set(_split_csv(params.get("only_runs")))
     non_interactive = _parse_bool(params.get("non_interactive"), False)
     interactive = _parse_bool(params.get("interactive"), True)
     dry_run = _parse_bool(params.get("dry_run"), False)
@@ -895,10 +1161,54 @@ def main() -> None:
     manifest_dir = Path(str(params.get("manifest_dir") or DEFAULT_MANIFEST_DIR)).expanduser().resolve()
     keep_rules_path = Path(str(params.get("keep_rules_path") or DEFAULT_KEEP_RULES_PATH)).expanduser().resolve()
     tui = _parse_bool(params.get("tui"), True)
+    use_catalog = _parse_bool(params.get("use_catalog"), True)
+    refresh_catalog = _parse_bool(params.get("refresh_catalog"), False)
+    discovery_workers = _parse_int(params.get("discovery_workers"), _SHARED_DISCOVERY_WORKERS)
+    job_order = str(params.get("job_order") or DEFAULT_JOB_ORDER).strip().lower()
+    max_streams_per_mount = _parse_int(params.get("max_streams_per_mount"), 0)
+    mount_bwlimit_mbps = _parse_int(params.get("mount_bwlimit_mbps"), 0)
+    io_nice = _parse_bool(params.get("io_nice"), False)
+    parallel_runs = _parse_int(params.get("parallel_runs"), DEFAULT_PARALLEL_RUNS)
+    verify_mode = str(params.get("verify_mode") or DEFAULT_VERIFY_MODE).strip().lower()
+    verify_algorithm = str(params.get("verify_algorithm") or DEFAULT_VERIFY_ALGORITHM).strip().lower()
+    archive_format = str(params.get("archive_format") or DEFAULT_ARCHIVE_FORMAT).strip().lower()
+    copy_backend = str(params.get("copy_backend") or DEFAULT_COPY_BACKEND).strip().lower()
+    copy_shards = _parse_int(params.get("copy_shards"), DEFAULT_COPY_SHARDS)
 
     if retention_days < 0:
         raise SystemExit("retention_days must be >= 0")
 
+    if discovery_workers <= 0:
+        raise SystemExit("discovery_workers must be > 0")
+
+    if job_order not in _SHARED_JOB_ORDERS:
+        raise SystemExit(f"job_order must be one of: {', '.join(_SHARED_JOB_ORDERS)}")
+
+    if max_streams_per_mount < 0 or mount_bwlimit_mbps < 0:
+        raise SystemExit("max_streams_per_mount and mount_bwlimit_mbps must be >= 0")
+    if parallel_runs <= 0:
+        raise SystemExit("parallel_runs must be > 0")
+    if verify_mode not in VERIFY_MODES:
+        raise SystemExit(f"verify_mode must be one of: {', '.join(VERIFY_MODES)}")
+    if archive_format not in ARCHIVE_FORMATS:
+        raise SystemExit(f"archive_format must be one of: {', '.join(ARCHIVE_FORMATS)}")
+    if copy_backend not in _SHARED_COPY_BACKENDS:
+        raise SystemExit(f"copy_backend must be one of: {', '.join(_SHARED_COPY_BACKENDS)}")
+    if copy_shards <= 0:
+        raise SystemExit("copy_shards must be > 0")
+    if archive_format != "directory":
+        # Containers are always verified against their member index.
+        verify_mode = "container"
+        try:
+            _shared_check_container_format(archive_format)
+        except (ValueError, RuntimeError) as exc:
+            raise SystemExit(str(exc)) from exc
+    if verify_mode in ("checksum", "container"):
+        try:
+            _shared_check_verify_algorithm(verify_algorithm)
+        except (ValueError, RuntimeError) as exc:
+            raise SystemExit(str(exc)) from exc
+
     if cleanup_requested:
         print(_warn(f"[warning] cleanup in {_workflow_label()} is deprecated and ignored. Use archive_cleanup workflow."))
 
@@ -938,9 +1248,19 @@ def main() -> None:
     print(f"Protected runs from keep rules: {len(keep_run_ids)}")
     print(f"Manifest path: {manifest_path}")
     print(f"Log path: {log_path}")
+    if only_runs:
+        print(f"Only runs: {', '.join(sorted(only_runs))}")
+    print(f"Parallel runs: {parallel_runs}")
+    print(f"Job order: {job_order}")
+    print(f"Archive format: {archive_format}")
+    if archive_format == "directory":
+        print(f"Copy backend: {copy_backend}" + (f" ({copy_shards} shards per run)" if copy_shards > 1 else ""))
+    print(f"Verify: {verify_mode}" + (f" ({verify_algorithm})" if verify_mode != "rsync" else ""))
 
     # Fail fast before expensive discovery/copy if manifest/log location is not writable.
     _preflight_manifest_paths(manifest_path, log_path)
+    catalog = _shared_open_run_catalog(manifest_dir, enabled=use_catalog, refresh=refresh_catalog)
+    print(f"Run catalog: {catalog.path if catalog.enabled else 'disabled'}")
 
     candidates, issues = _discover_candidates(
         source_root=source_root_path,
@@ -949,6 +1269,9 @@ def main() -> None:
         retention_days=retention_days,
         skip_runs=skip_runs,
         keep_run_ids=keep_run_ids,
+        catalog=catalog,
+        discovery_workers=discovery_workers,
+        only_runs=only_runs,
     )
 
     if issues or keep_notes:
@@ -968,6 +1291,9 @@ def main() -> None:
             retention_days=retention_days,
             skip_runs=skip_runs,
             keep_run_ids=keep_run_ids,
+            catalog=catalog,
+            discovery_workers=discovery_workers,
+            only_runs=only_runs,
         )
         if issues or keep_notes:
             _print_section("Discovery Notes")
@@ -1017,77 +1343,59 @@ def main() -> None:
         "keep_protected_runs": sorted(keep_run_ids),
         "dry_run": dry_run,
         "cleanup_in_archive": False,
+        "parallel_runs": parallel_runs,
+        "job_order": job_order,
+        "verify_mode": verify_mode,
+        "verify_algorithm": verify_algorithm if verify_mode != "rsync" else "",
+        "archive_format": archive_format,
+        "copy_backend": copy_backend if archive_format == "directory" else "",
+        "copy_shards": copy_shards if archive_format == "directory" else 1,
         "log_path": str(log_path),
     }
 
     records: list[dict[str, Any]] = []
-    copy_failures = 0
-    verify_failures = 0
+    journal = _SharedManifestJournal(manifest_path, metadata)
+    results: dict[int, dict[str, Any]] = {}
+    settings = BatchSettings(
+        dry_run=dry_run,
+        log_path=log_path,
+        # Parallel runs would fight over one status line; they get periodic progress lines instead.
+        show_progress=parallel_runs == 1 and sys.stdout.isatty(),
+        verify_mode=verify_mode,
+        verify_algorithm=verify_algorithm,
+        scheduler=_SharedTransferScheduler(max_streams_per_mount, mount_bwlimit_mbps, io_nice, parallel_runs),
+        archive_format=archive_format,
+        copy_backend=copy_backend,
+        copy_shards=copy_shards,
+    )
+    print(_dim(f"Transfer limits: {settings.scheduler.describe()}"))
+    selected_candidates = _shared_order_jobs(
+        selected_candidates, job_order, lambda c: c.size_bytes, lambda c: (c.run_date, c.instrument, c.run_id)
+    )
+
+    def _record_result(index: int, rec: dict[str, Any]) -> None:
+        results[index] = rec
+        records[:] = [results[i] for i in sorted(results)]
+        journal.append(index, rec)
 
     try:
         required = sum(c.size_bytes for c in selected_candidates)
         _ensure_target_free_space(target_root_path, required, min_free_gb)
         _preflight_target_paths(target_root_path, selected_candidates)
 
-        _append_log(log_path, f"{_workflow_public_id()} start: runs={len(selected_candidates)} total_size={required}")
-
-        for candidate in selected_candidates:
-            rec: dict[str, Any] = {
-                "instrument": candidate.instrument,
-                "run_id": candidate.run_id,
-                "owner_user": candidate.owner_user,
-                "run_date": candidate.run_date.isoformat(),
-                "retention_reference_date": candidate.retention_reference_date.isoformat(),
-                "retention_reference_source": candidate.retention_reference_source,
-                "source": str(candidate.source_path),
-                "target": str(candidate.target_run_path),
-                "size_bytes": candidate.size_bytes,
-                "copy_status": "pending",
-                "verify_status": "pending",
-                "cleanup_status": "pending_external_cleanup",
-                "status": "planned",
-                "errors": [],
-                "log_path": str(log_path),
-            }
-
-            if dry_run:
-                rec["copy_status"] = "skipped_dry_run"
-                rec["verify_status"] = "skipped_dry_run"
-                rec["status"] = "dry_run_only"
-                records.append(rec)
-                print(_warn(f"[dry-run] Would archive {candidate.source_path} -> {candidate.target_run_path}"))
-                _write_manifest(manifest_path, metadata, records)
-                continue
-
-            _append_log(log_path, f"run_start {candidate.run_id}")
-            try:
-                _rsync_copy(candidate)
-                rec["copy_status"] = "ok"
-            except Exception as exc:  # noqa: BLE001
-                rec["copy_status"] = "failed"
-                rec["verify_status"] = "skipped_due_to_copy_failure"
-                rec["status"] = "failed"
-                rec["errors"].append(f"copy: {exc}")
-                copy_failures += 1
-                _append_log(log_path, f"run_copy_failed {candidate.run_id}: {exc}")
-                records.append(rec)
-                _write_manifest(manifest_path, metadata, records)
-                continue
-
-            try:
-                _rsync_verify(candidate)
-                rec["verify_status"] = "ok"
-                rec["status"] = "copied_verified"
-                _append_log(log_path, f"run_verified {candidate.run_id}")
-            except Exception as exc:  # noqa: BLE001
-                rec["verify_status"] = "failed"
-                rec["status"] = "failed"
-                rec["errors"].append(f"verify: {exc}")
-                verify_failures += 1
-                _append_log(log_path, f"run_verify_failed {candidate.run_id}: {exc}")
+        _append_log(
+            log_path,
+            f"{_workflow_public_id()} start: runs={len(selected_candidates)} total_size={required} parallel_runs={parallel_runs}",
+        )
 
-            records.append(rec)
-            _write_manifest(manifest_path, metadata, records)
+        _shared_run_batch(
+            selected_candidates,
+            lambda candidate: _process_candidate(candidate, settings),
+            parallel_runs,
+            _record_result,
+        )
+        copy_failures = sum(1 for rec in records if rec.get("copy_status") == "failed")
+        verify_failures = sum(1 for rec in records if rec.get("verify_status") == "failed")
 
         _append_log(
             log_path,
@@ -1107,7 +1415,15 @@ def main() -> None:
         if copy_failures or verify_failures:
             raise SystemExit(1)
     finally:
-        _release_lock(lock_fd, lock_path)
+        # The lock is released even if writing the manifest fails, so later batches can start.
+        try:
+            if records:
+                _write_manifest(journal, metadata, records)
+        finally:
+            try:
+                journal.close()
+            finally:
+                _release_lock(lock_fd, lock_path)
 
 
 if __name__ == "__main__":
@@ -2,10 +2,10 @@
 from __future__ import annotations
 
 import argparse
+import fnmatch
 import json
 import os
 import re
-import shutil
 import sys
 import tempfile
 from dataclasses import dataclass
@@ -14,6 +14,20 @@ from pathlib import Path
 from typing import Any
 import yaml
 
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+
+from archive_common import (
+    DISCOVERY_WORKERS as _SHARED_DISCOVERY_WORKERS,
+    ManifestJournal as _SharedManifestJournal,
+    RunCatalog as _SharedRunCatalog,
+    load_active_keep_runs as _shared_load_active_keep_runs,
+    map_ordered as _shared_map_ordered,
+    open_run_catalog as _shared_open_run_catalog,
+    remove_tree as _shared_remove_tree,
+)
+
 DEFAULT_SOURCE_ROOT = "/data/fastq"
 DEFAULT_RETENTION_DAYS = 90
 DEFAULT_MANIFEST_DIR = "/data/shared/bpm_manifests"
@@ -152,47 +166,6 @@ def _parse_exported_at_date(value: Any) -> date | None:
         return None
 
 
-def _load_active_keep_runs(keep_rules_path: Path) -> tuple[set[str], list[str]]:
-    if not keep_rules_path.exists():
-        return set(), []
-    try:
-        payload = yaml.safe_load(keep_rules_path.read_text(encoding="utf-8")) or {}
-    except Exception as exc:  # noqa: BLE001
-        return set(), [f"Failed to parse keep_rules file {keep_rules_path}: {exc}"]
-    if not isinstance(payload, dict):
-        return set(), [f"Invalid keep_rules format in {keep_rules_path}: expected mapping"]
-
-    runs = payload.get("runs") or {}
-    if not isinstance(runs, dict):
-        return set(), [f"Invalid keep_rules.runs format in {keep_rules_path}: expected mapping"]
-
-    today = date.today()
-    active: set[str] = set()
-    notes: list[str] = []
-    for run_id, rec in runs.items():
-        run_id_s = str(run_id).strip()
-        if not run_id_s:
-            continue
-        if not isinstance(rec, dict):
-            notes.append(f"Invalid keep_rules record for run_id={run_id_s}: expected mapping")
-            continue
-        if rec.get("keep", True) is False:
-            continue
-        keep_until_raw = rec.get("keep_until")
-        if keep_until_raw in (None, ""):
-            active.add(run_id_s)
-            continue
-        try:
-            keep_until = date.fromisoformat(str(keep_until_raw))
-        except ValueError:
-            notes.append(f"Invalid keep_until in keep_rules for run_id={run_id_s}: {keep_until_raw}")
-            active.add(run_id_s)
-            continue
-        if keep_until >= today:
-            active.add(run_id_s)
-    return active, notes
-
-
 def _get_retention_reference(run_dir: Path, run_date: date) -> tuple[date, str]:
     meta_path = run_dir / "bpm.meta.yaml"
     if not meta_path.exists():
@@ -220,11 +193,20 @@ def _get_retention_reference(run_dir: Path, run_date: date) -> tuple[date, str]:
     return run_date, "run_name_prefix"
 
 
-def _du_size_bytes(path: Path) -> int:
-    import subprocess
+def _tree_size_bytes(path: Path, catalog: _SharedRunCatalog) -> int:
+    scan = catalog.scan(path)
+    if scan.errors:
+        raise RuntimeError(scan.errors[0])
+    return scan.total_bytes
+
+
+def _cached_retention_reference(catalog: _SharedRunCatalog, run_dir: Path, run_date: date) -> tuple[date, str]:
+    def _compute() -> list[str]:
+        ref_date, ref_source = _get_retention_reference(run_dir, run_date)
+        return [ref_date.isoformat(), ref_source]
 
-    result = subprocess.run(["du", "-sb", str(path)], check=True, text=True, capture_output=True)
-    return int(result.stdout.strip().split()[0])
+    ref_iso, ref_source = catalog.cached(run_dir, "retention_reference", _compute)
+    return date.fromisoformat(ref_iso), ref_source
 
 
 def _compute_cutoff(retention_days: int) -> date:
@@ -236,43 +218,47 @@ def _discover_candidates(
     retention_days: int,
     skip_runs: set[str],
     keep_run_ids: set[str],
+    catalog: _SharedRunCatalog,
+    discovery_workers: int = _SHARED_DISCOVERY_WORKERS,
 ) -> tuple[list[RunCandidate], list[str]]:
-    issues: list[str] = []
+    catalog_notes_before = len(catalog.notes)
     cutoff = _compute_cutoff(retention_days)
-    candidates: list[RunCandidate] = []
 
-    for entry in sorted(source_root.iterdir()):
+    def _probe(entry: Path) -> tuple[RunCandidate | None, list[str]]:
+        issues: list[str] = []
         if not entry.is_dir():
-            continue
+            return None, issues
         run_date = _parse_run_date(entry.name)
         if run_date is None:
-            continue
-        ref_date, ref_source = _get_retention_reference(entry, run_date)
+            return None, issues
+        ref_date, ref_source = _cached_retention_reference(catalog, entry, run_date)
         if ref_date >= cutoff:
-            continue
+            return None, issues
         if entry.name in skip_runs:
-            continue
+            return None, issues
         if entry.name in keep_run_ids:
-            continue
+            return None, issues
         try:
-            total_size_bytes = _du_size_bytes(entry)
+            total_size_bytes = _tree_size_bytes(entry, catalog)
         except Exception as exc:  # noqa: BLE001
             issues.append(f"Failed to calculate size for {entry}: {exc}")
-            continue
-        candidates.append(
-            RunCandidate(
-                run_id=entry.name,
-                run_date=run_date,
-                retention_reference_date=ref_date,
-                retention_reference_source=ref_source,
-                source_path=entry,
-                total_size_bytes=total_size_bytes,
-                estimated_reclaim_bytes=0,
-                estimated_after_bytes=total_size_bytes,
-                estimated_reclaim_pct=0.0,
-            )
-        )
-
+            return None, issues
+        return RunCandidate(
+            run_id=entry.name,
+            run_date=run_date,
+            retention_reference_date=ref_date,
+            retention_reference_source=ref_source,
+            source_path=entry,
+            total_size_bytes=total_size_bytes,
+            estimated_reclaim_bytes=0,
+            estimated_after_bytes=total_size_bytes,
+            estimated_reclaim_pct=0.0,
+        ), issues
+
+    results = _shared_map_ordered(sorted(source_root.iterdir()), _probe, discovery_workers)
+    candidates = [candidate for candidate, _ in results if candidate is not None]
+    issues = [issue for _, entry_issues in results for issue in entry_issues]
+    issues.extend(catalog.notes[catalog_notes_before:])
     candidates.sort(key=lambda c: (c.run_date, c.run_id))
     return candidates, issues
 
@@ -380,56 +366,78 @@ def _interactive_overrides(
     return source_root, retention_days, patterns, skip_runs
 
 
-def _collect_clean_targets(run_dir: Path, patterns: list[str]) -> list[Path]:
-    raw: set[Path] = set()
-    for pat in patterns:
-        for p in run_dir.rglob(pat):
-            if p == run_dir:
-                continue
-            raw.add(p)
+def _compile_clean_patterns(patterns: list[str]) -> tuple[re.Pattern[str] | None, list[list[re.Pattern[str]]]]:
+    # rglob semantics: a plain pattern matches an entry name at any depth; a pattern with
+    # "/" matches the trailing path components of an entry.
+    names = [p for p in patterns if "/" not in p.strip("/")]
+    paths = [p.strip("/").split("/") for p in patterns if "/" in p.strip("/")]
+    name_re = re.compile("|".join(f"(?:{fnmatch.translate(p.strip('/'))})" for p in names)) if names else None
+    path_res = [[re.compile(fnmatch.translate(part)) for part in parts] for parts in paths]
+    return name_re, path_res
+
+
+def _scan_clean_targets(run_dir: Path, patterns: list[str], measure: bool = False) -> tuple[list[Path], int]:
+    # One walk for all patterns. A matching entry becomes a target and its subtree is not
+    # matched further (only sized when measure=True); symlinked directories are never
+    # entered. Sizes are lstat sizes of everything but real directories.
+    name_re, path_res = _compile_clean_patterns(patterns)
+    targets: list[Path] = []
+    reclaim_bytes = 0
 
-    # Keep only top-most targets to avoid redundant deletes.
-    minimized: list[Path] = []
-    for p in sorted(raw, key=lambda x: len(x.parts)):
-        if any(parent == p or p.is_relative_to(parent) for parent in minimized):
+    def _matches(name: str, parts: tuple[str, ...]) -> bool:
+        if name_re is not None and name_re.match(name):
+            return True
+        for regexes in path_res:
+            if len(regexes) <= len(parts) and all(
+                r.match(part) for r, part in zip(regexes, parts[len(parts) - len(regexes):])
+            ):
+                return True
+        return False
+
+    def _entry_size(entry: os.DirEntry[str]) -> int:
+        try:
+            return entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            return 0
+
+    stack: list[tuple[str, tuple[str, ...], bool]] = [(str(run_dir), (), False)]
+    while stack:
+        dir_path, parts, inside_target = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
             continue
-        minimized.append(p)
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if inside_target:
+                if is_dir:
+                    stack.append((entry.path, (), True))
+                else:
+                    reclaim_bytes += _entry_size(entry)
+                continue
+            entry_parts = (*parts, entry.name)
+            if _matches(entry.name, entry_parts):
+                targets.append(Path(entry.path))
+                if is_dir:
+                    if measure:
+                        stack.append((entry.path, (), True))
+                elif measure:
+                    reclaim_bytes += _entry_size(entry)
+            elif is_dir:
+                stack.append((entry.path, entry_parts, False))
 
     # Delete deeper paths first.
-    minimized.sort(key=lambda x: len(x.parts), reverse=True)
-    return minimized
+    targets.sort(key=lambda x: len(x.parts), reverse=True)
+    return targets, reclaim_bytes
 
 
-def _path_size_bytes(path: Path) -> int:
-    try:
-        if path.is_symlink() or path.is_file():
-            return path.lstat().st_size
-        if path.is_dir():
-            total = 0
-            for root, dirs, files in os.walk(path, followlinks=False):
-                root_p = Path(root)
-                for d in dirs:
-                    dpath = root_p / d
-                    if dpath.is_symlink():
-                        try:
-                            total += dpath.lstat().st_size
-                        except OSError:
-                            pass
-                for f in files:
-                    fpath = root_p / f
-                    try:
-                        total += fpath.lstat().st_size
-                    except OSError:
-                        pass
-            return total
-    except OSError:
-        return 0
-    return 0
+def _collect_clean_targets(run_dir: Path, patterns: list[str]) -> list[Path]:
+    return _scan_clean_targets(run_dir, patterns)[0]
 
 
 def _estimate_cleanup_impact(run_dir: Path, total_size_bytes: int, patterns: list[str]) -> tuple[int, int, float]:
-    targets = _collect_clean_targets(run_dir, patterns)
-    reclaim_bytes = sum(_path_size_bytes(t) for t in targets)
+    _targets, reclaim_bytes = _scan_clean_targets(run_dir, patterns, measure=True)
     reclaim_bytes = min(reclaim_bytes, total_size_bytes)
     after_bytes = max(0, total_size_bytes - reclaim_bytes)
     pct = 0.0 if total_size_bytes == 0 else (reclaim_bytes * 100.0 / total_size_bytes)
@@ -444,7 +452,7 @@ def _remove_target(path: Path) -> tuple[str, str | None]:
             path.unlink()
             return "file", None
         if path.is_dir():
-            shutil.rmtree(path)
+            _shared_remove_tree(path)
             return "dir", None
         return "skip", "unsupported path type"
     except Exception as exc:  # noqa: BLE001
@@ -509,9 +517,9 @@ def _append_log(log_path: Path, message: str) -> None:
         fh.write(f"[{stamp}] {message}\n")
 
 
-def _write_manifest(manifest_path: Path, payload: dict[str, Any]) -> None:
-    manifest_path.parent.mkdir(parents=True, exist_ok=True)
-    manifest_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+def _record_manifest(journal: _SharedManifestJournal, payload: dict[str, Any], rec: dict[str, Any]) -> None:
+    payload["records"].append(rec)
+    journal.append(len(payload["records"]) - 1, rec)
 
 
 def _parse_params() -> dict[str, Any]:
@@ -530,6 +538,9 @@ def _parse_params() -> dict[str, Any]:
     parser.add_argument("--manifest-path", default="")
     parser.add_argument("--manifest-dir", default=DEFAULT_MANIFEST_DIR)
     parser.add_argument("--keep-rules-path", default=DEFAULT_KEEP_RULES_PATH)
+    parser.add_argument("--use-catalog", nargs="?", const="true", default="true")
+    parser.add_argument("--refresh-catalog", nargs="?", const="true", default="false")
+    parser.add_argument("--discovery-workers", type=int, default=_SHARED_DISCOVERY_WORKERS)
 
     if params:
         return params
@@ -547,6 +558,9 @@ def _parse_params() -> dict[str, Any]:
         "manifest_path": args.manifest_path,
         "manifest_dir": args.manifest_dir,
         "keep_rules_path": args.keep_rules_path,
+        "use_catalog": args.use_catalog,
+        "refresh_catalog": args.refresh_catalog,
+        "discovery_workers": args.discovery_workers,
     }
 
 
@@ -568,10 +582,16 @@ def main() -> None:
     manifest_path_raw = str(params.get("manifest_path") or "").strip()
     manifest_dir = Path(str(params.get("manifest_dir") or DEFAULT_MANIFEST_DIR)).expanduser().resolve()
     keep_rules_path = Path(str(params.get("keep_rules_path") or DEFAULT_KEEP_RULES_PATH)).expanduser().resolve()
+    use_catalog = _parse_bool(params.get("use_catalog"), True)
+    refresh_catalog = _parse_bool(params.get("refresh_catalog"), False)
+    discovery_workers = _parse_int(params.get("discovery_workers"), _SHARED_DISCOVERY_WORKERS)
 
     if retention_days < 0:
         raise SystemExit("retention_days must be >= 0")
 
+    if discovery_workers <= 0:
+        raise SystemExit("discovery_workers must be > 0")
+
     if non_interactive:
         interactive = False
         yes = True
@@ -588,7 +608,7 @@ def main() -> None:
     source_root_path = Path(source_root).expanduser().resolve()
     if not source_root_path.exists() or not source_root_path.is_dir():
         raise SystemExit(f"Source root not found or not a directory: {source_root_path}")
-    keep_run_ids, keep_notes = _load_active_keep_runs(keep_rules_path)
+    keep_run_ids, keep_notes = _shared_load_active_keep_runs(keep_rules_path)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     default_manifest_path = manifest_dir / f"clean_fastq_{timestamp}.json"
@@ -604,10 +624,22 @@ def main() -> None:
     print(f"Log path: {log_path}")
 
     _preflight_manifest_paths(manifest_path, log_path)
+    catalog = _shared_open_run_catalog(manifest_dir, enabled=use_catalog, refresh=refresh_catalog)
 
-    candidates, issues = _discover_candidates(source_root_path, retention_days, skip_runs, keep_run_ids)
-    for c in candidates:
-        reclaim, after, pct = _estimate_cleanup_impact(c.source_path, c.total_size_bytes, clean_patterns)
+    candidates, issues = _discover_candidates(
+        source_root_path, retention_days, skip_runs, keep_run_ids, catalog, discovery_workers
+    )
+    estimate_key = "clean_estimate:" + json.dumps(clean_patterns)
+
+    def _estimate(c: RunCandidate) -> list[Any]:
+        return catalog.cached(
+            c.source_path,
+            estimate_key,
+            lambda: list(_estimate_cleanup_impact(c.source_path, c.total_size_bytes, clean_patterns)),
+        )
+
+    estimates = _shared_map_ordered(candidates, _estimate, discovery_workers)
+    for c, (reclaim, after, pct) in zip(candidates, estimates):
         c.estimated_reclaim_bytes = reclaim
         c.estimated_after_bytes = after
         c.estimated_reclaim_pct = pct
@@ -649,6 +681,7 @@ def main() -> None:
         "log_path": str(log_path),
         "records": [],
     }
+    journal = _SharedManifestJournal(manifest_path, {k: v for k, v in payload.items() if k != "records"})
 
     try:
         _append_log(log_path, f"clean_fastq start: runs={len(candidates)}")
@@ -676,8 +709,7 @@ def main() -> None:
                 rec["status"] = "dry_run_only"
                 for t in targets:
                     print(_warn(f"[dry-run] Would remove: {t}"))
-                payload["records"].append(rec)
-                _write_manifest(manifest_path, payload)
+                _record_manifest(journal, payload, rec)
                 continue
 
             rec["status"] = "cleaning"
@@ -691,8 +723,7 @@ def main() -> None:
                     rec["errors"].append(f"{t}: {err}")
 
             rec["status"] = "failed" if rec["errors"] else ("done_no_matches" if len(targets) == 0 else "done")
-            payload["records"].append(rec)
-            _write_manifest(manifest_path, payload)
+            _record_manifest(journal, payload, rec)
 
         done = sum(1 for r in payload["records"] if str(r.get("status", "")).startswith("done"))
         failed = sum(1 for r in payload["records"] if r.get("status") == "failed")
@@ -715,7 +746,15 @@ def main() -> None:
         if failed:
             raise SystemExit(1)
     finally:
-        _release_lock(lock_fd, lock_path)
+        # The lock is released even if writing the manifest fails, so later runs can start.
+        try:
+            if payload["records"]:
+                journal.compact(payload)
+        finally:
+            try:
+                journal.close()
+            finally:
+                _release_lock(lock_fd, lock_path)
 
 
 if __name__ == "__main__":
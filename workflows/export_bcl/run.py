@@ -9,14 +9,16 @@ import sys
 import threading
 import time
 from pathlib import Path
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
 
 import yaml
 
-
-POLL_INTERVAL_SECONDS = 2
-FINAL_MESSAGE_TIMEOUT_SECONDS = 3600
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+from export_client import (
+    ExportAPIError as _SharedExportAPIError,
+    ExportSession as _SharedExportSession,
+)
 
 
 def load_ctx() -> dict:
@@ -217,14 +219,6 @@ def _add_if_exists(export_list: list[dict], path: Path, **kwargs) -> None:
     export_list.append(entry)
 
 
-def _is_final_message_pending(exc: HTTPError, detail: str) -> bool:
-    if exc.code == 425:
-        return True
-    if exc.code == 404 and "Job not found" in detail:
-        return True
-    return False
-
-
 def main() -> None:
     ctx = load_ctx()
     params = ctx.get("params") or {}
@@ -282,87 +276,44 @@ def main() -> None:
         "expiry_days": expiry_days,
     }
 
-    api_clean = api_url.rstrip("/")
-    export_endpoint = api_clean if api_clean.endswith("/export") else f"{api_clean}/export"
-    req = Request(
-        export_endpoint,
-        data=json.dumps(job_spec).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-
-    try:
-        def _post_request():
-            with urlopen(req, timeout=30) as resp:
-                return resp.read().decode("utf-8")
-
-        resp_body = _run_with_spinner(
-            "Submitting export job",
-            _post_request,
-        )
-    except HTTPError as exc:
-        detail = exc.read().decode("utf-8") if exc.fp else str(exc)
-        raise SystemExit(f"Export API request failed: {exc.code} {detail}")
-    except URLError as exc:
-        raise SystemExit(f"Export API request failed: {exc.reason}")
-
-    try:
-        response_json = json.loads(resp_body)
-    except json.JSONDecodeError as exc:
-        raise SystemExit(f"Export API returned non-JSON response: {exc}") from exc
-
-    job_id = response_json.get("job_id")
-    if not isinstance(job_id, str) or not job_id:
-        raise SystemExit("Export API response missing job_id")
-
-    _print_section("Export Request", BLUE)
-    _print_key_value("API endpoint", export_endpoint)
-    _print_key_value("Project", project_name)
-
-    _print_section("Job Registered", GREEN)
-    _print_key_value("job_id", job_id, color=GREEN)
-    _print_key_value("Run directory", str(run_dir), color=GREEN)
-
-    final_endpoint = (
-        f"{api_clean}/final_message/{job_id}"
-        if api_clean.endswith("/export")
-        else f"{api_clean}/export/final_message/{job_id}"
-    )
-    final_req = Request(final_endpoint, method="GET")
-
-    def _wait_for_final_message():
-        start = time.monotonic()
-        while True:
-            if time.monotonic() - start > FINAL_MESSAGE_TIMEOUT_SECONDS:
-                raise TimeoutError(
-                    f"Timed out after {FINAL_MESSAGE_TIMEOUT_SECONDS}s waiting for final export status for job_id={job_id}"
-                )
-            try:
-                with urlopen(final_req, timeout=30) as resp:
-                    return json.loads(resp.read().decode("utf-8"))
-            except HTTPError as exc:
-                detail = exc.read().decode("utf-8") if exc.fp else str(exc)
-                if _is_final_message_pending(exc, detail):
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                raise RuntimeError(f"Unable to fetch final message: {exc.code} {detail}") from exc
-            except json.JSONDecodeError as exc:
-                raise RuntimeError(f"Final export message is not valid JSON: {exc}") from exc
-            except URLError:
-                time.sleep(POLL_INTERVAL_SECONDS)
-                continue
-
-    try:
-        final_json = _run_with_spinner(
-            "Waiting for final export status",
-            _wait_for_final_message,
-        )
-    except KeyboardInterrupt:
-        raise SystemExit(
-            f"Interrupted while waiting for final export status. job_id={job_id} is already registered."
-        )
-    except Exception as exc:  # noqa: BLE001
-        raise SystemExit(str(exc)) from exc
+    with _SharedExportSession(api_url) as session:
+        export_endpoint = session.client.export_endpoint
+        try:
+            response_json = _run_with_spinner(
+                "Submitting export job",
+                lambda: session.submit(job_spec),
+            )
+        except _SharedExportAPIError as exc:
+            raise SystemExit(str(exc))
+        except json.JSONDecodeError as exc:
+            raise SystemExit(f"Export API returned non-JSON response: {exc}") from exc
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"Export API request failed: {exc}")
+
+        job_id = response_json.get("job_id")
+        if not isinstance(job_id, str) or not job_id:
+            raise SystemExit("Export API response missing job_id")
+
+        _print_section("Export Request", BLUE)
+        _print_key_value("API endpoint", export_endpoint)
+        _print_key_value("Project", project_name)
+
+        _print_section("Job Registered", GREEN)
+        _print_key_value("job_id", job_id, color=GREEN)
+        _print_key_value("Run directory", str(run_dir), color=GREEN)
+
+        # Polls reuse the submit connection and back off while the engine reports the job pending.
+        try:
+            final_json = _run_with_spinner(
+                "Waiting for final export status",
+                lambda: session.wait_final(job_id),
+            )
+        except KeyboardInterrupt:
+            raise SystemExit(
+                f"Interrupted while waiting for final export status. job_id={job_id} is already registered."
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise SystemExit(str(exc)) from exc
 
     formatted_message = _strip_markdown_formatting((final_json.get("formatted_message") or "").strip())
     plain_message = (final_json.get("message") or "").strip()
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import inspect
+import json
+import random
+import ssl
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+from urllib.parse import urlsplit
+
+# Shared export-engine client for export_bcl, export_demux and the export template.
+# Standard library only: a small asyncio HTTP/1.1 client with a keep-alive connection
+# pool, so one process can submit and await many export jobs over a few connections.
+# The export template gets a copy at render time (hooks/export_install_client.py).
+
+REQUEST_TIMEOUT_SECONDS = 30.0
+FINAL_MESSAGE_TIMEOUT_SECONDS = 3600
+POLL_INITIAL_SECONDS = 2.0
+POLL_MAX_SECONDS = 60.0
+MAX_CONNECTIONS = 4
+IDLE_CONNECTION_SECONDS = 30.0
+USER_AGENT = "uka-gf-brs-export-client"
+
+
+class ExportAPIError(RuntimeError):
+    def __init__(self, message: str, status: int, detail: str):
+        super().__init__(f"{message}: {status} {detail}")
+        self.status = status
+        self.detail = detail
+
+
+def export_endpoints(api_url: str) -> tuple[str, str]:
+    # Accepts the engine base URL or the full .../export endpoint; returns the export
+    # endpoint and the final_message prefix (job_id is appended).
+    api_clean = api_url.rstrip("/")
+    export_endpoint = api_clean if api_clean.endswith("/export") else f"{api_clean}/export"
+    return export_endpoint, f"{export_endpoint}/final_message/"
+
+
+def is_final_message_pending(status: int, detail: str) -> bool:
+    # 425 Too Early while the job runs; 404 "Job not found" until the engine registered it.
+    if status == 425:
+        return True
+    return status == 404 and "Job not found" in detail
+
+
+def poll_delay(attempt: int, initial: float = POLL_INITIAL_SECONDS, maximum: float = POLL_MAX_SECONDS) -> float:
+    # Exponential backoff with equal jitter: half the step is fixed, half random, so many
+    # jobs started together spread their polls out instead of hitting the engine in step.
+    step = min(maximum, initial * (2 ** min(attempt, 30)))
+    return step / 2 + random.uniform(0, step / 2)
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    idle_since: float = 0.0
+    requests: int = 0
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+@dataclass
+class ExportJob:
+    # One export job through submit -> final message. `key` is the caller's label (e.g. run_dir).
+    key: str
+    spec: dict[str, Any]
+    response: dict[str, Any] | None = None
+    final: dict[str, Any] | None = None
+    error: str = ""
+    submitted_at: float = 0.0
+    finished_at: float = 0.0
+    polls: int = 0
+
+    @property
+    def job_id(self) -> str:
+        return str((self.response or {}).get("job_id") or "")
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "failed"
+        if self.final is not None:
+            return str(self.final.get("status") or self.final.get("type") or "done")
+        return "waiting" if self.response is not None else "pending"
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, dict[str, str], bytes, bool]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed by export engine")
+    version, status_text = status_line.decode("latin-1").split(" ", 2)[:2]
+    status = int(status_text)
+    headers: dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    framed = True
+    if status in (204, 304) or 100 <= status < 200:
+        body = b""
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks += await reader.readexactly(size)
+            await reader.readexactly(2)
+        body = bytes(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+        framed = False
+    reusable = framed and version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    return status, headers, body, reusable
+
+
+class ExportClient:
+    # Async client for the export engine. Connections are kept alive and reused per host, at
+    # most `max_connections` at a time; use one client for all jobs of a process.
+    def __init__(
+        self,
+        api_url: str,
+        max_connections: int = MAX_CONNECTIONS,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+        poll_initial: float = POLL_INITIAL_SECONDS,
+        poll_max: float = POLL_MAX_SECONDS,
+        final_timeout: float = FINAL_MESSAGE_TIMEOUT_SECONDS,
+    ):
+        self.export_endpoint, self.final_prefix = export_endpoints(api_url)
+        self.timeout = timeout
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.final_timeout = final_timeout
+        self.connections_opened = 0
+        self.requests_sent = 0
+        self._slots = asyncio.Semaphore(max(1, max_connections))
+        self._idle: dict[tuple[str, str, int], collections.deque[_Connection]] = {}
+
+    async def __aenter__(self) -> ExportClient:
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        for pool in self._idle.values():
+            while pool:
+                conn = pool.popleft()
+                conn.close()
+                try:
+                    await conn.writer.wait_closed()
+                except (OSError, asyncio.CancelledError):
+                    pass
+        self._idle.clear()
+
+    async def _connect(self, scheme: str, host: str, port: int) -> _Connection:
+        context = ssl.create_default_context() if scheme == "https" else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context, server_hostname=host if context else None),
+            self.timeout,
+        )
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    def _checkout(self, key: tuple[str, str, int]) -> _Connection | None:
+        pool = self._idle.get(key)
+        now = time.monotonic()
+        while pool:
+            conn = pool.pop()
+            if now - conn.idle_since < IDLE_CONNECTION_SECONDS and not conn.reader.at_eof():
+                return conn
+            conn.close()
+        return None
+
+    async def request(self, method: str, url: str, payload: Any = None) -> tuple[int, bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        if scheme not in {"http", "https"}:
+            raise ValueError(f"Unsupported export API URL scheme: {url}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        host_header = host if parts.port is None else f"{host}:{port}"
+        head = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {host_header}",
+            f"User-Agent: {USER_AGENT}",
+            "Accept: application/json",
+            "Connection: keep-alive",
+            f"Content-Length: {len(body)}",
+        ]
+        if payload is not None:
+            head.append("Content-Type: application/json")
+        message = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+        key = (scheme, host, port)
+        async with self._slots:
+            conn = self._checkout(key)
+            for attempt in range(2):
+                reused = conn is not None
+                if conn is None:
+                    conn = await self._connect(scheme, host, port)
+                written = False
+                try:
+                    conn.writer.write(message)
+                    await conn.writer.drain()
+                    written = True
+                    self.requests_sent += 1
+                    status, _, data, reusable = await asyncio.wait_for(_read_response(conn.reader), self.timeout)
+                except (OSError, EOFError, asyncio.TimeoutError) as exc:
+                    conn.close()
+                    conn = None
+                    # A pooled connection the server already closed fails without a response, so the
+                    # request is sent once more on a new one. Once written, the engine may already
+                    # have acted on it, so only GETs are resent then; a POST could register twice.
+                    if (
+                        reused
+                        and attempt == 0
+                        and isinstance(exc, (ConnectionError, EOFError))
+                        and (method == "GET" or not written)
+                    ):
+                        continue
+                    if isinstance(exc, asyncio.TimeoutError):
+                        raise TimeoutError(f"Export API request timed out after {self.timeout:.0f}s: {url}") from exc
+                    if isinstance(exc, EOFError):
+                        # IncompleteReadError: the response was cut short. Callers handle it like
+                        # any other dropped connection.
+                        raise ConnectionResetError(f"Export API response truncated: {url}") from exc
+                    raise
+                conn.requests += 1
+                if reusable:
+                    conn.idle_since = time.monotonic()
+                    self._idle.setdefault(key, collections.deque()).append(conn)
+                else:
+                    conn.close()
+                return status, data
+        raise ConnectionResetError(f"Export API connection failed: {url}")
+
+    async def submit(self, job_spec: dict[str, Any]) -> dict[str, Any]:
+        # Returns the engine's JSON response; raises ExportAPIError on HTTP errors and
+        # ValueError when the body is not JSON.
+        status, body = await self.request("POST", self.export_endpoint, job_spec)
+        detail = body.decode("utf-8", errors="replace")
+        if not 200 <= status < 300:
+            raise ExportAPIError("Export API request failed", status, detail)
+        return json.loads(detail)
+
+    async def wait_final(self, job_id: str, on_poll: Callable[[int, float], None] | None = None) -> dict[str, Any]:
+        # Polls final_message/<job_id> until the job is done, backing off exponentially while
+        # the engine answers "pending" or is unreachable.
+        url = f"{self.final_prefix}{job_id}"
+        deadline = time.monotonic() + self.final_timeout
+        attempt = 0
+        while True:
+            try:
+                status, body = await self.request("GET", url)
+            except (OSError, TimeoutError):
+                pass
+            else:
+                detail = body.decode("utf-8", errors="replace")
+                if 200 <= status < 300:
+                    try:
+                        return json.loads(detail)
+                    except ValueError as exc:
+                        raise RuntimeError(f"Final export message is not valid JSON: {exc}") from exc
+                if not is_final_message_pending(status, detail):
+                    raise ExportAPIError("Unable to fetch final message", status, detail)
+            delay = poll_delay(attempt, self.poll_initial, self.poll_max)
+            attempt += 1
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(
+                    f"Timed out after {self.final_timeout:.0f}s waiting for final export status for job_id={job_id}"
+                )
+            if on_poll is not None:
+                on_poll(attempt, delay)
+            await asyncio.sleep(delay)
+
+    async def run_job(
+        self,
+        job: ExportJob,
+        on_submitted: Callable[[ExportJob], Any] | None = None,
+        on_finished: Callable[[ExportJob], Any] | None = None,
+    ) -> ExportJob:
+        # Never raises for job failures: the error is stored on the job so sibling jobs go on.
+        try:
+            job.response = await self.submit(job.spec)
+            job.submitted_at = time.time()
+            if not job.job_id:
+                raise RuntimeError("Export API response missing job_id")
+            if on_submitted is not None:
+                await _maybe_await(on_submitted(job))
+
+            def _count(attempt: int, _delay: float) -> None:
+                job.polls = attempt
+
+            job.final = await self.wait_final(job.job_id, on_poll=_count)
+        except (RuntimeError, OSError, TimeoutError, ValueError) as exc:
+            job.error = str(exc) or exc.__class__.__name__
+        job.finished_at = time.time()
+        if on_finished is not None:
+            await _maybe_await(on_finished(job))
+        return job
+
+    async def run_jobs(
+        self,
+        jobs: Sequence[ExportJob],
+        on_submitted: Callable[[ExportJob], Any] | None = None,
+        on_finished: Callable[[ExportJob], Any] | None = None,
+    ) -> list[ExportJob]:
+        # An error run_job does not anticipate (e.g. raised by a callback) is stored on its job,
+        # so it cannot cancel the others while their engine-side jobs keep running.
+        results = await asyncio.gather(*(self.run_job(job, on_submitted, on_finished) for job in jobs), return_exceptions=True)
+        for job, result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                job.error = job.error or str(result) or result.__class__.__name__
+                job.finished_at = job.finished_at or time.time()
+        return list(jobs)
+
+
+async def _maybe_await(value: Any) -> Any:
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class ExportSession:
+    # Blocking facade for single-job workflows: one event loop and one connection pool
+    # shared by the submit call and every final_message poll.
+    def __init__(self, api_url: str, **options: Any):
+        self._loop = asyncio.new_event_loop()
+        self.client = ExportClient(api_url, **options)
+
+    def __enter__(self) -> ExportSession:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def submit(self, job_spec: dict[str, Any]) -> dict[str, Any]:
+        return self._loop.run_until_complete(self.client.submit(job_spec))
+
+    def wait_final(self, job_id: str) -> dict[str, Any]:
+        return self._loop.run_until_complete(self.client.wait_final(job_id))
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        try:
+            self._loop.run_until_complete(self.client.close())
+        finally:
+            self._loop.close()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import asyncio
+import glob
 import json
 import os
 import re
@@ -10,14 +12,23 @@ import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
 
 import yaml
 
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+from export_client import (
+    MAX_CONNECTIONS as _SHARED_MAX_CONNECTIONS,
+    ExportAPIError as _SharedExportAPIError,
+    ExportClient as _SharedExportClient,
+    ExportJob as _SharedExportJob,
+    ExportSession as _SharedExportSession,
+    export_endpoints as _shared_export_endpoints,
+)
 
-POLL_INTERVAL_SECONDS = 2
-FINAL_MESSAGE_TIMEOUT_SECONDS = 3600
+DEFAULT_API_URL = "http://genomics.rwth-aachen.de:9500/export"
+PROGRESS_REFRESH_SECONDS = 0.5
 
 
 def load_ctx() -> dict:
@@ -250,29 +261,37 @@ def _run_with_spinner(message: str, func):
         thread.join()
 
 
-def _is_final_message_pending(exc: HTTPError, detail: str) -> bool:
-    if exc.code == 425:
-        return True
-    if exc.code == 404 and "Job not found" in detail:
-        return True
-    return False
-
+def _resolve_run_dirs(value) -> list[Path]:
+    # Comma-separated (or YAML list) run directories; entries with *, ? or [ are expanded
+    # as globs to the directories they match. Duplicates are dropped, order is kept.
+    run_dirs: list[Path] = []
+    seen: set[Path] = set()
+    for entry in _split_csv(value):
+        expanded = os.path.expanduser(entry)
+        if any(ch in expanded for ch in "*?["):
+            matches = [Path(m) for m in sorted(glob.glob(expanded)) if Path(m).is_dir()]
+            if not matches:
+                raise SystemExit(f"run_dirs pattern matched no directories: {entry}")
+        else:
+            matches = [Path(expanded)]
+        for run_dir in matches:
+            key = run_dir.resolve()
+            if key not in seen:
+                seen.add(key)
+                run_dirs.append(run_dir)
+    return run_dirs
 
-def main() -> None:
-    ctx = load_ctx()
-    params = ctx.get("params") or {}
 
-    run_dir = Path(str(params.get("run_dir") or "")).expanduser()
+def _build_job_spec(run_dir: Path, project_name: str, params: dict) -> dict:
+    # Raises ValueError when the run directory or its published outputs are missing.
     if not run_dir.exists():
-        raise SystemExit(f"run_dir not found: {run_dir}")
+        raise ValueError(f"run_dir not found: {run_dir}")
     if not run_dir.is_dir():
-        raise SystemExit(f"run_dir is not a directory: {run_dir}")
+        raise ValueError(f"run_dir is not a directory: {run_dir}")
 
     meta = _load_meta(run_dir)
     published = meta.get("published") or {}
 
-    project_name = str(params.get("project_name") or run_dir.name)
-
     def _resolve_path(raw: str | Path, default_host: str) -> tuple[str, Path]:
         if isinstance(raw, Path):
             return default_host, raw
@@ -289,11 +308,10 @@ def main() -> None:
     multiqc_host, multiqc_report = _resolve_path(multiqc_report_raw, host_default)
 
     if fastq_host == host_default and not fastq_dir.exists():
-        raise SystemExit(f"FASTQ dir not found: {fastq_dir}")
+        raise ValueError(f"FASTQ dir not found: {fastq_dir}")
     if multiqc_host == host_default and not multiqc_report.exists():
-        raise SystemExit(f"MultiQC report not found: {multiqc_report}")
+        raise ValueError(f"MultiQC report not found: {multiqc_report}")
 
-    api_url = str(params.get("export_engine_api_url") or "").strip() or "http://genomics.rwth-aachen.de:9500/export"
     backends = _split_csv(params.get("export_engine_backends") or "apache, owncloud, sftp")
     expiry_days = int(params.get("export_expiry_days") or 0)
     username = str(params.get("export_username") or "").strip() or _derive_username(project_name)
@@ -351,7 +369,7 @@ def main() -> None:
         ),
     ]
 
-    job_spec = {
+    return {
         "project_name": project_name,
         "export_list": export_list,
         "backend": backends,
@@ -361,96 +379,100 @@ def main() -> None:
         "expiry_days": expiry_days,
     }
 
-    api_clean = api_url.rstrip("/")
-    export_endpoint = api_clean if api_clean.endswith("/export") else f"{api_clean}/export"
-    req = Request(
-        export_endpoint,
-        data=json.dumps(job_spec).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-
-    try:
-        def _post_request():
-            with urlopen(req, timeout=30) as resp:
-                return resp.read().decode("utf-8")
 
-        resp_body = _run_with_spinner(
-            "Submitting export job",
-            _post_request,
+class _BatchProgress:
+    # One progress view for a batch: an event line per run as it is submitted or finishes,
+    # plus a status line that is redrawn in place on a terminal.
+    def __init__(self, jobs: list):
+        self.jobs = jobs
+        self.started = time.monotonic()
+        self.live = sys.stdout.isatty()
+        self._line_len = 0
+
+    def status_line(self) -> str:
+        failed = sum(1 for job in self.jobs if job.error)
+        done = sum(1 for job in self.jobs if job.final is not None and not job.error)
+        waiting = sum(1 for job in self.jobs if job.response is not None and job.final is None and not job.error)
+        submitting = len(self.jobs) - failed - done - waiting
+        elapsed = int(time.monotonic() - self.started)
+        return (
+            f"Exports: {done}/{len(self.jobs)} done, {failed} failed, {waiting} waiting, "
+            f"{submitting} submitting [{elapsed // 60}:{elapsed % 60:02d}]"
         )
-    except HTTPError as exc:
-        detail = exc.read().decode("utf-8") if exc.fp else str(exc)
-        raise SystemExit(f"Export API request failed: {exc.code} {detail}")
-    except URLError as exc:
-        raise SystemExit(f"Export API request failed: {exc.reason}")
-
-    try:
-        response_json = json.loads(resp_body)
-    except json.JSONDecodeError as exc:
-        raise SystemExit(f"Export API returned non-JSON response: {exc}") from exc
 
-    _update_export_meta(
-        run_dir=run_dir,
-        workflow_id="export_demux",
-        api_url=export_endpoint,
-        project_name=project_name,
-        job_spec=job_spec,
-        response_json=response_json,
-    )
-
-    job_id = response_json.get("job_id")
-    if not isinstance(job_id, str) or not job_id:
-        raise SystemExit("Export API response missing job_id")
-
-    _print_section("Export Request", BLUE)
-    _print_key_value("API endpoint", export_endpoint)
-    _print_key_value("Project", project_name)
+    def redraw(self) -> None:
+        if not self.live:
+            return
+        line = self.status_line()
+        sys.stdout.write("\r" + line.ljust(self._line_len))
+        sys.stdout.flush()
+        self._line_len = len(line)
 
-    _print_section("Job Registered", GREEN)
-    _print_key_value("job_id", job_id, color=GREEN)
-    _print_key_value("bpm.meta.yaml", str(run_dir / "bpm.meta.yaml"), color=GREEN)
+    def clear(self) -> None:
+        if self.live and self._line_len:
+            sys.stdout.write("\r" + " " * self._line_len + "\r")
+            sys.stdout.flush()
+            self._line_len = 0
 
-    final_endpoint = (
-        f"{api_clean}/final_message/{job_id}"
-        if api_clean.endswith("/export")
-        else f"{api_clean}/export/final_message/{job_id}"
-    )
-    final_req = Request(final_endpoint, method="GET")
+    def event(self, text: str) -> None:
+        self.clear()
+        print(text)
+        self.redraw()
 
-    def _wait_for_final_message():
-        start = time.monotonic()
+    async def ticker(self) -> None:
         while True:
-            if time.monotonic() - start > FINAL_MESSAGE_TIMEOUT_SECONDS:
-                raise TimeoutError(
-                    f"Timed out after {FINAL_MESSAGE_TIMEOUT_SECONDS}s waiting for final export status for job_id={job_id}"
-                )
-            try:
-                with urlopen(final_req, timeout=30) as resp:
-                    return json.loads(resp.read().decode("utf-8"))
-            except HTTPError as exc:
-                detail = exc.read().decode("utf-8") if exc.fp else str(exc)
-                if _is_final_message_pending(exc, detail):
-                    time.sleep(POLL_INTERVAL_SECONDS)
-                    continue
-                raise RuntimeError(f"Unable to fetch final message: {exc.code} {detail}") from exc
-            except json.JSONDecodeError as exc:
-                raise RuntimeError(f"Final export message is not valid JSON: {exc}") from exc
-            except URLError:
-                time.sleep(POLL_INTERVAL_SECONDS)
-                continue
-
-    try:
-        final_json = _run_with_spinner(
-            "Waiting for final export status",
-            _wait_for_final_message,
-        )
-    except KeyboardInterrupt:
-        raise SystemExit(
-            f"Interrupted while waiting for final export status. job_id={job_id} is already stored in bpm.meta.yaml."
+            self.redraw()
+            await asyncio.sleep(PROGRESS_REFRESH_SECONDS)
+
+
+def _export_single(run_dir: Path, project_name: str, job_spec: dict, api_url: str) -> None:
+    with _SharedExportSession(api_url) as session:
+        export_endpoint = session.client.export_endpoint
+        try:
+            response_json = _run_with_spinner(
+                "Submitting export job",
+                lambda: session.submit(job_spec),
+            )
+        except _SharedExportAPIError as exc:
+            raise SystemExit(str(exc))
+        except json.JSONDecodeError as exc:
+            raise SystemExit(f"Export API returned non-JSON response: {exc}") from exc
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"Export API request failed: {exc}")
+
+        _update_export_meta(
+            run_dir=run_dir,
+            workflow_id="export_demux",
+            api_url=export_endpoint,
+            project_name=project_name,
+            job_spec=job_spec,
+            response_json=response_json,
         )
-    except Exception as exc:  # noqa: BLE001
-        raise SystemExit(str(exc)) from exc
+
+        job_id = response_json.get("job_id")
+        if not isinstance(job_id, str) or not job_id:
+            raise SystemExit("Export API response missing job_id")
+
+        _print_section("Export Request", BLUE)
+        _print_key_value("API endpoint", export_endpoint)
+        _print_key_value("Project", project_name)
+
+        _print_section("Job Registered", GREEN)
+        _print_key_value("job_id", job_id, color=GREEN)
+        _print_key_value("bpm.meta.yaml", str(run_dir / "bpm.meta.yaml"), color=GREEN)
+
+        # Polls reuse the submit connection and back off while the engine reports the job pending.
+        try:
+            final_json = _run_with_spinner(
+                "Waiting for final export status",
+                lambda: session.wait_final(job_id),
+            )
+        except KeyboardInterrupt:
+            raise SystemExit(
+                f"Interrupted while waiting for final export status. job_id={job_id} is already stored in bpm.meta.yaml."
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise SystemExit(str(exc)) from exc
 
     formatted_message = _strip_markdown_formatting((final_json.get("formatted_message") or "").strip())
     plain_message = (final_json.get("message") or "").strip()
@@ -489,5 +511,113 @@ def main() -> None:
     )
 
 
+def _export_batch(run_dirs: list[Path], params: dict, api_url: str) -> None:
+    # All job specs are built before anything is submitted, so a missing FASTQ dir in one run
+    # does not leave the batch half exported.
+    jobs: list[_SharedExportJob] = []
+    problems: list[str] = []
+    for run_dir in run_dirs:
+        try:
+            job_spec = _build_job_spec(run_dir, run_dir.name, params)
+        except ValueError as exc:
+            problems.append(f"{run_dir}: {exc}")
+            continue
+        jobs.append(_SharedExportJob(key=str(run_dir), spec=job_spec))
+    if problems:
+        raise SystemExit("Cannot export batch:\n  " + "\n  ".join(problems))
+
+    max_connections = int(params.get("export_max_connections") or _SHARED_MAX_CONNECTIONS)
+    if max_connections < 1:
+        raise SystemExit("export_max_connections must be >= 1")
+
+    progress = _BatchProgress(jobs)
+    export_endpoint, _ = _shared_export_endpoints(api_url)
+
+    def _record(job: _SharedExportJob, final_json: dict | None = None) -> None:
+        _update_export_meta(
+            run_dir=Path(job.key),
+            workflow_id="export_demux",
+            api_url=export_endpoint,
+            project_name=job.spec["project_name"],
+            job_spec=job.spec,
+            response_json=job.response or {},
+            final_json=final_json,
+        )
+
+    def _on_submitted(job: _SharedExportJob) -> None:
+        progress.event(f"{_color('submitted', BLUE, bold=True)} {job.spec['project_name']}  job_id={job.job_id}")
+        # The job is registered either way, so a failed write must not stop the wait for it.
+        try:
+            _record(job)
+        except OSError as exc:
+            progress.event(f"{_color('warning', YELLOW, bold=True)} {job.spec['project_name']}  bpm.meta.yaml not updated: {exc}")
+
+    def _on_finished(job: _SharedExportJob) -> None:
+        if job.final is not None:
+            try:
+                _record(job, job.final)
+            except OSError as exc:
+                job.error = f"export finished but bpm.meta.yaml was not updated: {exc}"
+        if job.error:
+            progress.event(f"{_color('failed', YELLOW, bold=True)} {job.spec['project_name']}  {job.error}")
+        else:
+            progress.event(f"{_color(job.status, GREEN, bold=True)} {job.spec['project_name']}  job_id={job.job_id}")
+
+    async def _run() -> None:
+        async with _SharedExportClient(api_url, max_connections=max_connections) as client:
+            ticker = asyncio.ensure_future(progress.ticker())
+            try:
+                await client.run_jobs(jobs, on_submitted=_on_submitted, on_finished=_on_finished)
+            finally:
+                ticker.cancel()
+                progress.clear()
+
+    _print_section("Batch Export Request", BLUE)
+    _print_key_value("API endpoint", export_endpoint)
+    _print_key_value("Runs", str(len(jobs)))
+    _print_key_value("Connections", str(max_connections))
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        raise SystemExit(
+            "Interrupted while waiting for final export status. "
+            "job_ids of submitted runs are already stored in their bpm.meta.yaml."
+        )
+
+    failed = [job for job in jobs if job.error]
+    _print_section("Batch Export Summary", YELLOW if failed else GREEN)
+    for job in jobs:
+        if job.error:
+            _print_key_value(job.spec["project_name"], f"failed: {job.error}", color=YELLOW)
+            continue
+        report = str((job.final or {}).get("main_report") or "")
+        _print_key_value(job.spec["project_name"], "  ".join(v for v in (job.status, job.job_id, report) if v), color=GREEN)
+    print("Final messages are stored per run in bpm.meta.yaml under export.demux.final_message.")
+    if failed:
+        raise SystemExit(f"{len(failed)} of {len(jobs)} exports failed")
+
+
+def main() -> None:
+    ctx = load_ctx()
+    params = ctx.get("params") or {}
+    api_url = str(params.get("export_engine_api_url") or "").strip() or DEFAULT_API_URL
+
+    if _split_csv(params.get("run_dirs")):
+        if str(params.get("run_dir") or "").strip():
+            raise SystemExit("Set either run_dir or run_dirs, not both")
+        if str(params.get("project_name") or "").strip():
+            raise SystemExit("project_name cannot be combined with run_dirs; each run is exported under its directory name")
+        _export_batch(_resolve_run_dirs(params.get("run_dirs")), params, api_url)
+        return
+
+    run_dir = Path(str(params.get("run_dir") or "")).expanduser()
+    project_name = str(params.get("project_name") or run_dir.name)
+    try:
+        job_spec = _build_job_spec(run_dir, project_name, params)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    _export_single(run_dir, project_name, job_spec, api_url)
+
+
 if __name__ == "__main__":
     main()
@@ -11,8 +11,21 @@ from datetime import date, datetime
 from pathlib import Path
 from typing import Any
 
-import yaml
-from metadata import RunFolderInfo, build_run_folder_info
+WORKFLOWS_DIR = Path(__file__).resolve().parents[1]
+if str(WORKFLOWS_DIR) not in sys.path:
+    sys.path.insert(0, str(WORKFLOWS_DIR))
+
+from archive_common import (
+    RunCatalog as _SharedRunCatalog,
+    RunFolderInfo,
+    discover_runs as _shared_discover_runs,
+    keep_rule_record as _shared_keep_rule_record,
+    list_run_folders as _shared_list_run_folders,
+    load_rules as _shared_load_rules,
+    open_run_catalog as _shared_open_run_catalog,
+    run_keep_tui as _shared_run_keep_tui,
+    update_rules as _shared_update_rules,
+)
 
 DEFAULT_RULES_PATH = "/data/shared/bpm_manifests/keep_rules.yaml"
 DEFAULT_SOURCE_ROOTS = "/data/raw,/data/fastq"
@@ -149,61 +162,12 @@ def _validate_keep_until(value: str) -> str | None:
     return v
 
 
-def _default_rules() -> dict[str, Any]:
-    return {
-        "schema_version": 1,
-        "updated_at": _now_iso(),
-        "runs": {},
-    }
-
-
-def _load_rules(path: Path) -> dict[str, Any]:
-    if not path.exists():
-        return _default_rules()
-    try:
-        payload = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-    except Exception as exc:  # noqa: BLE001
-        raise SystemExit(f"Failed to parse keep_rules file {path}: {exc}") from exc
-
-    if not isinstance(payload, dict):
-        raise SystemExit(f"Invalid keep_rules format in {path}: expected mapping at top level")
-
-    payload.setdefault("schema_version", 1)
-    payload.setdefault("updated_at", _now_iso())
-    runs = payload.get("runs")
-    if not isinstance(runs, dict):
-        payload["runs"] = {}
-    return payload
-
-
-def _save_rules(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    payload["updated_at"] = _now_iso()
-    path.write_text(yaml.safe_dump(payload, sort_keys=False), encoding="utf-8")
-
-
-def _discover_runs(source_roots: list[Path]) -> tuple[dict[str, RunFolderInfo], list[str]]:
-    found: dict[str, RunFolderInfo] = {}
-    notes: list[str] = []
-
-    for root in source_roots:
-        if not root.exists() or not root.is_dir():
-            notes.append(f"Source root missing or not a directory: {root}")
-            continue
-
-        for entry in root.iterdir():
-            if not entry.is_dir():
-                continue
-            if RUN_PREFIX_RE.match(entry.name):
-                found.setdefault(entry.name, build_run_folder_info(entry.name, entry))
-                continue
-            # Scan one more level (instrument -> run).
-            for sub in entry.iterdir():
-                if not sub.is_dir():
-                    continue
-                if RUN_PREFIX_RE.match(sub.name):
-                    found.setdefault(sub.name, build_run_folder_info(sub.name, sub))
-    return found, notes
+def _discover_runs(
+    source_roots: list[Path],
+    catalog: _SharedRunCatalog | None = None,
+) -> tuple[dict[str, RunFolderInfo], list[str]]:
+    # Scans root/<run> and root/<instrument>/<run>; owner/project_id come from the run catalog when enabled.
+    return _shared_discover_runs(source_roots, catalog)
 
 
 def _parse_index_selection(raw: str, max_index: int) -> list[int]:
@@ -240,18 +204,8 @@ def _column_width(values: list[str], header: str, min_width: int = 0, max_width:
     return width
 
 
-def _clip_text(value: str, width: int) -> str:
-    if width <= 0:
-        return ""
-    if len(value) <= width:
-        return value
-    if width == 1:
-        return value[:1]
-    return value[: width - 1] + "~"
-
-
-def _prompt_select_run_ids(source_roots: list[Path]) -> list[str]:
-    discovered, notes = _discover_runs(source_roots)
+def _prompt_select_run_ids(source_roots: list[Path], catalog: _SharedRunCatalog | None = None) -> list[str]:
+    discovered, notes = _discover_runs(source_roots, catalog)
     for note in notes:
         print(_warn(f"- {note}"))
 
@@ -344,296 +298,32 @@ def _print_rules(path: Path, payload: dict[str, Any]) -> None:
         )
 
 
-def _apply_add(payload: dict[str, Any], run_ids: list[str], keep_until: str | None, user: str) -> int:
-    runs = payload.setdefault("runs", {})
-    changed = 0
+def _apply_add(rules_path: Path, run_ids: list[str], keep_until: str | None, user: str) -> int:
     stamp = _now_iso()
-    for run_id in sorted(set(run_ids)):
-        prev = runs.get(run_id) if isinstance(runs, dict) else None
-        rec = {
-            "keep": True,
-            "set_by": user,
-            "set_at": stamp,
-            "keep_until": keep_until,
-        }
-        if prev != rec:
-            runs[run_id] = rec
-            changed += 1
-    return changed
-
-
-def _apply_remove(payload: dict[str, Any], run_ids: list[str]) -> int:
-    runs = payload.setdefault("runs", {})
-    changed = 0
-    for run_id in sorted(set(run_ids)):
-        if run_id in runs:
-            del runs[run_id]
-            changed += 1
-    return changed
+    return _shared_update_rules(
+        rules_path, {run_id: _shared_keep_rule_record(user, stamp, keep_until) for run_id in sorted(set(run_ids))}
+    )
+
+
+def _apply_remove(rules_path: Path, run_ids: list[str]) -> int:
+    return _shared_update_rules(rules_path, {run_id: None for run_id in sorted(set(run_ids))})
 
 
 def _prune_candidates(payload: dict[str, Any], source_roots: list[Path]) -> tuple[list[str], list[str]]:
     runs = payload.get("runs") or {}
-    existing, notes = _discover_runs(source_roots)
+    # Only run IDs matter here, so skip the per-run owner/project lookups.
+    existing, notes = _shared_list_run_folders(source_roots)
     stale = sorted([run_id for run_id in runs if run_id not in existing])
     return stale, notes
 
 
-def _run_keep_tui(payload: dict[str, Any], rules_path: Path, browse_root: Path) -> None:
-    import curses
-
-    discovered, notes = _discover_runs([browse_root])
-    if notes:
-        for note in notes:
-            print(_warn(f"- {note}"))
-    if not discovered:
-        print(_warn(f"No run IDs discovered under {browse_root}"))
-        return
-
-    runs = sorted(discovered)
-    existing = payload.get("runs") or {}
-    show_project_id = any(info.project_id for info in discovered.values())
-    owner_values = [discovered[run_id].owner for run_id in runs]
-    project_values = [discovered[run_id].project_id or "-" for run_id in runs] if show_project_id else []
-
-    marked: dict[str, bool] = {run_id: bool((existing.get(run_id) or {}).get("keep", False)) for run_id in runs}
-    keep_until: dict[str, str | None] = {
-        run_id: (existing.get(run_id) or {}).get("keep_until") for run_id in runs
-    }
-    set_by_map: dict[str, str] = {
-        run_id: str((existing.get(run_id) or {}).get("set_by") or "-") for run_id in runs
-    }
-
-    def _apply_changes() -> tuple[int, int]:
-        added_or_updated = 0
-        removed = 0
-        user = _current_user()
-        stamp = _now_iso()
-        run_map = payload.setdefault("runs", {})
-
-        for run_id in runs:
-            old = run_map.get(run_id)
-            if marked.get(run_id, False):
-                rec = {
-                    "keep": True,
-                    "set_by": user,
-                    "set_at": stamp,
-                    "keep_until": keep_until.get(run_id) or None,
-                }
-                if old != rec:
-                    run_map[run_id] = rec
-                    added_or_updated += 1
-            else:
-                if run_id in run_map:
-                    del run_map[run_id]
-                    removed += 1
-        _save_rules(rules_path, payload)
-        return added_or_updated, removed
-
-    def _curses_main(stdscr) -> tuple[bool, int, int]:
-        curses.curs_set(0)
-        stdscr.nodelay(False)
-        stdscr.keypad(True)
-        use_colors = False
-        color_header = curses.A_BOLD
-        color_help = curses.A_DIM
-        color_row = curses.A_NORMAL
-        color_marked = curses.A_BOLD
-        color_selected = curses.A_REVERSE | curses.A_BOLD
-        color_status = curses.A_BOLD
-        color_summary = curses.A_DIM
-
-        if curses.has_colors():
-            try:
-                curses.start_color()
-                curses.use_default_colors()
-                curses.init_pair(1, curses.COLOR_CYAN, -1)   # header
-                curses.init_pair(2, curses.COLOR_WHITE, -1)  # regular/help
-                curses.init_pair(3, curses.COLOR_GREEN, -1)  # marked rows
-                curses.init_pair(4, curses.COLOR_BLACK, curses.COLOR_CYAN)  # selected row
-                curses.init_pair(5, curses.COLOR_YELLOW, -1)  # status
-                use_colors = True
-                color_header = curses.color_pair(1) | curses.A_BOLD
-                color_help = curses.color_pair(2) | curses.A_DIM
-                color_row = curses.color_pair(2)
-                color_marked = curses.color_pair(3) | curses.A_BOLD
-                color_selected = curses.color_pair(4) | curses.A_BOLD
-                color_status = curses.color_pair(5) | curses.A_BOLD
-                color_summary = curses.color_pair(2) | curses.A_DIM
-            except curses.error:
-                use_colors = False
-
-        idx = 0
-        top = 0
-        changed = False
-        add_count = 0
-        remove_count = 0
-
-        def _render(status: str = "") -> None:
-            nonlocal top
-            h, w = stdscr.getmaxyx()
-            stdscr.erase()
-            header = f"keep_rules TUI | root={browse_root} | runs={len(runs)}"
-            help_line = "Up/Down: move  Space: toggle keep  u: keep-until  s: save  q: quit"
-            stdscr.addnstr(0, 0, header.ljust(max(0, w - 1)), w - 1, color_header)
-            stdscr.addnstr(1, 0, help_line.ljust(max(0, w - 1)), w - 1, color_help)
-
-            list_top = 4
-            list_h = max(1, h - 6)
-            owner_col = _column_width(owner_values, "Owner", min_width=5, max_width=16)
-            set_by_col = _column_width(
-                [set_by_map.get(run_id, "-") for run_id in runs],
-                "Set By",
-                min_width=6,
-                max_width=20,
-            )
-            project_col = 0
-            if show_project_id:
-                project_col = _column_width(project_values, "Project ID", min_width=10, max_width=36)
-            sep_count = 5 if show_project_id else 4
-            fixed_non_run = 3 + owner_col + project_col + 10 + set_by_col + sep_count
-            available_for_run = max(12, w - fixed_non_run - 1)
-            run_col = min(_column_width(runs, "Run ID", min_width=12), available_for_run)
-            if show_project_id:
-                row_fmt = (
-                    f"{{sel:<3}} {{run:<{run_col}}} {{owner:<{owner_col}}} "
-                    f"{{project:<{project_col}}} {{ku:<10}} {{set_by:<{set_by_col}}}"
-                )
-                list_header = row_fmt.format(
-                    sel="Sel",
-                    run="Run ID",
-                    owner="Owner",
-                    project="Project ID",
-                    ku="Keep Until",
-                    set_by="Set By",
-                )
-            else:
-                row_fmt = f"{{sel:<3}} {{run:<{run_col}}} {{owner:<{owner_col}}} {{ku:<10}} {{set_by:<{set_by_col}}}"
-                list_header = row_fmt.format(sel="Sel", run="Run ID", owner="Owner", ku="Keep Until", set_by="Set By")
-            stdscr.addnstr(3, 0, list_header.ljust(max(0, w - 1)), w - 1, color_help | curses.A_BOLD)
-            if idx < top:
-                top = idx
-            elif idx >= top + list_h:
-                top = idx - list_h + 1
-
-            for row in range(list_h):
-                pos = top + row
-                y = list_top + row
-                if pos >= len(runs):
-                    stdscr.addnstr(y, 0, " " * max(0, w - 1), w - 1, color_row)
-                    continue
-                run_id = runs[pos]
-                mark = "[x]" if marked.get(run_id, False) else "[ ]"
-                owner = _clip_text(discovered[run_id].owner, owner_col)
-                project_id = _clip_text(discovered[run_id].project_id or "-", project_col) if show_project_id else "-"
-                ku = keep_until.get(run_id) or "-"
-                set_by = _clip_text(set_by_map.get(run_id, "-"), set_by_col)
-                if show_project_id:
-                    line = row_fmt.format(
-                        sel=mark,
-                        run=_clip_text(run_id, run_col),
-                        owner=owner,
-                        project=project_id,
-                        ku=ku,
-                        set_by=set_by,
-                    )
-                else:
-                    line = row_fmt.format(
-                        sel=mark,
-                        run=_clip_text(run_id, run_col),
-                        owner=owner,
-                        ku=ku,
-                        set_by=set_by,
-                    )
-                attr = color_selected if pos == idx else (color_marked if marked.get(run_id, False) else color_row)
-                stdscr.addnstr(y, 0, line.ljust(max(0, w - 1)), w - 1, attr)
-
-            summary = f"Marked: {sum(1 for v in marked.values() if v)}  Changed: {'yes' if changed else 'no'}"
-            stdscr.addnstr(h - 2, 0, summary.ljust(max(0, w - 1)), w - 1, color_summary)
-            if status:
-                stdscr.addnstr(h - 1, 0, status.ljust(max(0, w - 1)), w - 1, color_status)
-            elif use_colors:
-                stdscr.addnstr(h - 1, 0, " " * max(0, w - 1), w - 1, color_row)
-            stdscr.refresh()
-
-        def _prompt_keep_until(current: str | None) -> str | None:
-            curses.curs_set(1)
-            h, w = stdscr.getmaxyx()
-            prompt = "keep_until for selected run (YYYY-MM-DD, empty clears)"
-            while True:
-                stdscr.move(h - 2, 0)
-                stdscr.clrtoeol()
-                stdscr.addnstr(h - 2, 0, prompt, w - 1)
-                stdscr.move(h - 1, 0)
-                stdscr.clrtoeol()
-                if current:
-                    stdscr.addnstr(h - 1, 0, f"current={current} -> ", w - 1)
-                stdscr.refresh()
-                curses.echo()
-                prefix = f"current={current} -> " if current else ""
-                raw = stdscr.getstr(h - 1, min(len(prefix), max(0, w - 2)), max(1, w - len(prefix) - 1))
-                curses.noecho()
-                text = raw.decode("utf-8", errors="ignore").strip()
-                try:
-                    parsed = _validate_keep_until(text)
-                except SystemExit:
-                    stdscr.move(h - 2, 0)
-                    stdscr.clrtoeol()
-                    stdscr.move(h - 1, 0)
-                    stdscr.clrtoeol()
-                    stdscr.addnstr(h - 1, 0, "Invalid date. Use YYYY-MM-DD.", w - 1, curses.A_BOLD)
-                    stdscr.refresh()
-                    curses.napms(900)
-                    continue
-                finally:
-                    curses.curs_set(0)
-                return parsed
-
-        _render()
-        while True:
-            key = stdscr.getch()
-            if key in (curses.KEY_UP, ord("k")):
-                idx = max(0, idx - 1)
-                _render()
-            elif key in (curses.KEY_DOWN, ord("j")):
-                idx = min(len(runs) - 1, idx + 1)
-                _render()
-            elif key == ord(" "):
-                run_id = runs[idx]
-                marked[run_id] = not marked.get(run_id, False)
-                changed = True
-                _render()
-            elif key == ord("u"):
-                run_id = runs[idx]
-                ku = _prompt_keep_until(keep_until.get(run_id))
-                keep_until[run_id] = ku
-                if ku is not None:
-                    marked[run_id] = True
-                changed = True
-                _render("keep_until updated")
-            elif key == ord("s"):
-                add_count, remove_count = _apply_changes()
-                changed = False
-                _render(f"Saved: {add_count} added/updated, {remove_count} removed")
-                curses.napms(900)
-                return True, add_count, remove_count
-            elif key == ord("q"):
-                if changed:
-                    _render("Unsaved changes. Press q again to discard.")
-                    key2 = stdscr.getch()
-                    if key2 == ord("q"):
-                        return False, 0, 0
-                    _render()
-                    continue
-                return False, 0, 0
-
-    saved, add_count, remove_count = curses.wrapper(_curses_main)
-    _print_section("keep_rules TUI")
-    print(f"Rules file: {rules_path}")
-    if saved:
-        print(_ok(f"Saved keep rules: {add_count} added/updated, {remove_count} removed"))
-    else:
-        print(_warn("No changes saved."))
+def _run_keep_tui(
+    rules_path: Path,
+    browse_root: Path,
+    catalog: _SharedRunCatalog | None = None,
+) -> None:
+    # Run IDs are listed right away; owner/project/size columns fill in from a background loader.
+    _shared_run_keep_tui(rules_path, browse_root, "keep_rules TUI", catalog)
 
 
 def _interactive_action(
@@ -642,6 +332,7 @@ def _interactive_action(
     keep_until: str | None,
     source_roots: list[Path],
     apply: bool,
+    catalog: _SharedRunCatalog | None = None,
 ) -> tuple[str, list[str], str | None, list[Path], bool]:
     _print_section("keep_rules Interactive Setup")
     print(_dim("Press Enter to keep defaults."))
@@ -651,7 +342,7 @@ def _interactive_action(
 
     if action in {"add", "remove"} and not run_ids:
         if _input_yes_no("Browse discovered run IDs?", default_yes=True):
-            run_ids = _prompt_select_run_ids(source_roots)
+            run_ids = _prompt_select_run_ids(source_roots, catalog)
         else:
             run_raw = _input_with_default("Run IDs (comma-separated)", "")
             run_ids = _split_csv(run_raw)
@@ -682,6 +373,7 @@ def _parse_params() -> dict[str, Any]:
     parser.add_argument("--non-interactive", nargs="?", const="true", default="false")
     parser.add_argument("--interactive", nargs="?", const="true", default="true")
     parser.add_argument("--yes", nargs="?", const="true", default="false")
+    parser.add_argument("--use-catalog", nargs="?", const="true", default="true")
 
     if params:
         return params
@@ -700,6 +392,7 @@ def _parse_params() -> dict[str, Any]:
         "non_interactive": args.non_interactive,
         "interactive": args.interactive,
         "yes": args.yes,
+        "use_catalog": args.use_catalog,
     }
 
 
@@ -719,12 +412,15 @@ def main() -> None:
     non_interactive = _parse_bool(params.get("non_interactive"), False)
     interactive = _parse_bool(params.get("interactive"), True)
     yes = _parse_bool(params.get("yes"), False)
+    use_catalog = _parse_bool(params.get("use_catalog"), True)
 
     if non_interactive:
         interactive = False
         yes = True
 
-    payload = _load_rules(rules_path)
+    payload = _shared_load_rules(rules_path)
+    # The run catalog lives next to keep_rules.yaml in the shared manifest directory.
+    catalog = _shared_open_run_catalog(rules_path.parent, enabled=use_catalog)
 
     # Default UX: launch TUI directly when action is interactive.
     if action == "interactive" and tui:
@@ -733,12 +429,12 @@ def main() -> None:
             action = "list"
         else:
             browse_root = _choose_browse_root(browse_root)
-            _run_keep_tui(payload, rules_path, browse_root)
+            _run_keep_tui(rules_path, browse_root, catalog)
             return
 
     if interactive and sys.stdin.isatty():
         action, run_ids, keep_until, source_roots, apply = _interactive_action(
-            action, run_ids, keep_until, source_roots, apply
+            action, run_ids, keep_until, source_roots, apply, catalog
         )
     elif action == "interactive":
         action = "list"
@@ -756,8 +452,7 @@ def main() -> None:
                 print(_warn("No run IDs selected. No changes applied."))
                 return
             raise SystemExit("No run IDs provided. Use --run-id or --run-ids.")
-        changed = _apply_add(payload, run_ids, keep_until, _current_user())
-        _save_rules(rules_path, payload)
+        changed = _apply_add(rules_path, run_ids, keep_until, _current_user())
         print(_ok(f"Updated keep rules: {changed} entries added/updated"))
         print(_ok(f"Rules file: {rules_path}"))
         return
@@ -768,8 +463,7 @@ def main() -> None:
                 print(_warn("No run IDs selected. No changes applied."))
                 return
             raise SystemExit("No run IDs provided. Use --run-id or --run-ids.")
-        changed = _apply_remove(payload, run_ids)
-        _save_rules(rules_path, payload)
+        changed = _apply_remove(rules_path, run_ids)
         print(_ok(f"Updated keep rules: {changed} entries removed"))
         print(_ok(f"Rules file: {rules_path}"))
         return
@@ -802,8 +496,7 @@ def main() -> None:
     elif not yes and not non_interactive:
         raise SystemExit("Global confirmation required. Re-run with --yes true or interactive mode.")
 
-    changed = _apply_remove(payload, stale)
-    _save_rules(rules_path, payload)
+    changed = _apply_remove(rules_path, stale)
     print(_ok(f"Pruned keep rules: {changed} entries removed"))
     print(_ok(f"Rules file: {rules_path}"))
 